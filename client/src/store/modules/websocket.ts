@@ -110,6 +110,8 @@ const module: Module<WebsocketState, RootState> = {
           break;
         case 'GET_CAST_LIST':
           break;
+        case 'JOB_UPDATE':
+          break;
         case 'START_SHOW':
           if (router.currentRoute.path !== '/live') {
             router.push('/live');
@@ -0,0 +1,55 @@
+"""Add full-text search index over script line parts
+
+Revision ID: b7c41d2e9f30
+Revises: e96bdd11ca42
+Create Date: 2026-10-19 12:02:41.118230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7c41d2e9f30"
+down_revision: Union[str, None] = "e96bdd11ca42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS script_line_search USING fts5("
+        "line_text, content='script_line_parts', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS script_line_search_ai "
+        "AFTER INSERT ON script_line_parts BEGIN "
+        "INSERT INTO script_line_search(rowid, line_text) "
+        "VALUES (new.id, new.line_text); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS script_line_search_ad "
+        "AFTER DELETE ON script_line_parts BEGIN "
+        "INSERT INTO script_line_search(script_line_search, rowid, line_text) "
+        "VALUES ('delete', old.id, old.line_text); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS script_line_search_au "
+        "AFTER UPDATE OF line_text ON script_line_parts BEGIN "
+        "INSERT INTO script_line_search(script_line_search, rowid, line_text) "
+        "VALUES ('delete', old.id, old.line_text); "
+        "INSERT INTO script_line_search(rowid, line_text) "
+        "VALUES (new.id, new.line_text); END"
+    )
+    # Index all existing line parts
+    op.execute("INSERT INTO script_line_search(script_line_search) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS script_line_search_au")
+    op.execute("DROP TRIGGER IF EXISTS script_line_search_ad")
+    op.execute("DROP TRIGGER IF EXISTS script_line_search_ai")
+    op.execute("DROP TABLE IF EXISTS script_line_search")
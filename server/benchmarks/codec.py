@@ -0,0 +1,115 @@
+"""
+Benchmark for encoding and decoding the largest responses.
+
+Builds a synthetic show in a temporary SQLite database, then builds its compiled
+script and cue list in the form the API sends them. Each is encoded and decoded
+with the standard library's JSON, with ``orjson`` if it is installed and with
+MessagePack. Reports the time taken and the encoded size for each codec, and the
+size of the compiled script after the gzip compression it is stored with.
+
+Run from the server directory::
+
+    python -m benchmarks.codec --repeat 5
+"""
+
+import argparse
+import collections
+import gzip
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from benchmarks.synthetic_show import MUSICAL, generate_show
+from models.cue import CueAssociation
+from models.models import db, import_all_models
+from models.script import ScriptLine
+from schemas.serializers import dump_cue_association, dump_script_line
+from utils.web.codec import MESSAGE_PACK, Codec, JSONCodec, orjson
+
+
+def build_payloads(session, show) -> Dict[str, dict]:
+    """
+    :return: The compiled script and cue list of the show, as the API sends them
+    """
+    lines = {
+        line.id: line
+        for line in session.scalars(
+            select(ScriptLine).options(selectinload(ScriptLine.line_parts))
+        )
+    }
+    compiled_script = collections.defaultdict(list)
+    for line_id in show.line_ids:
+        line = lines[line_id]
+        compiled_script[line.page].append(dump_script_line(line))
+
+    cues = collections.defaultdict(list)
+    for association in session.scalars(
+        select(CueAssociation)
+        .where(CueAssociation.revision_id == show.revision_id)
+        .options(selectinload(CueAssociation.cue))
+    ):
+        cues[association.line_id].append(dump_cue_association(association))
+    return {
+        "compiled_script": dict(compiled_script),
+        "cue_list": {"cues": dict(cues), "cue_groups": []},
+    }
+
+
+def best_ms(function: Callable, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def measure(codec: Codec, payload: dict, repeat: int) -> dict:
+    encoded = codec.dumps(payload)
+    return {
+        "encode_ms": round(best_ms(lambda: codec.dumps(payload), repeat), 2),
+        "decode_ms": round(best_ms(lambda: codec.loads(encoded), repeat), 2),
+        "bytes": len(encoded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    codecs: Dict[str, Codec] = {"json": JSONCodec(use_orjson=False)}
+    if orjson is not None:
+        codecs["orjson"] = JSONCodec(use_orjson=True)
+    codecs["msgpack"] = MESSAGE_PACK
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        import_all_models()
+        db.configure(url=f"sqlite:///{os.path.join(temp_dir, 'benchmark.sqlite')}")
+        db.create_all()
+        with db.sessionmaker() as session:
+            show = generate_show(session, MUSICAL)
+            payloads = build_payloads(session, show)
+        db.engine.dispose()
+
+    results = {
+        name: {
+            codec_name: measure(codec, payload, args.repeat)
+            for codec_name, codec in codecs.items()
+        }
+        for name, payload in payloads.items()
+    }
+    results["compiled_script"]["stored_gzip_bytes"] = len(
+        gzip.compress(codecs["json"].dumps(payloads["compiled_script"]))
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""
+Load harness for the WebSocket live show path.
+
+Starts :class:`~digi_server.app_server.DigiScriptServer` in a thread of its own,
+with its own event loop, and connects simulated clients to it with
+``websocket_connect``. Every client authenticates, the leader starts a show
+session and sends ``SCRIPT_SCROLL`` messages, and each viewer records how long
+the relayed scroll took to arrive. The server thread's CPU time is measured
+separately from the clients', with :func:`time.thread_time`.
+
+Scenarios:
+
+- ``steady``: every viewer reads promptly
+- ``slow_readers``: some viewers sleep after every message they read, so their
+  messages back up on the server
+- ``leader_disconnect``: the leader disconnects half way through, a second
+  connection of the same user is elected leader and carries on scrolling
+
+Run from the server directory::
+
+    python -m benchmarks.live_show --clients 50 --events 200 --rate 20
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+from tornado import escape
+from tornado.websocket import WebSocketClientConnection, websocket_connect
+
+from benchmarks.server import (
+    RESULTS_VERSION,
+    BenchmarkClient,
+    RunningServer,
+    environment,
+    start_server,
+    stop_server,
+)
+from benchmarks.synthetic_show import ShowSpec
+
+
+VIEWER_USERNAME = "viewer"
+VIEWER_PASSWORD = "viewer"
+# Longest to wait for the last scroll message to reach every client
+DRAIN_TIMEOUT = 30.0
+# The live show path does not depend on the size of the script
+SHOW_SPEC = ShowSpec(lines=500, pages=30, cues=200)
+
+
+class ServerThread(threading.Thread):
+    """
+    Runs the server under test on an event loop in a separate thread, so the
+    clients' work is not counted as the server's.
+
+    :param temp_dir: Empty directory for the server's files
+    :param spec: Size of the show
+    """
+
+    def __init__(self, temp_dir: str, spec: ShowSpec):
+        super().__init__(name="digiscript-server", daemon=True)
+        self.temp_dir = temp_dir
+        self.spec = spec
+        self.running: Optional[RunningServer] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready = threading.Event()
+        self._stopped: Optional[asyncio.Event] = None
+        self._error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        asyncio.run(self._serve())
+
+    async def _serve(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        try:
+            self.running = await start_server(self.temp_dir, self.spec)
+        except BaseException as error:
+            self._error = error
+            raise
+        finally:
+            self._ready.set()
+        await self._stopped.wait()
+        await stop_server(self.running)
+
+    def wait_ready(self) -> RunningServer:
+        self._ready.wait()
+        if self._error is not None:
+            raise RuntimeError("Server failed to start") from self._error
+        return self.running
+
+    async def cpu_seconds(self) -> float:
+        """CPU time used by the server thread so far."""
+
+        async def measure():
+            return time.thread_time()
+
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(measure(), self.loop)
+        )
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self._stopped.set)
+        self.join()
+
+
+class SimulatedClient:
+    """
+    A WebSocket client, as a browser showing the live script would be.
+
+    :param url: WebSocket URL of the server
+    :param token: Access token to authenticate with
+    :param read_delay: Seconds to sleep after reading each message
+    """
+
+    def __init__(self, url: str, token: str, read_delay: float = 0.0):
+        self.url = url
+        self.token = token
+        self.read_delay = read_delay
+        self.connection: Optional[WebSocketClientConnection] = None
+        self.internal_id: Optional[str] = None
+        # Seconds from sending to receiving each scroll message, by sequence number
+        self.latencies: Dict[int, float] = {}
+        self.elected_at: Optional[float] = None
+        self._authenticated = asyncio.Event()
+        self._reader: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        self.connection = await websocket_connect(self.url)
+        self._reader = asyncio.create_task(self._read())
+        await self.send("AUTHENTICATE", {"token": self.token})
+        await self._authenticated.wait()
+        await self.send("NEW_CLIENT", {})
+
+    async def send(self, op: str, data: dict) -> None:
+        await self.connection.write_message(json.dumps({"OP": op, "DATA": data}))
+
+    async def _read(self) -> None:
+        while True:
+            raw = await self.connection.read_message()
+            if raw is None:
+                return
+            received_at = time.perf_counter()
+            message = json.loads(raw)
+            if message["OP"] == "SET_UUID":
+                self.internal_id = message["DATA"]
+            elif message["OP"] == "WS_AUTH_SUCCESS":
+                self._authenticated.set()
+            elif message.get("ACTION") == "ELECTED_LEADER":
+                self.elected_at = received_at
+            elif message.get("ACTION") == "SCRIPT_SCROLL":
+                data = message["DATA"]
+                self.latencies[data["seq"]] = received_at - data["sent_at"]
+            if self.read_delay:
+                await asyncio.sleep(self.read_delay)
+
+    async def scroll(self, seq: int, page: int) -> None:
+        await self.send(
+            "SCRIPT_SCROLL",
+            {
+                "current_line": f"page_{page}_line_0",
+                "seq": seq,
+                "sent_at": time.perf_counter(),
+            },
+        )
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+        if self._reader is not None:
+            self._reader.cancel()
+
+
+def _percentiles(values: List[float]) -> Optional[dict]:
+    if not values:
+        return None
+    values = sorted(values)
+
+    def percentile(fraction: float) -> float:
+        return values[min(int(len(values) * fraction), len(values) - 1)] * 1000
+
+    return {
+        "p50_ms": percentile(0.5),
+        "p90_ms": percentile(0.9),
+        "p99_ms": percentile(0.99),
+        "max_ms": values[-1] * 1000,
+        "mean_ms": statistics.fmean(values) * 1000,
+    }
+
+
+async def _wait_delivered(clients: List[SimulatedClient], last_seq: int) -> None:
+    deadline = time.perf_counter() + DRAIN_TIMEOUT
+    while time.perf_counter() < deadline:
+        if all(last_seq in client.latencies for client in clients):
+            return
+        await asyncio.sleep(0.01)
+
+
+async def run_scenario(
+    server: ServerThread,
+    http: BenchmarkClient,
+    viewer_token: str,
+    name: str,
+    num_clients: int,
+    num_events: int,
+    rate: float,
+    slow_clients: int,
+    slow_delay: float,
+) -> dict:
+    """
+    Connect the clients, start a show session and scroll through the script.
+
+    :return: Summary of the scenario
+    """
+    ws_url = http.base_url.replace("http", "ws", 1) + "/ws"
+    leader = SimulatedClient(ws_url, http.token)
+    backup = (
+        SimulatedClient(ws_url, http.token) if name == "leader_disconnect" else None
+    )
+    slow = slow_clients if name == "slow_readers" else 0
+    viewers = [
+        SimulatedClient(ws_url, viewer_token, slow_delay if index < slow else 0.0)
+        for index in range(num_clients)
+    ]
+    connected = [leader] + ([backup] if backup else []) + viewers
+    for client in connected:
+        await client.connect()
+    await http.request(
+        "POST", "/show/sessions/start", {"session_id": leader.internal_id}
+    )
+
+    pages = server.running.show.spec.pages
+    sender = leader
+    failover_seconds = None
+    cpu_start = await server.cpu_seconds()
+    start = time.perf_counter()
+    for seq in range(num_events):
+        if backup and seq == num_events // 2:
+            disconnected_at = time.perf_counter()
+            leader.close()
+            while backup.elected_at is None:
+                await asyncio.sleep(0.001)
+            failover_seconds = backup.elected_at - disconnected_at
+            sender = backup
+        await sender.scroll(seq, seq % pages + 1)
+        await asyncio.sleep(max(start + (seq + 1) / rate - time.perf_counter(), 0))
+    await _wait_delivered(viewers, num_events - 1)
+    elapsed = time.perf_counter() - start
+    cpu_seconds = await server.cpu_seconds() - cpu_start
+
+    await http.request("POST", "/show/sessions/stop", {})
+    for client in connected:
+        client.close()
+
+    prompt = viewers[slow:]
+    delivered = sum(len(client.latencies) for client in viewers)
+    return {
+        "clients": len(connected),
+        "slow_clients": slow,
+        "events": num_events,
+        "delivered": delivered,
+        "expected": num_events * len(viewers),
+        "seconds": elapsed,
+        "messages_per_second": delivered / elapsed,
+        "server_cpu_percent": cpu_seconds / elapsed * 100,
+        "relay_latency": _percentiles(
+            [latency for client in prompt for latency in client.latencies.values()]
+        ),
+        "slow_relay_latency": _percentiles(
+            [
+                latency
+                for client in viewers[:slow]
+                for latency in client.latencies.values()
+            ]
+        ),
+        "failover_ms": failover_seconds * 1000 if failover_seconds else None,
+    }
+
+
+async def run_harness(
+    server: ServerThread,
+    scenarios: List[str],
+    num_clients: int,
+    num_events: int,
+    rate: float,
+    slow_clients: int,
+    slow_delay: float,
+) -> Dict[str, dict]:
+    http = BenchmarkClient(server.running.application, server.running.port)
+    try:
+        await http.login()
+        await http.request(
+            "POST",
+            "/auth/create",
+            {
+                "username": VIEWER_USERNAME,
+                "password": VIEWER_PASSWORD,
+                "is_admin": False,
+            },
+        )
+        response = await http.request(
+            "POST",
+            "/auth/login",
+            {"username": VIEWER_USERNAME, "password": VIEWER_PASSWORD},
+        )
+        viewer_token = escape.json_decode(response.body)["access_token"]
+
+        results = {}
+        for name in scenarios:
+            results[name] = await run_scenario(
+                server,
+                http,
+                viewer_token,
+                name,
+                num_clients,
+                num_events,
+                rate,
+                slow_clients,
+                slow_delay,
+            )
+            print(
+                f"{name:18} {_format_latency(results[name]['relay_latency'])}, "
+                f"{results[name]['messages_per_second']:8.1f} msg/s, "
+                f"server CPU {results[name]['server_cpu_percent']:5.1f}%",
+                file=sys.stderr,
+            )
+            # Let the server finish handling the disconnects
+            await asyncio.sleep(0.5)
+        return results
+    finally:
+        http.http_client.close()
+
+
+def _format_latency(latency: Optional[dict]) -> str:
+    if latency is None:
+        return f"p50 {'n/a':>8} ms, p99 {'n/a':>8} ms"
+    return f"p50 {latency['p50_ms']:8.2f} ms, p99 {latency['p99_ms']:8.2f} ms"
+
+
+SCENARIOS = ["steady", "slow_readers", "leader_disconnect"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=SCENARIOS,
+        help="Scenario to run, may be repeated (default: all)",
+    )
+    parser.add_argument("--clients", type=int, default=50, help="Viewers to connect")
+    parser.add_argument("--events", type=int, default=200, help="Scrolls to send")
+    parser.add_argument("--rate", type=float, default=20.0, help="Scrolls per second")
+    parser.add_argument("--slow-clients", type=int, default=5)
+    parser.add_argument(
+        "--slow-delay", type=float, default=0.05, help="Seconds per message read"
+    )
+    parser.add_argument("--output", help="Write results to this file, not stdout")
+    args = parser.parse_args()
+    if not 0 <= args.slow_clients < args.clients:
+        parser.error("--slow-clients must be at least 0 and less than --clients")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        server = ServerThread(temp_dir, SHOW_SPEC)
+        server.start()
+        server.wait_ready()
+        try:
+            scenarios = asyncio.run(
+                run_harness(
+                    server,
+                    args.scenario or SCENARIOS,
+                    args.clients,
+                    args.events,
+                    args.rate,
+                    args.slow_clients,
+                    args.slow_delay,
+                )
+            )
+        finally:
+            server.stop()
+
+    results = {
+        "version": RESULTS_VERSION,
+        **environment(),
+        "spec": asdict(SHOW_SPEC),
+        "scenarios": scenarios,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="UTF-8") as file_pointer:
+            json.dump(results, file_pointer, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
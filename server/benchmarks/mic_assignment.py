@@ -0,0 +1,193 @@
+"""
+Benchmark for the auto mic assignment cost model.
+
+Compares scoring every (character, scene) appearance with the list-scanning
+:func:`~utils.show.mic_assignment.find_best_mic` against
+:class:`~utils.show.mic_assignment.MicAssignmentModel` on a synthetic show, and
+checks that both pick the same mics. Also reports the time taken and total swap
+cost of the optimal solver.
+
+Run from the server directory::
+
+    python -m benchmarks.mic_assignment --mics 40 --characters 60 --scenes 40
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from utils.show.mic_assignment import (
+    MicAssignmentModel,
+    SceneMetadata,
+    assign_greedy,
+    find_best_mic,
+)
+from utils.show.mic_solver import assign_optimal
+
+
+@dataclass
+class _Character:
+    id: int
+    played_by: Optional[int]
+
+
+@dataclass
+class _Allocation:
+    mic_id: int
+    scene_id: int
+    character_id: int
+
+
+class _CharacterLookup:
+    """Stands in for a session, answering ``get(Character, id)`` from memory."""
+
+    def __init__(self, characters: Dict[int, _Character]):
+        self.characters = characters
+
+    def get(self, _model, character_id):
+        return self.characters.get(character_id)
+
+
+def build_show(num_mics: int, num_characters: int, num_scenes: int, seed: int = 0):
+    """Generate scene metadata, characters, manual allocations and appearances."""
+    rng = random.Random(seed)
+
+    scene_metadata: Dict[int, SceneMetadata] = {}
+    group_size = max(num_scenes // 4, 1)
+    for position in range(num_scenes):
+        scene_id = position + 1
+        scene_metadata[scene_id] = SceneMetadata(
+            scene_id=scene_id,
+            group_idx=position // group_size,
+            scene_idx=position % group_size,
+            position=position,
+        )
+
+    num_cast = max(num_characters * 2 // 3, 1)
+    characters = {
+        char_id: _Character(char_id, rng.choice([None, *range(1, num_cast + 1)]))
+        for char_id in range(1, num_characters + 1)
+    }
+
+    mic_ids = list(range(1, num_mics + 1))
+    existing_allocations = []
+    for mic_id in rng.sample(mic_ids, max(num_mics // 4, 1)):
+        char_id = rng.choice(list(characters))
+        for scene_id in rng.sample(list(scene_metadata), 3):
+            existing_allocations.append(_Allocation(mic_id, scene_id, char_id))
+    allocated_pairs = {(a.scene_id, a.character_id) for a in existing_allocations}
+
+    appearances: Dict[Tuple[int, int], int] = {}
+    for char_id in characters:
+        for scene_id in scene_metadata:
+            if rng.random() < 0.35 and (scene_id, char_id) not in allocated_pairs:
+                appearances[(scene_id, char_id)] = rng.randint(1, 30)
+
+    return scene_metadata, characters, mic_ids, existing_allocations, appearances
+
+
+def _sorted_characters(appearances: Dict[Tuple[int, int], int]) -> List[int]:
+    totals: Dict[int, int] = defaultdict(int)
+    for (_, char_id), line_count in appearances.items():
+        totals[char_id] += line_count
+    return sorted(totals, key=lambda char_id: totals[char_id], reverse=True)
+
+
+def run_list_scan(scene_metadata, characters, mic_ids, existing, appearances):
+    session = _CharacterLookup(characters)
+    mic_usage_tracker = defaultdict(list)
+    for alloc in existing:
+        mic_usage_tracker[alloc.mic_id].append((alloc.scene_id, alloc.character_id))
+
+    new_allocations = []
+    for char_id in _sorted_characters(appearances):
+        scene_ids = sorted(
+            (scene_id for scene_id, c_id in appearances if c_id == char_id),
+            key=lambda scene_id: scene_metadata[scene_id].position,
+        )
+        for scene_id in scene_ids:
+            best_mic = find_best_mic(
+                session,
+                char_id,
+                scene_id,
+                mic_ids,
+                mic_usage_tracker,
+                existing,
+                new_allocations,
+                scene_metadata,
+            )
+            if best_mic:
+                new_allocations.append((best_mic, scene_id, char_id))
+                mic_usage_tracker[best_mic].append((scene_id, char_id))
+    return new_allocations
+
+
+def _seeded_model(scene_metadata, characters, existing) -> MicAssignmentModel:
+    model = MicAssignmentModel(
+        scene_metadata, {c.id: c.played_by for c in characters.values()}
+    )
+    for alloc in existing:
+        model.record_allocation(
+            alloc.mic_id, alloc.scene_id, alloc.character_id, manual=True
+        )
+    return model
+
+
+def run_model(scene_metadata, characters, mic_ids, existing, appearances):
+    model = _seeded_model(scene_metadata, characters, existing)
+    new_allocations, _ = assign_greedy(
+        model, _sorted_characters(appearances), appearances, mic_ids
+    )
+    return new_allocations, model.total_cost
+
+
+def run_optimal(scene_metadata, characters, mic_ids, existing, appearances):
+    model = _seeded_model(scene_metadata, characters, existing)
+    new_allocations, _ = assign_optimal(
+        model, _sorted_characters(appearances), appearances, mic_ids
+    )
+    return new_allocations, model.total_cost
+
+
+def _time(func, args, repeat: int) -> Tuple[float, list]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--mics", type=int, default=40)
+    parser.add_argument("--characters", type=int, default=60)
+    parser.add_argument("--scenes", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    show = build_show(args.mics, args.characters, args.scenes, args.seed)
+    print(
+        f"{args.mics} mics x {args.characters} characters x {args.scenes} scenes, "
+        f"{len(show[3])} manual allocations, {len(show[4])} appearances"
+    )
+
+    list_scan_time, list_scan_result = _time(run_list_scan, show, args.repeat)
+    model_time, (model_result, greedy_cost) = _time(run_model, show, args.repeat)
+    optimal_time, (_, optimal_cost) = _time(run_optimal, show, args.repeat)
+
+    print(f"list scan:  {list_scan_time * 1000:10.2f} ms")
+    print(f"cost model: {model_time * 1000:10.2f} ms")
+    print(f"speedup:    {list_scan_time / model_time:10.1f}x")
+    print(f"identical allocations: {list_scan_result == model_result}")
+    print(f"optimal:    {optimal_time * 1000:10.2f} ms")
+    print(f"swap cost:  greedy {greedy_cost:.1f}, optimal {optimal_cost:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark for dumping the models on hot paths.
+
+Builds a synthetic show in a temporary SQLite database and loads its script lines,
+line parts, cues, cue associations, show and users. Each set of objects is then
+dumped with its marshmallow schema and with its function from
+:mod:`schemas.serializers`, and the time per object for each is reported. Objects
+are loaded, with their relationships, before timing, so only the dumping is
+measured.
+
+Run from the server directory::
+
+    python -m benchmarks.serializers --repeat 5
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from benchmarks.synthetic_show import MUSICAL, generate_show
+from models.cue import CueAssociation
+from models.models import db, import_all_models
+from models.script import ScriptLine
+from models.show import Show
+from models.user import User
+from schemas.schemas import (
+    CueSchema,
+    ScriptLinePartSchema,
+    ScriptLineSchema,
+    ShowSchema,
+    UserSchema,
+)
+from schemas.serializers import (
+    dump_cue,
+    dump_cue_association,
+    dump_script_line,
+    dump_script_line_part,
+    dump_show,
+    dump_user,
+)
+
+
+def _dump_cue_association_with_schema(schema: CueSchema) -> Callable:
+    # As the cue list controller did before it used dump_cue_association
+    def dump(association: CueAssociation) -> dict:
+        data = schema.dump(association.cue)
+        data["group_id"] = association.group_id
+        data["sort_order"] = association.sort_order
+        data["line_position"] = association.line_position
+        return data
+
+    return dump
+
+
+def time_per_object(dump: Callable, objects: Sequence, repeat: int) -> float:
+    """
+    :return: Lowest of ``repeat`` runs of the microseconds taken to dump each object
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for obj in objects:
+            dump(obj)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(objects) * 1_000_000
+
+
+def run(session, repeat: int) -> Dict[str, dict]:
+    lines: List[ScriptLine] = session.scalars(
+        select(ScriptLine).options(selectinload(ScriptLine.line_parts))
+    ).all()
+    parts = [part for line in lines for part in line.line_parts]
+    associations: List[CueAssociation] = session.scalars(
+        select(CueAssociation).options(selectinload(CueAssociation.cue))
+    ).all()
+    cues = [association.cue for association in associations]
+    shows = session.scalars(select(Show)).all()
+    users = session.scalars(select(User)).all()
+
+    cases = {
+        "script_line": (lines, ScriptLineSchema().dump, dump_script_line),
+        "script_line_part": (parts, ScriptLinePartSchema().dump, dump_script_line_part),
+        "cue": (cues, CueSchema().dump, dump_cue),
+        "cue_association": (
+            associations,
+            _dump_cue_association_with_schema(CueSchema()),
+            dump_cue_association,
+        ),
+        "show": (shows, ShowSchema().dump, dump_show),
+        "user": (users, UserSchema().dump, dump_user),
+    }
+    results = {}
+    for name, (objects, schema_dump, fast_dump) in cases.items():
+        schema_us = time_per_object(schema_dump, objects, repeat)
+        fast_us = time_per_object(fast_dump, objects, repeat)
+        results[name] = {
+            "objects": len(objects),
+            "schema_us_per_object": round(schema_us, 2),
+            "fast_us_per_object": round(fast_us, 2),
+            "speedup": round(schema_us / fast_us, 1),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        import_all_models()
+        db.configure(url=f"sqlite:///{os.path.join(temp_dir, 'benchmark.sqlite')}")
+        db.create_all()
+        with db.sessionmaker() as session:
+            generate_show(session, MUSICAL)
+            session.add_all(
+                User(username=f"user{i}", is_admin=i == 0) for i in range(args.users)
+            )
+            session.commit()
+        with db.sessionmaker() as session:
+            results = run(session, args.repeat)
+        db.engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""
+Benchmark suite for the HTTP API, run against an in-process server.
+
+Starts :class:`~digi_server.app_server.DigiScriptServer` on a temporary SQLite
+database holding a synthetic show (see :mod:`benchmarks.synthetic_show`), logs in
+as an admin and times each scenario over HTTP on the loopback interface. Results
+are written as JSON, with the median, 95th percentile and SQL statements per
+request of each scenario, so runs from different commits can be compared. Pass
+an earlier results file to ``--compare`` to print the change in median time.
+
+Run from the server directory::
+
+    python -m benchmarks.server --iterations 20 --output results.json
+    python -m benchmarks.server --compare results.json --scenario page_get
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from tornado import escape
+from tornado.httpclient import AsyncHTTPClient, HTTPResponse
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets
+
+from benchmarks.synthetic_show import MUSICAL, ShowSpec, SyntheticShow, generate_show
+from digi_server.app_server import DigiScriptServer
+
+
+RESULTS_VERSION = 1
+ADMIN_USERNAME = "benchmark"
+ADMIN_PASSWORD = "benchmark"
+
+
+class BenchmarkClient:
+    """
+    Makes requests to the server under test as the admin user.
+
+    :param application: Server under test
+    :param port: Port the server is listening on
+    """
+
+    def __init__(self, application: DigiScriptServer, port: int):
+        self.application = application
+        self.base_url = f"http://127.0.0.1:{port}/api/v1"
+        self.http_client = AsyncHTTPClient(max_body_size=1024**3)
+        self.token: Optional[str] = None
+
+    async def login(self) -> None:
+        await self.request(
+            "POST",
+            "/auth/create",
+            {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD, "is_admin": True},
+        )
+        response = await self.request(
+            "POST",
+            "/auth/login",
+            {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD},
+        )
+        self.token = escape.json_decode(response.body)["access_token"]
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[dict] = None,
+        raw_body: Optional[bytes] = None,
+    ) -> HTTPResponse:
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if body is not None:
+            raw_body = escape.json_encode(body)
+        return await self.http_client.fetch(
+            self.base_url + path,
+            method=method,
+            headers=headers,
+            body=raw_body,
+            request_timeout=600,
+        )
+
+    async def json(self, method: str, path: str, body: Optional[dict] = None):
+        return escape.json_decode((await self.request(method, path, body)).body)
+
+
+# A scenario takes the client, the show and the iteration number, and returns a
+# coroutine making the request to time. Untimed set up is done before returning.
+Scenario = Callable[[BenchmarkClient, SyntheticShow, int], Awaitable[Callable]]
+
+
+def _page(show: SyntheticShow, iteration: int) -> int:
+    # Spread requests over the script, in the same order for every run
+    return iteration * 37 % show.spec.pages + 1
+
+
+async def page_get(client, show, iteration):
+    return lambda: client.request("GET", f"/show/script?page={_page(show, iteration)}")
+
+
+async def page_patch(client, show, iteration):
+    page = _page(show, iteration)
+    lines = (await client.json("GET", f"/show/script?page={page}"))["lines"]
+    updated = [
+        index
+        for index, line in enumerate(lines)
+        if any(part["line_text"] for part in line["line_parts"])
+    ][:1]
+    for index in updated:
+        part = next(p for p in lines[index]["line_parts"] if p["line_text"])
+        part["line_text"] = f"{part['line_text']} ({iteration})"
+    body = {
+        "page": lines,
+        "status": {"added": [], "updated": updated, "deleted": [], "inserted": []},
+    }
+    return lambda: client.request("PATCH", f"/show/script?page={page}", body)
+
+
+async def compile_script(client, show, _iteration):
+    body = {"revision_id": show.revision_id}
+    return lambda: client.request("POST", "/show/script/compiled_scripts", body)
+
+
+async def compiled_get(client, show, iteration):
+    if iteration == 0:
+        await client.request(
+            "POST", "/show/script/compiled_scripts", {"revision_id": show.revision_id}
+        )
+    return lambda: client.request("GET", "/show/script/compiled")
+
+
+async def cue_list(client, _show, _iteration):
+    return lambda: client.request("GET", "/show/cues")
+
+
+async def cue_stats(client, _show, _iteration):
+    return lambda: client.request("GET", "/show/cues/stats")
+
+
+async def character_stats(client, _show, _iteration):
+    return lambda: client.request("GET", "/show/character/stats")
+
+
+async def mic_suggest(client, _show, _iteration):
+    body = {
+        "excluded_mics": [],
+        "static_characters": [],
+        "gap_mode": "leave_gaps",
+        "solver": "greedy",
+    }
+    return lambda: client.request("POST", "/show/microphones/suggest", body)
+
+
+async def revision_branch(client, show, iteration):
+    body = {
+        "description": f"Benchmark branch {iteration}",
+        "parent_revision_id": show.revision_id,
+        "set_as_current": False,
+    }
+    return lambda: client.request("POST", "/show/script/revisions", body)
+
+
+async def revision_diff(client, show, iteration):
+    if iteration == 0:
+        # Edit some pages in a new revision, which becomes the current one
+        body = {"description": "Benchmark diff", "parent_revision_id": show.revision_id}
+        await client.request("POST", "/show/script/revisions", body)
+        for edit in range(5):
+            await (await page_patch(client, show, edit))()
+    current = await client.json("GET", "/show/script/revisions/current")
+    query = f"from={show.revision_id}&to={current['current_revision']}"
+    return lambda: client.request("GET", f"/show/script/revisions/diff?{query}")
+
+
+async def show_export(client, _show, _iteration):
+    return lambda: client.request("GET", "/show/export")
+
+
+async def show_import(client, _show, _iteration):
+    export = (await client.request("GET", "/show/export")).body
+    return lambda: client.request("POST", "/show/import", raw_body=export)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "page_get": page_get,
+    "page_patch": page_patch,
+    "compile": compile_script,
+    "compiled_get": compiled_get,
+    "cue_list": cue_list,
+    "cue_stats": cue_stats,
+    "character_stats": character_stats,
+    "mic_suggest": mic_suggest,
+    "revision_branch": revision_branch,
+    "show_export": show_export,
+    "show_import": show_import,
+    "revision_diff": revision_diff,
+}
+
+
+def _summarise(times: List[float], queries: List[int]) -> dict:
+    times = sorted(times)
+    return {
+        "iterations": len(times),
+        "min_ms": times[0] * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "mean_ms": statistics.fmean(times) * 1000,
+        "p95_ms": times[min(round(len(times) * 0.95), len(times) - 1)] * 1000,
+        "max_ms": times[-1] * 1000,
+        "queries": statistics.median(queries) if queries else None,
+    }
+
+
+async def run_scenario(
+    client: BenchmarkClient,
+    show: SyntheticShow,
+    scenario: Scenario,
+    iterations: int,
+    warmup: int,
+) -> dict:
+    """
+    Time a scenario, after running it ``warmup`` times untimed.
+
+    :return: Summary of the timings
+    """
+    profiler = client.application.query_profiler
+    times = []
+    queries = []
+    for iteration in range(warmup + iterations):
+        make_request = await scenario(client, show, iteration)
+        recorded = profiler.recorded
+        start = time.perf_counter()
+        await make_request()
+        elapsed = time.perf_counter() - start
+        if iteration >= warmup:
+            times.append(elapsed)
+            queries.extend(p.queries for p in profiler.profiles_since(recorded))
+    return _summarise(times, queries)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    """Describe the code and platform being benchmarked, for the results file."""
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+@dataclass
+class RunningServer:
+    """A server under test, listening on the loopback interface."""
+
+    application: DigiScriptServer
+    http_server: HTTPServer
+    port: int
+    show: SyntheticShow
+    setup_seconds: float
+
+
+async def start_server(temp_dir: str, spec: ShowSpec) -> RunningServer:
+    """
+    Start a server with its database and compiled scripts in ``temp_dir``, and a
+    synthetic show as the current show.
+
+    :param temp_dir: Empty directory for the server's files
+    :param spec: Size of the show
+    :return: The running server
+    """
+    settings_path = os.path.join(temp_dir, "digiscript.json")
+    with open(settings_path, "w", encoding="UTF-8") as file_pointer:
+        json.dump(
+            {
+                "db_path": f"sqlite:///{os.path.join(temp_dir, 'benchmark.sqlite')}",
+                "compiled_script_path": os.path.join(temp_dir, "compiled"),
+            },
+            file_pointer,
+        )
+    application = DigiScriptServer(port=0, settings_path=settings_path)
+    # Count statements per request without the debug mode auto reloader
+    application.query_profiler.enabled = True
+
+    start = time.perf_counter()
+    with application.get_db().sessionmaker() as session:
+        show = generate_show(session, spec)
+    setup_seconds = time.perf_counter() - start
+    await application.digi_settings.set("current_show", show.show_id)
+
+    sockets = bind_sockets(0, "127.0.0.1")
+    http_server = HTTPServer(application)
+    http_server.add_sockets(sockets)
+    return RunningServer(
+        application, http_server, sockets[0].getsockname()[1], show, setup_seconds
+    )
+
+
+async def stop_server(running: RunningServer) -> None:
+    running.http_server.stop()
+    await running.http_server.close_all_connections()
+    running.application.digi_settings.close()
+    running.application.get_db().engine.dispose()
+
+
+async def run_suite(
+    spec: ShowSpec, scenarios: List[str], iterations: int, warmup: int
+) -> dict:
+    """
+    Start a server with a synthetic show and run the given scenarios against it.
+
+    :return: Results, ready to be written as JSON
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        running = await start_server(temp_dir, spec)
+        client = BenchmarkClient(running.application, running.port)
+        try:
+            await client.login()
+            results = {}
+            for name in scenarios:
+                results[name] = await run_scenario(
+                    client, running.show, SCENARIOS[name], iterations, warmup
+                )
+                print(
+                    f"{name:16} median {results[name]['median_ms']:10.2f} ms",
+                    file=sys.stderr,
+                )
+        finally:
+            client.http_client.close()
+            await stop_server(running)
+
+    return {
+        "version": RESULTS_VERSION,
+        **environment(),
+        "spec": asdict(spec),
+        "setup_seconds": running.setup_seconds,
+        "iterations": iterations,
+        "scenarios": results,
+    }
+
+
+def compare(results: dict, baseline: dict) -> List[str]:
+    """
+    Describe the change in median time of each scenario from a baseline run.
+
+    :param results: Results of this run
+    :param baseline: Results of an earlier run
+    :return: One line per scenario in both runs
+    """
+    lines = []
+    if results["spec"] != baseline["spec"]:
+        lines.append("warning: the runs used different show specs")
+    for name, summary in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        ratio = summary["median_ms"] / before["median_ms"]
+        lines.append(
+            f"{name:16} {before['median_ms']:10.2f} ms -> "
+            f"{summary['median_ms']:10.2f} ms ({ratio:5.2f}x), "
+            f"queries {before['queries']} -> {summary['queries']}"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=list(SCENARIOS),
+        help="Scenario to run, may be repeated (default: all)",
+    )
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", help="Write results to this file, not stdout")
+    parser.add_argument("--compare", help="Results file of an earlier run")
+    for spec_field in fields(ShowSpec):
+        parser.add_argument(
+            f"--{spec_field.name}",
+            type=int,
+            default=getattr(MUSICAL, spec_field.name),
+        )
+    args = parser.parse_args()
+
+    spec = ShowSpec(**{f.name: getattr(args, f.name) for f in fields(ShowSpec)})
+    results = asyncio.run(
+        run_suite(spec, args.scenario or list(SCENARIOS), args.iterations, args.warmup)
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="UTF-8") as file_pointer:
+            json.dump(results, file_pointer, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding="UTF-8") as file_pointer:
+            baseline = json.load(file_pointer)
+        for line in compare(results, baseline):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
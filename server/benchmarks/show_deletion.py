@@ -0,0 +1,245 @@
+"""
+Benchmark for deleting a show.
+
+Builds a synthetic show in a temporary SQLite database, then deletes it once with
+``session.delete(show)`` and the ORM cascades, as the show controller used to, and
+once with :func:`~utils.show.show_deletion.delete_show`, rebuilding the show in
+between. Reports the time taken and the number of delete hook calls for each, and
+checks that both leave the same rows behind.
+
+Run from the server directory::
+
+    python -m benchmarks.show_deletion --acts 2 --scenes 10 --lines 100 --revisions 3
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Dict
+
+from sqlalchemy import func, insert, select
+
+from models.cue import Cue, CueAssociation, CueType
+from models.mics import Microphone, MicrophoneAllocation
+from models.models import db, import_all_models
+from models.script import (
+    Script,
+    ScriptLine,
+    ScriptLinePart,
+    ScriptLineRevisionAssociation,
+    ScriptLineType,
+    ScriptRevision,
+)
+from models.show import Act, Character, Scene, Show, ShowScriptType
+from utils.show.show_deletion import delete_show
+
+
+def build_show(
+    session, num_acts: int, num_scenes: int, num_lines: int, num_revisions: int
+) -> int:
+    """
+    Create a show with every line in every revision, a cue on every tenth line and
+    a mic for each character.
+
+    :return: ID of the show
+    """
+    show = Show(name="Benchmark", script_mode=ShowScriptType.FULL)
+    session.add(show)
+    session.flush()
+
+    characters = []
+    for i in range(20):
+        character = Character(show_id=show.id, name=f"Character {i}")
+        session.add(character)
+        characters.append(character)
+    cue_type = CueType(show_id=show.id, prefix="LX", description="Lighting")
+    session.add(cue_type)
+    session.flush()
+
+    previous_act = None
+    scene_ids = []
+    for act_index in range(num_acts):
+        act = Act(show_id=show.id, name=f"Act {act_index + 1}")
+        act.previous_act = previous_act
+        session.add(act)
+        session.flush()
+        if previous_act is None:
+            show.first_act_id = act.id
+        previous_scene = None
+        for scene_index in range(num_scenes):
+            scene = Scene(show_id=show.id, act_id=act.id, name=f"Scene {scene_index}")
+            scene.previous_scene = previous_scene
+            session.add(scene)
+            session.flush()
+            if previous_scene is None:
+                act.first_scene_id = scene.id
+            previous_scene = scene
+            scene_ids.append((act.id, scene.id))
+        previous_act = act
+
+    mics = [Microphone(show_id=show.id, name=f"Mic {i}") for i in range(20)]
+    session.add_all(mics)
+    session.flush()
+    session.execute(
+        insert(MicrophoneAllocation),
+        [
+            {"mic_id": mic.id, "scene_id": scene_id, "character_id": character.id}
+            for mic, character in zip(mics, characters)
+            for _, scene_id in scene_ids
+        ],
+    )
+
+    script = Script(show_id=show.id)
+    session.add(script)
+    session.flush()
+
+    line_ids = []
+    for act_id, scene_id in scene_ids:
+        for i in range(num_lines):
+            line = ScriptLine(
+                act_id=act_id,
+                scene_id=scene_id,
+                page=1,
+                line_type=ScriptLineType.DIALOGUE,
+            )
+            session.add(line)
+            line_ids.append(line)
+    session.flush()
+    line_ids = [line.id for line in line_ids]
+    session.execute(
+        insert(ScriptLinePart),
+        [
+            {
+                "line_id": line_id,
+                "part_index": 0,
+                "character_id": characters[i % len(characters)].id,
+                "line_text": "Line",
+            }
+            for i, line_id in enumerate(line_ids)
+        ],
+    )
+
+    cue_ids = []
+    for i in range(0, len(line_ids), 10):
+        cue = Cue(cue_type_id=cue_type.id, ident=str(i))
+        session.add(cue)
+        cue_ids.append(cue)
+    session.flush()
+    cue_ids = [cue.id for cue in cue_ids]
+
+    previous_revision = None
+    for revision_number in range(1, num_revisions + 1):
+        revision = ScriptRevision(
+            script_id=script.id,
+            revision=revision_number,
+            previous_revision_id=previous_revision,
+        )
+        session.add(revision)
+        session.flush()
+        previous_revision = revision.id
+        session.execute(
+            insert(ScriptLineRevisionAssociation),
+            [{"revision_id": revision.id, "line_id": line_id} for line_id in line_ids],
+        )
+        session.execute(
+            insert(CueAssociation),
+            [
+                {
+                    "revision_id": revision.id,
+                    "line_id": line_ids[i * 10],
+                    "cue_id": cue_id,
+                }
+                for i, cue_id in enumerate(cue_ids)
+            ],
+        )
+    script.current_revision = previous_revision
+    session.commit()
+    return show.id
+
+
+def delete_with_orm(session, show_id: int) -> None:
+    show = session.get(Show, show_id)
+    show.current_session_id = None
+    for script in show.scripts:
+        script.current_revision = None
+    session.flush()
+    with session.no_autoflush:
+        session.delete(show)
+    session.commit()
+
+
+def delete_with_statements(session, show_id: int) -> None:
+    delete_show(session, show_id)
+    session.commit()
+
+
+def count_rows() -> Dict[str, int]:
+    with db.sessionmaker() as session:
+        return {
+            table.name: session.scalar(select(func.count()).select_from(table))
+            for table in db.metadata.tables.values()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--acts", type=int, default=2)
+    parser.add_argument("--scenes", type=int, default=10)
+    parser.add_argument("--lines", type=int, default=100)
+    parser.add_argument("--revisions", type=int, default=3)
+    args = parser.parse_args()
+
+    hook_calls = {"delete": 0, "bulk_delete": 0}
+
+    def count_hook(*_args):
+        hook_calls["delete"] += 1
+
+    def count_bulk_hook(*_args):
+        hook_calls["bulk_delete"] += 1
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        import_all_models()
+        db.configure(url=f"sqlite:///{os.path.join(temp_dir, 'benchmark.sqlite')}")
+        db.create_all()
+        db.register_delete_hook(count_hook)
+        db.register_bulk_delete_hook(count_bulk_hook)
+
+        results = {}
+        for name, delete in (
+            ("orm cascade", delete_with_orm),
+            ("statements", delete_with_statements),
+        ):
+            with db.sessionmaker() as session:
+                show_id = build_show(
+                    session, args.acts, args.scenes, args.lines, args.revisions
+                )
+            rows = sum(count_rows().values())
+            with db.sessionmaker() as session:
+                start = time.perf_counter()
+                delete(session, show_id)
+                elapsed = time.perf_counter() - start
+            results[name] = (elapsed, rows, count_rows())
+
+        db.engine.dispose()
+
+    orm_time, rows, orm_remaining = results["orm cascade"]
+    statements_time, _, statements_remaining = results["statements"]
+    print(
+        f"{args.acts} acts x {args.scenes} scenes x {args.lines} lines, "
+        f"{args.revisions} revisions, {rows} rows"
+    )
+    print(
+        f"orm cascade: {orm_time * 1000:10.2f} ms, "
+        f"{hook_calls['delete']} delete hook calls"
+    )
+    print(
+        f"statements:  {statements_time * 1000:10.2f} ms, "
+        f"{hook_calls['bulk_delete']} bulk delete hook calls"
+    )
+    print(f"speedup:     {orm_time / statements_time:10.1f}x")
+    print(f"identical remaining rows: {orm_remaining == statements_remaining}")
+
+
+if __name__ == "__main__":
+    main()
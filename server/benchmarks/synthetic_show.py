@@ -0,0 +1,415 @@
+"""
+Deterministic generator for synthetic shows, sized like a full musical by default.
+
+The show is built through the models, in the same shape the API produces: acts and
+scenes as linked lists, a script whose current revision links every line to the
+next, cues attached to lines, and props allocated to runs of scenes. The same spec
+and seed always produce the same show, so benchmark results from different commits
+are comparable.
+
+Run from the server directory to write a show to an SQLite database::
+
+    python -m benchmarks.synthetic_show /tmp/musical.sqlite --pages 300 --lines 5000
+"""
+
+import argparse
+import datetime
+import os
+import random
+import time
+from dataclasses import dataclass, field, fields
+from typing import List
+
+from sqlalchemy import insert
+
+from models.cue import Cue, CueAssociation, CueType
+from models.mics import Microphone
+from models.models import db, import_all_models
+from models.script import (
+    Script,
+    ScriptLine,
+    ScriptLinePart,
+    ScriptLineRevisionAssociation,
+    ScriptLineType,
+    ScriptRevision,
+)
+from models.show import Act, Cast, Character, Scene, Show, ShowScriptType
+from models.stage import Props, PropsAllocation, PropType
+
+
+# Fixed timestamp, so generated shows are identical between runs
+CREATED_AT = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+CUE_TYPES = [
+    ("LX", "Lighting", "#ffd700"),
+    ("SND", "Sound", "#1e90ff"),
+    ("FS", "Follow Spot", "#ff69b4"),
+    ("FLY", "Flys", "#32cd32"),
+]
+PROP_TYPES = ["Hand Props", "Set Dressing", "Furniture", "Consumables", "Costume Props"]
+WORDS = (
+    "the a and to of in you it is that we my your all for not but this love "
+    "night come go now here there never always heart light dance sing away home "
+    "tomorrow tonight dream world time again stay leave know see hear feel"
+).split()
+
+
+@dataclass(frozen=True)
+class ShowSpec:
+    """
+    Size of a synthetic show.
+
+    :param acts: Number of acts, with an interval after every act but the last
+    :param scenes: Number of scenes, split evenly between the acts
+    :param pages: Number of script pages, split evenly between the lines
+    :param lines: Number of script lines
+    :param cues: Number of cues, spread across the cue types
+    :param characters: Number of characters
+    :param cast: Number of cast members, fewer than characters for doubling
+    :param mics: Number of microphones
+    :param props: Number of props
+    :param seed: Seed for the random choices
+    """
+
+    acts: int = 2
+    scenes: int = 30
+    pages: int = 300
+    lines: int = 5000
+    cues: int = 2000
+    characters: int = 60
+    cast: int = 45
+    mics: int = 40
+    props: int = 200
+    seed: int = 0
+
+
+# A full-length musical
+MUSICAL = ShowSpec()
+# A show small enough to build in tests
+SMALL = ShowSpec(
+    scenes=4, pages=6, lines=60, cues=20, characters=8, cast=6, mics=4, props=10
+)
+
+
+@dataclass
+class SyntheticShow:
+    """IDs of the rows created for a synthetic show."""
+
+    show_id: int
+    script_id: int
+    revision_id: int
+    spec: ShowSpec
+    act_ids: List[int] = field(default_factory=list)
+    scene_ids: List[int] = field(default_factory=list)
+    character_ids: List[int] = field(default_factory=list)
+    mic_ids: List[int] = field(default_factory=list)
+    # Line IDs in script order
+    line_ids: List[int] = field(default_factory=list)
+
+
+def _sentence(rng: random.Random) -> str:
+    text = " ".join(rng.choices(WORDS, k=rng.randint(4, 16)))
+    return text[0].upper() + text[1:] + rng.choice(".!?")
+
+
+def _scene_casts(
+    rng: random.Random, num_scenes: int, character_ids: List[int]
+) -> List[List[int]]:
+    """
+    Pick the characters in each scene. The first few characters are leads, in
+    most scenes, and the rest are ensemble, each in a run of consecutive scenes.
+    """
+    leads = character_ids[: max(len(character_ids) // 10, 1)]
+    ensemble = character_ids[len(leads) :]
+    casts = [[c for c in leads if rng.random() < 0.8] for _ in range(num_scenes)]
+    for character_id in ensemble:
+        length = rng.randint(1, max(num_scenes // 3, 1))
+        start = rng.randrange(num_scenes)
+        for scene_index in range(start, min(start + length, num_scenes)):
+            casts[scene_index].append(character_id)
+    for scene_index, cast in enumerate(casts):
+        if not cast:
+            cast.append(rng.choice(character_ids))
+        casts[scene_index] = sorted(set(cast))
+    return casts
+
+
+def _line_type(rng: random.Random) -> ScriptLineType:
+    roll = rng.random()
+    if roll < 0.8:
+        return ScriptLineType.DIALOGUE
+    if roll < 0.92:
+        return ScriptLineType.STAGE_DIRECTION
+    if roll < 0.97:
+        return ScriptLineType.CUE_LINE
+    return ScriptLineType.SPACING
+
+
+def generate_show(session, spec: ShowSpec = MUSICAL) -> SyntheticShow:
+    """
+    Create a synthetic show, with its script as the first and current revision,
+    and commit it.
+
+    :param session: SQLAlchemy session
+    :param spec: Size of the show
+    :return: IDs of the rows created
+    """
+    rng = random.Random(spec.seed)
+
+    show = Show(
+        name=f"Synthetic Show {spec.seed}",
+        script_mode=ShowScriptType.FULL,
+        created_at=CREATED_AT,
+        edited_at=CREATED_AT,
+    )
+    session.add(show)
+    session.flush()
+    script = Script(show_id=show.id)
+    session.add(script)
+    session.flush()
+    revision = ScriptRevision(
+        script_id=script.id,
+        revision=1,
+        created_at=CREATED_AT,
+        edited_at=CREATED_AT,
+        description="Initial script revision",
+    )
+    session.add(revision)
+    session.flush()
+    script.current_revision = revision.id
+    result = SyntheticShow(
+        show_id=show.id, script_id=script.id, revision_id=revision.id, spec=spec
+    )
+
+    # Acts and scenes, as linked lists in show order
+    scene_acts = []
+    previous_act = None
+    for act_index in range(spec.acts):
+        act = Act(
+            show_id=show.id,
+            name=f"Act {act_index + 1}",
+            interval_after=act_index < spec.acts - 1,
+            previous_act=previous_act,
+        )
+        session.add(act)
+        session.flush()
+        if previous_act is None:
+            show.first_act = act
+        result.act_ids.append(act.id)
+        # Scenes are only linked within an act
+        previous_scene = None
+        act_scenes = range(
+            act_index * spec.scenes // spec.acts,
+            (act_index + 1) * spec.scenes // spec.acts,
+        )
+        for scene_number in act_scenes:
+            scene = Scene(
+                show_id=show.id,
+                act_id=act.id,
+                name=f"Scene {scene_number + 1}",
+                previous_scene=previous_scene,
+            )
+            session.add(scene)
+            session.flush()
+            if act.first_scene_id is None:
+                act.first_scene = scene
+            previous_scene = scene
+            result.scene_ids.append(scene.id)
+            scene_acts.append(act.id)
+        previous_act = act
+
+    # Cast and characters, with some actors doubling
+    cast_ids = session.scalars(
+        insert(Cast).returning(Cast.id, sort_by_parameter_order=True),
+        [
+            {"show_id": show.id, "first_name": "Actor", "last_name": str(i + 1)}
+            for i in range(spec.cast)
+        ],
+    ).all()
+    result.character_ids = list(
+        session.scalars(
+            insert(Character).returning(Character.id, sort_by_parameter_order=True),
+            [
+                {
+                    "show_id": show.id,
+                    "name": f"Character {i + 1}",
+                    "description": "",
+                    "played_by": cast_ids[i % len(cast_ids)] if cast_ids else None,
+                }
+                for i in range(spec.characters)
+            ],
+        ).all()
+    )
+    result.mic_ids = list(
+        session.scalars(
+            insert(Microphone).returning(Microphone.id, sort_by_parameter_order=True),
+            [
+                {"show_id": show.id, "name": f"Mic {i + 1}", "description": ""}
+                for i in range(spec.mics)
+            ],
+        ).all()
+    )
+
+    # Script lines, split evenly between the scenes and pages in order
+    casts = _scene_casts(rng, spec.scenes, result.character_ids)
+    line_rows = []
+    part_rows = []
+    for index in range(spec.lines):
+        scene_index = index * spec.scenes // spec.lines
+        line_type = _line_type(rng)
+        line_rows.append(
+            {
+                "act_id": scene_acts[scene_index],
+                "scene_id": result.scene_ids[scene_index],
+                "page": index * spec.pages // spec.lines + 1,
+                "line_type": line_type,
+            }
+        )
+        if line_type == ScriptLineType.DIALOGUE:
+            speakers = rng.sample(
+                casts[scene_index], min(len(casts[scene_index]), rng.choice((1, 1, 2)))
+            )
+            parts = [(character_id, _sentence(rng)) for character_id in speakers]
+        elif line_type == ScriptLineType.STAGE_DIRECTION:
+            parts = [(None, _sentence(rng))]
+        else:
+            parts = []
+        part_rows.append(parts)
+    result.line_ids = list(
+        session.scalars(
+            insert(ScriptLine).returning(ScriptLine.id, sort_by_parameter_order=True),
+            line_rows,
+        ).all()
+    )
+    session.execute(
+        insert(ScriptLinePart),
+        [
+            {
+                "line_id": line_id,
+                "part_index": part_index,
+                "character_id": character_id,
+                "line_text": text,
+            }
+            for line_id, parts in zip(result.line_ids, part_rows)
+            for part_index, (character_id, text) in enumerate(parts)
+        ],
+    )
+    line_ids = result.line_ids
+    session.execute(
+        insert(ScriptLineRevisionAssociation),
+        [
+            {
+                "revision_id": revision.id,
+                "line_id": line_id,
+                "previous_line_id": line_ids[i - 1] if i > 0 else None,
+                "next_line_id": line_ids[i + 1] if i + 1 < len(line_ids) else None,
+            }
+            for i, line_id in enumerate(line_ids)
+        ],
+    )
+
+    # Cues, on any line but spacing, numbered in script order within each type
+    cue_type_ids = []
+    for prefix, description, colour in CUE_TYPES:
+        cue_type = CueType(
+            show_id=show.id, prefix=prefix, description=description, colour=colour
+        )
+        session.add(cue_type)
+        session.flush()
+        cue_type_ids.append(cue_type.id)
+    cue_lines = [
+        line_id
+        for line_id, row in zip(line_ids, line_rows)
+        if row["line_type"] != ScriptLineType.SPACING
+    ]
+    cue_placements = sorted(
+        (rng.randrange(len(cue_lines)), rng.randrange(len(cue_type_ids)))
+        for _ in range(spec.cues if cue_lines else 0)
+    )
+    idents = [0] * len(cue_type_ids)
+    cue_rows = []
+    for _, type_index in cue_placements:
+        idents[type_index] += 1
+        cue_rows.append(
+            {"cue_type_id": cue_type_ids[type_index], "ident": str(idents[type_index])}
+        )
+    cue_ids = (
+        session.scalars(
+            insert(Cue).returning(Cue.id, sort_by_parameter_order=True), cue_rows
+        ).all()
+        if cue_rows
+        else []
+    )
+    association_rows = []
+    line_positions = {}
+    for cue_id, (line_index, _) in zip(cue_ids, cue_placements):
+        line_id = cue_lines[line_index]
+        line_positions[line_id] = line_positions.get(line_id, 0) + 1
+        association_rows.append(
+            {
+                "revision_id": revision.id,
+                "line_id": line_id,
+                "cue_id": cue_id,
+                "line_position": line_positions[line_id],
+            }
+        )
+    if association_rows:
+        session.execute(insert(CueAssociation), association_rows)
+
+    # Props, each allocated to a run of consecutive scenes
+    prop_type_ids = []
+    for name in PROP_TYPES:
+        prop_type = PropType(show_id=show.id, name=name, description="")
+        session.add(prop_type)
+        session.flush()
+        prop_type_ids.append(prop_type.id)
+    prop_ids = session.scalars(
+        insert(Props).returning(Props.id, sort_by_parameter_order=True),
+        [
+            {
+                "show_id": show.id,
+                "prop_type_id": prop_type_ids[i % len(prop_type_ids)],
+                "name": f"Prop {i + 1}",
+                "description": "",
+            }
+            for i in range(spec.props)
+        ],
+    ).all()
+    allocation_rows = []
+    for prop_id in prop_ids:
+        start = rng.randrange(spec.scenes)
+        for scene_id in result.scene_ids[start : start + rng.randint(1, 4)]:
+            allocation_rows.append({"props_id": prop_id, "scene_id": scene_id})
+    if allocation_rows:
+        session.execute(insert(PropsAllocation), allocation_rows)
+
+    session.commit()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("database", help="SQLite database file to create")
+    for spec_field in fields(ShowSpec):
+        parser.add_argument(
+            f"--{spec_field.name}", type=int, default=spec_field.default
+        )
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        parser.error(f"{args.database} already exists")
+    spec = ShowSpec(**{f.name: getattr(args, f.name) for f in fields(ShowSpec)})
+
+    import_all_models()
+    db.configure(url=f"sqlite:///{args.database}")
+    db.create_all()
+    start = time.perf_counter()
+    with db.sessionmaker() as session:
+        show = generate_show(session, spec)
+    elapsed = time.perf_counter() - start
+    db.engine.dispose()
+    print(f"Created show {show.show_id} in {args.database} in {elapsed:.2f}s: {spec}")
+
+
+if __name__ == "__main__":
+    main()
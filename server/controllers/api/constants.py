@@ -53,6 +53,9 @@ ERROR_ALLOCATION_NOT_FOUND = "404 allocation not found"
 # Crew assignments
 ERROR_CREW_ASSIGNMENT_NOT_FOUND = "404 crew assignment not found"
 
+# Background jobs
+ERROR_JOB_NOT_FOUND = "404 job not found"
+
 
 # =============================================================================
 # HTTP 400 Validation Errors - Missing Required Fields
@@ -117,3 +120,11 @@ ERROR_TAG_NAME_EXISTS = "Tag name already exists (case-insensitive)"
 ERROR_CANNOT_MERGE_SAME_CHARACTER = (
     "Source and destination characters must be different"
 )
+
+
+# =============================================================================
+# Background Job Errors
+# =============================================================================
+
+ERROR_JOB_CANCELLED = "Job was cancelled"
+ERROR_JOB_FAILED = "Job failed"
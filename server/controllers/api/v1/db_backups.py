@@ -1,52 +1,19 @@
-import os
+from tornado import escape
 
+from services.backup_service import BackupEntry, BackupError
 from utils.web.base_controller import BaseAPIController
 from utils.web.route import ApiRoute, ApiVersion
-from utils.web.web_decorators import api_authenticated, require_admin
+from utils.web.web_decorators import api_authenticated, no_live_session, require_admin
 
 
-def _get_db_file_path(application) -> str:
-    """
-    :return: Absolute filesystem path to the SQLite database file.
-    :rtype: str
-    """
-    db_path: str = application.digi_settings.settings.get("db_path").get_value()
-    if db_path.startswith("sqlite:///"):
-        db_path = db_path.replace("sqlite:///", "")
-    return db_path
-
-
-def _list_backups(db_path: str) -> list[dict]:
-    """
-    :param db_path: Filesystem path to the main database file.
-    :type db_path: str
-    :return: List of backup file dicts, sorted newest first.
-    :rtype: list[dict]
-    """
-    db_dir = os.path.dirname(db_path) or "."
-    db_basename = os.path.basename(db_path)
-    prefix = db_basename + "."
-
-    backups = []
-    if os.path.isdir(db_dir):
-        for fname in os.listdir(db_dir):
-            if not fname.startswith(prefix):
-                continue
-            suffix = fname[len(prefix) :]
-            if not suffix.isdigit():
-                continue
-            full_path = os.path.join(db_dir, fname)
-            stat = os.stat(full_path)
-            backups.append(
-                {
-                    "filename": fname,
-                    "size_bytes": stat.st_size,
-                    "created_at": int(suffix),
-                }
-            )
-
-    backups.sort(key=lambda x: x["created_at"], reverse=True)
-    return backups
+def _backup_json(entry: BackupEntry) -> dict:
+    return {
+        "filename": entry.filename,
+        "size_bytes": entry.size_bytes,
+        "created_at": entry.created_at,
+        "compressed": entry.compressed,
+        "reason": entry.reason,
+    }
 
 
 @ApiRoute("admin/db-backups", ApiVersion.V1)
@@ -54,18 +21,29 @@ class BackupsController(BaseAPIController):
     @api_authenticated
     @require_admin
     async def get(self):
-        db_path = _get_db_file_path(self.application)
-        backups = _list_backups(db_path)
-        total_size = sum(b["size_bytes"] for b in backups)
+        backups = self.application.backup_service.list_backups()
         self.set_status(200)
         await self.finish(
             {
-                "backups": backups,
+                "backups": [_backup_json(backup) for backup in backups],
                 "count": len(backups),
-                "total_size_bytes": total_size,
+                "total_size_bytes": sum(b.size_bytes for b in backups),
             }
         )
 
+    @api_authenticated
+    @require_admin
+    async def post(self):
+        """Back up the database now."""
+        try:
+            backup = await self.application.backup_service.create_backup()
+        except BackupError as error:
+            self.set_status(400)
+            await self.finish({"message": str(error)})
+            return
+        self.set_status(200)
+        await self.finish({"message": "Backup created", "backup": _backup_json(backup)})
+
     @api_authenticated
     @require_admin
     async def delete(self):
@@ -79,14 +57,47 @@ class BackupsController(BaseAPIController):
             await self.finish({"message": "timestamp must be a positive integer"})
             return
 
-        db_path = _get_db_file_path(self.application)
-        backup_path = f"{db_path}.{timestamp}"
-
-        if not os.path.isfile(backup_path):
+        if not self.application.backup_service.delete_backup(int(timestamp)):
             self.set_status(404)
             await self.finish({"message": "Backup file not found"})
             return
 
-        os.remove(backup_path)
         self.set_status(200)
         await self.finish({"message": "Backup deleted"})
+
+
+@ApiRoute("admin/db-backups/restore", ApiVersion.V1)
+class BackupRestoreController(BaseAPIController):
+    @api_authenticated
+    @require_admin
+    @no_live_session
+    async def post(self):
+        """
+        Restore the database from a backup. The current database is backed up
+        first, and connected clients are told to reload.
+        """
+        data = escape.json_decode(self.request.body)
+        timestamp = data.get("timestamp", None)
+        if not isinstance(timestamp, int) or timestamp < 0:
+            self.set_status(400)
+            await self.finish({"message": "timestamp must be a positive integer"})
+            return
+
+        try:
+            safety_backup = await self.application.backup_service.restore_backup(
+                timestamp
+            )
+        except KeyError:
+            self.set_status(404)
+            await self.finish({"message": "Backup file not found"})
+            return
+        except BackupError as error:
+            self.set_status(400)
+            await self.finish({"message": str(error)})
+            return
+
+        await self.application.ws_send_to_all("RELOAD_CLIENT", "NOOP", {})
+        self.set_status(200)
+        await self.finish(
+            {"message": "Backup restored", "backup": _backup_json(safety_backup)}
+        )
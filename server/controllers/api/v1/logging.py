@@ -1,67 +1,45 @@
-from typing import Any, Dict, List
+from typing import Dict, List
 
-from tornado import escape, httputil
+from tornado import escape
 
-from digi_server.app_server import DigiScriptServer
-from digi_server.logger import get_logger, map_client_level
+from services.client_log_service import MAX_BATCH_SIZE
 from utils.web.base_controller import BaseAPIController
 from utils.web.route import ApiRoute, ApiVersion
 
 
 class ClientLoggingBase(BaseAPIController):
-    def __init__(
-        self,
-        application: DigiScriptServer,
-        request: httputil.HTTPServerRequest,
-        **kwargs: Any,
-    ):
-        super().__init__(application, request, **kwargs)
-        self.client_logger = get_logger("Client")
-
     def process_logs(self, entries: List[Dict]):
-        # Build request-level context added to every entry's extra
-        request_extra = {
-            "remote_ip": self.request.remote_ip,
-            "agent": self.request.headers.get("User-Agent", "Unknown"),
-        }
+        user_id = None
+        username = None
         if self.current_user:
-            request_extra["user_id"] = self.current_user.get("id")
-            request_extra["username"] = self.current_user.get("username")
-
-        for entry in entries:
-            level = entry.get("level", "INFO").upper()
-            message = entry.get("message", "")
-            extra = {**entry.get("extra", {}), **request_extra}
-
-            log_level = map_client_level(level)
-
-            log_msg = f"[Client] {message}"
-            if extra:
-                log_msg += f" | Extra: {extra}"
-
-            # Pass structured fields via extra so LogBufferHandler can read them.
-            # Tornado's LogFormatter ignores unknown extra fields, so file output
-            # is unaffected.
-            self.client_logger.log(
-                log_level,
-                log_msg,
-                extra={
-                    "user_id": request_extra.get("user_id"),
-                    "username": request_extra.get("username"),
-                    "remote_ip": request_extra.get("remote_ip"),
-                },
-            )
+            user_id = self.current_user.get("id")
+            username = self.current_user.get("username")
+
+        result = self.application.client_log_service.submit(
+            entries,
+            client_key=f"user:{user_id}" if user_id else self.request.remote_ip,
+            user_id=user_id,
+            username=username,
+            remote_ip=self.request.remote_ip,
+            agent=self.request.headers.get("User-Agent", "Unknown"),
+        )
+
+        if entries and result["rate_limited"] and not result["accepted"]:
+            self.set_status(429)
+            self.set_header("Retry-After", "1")
+            self.write({"message": "Too many log entries", **result})
+            return
 
         self.set_status(200)
-        self.write({"status": "OK"})
+        self.write({"status": "OK", **result})
 
 
 @ApiRoute("logs/batch", ApiVersion.V1, ignore_logging=True)
 class ClientLoggingBatchController(ClientLoggingBase):
     async def post(self):
-        client_log_enabled = await self.application.digi_settings.get(
+        client_log_enabled = self.application.digi_settings.snapshot[
             "client_log_enabled"
-        )
+        ]
         if not client_log_enabled:
             self.set_status(403)
             self.write({"message": "Client logging is disabled"})
@@ -85,15 +63,23 @@ class ClientLoggingBatchController(ClientLoggingBase):
             self.write({"message": "Expected 'batch' to be a list of log entries"})
             return
 
+        if len(batch) > MAX_BATCH_SIZE:
+            self.application.client_log_service.reject_batch(len(batch))
+            self.set_status(413)
+            self.write(
+                {"message": f"Batch must contain at most {MAX_BATCH_SIZE} log entries"}
+            )
+            return
+
         self.process_logs(batch)
 
 
 @ApiRoute("logs", ApiVersion.V1, ignore_logging=True)
 class ClientLoggingController(ClientLoggingBase):
     async def post(self):
-        client_log_enabled = await self.application.digi_settings.get(
+        client_log_enabled = self.application.digi_settings.snapshot[
             "client_log_enabled"
-        )
+        ]
         if not client_log_enabled:
             self.set_status(403)
             self.write({"message": "Client logging is disabled"})
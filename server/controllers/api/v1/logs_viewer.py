@@ -9,10 +9,17 @@ populated by :class:`~digi_server.log_buffer.LogBufferHandler`:
 """
 
 import asyncio
-import json
 import logging
-
-from utils.log_buffer import get_client_buffer, get_server_buffer
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set, Tuple
+
+from utils.log_buffer import (
+    LogBufferHandler,
+    LogEntry,
+    get_client_buffer,
+    get_server_buffer,
+)
+from utils.log_query import LogQuery, run_query
 from utils.web.base_controller import BaseAPIController
 from utils.web.route import ApiRoute, ApiVersion
 from utils.web.web_decorators import require_admin
@@ -46,39 +53,115 @@ def _parse_source(raw: str) -> str:
     return "client" if raw.lower() == "client" else "server"
 
 
-def _filter_entries(
-    entries: list,
-    level_name: str,
-    search: str,
-    username_filter: str,
-    source: str,
-) -> list:
-    """Apply all active filters to *entries* and return the matching subset.
-
-    :param entries: List of entry dicts to filter.
-    :param level_name: Uppercase level name (e.g. ``"ERROR"``); empty means
-        no level filter.
-    :param search: Lowercase search string; empty means no search filter.
-    :param username_filter: Lowercase username substring; empty means no filter.
-    :param source: ``"server"`` or ``"client"``.
-    :returns: Filtered list of entry dicts.
+def _parse_timestamp(raw: str) -> Optional[float]:
+    """Parse an ISO-8601 timestamp query parameter, assuming UTC if no offset.
+
+    :param raw: Raw value from the query string.
+    :returns: UNIX timestamp, or None if *raw* is empty.
+    :raises ValueError: If *raw* is not an ISO-8601 timestamp.
+    """
+    if not raw:
+        return None
+    parsed = datetime.fromisoformat(raw)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _build_query(handler: BaseAPIController) -> LogQuery:
+    """Build a :class:`LogQuery` from the filter query parameters of a request.
+
+    :param handler: Request handler for the log viewer or stream.
+    :returns: The query.
+    :raises ValueError: If ``since`` or ``until`` is not an ISO-8601 timestamp.
     """
-    if level_name:
-        min_level_no = _LEVEL_ALIASES.get(level_name)
-        if min_level_no is not None:
-            entries = [e for e in entries if e["level_no"] >= min_level_no]
+    level_name = handler.get_argument("level", "").upper()
+    return LogQuery(
+        min_level_no=_LEVEL_ALIASES.get(level_name) if level_name else None,
+        search=handler.get_argument("search", "").lower(),
+        username=handler.get_argument("username", "").lower(),
+        since=_parse_timestamp(handler.get_argument("since", "")),
+        until=_parse_timestamp(handler.get_argument("until", "")),
+    )
+
+
+_FanoutKey = Tuple[str, LogQuery]
 
-    if search:
-        entries = [e for e in entries if search in e["message"].lower()]
 
-    if username_filter:
-        entries = [
-            e
-            for e in entries
-            if e.get("username") and username_filter in e["username"].lower()
-        ]
+class _StreamFanout:
+    """Shares one buffer subscription between streams with identical filters.
+
+    Each new entry is checked against the filters once, and the matching entry
+    is put on the queue of every stream, rather than every stream filtering
+    every entry itself.
+    """
+
+    def __init__(self, key: _FanoutKey, buffer: LogBufferHandler):
+        _source, query = key
+        self.key = key
+        self.query = query
+        self.queues: Set[asyncio.Queue] = set()
+        self._unsubscribe = buffer.subscribe(self._publish)
 
-    return entries
+    def _publish(self, entry: LogEntry) -> None:
+        if self.query.matches(entry):
+            for queue in self.queues:
+                queue.put_nowait(entry)
+
+    def add(self, queue: asyncio.Queue) -> None:
+        self.queues.add(queue)
+
+    def remove(self, queue: asyncio.Queue) -> None:
+        """Remove a stream's queue, unsubscribing once no streams remain."""
+        self.queues.discard(queue)
+        if not self.queues:
+            self._unsubscribe()
+            if _fanouts.get(self.key) is self:
+                del _fanouts[self.key]
+
+
+_fanouts: Dict[_FanoutKey, _StreamFanout] = {}
+
+
+def _get_fanout(key: _FanoutKey, buffer: LogBufferHandler) -> _StreamFanout:
+    """Return the fan-out for *key*, subscribing it to *buffer* if new.
+
+    :param key: Tuple of the source and the query entries must match.
+    :param buffer: Buffer the source's entries are read from.
+    :returns: The shared :class:`_StreamFanout`.
+    """
+    fanout = _fanouts.get(key)
+    if fanout is None:
+        fanout = _StreamFanout(key, buffer)
+        _fanouts[key] = fanout
+    return fanout
+
+
+def _parse_last_event_id(raw: Optional[str], buffer: LogBufferHandler) -> int:
+    """Get the sequence number to resume a stream after from an SSE event ID.
+
+    Event IDs have the form ``<epoch>-<seq>``.  IDs from a different epoch,
+    for example from before the server restarted, or which cannot be parsed
+    resume from the start of the buffer.
+
+    :param raw: Value of the ``Last-Event-ID`` header, if sent.
+    :param buffer: Buffer the stream is reading from.
+    :returns: Sequence number of the last entry already received, or 0.
+    """
+    if not raw:
+        return 0
+    epoch, _, seq = raw.strip().partition("-")
+    if epoch != buffer.epoch:
+        return 0
+    try:
+        seq = int(seq)
+    except ValueError:
+        return 0
+    return seq if 0 <= seq <= buffer.last_seq else 0
+
+
+def _format_event(buffer: LogBufferHandler, entry: LogEntry) -> str:
+    return f"id: {buffer.epoch}-{entry.seq}\ndata: {entry.encoded}\n\n"
 
 
 @ApiRoute("logs/view", ApiVersion.V1, ignore_logging=True)
@@ -98,10 +181,26 @@ class LogViewerController(BaseAPIController):
     username : str
         Case-insensitive substring match on the ``username`` field.
         Applies to both client and server sources.
+    since, until : str
+        ISO-8601 timestamps bounding when entries were logged, assumed to be
+        UTC if they have no offset.
+    order : str
+        ``"oldest"`` (default) to return entries oldest-first, or ``"newest"``
+        to return the newest entries first.
     limit : int
         Maximum number of entries to return (capped at 1000, default 500).
     offset : int
         Number of entries to skip before returning (default 0).
+    after, before : int
+        Cursors: only return entries with a sequence number greater than
+        ``after`` or less than ``before``.  Pass the ``next_cursor`` from the
+        previous response as ``after`` when paging oldest-first, or as
+        ``before`` when paging newest-first.  ``total`` is only counted when
+        neither cursor is given, and is ``null`` otherwise.
+
+    For the client source, the response also includes ``ingestion`` counters
+    from :class:`~services.client_log_service.ClientLogService`, such as the
+    number of entries rate limited, deduplicated or dropped.
     """
 
     @require_admin
@@ -112,9 +211,13 @@ class LogViewerController(BaseAPIController):
             403 if not admin.
         """
         source = _parse_source(self.get_argument("source", "server"))
-        level_name = self.get_argument("level", "").upper()
-        search = self.get_argument("search", "").lower()
-        username_filter = self.get_argument("username", "").lower()
+        newest_first = self.get_argument("order", "oldest").lower() == "newest"
+        try:
+            query = _build_query(self)
+        except ValueError:
+            self.set_status(400)
+            await self.finish({"message": "Invalid since or until timestamp"})
+            return
 
         try:
             limit = min(int(self.get_argument("limit", "500")), _MAX_LIMIT)
@@ -126,25 +229,38 @@ class LogViewerController(BaseAPIController):
         except ValueError:
             offset = 0
 
-        if source == "client":
-            entries = get_client_buffer().get_entries()
-        else:
-            entries = get_server_buffer().get_entries()
-
-        entries = _filter_entries(entries, level_name, search, username_filter, source)
-
-        total = len(entries)
-        page = entries[offset : offset + limit]
-
-        self.write(
-            {
-                "entries": page,
-                "total": total,
-                "returned": len(page),
-                "source": source,
-            }
+        try:
+            after = self.get_argument("after", None)
+            after = int(after) if after else None
+            before = self.get_argument("before", None)
+            before = int(before) if before else None
+        except ValueError:
+            self.set_status(400)
+            await self.finish({"message": "Invalid cursor"})
+            return
+
+        buffer = get_client_buffer() if source == "client" else get_server_buffer()
+        page = run_query(
+            buffer,
+            query,
+            limit,
+            offset=offset,
+            newest_first=newest_first,
+            after=after,
+            before=before,
         )
 
+        response = {
+            "entries": page.entries,
+            "total": page.total,
+            "returned": len(page.entries),
+            "next_cursor": page.next_cursor,
+            "source": source,
+        }
+        if source == "client":
+            response["ingestion"] = self.application.client_log_service.get_stats()
+        self.write(response)
+
 
 @ApiRoute("logs/stream", ApiVersion.V1, ignore_logging=True)
 class LogStreamController(BaseAPIController):
@@ -157,16 +273,25 @@ class LogStreamController(BaseAPIController):
 
     Query parameters
     ----------------
-    Same as :class:`LogViewerController` except ``limit`` and ``offset`` which
-    are not applicable to a live stream.
+    Same as :class:`LogViewerController` except ``order``, ``limit``,
+    ``offset`` and the cursors, which are not applicable to a live stream.
+
+    Streams with identical filters share a single :class:`_StreamFanout`, so
+    each new entry is filtered and JSON-encoded once however many streams are
+    open.
 
     SSE event format
     ----------------
-    Each event is a single ``data:`` line containing a JSON-encoded entry dict,
+    Each event is an ``id:`` line holding the buffer epoch and entry sequence
+    number, and a ``data:`` line containing the JSON-encoded entry dict,
     followed by a blank line::
 
-        data: {"ts": "...", "level": "INFO", ...}
+        id: 1a2b3c4d-42
+        data: {"seq": 42, "ts": "...", "level": "INFO", ...}
 
+    A reconnecting client may send the last ID it received in the
+    ``Last-Event-ID`` header, and the backfill then only contains the entries
+    it missed.
     """
 
     def on_connection_close(self):
@@ -178,6 +303,7 @@ class LogStreamController(BaseAPIController):
         self._sse_closed = True
         if hasattr(self, "_sse_queue"):
             self._sse_queue.put_nowait(_STREAM_CLOSED)
+        super().on_connection_close()
 
     @require_admin
     async def get(self):
@@ -187,9 +313,12 @@ class LogStreamController(BaseAPIController):
             403 if not admin.
         """
         source = _parse_source(self.get_argument("source", "server"))
-        level_name = self.get_argument("level", "").upper()
-        search = self.get_argument("search", "").lower()
-        username_filter = self.get_argument("username", "").lower()
+        try:
+            query = _build_query(self)
+        except ValueError:
+            self.set_status(400)
+            await self.finish({"message": "Invalid since or until timestamp"})
+            return
 
         self._sse_closed = False
 
@@ -199,21 +328,25 @@ class LogStreamController(BaseAPIController):
         self.set_header("X-Accel-Buffering", "no")
 
         buffer = get_client_buffer() if source == "client" else get_server_buffer()
+        fanout = _get_fanout((source, query), buffer)
 
-        # Send backfill — all existing entries that pass the current filters.
-        for entry in _filter_entries(
-            buffer.get_entries(), level_name, search, username_filter, source
-        ):
-            self.write(f"data: {json.dumps(entry)}\n\n")
-        await self.flush()
-
-        # Subscribe to future entries.
+        # Subscribe before taking the backfill so no entry is missed between the
+        # two; entries already in the backfill are skipped by sequence number.
         queue: asyncio.Queue = asyncio.Queue()
         self._sse_queue = queue
-
-        unsubscribe = buffer.subscribe(queue.put_nowait)
+        fanout.add(queue)
 
         try:
+            last_seq = _parse_last_event_id(
+                self.request.headers.get("Last-Event-ID"), buffer
+            )
+            for entry in run_query(
+                buffer, query, buffer.count_entries(), after=last_seq
+            ).entries:
+                self.write(_format_event(buffer, entry))
+                last_seq = entry.seq
+            await self.flush()
+
             while True:
                 try:
                     entry = await asyncio.wait_for(queue.get(), timeout=20.0)
@@ -225,16 +358,18 @@ class LogStreamController(BaseAPIController):
                     await self.flush()
                     continue
 
+                # Write everything already queued before flushing
+                while entry is not _STREAM_CLOSED:
+                    if entry.seq > last_seq:
+                        self.write(_format_event(buffer, entry))
+                        last_seq = entry.seq
+                    if queue.empty():
+                        break
+                    entry = queue.get_nowait()
                 if entry is _STREAM_CLOSED:
                     break
-
-                matched = _filter_entries(
-                    [entry], level_name, search, username_filter, source
-                )
-                if matched:
-                    self.write(f"data: {json.dumps(matched[0])}\n\n")
-                    await self.flush()
+                await self.flush()
         except Exception:  # noqa: BLE001
             pass
         finally:
-            unsubscribe()
+            fanout.remove(queue)
@@ -0,0 +1,50 @@
+from utils.web.base_controller import BaseAPIController
+from utils.web.route import ApiRoute, ApiVersion
+from utils.web.web_decorators import api_authenticated, require_admin
+
+
+_MAX_LIMIT = 100
+
+
+@ApiRoute("debug/queries", ApiVersion.V1)
+class QueryProfilerController(BaseAPIController):
+    """
+    Report of the endpoints executing the most SQL statements per request.
+
+    Statements are only profiled when the server runs in debug mode, see
+    :mod:`utils.web.query_profiler`. Each endpoint lists the statements it ran
+    repeatedly within a single request, which usually point to an N+1 query.
+    """
+
+    @api_authenticated
+    @require_admin
+    async def get(self):
+        """
+        Get the query report for recent requests.
+
+        Query parameters:
+            ``limit``: Most endpoints to return (default 20, max 100).
+
+        :returns: JSON response with ``enabled``, the number of ``requests``
+            included and the ``endpoints`` report.
+        """
+        try:
+            limit = min(int(self.get_argument("limit", "20")), _MAX_LIMIT)
+        except ValueError:
+            limit = 20
+
+        profiler = self.application.query_profiler
+        await self.finish(
+            {
+                "enabled": profiler.enabled,
+                "requests": len(profiler.history),
+                "endpoints": profiler.report(limit),
+            }
+        )
+
+    @api_authenticated
+    @require_admin
+    async def delete(self):
+        """Clear the query report."""
+        self.application.query_profiler.clear()
+        await self.finish({"message": "Query report cleared"})
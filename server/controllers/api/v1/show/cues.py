@@ -27,6 +27,7 @@ from models.show import Show
 from models.user import User
 from rbac.role import Role
 from schemas.schemas import CueGroupSchema, CueSchema, CueTypeSchema
+from schemas.serializers import dump_cue_association
 from utils.web.base_controller import BaseAPIController
 from utils.web.route import ApiRoute, ApiVersion
 from utils.web.web_decorators import no_live_session, requires_show
@@ -237,7 +238,6 @@ class CueController(BaseAPIController):
     def get(self):
         current_show = self.get_current_show()
         show_id = current_show["id"]
-        cue_schema = CueSchema()
         group_schema = CueGroupSchema()
 
         with self.make_session() as session:
@@ -265,11 +265,7 @@ class CueController(BaseAPIController):
                 cues = collections.defaultdict(list)
                 groups_seen: dict = {}
                 for association in revision_cues:
-                    cue_data = cue_schema.dump(association.cue)
-                    cue_data["group_id"] = association.group_id
-                    cue_data["sort_order"] = association.sort_order
-                    cue_data["line_position"] = association.line_position
-                    cues[association.line_id].append(cue_data)
+                    cues[association.line_id].append(dump_cue_association(association))
                     if association.group_id and association.group_id not in groups_seen:
                         groups_seen[association.group_id] = association.group
 
@@ -1,5 +1,4 @@
-from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import List, Optional
 
 from sqlalchemy import select
 from tornado import escape
@@ -8,22 +7,29 @@ from controllers.api.constants import (
     ERROR_CHARACTER_NOT_FOUND,
     ERROR_ID_MISSING,
     ERROR_INVALID_ID,
+    ERROR_JOB_CANCELLED,
+    ERROR_JOB_FAILED,
+    ERROR_JOB_NOT_FOUND,
     ERROR_MICROPHONE_NOT_FOUND,
     ERROR_NAME_ALREADY_TAKEN,
     ERROR_NAME_MISSING,
     ERROR_SCENE_NOT_FOUND,
     ERROR_SHOW_NOT_FOUND,
 )
+from digi_server.logger import get_logger
 from models.mics import Microphone, MicrophoneAllocation
 from models.script import Script, ScriptRevision
-from models.show import Act, Character, Scene, Show
+from models.show import Character, Scene, Show
 from rbac.role import Role
 from schemas.schemas import MicrophoneAllocationSchema, MicrophoneSchema
-from utils.show.mic_assignment import (
-    SceneMetadata,
-    collect_character_appearances,
-    find_best_mic,
+from services.job_service import Job, JobCancelled, JobFailed
+from utils.show.mic_suggestions import (
+    GAP_MODES,
+    SOLVERS,
+    build_suggestion_input,
+    compute_suggestions,
 )
+from utils.show.show_structure import get_show_structure
 from utils.web.base_controller import BaseAPIController
 from utils.web.route import ApiRoute, ApiVersion
 from utils.web.web_decorators import no_live_session, requires_show
@@ -288,11 +294,122 @@ class MicrophoneAllocationsController(BaseAPIController):
                 await self.finish({"message": ERROR_SHOW_NOT_FOUND})
 
 
+MIC_SUGGEST_JOB = "mic_suggest"
+
+
+async def _load_suggestion_input(controller, session, show: Show):
+    """
+    Validate a suggestion request and snapshot the show for the suggestion algorithm.
+
+    :param controller: The controller instance handling the request
+    :param session: SQLAlchemy session
+    :param show: Current show
+    :return: Input for :func:`compute_suggestions`, or None if the request was
+             rejected (the response has already been sent)
+    """
+    data = escape.json_decode(controller.request.body)
+
+    if "excluded_mics" not in data:
+        controller.set_status(400)
+        await controller.finish({"message": "excluded_mics missing"})
+        return None
+    excluded_mics: List[int] = data["excluded_mics"]
+
+    if "static_characters" not in data:
+        controller.set_status(400)
+        await controller.finish({"message": "static_characters missing"})
+        return None
+    static_characters: List[int] = data["static_characters"]
+
+    if "gap_mode" not in data:
+        controller.set_status(400)
+        await controller.finish({"message": "gap_mode missing"})
+        return None
+    gap_mode: str = data["gap_mode"]
+    if gap_mode not in GAP_MODES:
+        controller.set_status(400)
+        await controller.finish({"message": "Invalid gap_mode value"})
+        return None
+
+    solver: str = data.get("solver", "greedy")
+    if solver not in SOLVERS:
+        controller.set_status(400)
+        await controller.finish({"message": "Invalid solver value"})
+        return None
+
+    # Scenes in show order, split into groups which are not separated by an interval
+    structure = get_show_structure(session, show.id)
+    if not structure.act_ids:
+        controller.set_status(400)
+        await controller.finish({"message": "No acts in show"})
+        return None
+    ordered_scenes = [list(scene_group) for scene_group in structure.scene_groups]
+
+    if not ordered_scenes:
+        controller.set_status(400)
+        await controller.finish({"message": "No scenes in show"})
+        return None
+
+    # Get available microphones
+    mics: List[Microphone] = session.scalars(
+        select(Microphone).where(Microphone.show_id == show.id)
+    ).all()
+    if not mics:
+        controller.set_status(400)
+        await controller.finish({"message": "No microphones available"})
+        return None
+    available_mic_ids = [mic.id for mic in mics]
+
+    # Filter out excluded mics - this list is used in the allocation algorithm
+    if all(mic_id in excluded_mics for mic_id in available_mic_ids):
+        controller.set_status(400)
+        await controller.finish({"message": "No microphones available for allocation"})
+        return None
+
+    # Get script and current revision
+    script: Script = session.scalars(
+        select(Script).where(Script.show_id == show.id)
+    ).first()
+    if not script or not script.current_revision:
+        controller.set_status(400)
+        await controller.finish({"message": "No script or current revision available"})
+        return None
+    revision: ScriptRevision = session.get(ScriptRevision, script.current_revision)
+
+    return build_suggestion_input(
+        session,
+        revision,
+        ordered_scenes,
+        available_mic_ids,
+        excluded_mics,
+        static_characters,
+        gap_mode,
+        solver,
+    )
+
+
+def _submit_suggestion_job(controller, show_id: int, suggestion_input) -> Job:
+    return controller.application.job_service.submit(
+        MIC_SUGGEST_JOB,
+        show_id,
+        controller.current_user["id"] if controller.current_user else None,
+        suggestion_input.dedupe_key,
+        compute_suggestions,
+        suggestion_input,
+    )
+
+
 @ApiRoute("show/microphones/suggest", ApiVersion.V1)
 class MicrophoneAutoAssignmentController(BaseAPIController):
     @requires_show
     @no_live_session
     async def post(self):
+        """
+        Suggest mic allocations, waiting for the result.
+
+        The suggestions are computed in a worker process, so other requests continue
+        to be served in the meantime.
+        """
         current_show = self.get_current_show()
         show_id = current_show["id"]
 
@@ -300,295 +417,109 @@ class MicrophoneAutoAssignmentController(BaseAPIController):
             show = session.get(Show, show_id)
             if show:
                 self.requires_role(show, Role.WRITE)
-                data = escape.json_decode(self.request.body)
-
-                if "excluded_mics" not in data:
-                    self.set_status(400)
-                    await self.finish({"message": "excluded_mics missing"})
-                    return
-                excluded_mics: List[int] = data["excluded_mics"]
-
-                if "static_characters" not in data:
-                    self.set_status(400)
-                    await self.finish({"message": "static_characters missing"})
-                    return
-                static_characters: List[int] = data["static_characters"]
-
-                if "gap_mode" not in data:
-                    self.set_status(400)
-                    await self.finish({"message": "gap_mode missing"})
-                    return
-                gap_mode: str = data["gap_mode"]
-                if gap_mode not in ["leave_gaps", "no_gaps"]:
-                    self.set_status(400)
-                    await self.finish({"message": "Invalid gap_mode value"})
-                    return
-
-                # Get all scenes in the show, and construct a list of lists, where each inner list
-                # is a list of scenes in order which are not separated by an interval
-                ordered_acts: List[Act] = []
-                iter_act: Act = show.first_act
-                if not iter_act:
-                    self.set_status(400)
-                    await self.finish({"message": "No acts in show"})
-                    return
-                while iter_act:
-                    ordered_acts.append(iter_act)
-                    iter_act = iter_act.next_act
-
-                ordered_scenes: List[List[Scene]] = []
-                current_scenes = []
-                for act in ordered_acts:
-                    iter_scene = act.first_scene
-                    while iter_scene:
-                        current_scenes.append(iter_scene)
-                        iter_scene = iter_scene.next_scene
-                    if act.interval_after:
-                        ordered_scenes.append(current_scenes)
-                        current_scenes = []
-                if current_scenes:
-                    ordered_scenes.append(current_scenes)
-
-                if not ordered_scenes:
-                    self.set_status(400)
-                    await self.finish({"message": "No scenes in show"})
-                    return
-
-                # Get available microphones
-                mics: List[Microphone] = session.scalars(
-                    select(Microphone).where(Microphone.show_id == show.id)
-                ).all()
-                if not mics:
-                    self.set_status(400)
-                    await self.finish({"message": "No microphones available"})
-                    return
-                available_mic_ids = [mic.id for mic in mics]
-
-                # Filter out excluded mics - this list is used in the allocation algorithm
-                allocatable_mic_ids = [
-                    mic_id
-                    for mic_id in available_mic_ids
-                    if mic_id not in excluded_mics
-                ]
-                if not allocatable_mic_ids:
-                    self.set_status(400)
-                    await self.finish(
-                        {"message": "No microphones available for allocation"}
-                    )
+                suggestion_input = await _load_suggestion_input(self, session, show)
+                if suggestion_input is None:
                     return
+            else:
+                self.set_status(404)
+                await self.finish({"message": ERROR_SHOW_NOT_FOUND})
+                return
+
+        job = _submit_suggestion_job(self, show_id, suggestion_input)
+        try:
+            result = await self.application.job_service.wait(job)
+        except JobCancelled:
+            self.set_status(409)
+            await self.finish({"message": ERROR_JOB_CANCELLED})
+            return
+        except JobFailed:
+            self.set_status(500)
+            await self.finish({"message": ERROR_JOB_FAILED})
+            return
+
+        if suggestion_input.solver == "optimal" and result["costs"]["optimal"] is None:
+            get_logger().warning(
+                "Optimal mic solver exceeded time budget, using greedy allocation"
+            )
+
+        # Return response
+        self.set_status(200)
+        await self.finish(result)
+
+
+@ApiRoute("show/microphones/suggest/jobs", ApiVersion.V1)
+class MicrophoneAutoAssignmentJobController(BaseAPIController):
+    @requires_show
+    @no_live_session
+    async def post(self):
+        """
+        Start computing mic allocation suggestions in the background.
+
+        Takes the same body as ``show/microphones/suggest`` and returns the job
+        straight away. Progress and the result are sent to the requesting user over
+        WebSocket as ``JOB_UPDATE`` messages, and can be fetched with GET. A request
+        with identical inputs to an unfinished or recently completed job returns
+        that job rather than starting another.
+        """
+        current_show = self.get_current_show()
+        show_id = current_show["id"]
 
-                # Get script and current revision
-                script: Script = session.scalars(
-                    select(Script).where(Script.show_id == show.id)
-                ).first()
-                if not script or not script.current_revision:
-                    self.set_status(400)
-                    await self.finish(
-                        {"message": "No script or current revision available"}
-                    )
+        with self.make_session() as session:
+            show = session.get(Show, show_id)
+            if show:
+                self.requires_role(show, Role.WRITE)
+                suggestion_input = await _load_suggestion_input(self, session, show)
+                if suggestion_input is None:
                     return
-                revision: ScriptRevision = session.get(
-                    ScriptRevision, script.current_revision
-                )
-
-                # Load existing allocations
-                existing_allocations: List[MicrophoneAllocation] = session.scalars(
-                    select(MicrophoneAllocation).where(
-                        MicrophoneAllocation.mic_id.in_(available_mic_ids)
-                    )
-                ).all()
-
-                # Collect character appearances (only unallocated pairs)
-                unallocated_appearances, character_total_lines = (
-                    collect_character_appearances(
-                        session, revision, existing_allocations
-                    )
-                )
-
-                # Sort characters by total line count (descending) - high priority first
-                sorted_characters = sorted(
-                    character_total_lines.keys(),
-                    key=lambda char_id: character_total_lines[char_id],
-                    reverse=True,
-                )
-
-                # Build comprehensive scene metadata (replaces all_scene_ids and scene_position_map)
-                scene_metadata: Dict[int, SceneMetadata] = {}
-                position = 0
-                for group_idx, scene_group in enumerate(ordered_scenes):
-                    for scene_idx, scene in enumerate(scene_group):
-                        scene_metadata[scene.id] = SceneMetadata(
-                            scene_id=scene.id,
-                            group_idx=group_idx,
-                            scene_idx=scene_idx,
-                            position=position,
-                        )
-                        position += 1
-
-                # Derive other structures from metadata
-                all_scene_ids = set(scene_metadata.keys())
-
-                # Initialize mic usage tracker with existing allocations
-                mic_usage_tracker: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
-                for alloc in existing_allocations:
-                    mic_usage_tracker[alloc.mic_id].append(
-                        (alloc.scene_id, alloc.character_id)
-                    )
+            else:
+                self.set_status(404)
+                await self.finish({"message": ERROR_SHOW_NOT_FOUND})
+                return
 
-                new_allocations: List[Tuple[int, int, int]] = []
-                hints = []
-
-                # Assign mics per static character allocation
-                static_mic_options = {
-                    mic_id
-                    for mic_id in allocatable_mic_ids
-                    if mic_id not in mic_usage_tracker
-                }
-                static_sorted_characters = [
-                    char_id
-                    for char_id in sorted_characters
-                    if char_id in static_characters
-                ]
-                for character_id in static_sorted_characters:
-                    # Check if character already has an allocation, skip and record hint if so
-                    if any(
-                        alloc.character_id == character_id
-                        for alloc in existing_allocations
-                    ):
-                        hints.append(
-                            {
-                                "character_id": character_id,
-                                "reason": "Character already has existing microphone allocation",
-                                "type": "static",
-                            }
-                        )
-                        continue
-
-                    # Try get next available static mic, if there are not any left, skip and record hint
-                    try:
-                        next_mic = static_mic_options.pop()
-                    except KeyError:
-                        hints.append(
-                            {
-                                "character_id": character_id,
-                                "reason": "No available microphone for static assignment",
-                                "type": "static",
-                            }
-                        )
-                    else:
-                        # Record new allocation for each scene
-                        for scene_id in all_scene_ids:
-                            new_allocations.append((next_mic, scene_id, character_id))
-                            mic_usage_tracker[next_mic].append((scene_id, character_id))
-
-                # Assign mics per character
-                for character_id in sorted_characters:
-                    # Skip static characters since they are already processed
-                    if character_id in static_sorted_characters:
-                        continue
-
-                    # Get all scenes where this character needs a mic (sorted by scene order)
-                    character_scenes = [
-                        (scene_id, line_count)
-                        for (
-                            scene_id,
-                            char_id,
-                        ), line_count in unallocated_appearances.items()
-                        if char_id == character_id
-                    ]
-                    # Sort by scene position (chronological order)
-                    character_scenes.sort(
-                        key=lambda x: (
-                            scene_metadata[x[0]].position
-                            if x[0] in scene_metadata
-                            else 0
-                        )
-                    )
+        job = _submit_suggestion_job(self, show_id, suggestion_input)
+        self.set_status(202)
+        await self.finish(job.as_json())
 
-                    # Assign mic for each scene
-                    for scene_id, line_count in character_scenes:
-                        best_mic = find_best_mic(
-                            session,
-                            character_id,
-                            scene_id,
-                            allocatable_mic_ids,
-                            mic_usage_tracker,
-                            existing_allocations,
-                            new_allocations,
-                            scene_metadata,
-                        )
-
-                        if best_mic:
-                            # Record new allocation
-                            new_allocations.append((best_mic, scene_id, character_id))
-                            mic_usage_tracker[best_mic].append((scene_id, character_id))
-                        else:
-                            # No available mic - record hint
-                            hints.append(
-                                {
-                                    "character_id": character_id,
-                                    "scene_id": scene_id,
-                                    "reason": "No available microphone",
-                                    "type": "allocation",
-                                }
-                            )
+    @requires_show
+    async def get(self):
+        job = await self._get_job()
+        if job:
+            self.set_status(200)
+            await self.finish(job.as_json())
 
-                # Build response in PATCH-compatible format
-                suggestions: Dict[int, Dict[int, int]] = {}
-
-                # Include existing allocations in response (complete picture)
-                for alloc in existing_allocations:
-                    if alloc.mic_id not in suggestions:
-                        suggestions[alloc.mic_id] = {}
-                    suggestions[alloc.mic_id][alloc.scene_id] = alloc.character_id
-
-                # Add new suggestions
-                for mic_id, scene_id, character_id in new_allocations:
-                    if mic_id not in suggestions:
-                        suggestions[mic_id] = {}
-                    suggestions[mic_id][scene_id] = character_id
-
-                # Process gap mode if needed
-                if gap_mode == "no_gaps":
-                    for mic_id, mic_allocations in suggestions.items():
-                        seen_scenes = []
-                        single_character = True
-                        character_id = None
-                        # For each scene, see whether the same character is assigned to the mic
-                        for scene_id, char_id in mic_allocations.items():
-                            seen_scenes.append(scene_id)
-                            if character_id is not None and char_id != character_id:
-                                single_character = False
-                                break
-                            character_id = char_id
-
-                        # Only proceed if a single character is assigned to this mic
-                        if not single_character:
-                            continue
-
-                        # Fill in gaps for scenes where the character wasn't assigned a mic
-                        gapped_scenes = all_scene_ids - set(seen_scenes)
-                        if gapped_scenes:
-                            hints.append(
-                                {
-                                    "character_id": character_id,
-                                    "reason": "Filled gap in microphone assignment",
-                                    "type": "gap_fill",
-                                    "scenes": list(gapped_scenes),
-                                }
-                            )
-                            for scene_id in gapped_scenes:
-                                mic_allocations[scene_id] = character_id
+    @requires_show
+    async def delete(self):
+        job = await self._get_job()
+        if job:
+            cancelled = await self.application.job_service.cancel(job.id)
+            if not cancelled:
+                self.set_status(409)
+                await self.finish({"message": "Job has already finished"})
+                return
+            self.set_status(200)
+            await self.finish(job.as_json())
+
+    async def _get_job(self) -> Optional[Job]:
+        current_show = self.get_current_show()
+        show_id = current_show["id"]
 
-                # Return response
-                self.set_status(200)
-                await self.finish(
-                    {
-                        "allocations": suggestions,
-                        "hints": hints,
-                    }
-                )
+        job_id = self.get_argument("job_id", None)
+        if not job_id:
+            self.set_status(400)
+            await self.finish({"message": ERROR_ID_MISSING})
+            return None
 
-            else:
+        with self.make_session() as session:
+            show = session.get(Show, show_id)
+            if not show:
                 self.set_status(404)
                 await self.finish({"message": ERROR_SHOW_NOT_FOUND})
+                return None
+            self.requires_role(show, Role.WRITE)
+
+        job = self.application.job_service.get(job_id)
+        if not job or job.kind != MIC_SUGGEST_JOB or job.show_id != show_id:
+            self.set_status(404)
+            await self.finish({"message": ERROR_JOB_NOT_FOUND})
+            return None
+        return job
@@ -2,6 +2,7 @@ import os
 from datetime import UTC, datetime
 
 from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
 from tornado import escape
 from tornado.web import MissingArgumentError
 
@@ -17,12 +18,15 @@ from models.script import (
     CompiledScript,
     Script,
     ScriptCuts,
+    ScriptLine,
     ScriptLineRevisionAssociation,
     ScriptRevision,
 )
 from models.show import Show
 from rbac.role import Role
 from schemas.schemas import ScriptRevisionsSchema
+from schemas.serializers import dump_script_line
+from utils.show.revision_diff import RevisionDiff, diff_revisions, load_cues
 from utils.web.base_controller import BaseAPIController
 from utils.web.route import ApiRoute, ApiVersion
 from utils.web.web_decorators import no_live_session, requires_show
@@ -367,3 +371,129 @@ class ScriptCurrentRevisionController(BaseAPIController):
             else:
                 self.set_status(404)
                 await self.finish({"message": ERROR_SHOW_NOT_FOUND})
+
+
+@ApiRoute("show/script/revisions/diff", ApiVersion.V1)
+class ScriptRevisionDiffController(BaseAPIController):
+    @requires_show
+    async def get(self):
+        """
+        Compare two revisions of the current script, see
+        :mod:`utils.show.revision_diff`. The changes are streamed one page at a
+        time, in page order.
+
+        Query parameters:
+            ``from``: ID of the old revision.
+            ``to``: ID of the new revision.
+            ``page``: Only return the changes on this page (optional).
+
+        :returns: JSON response with the ``summary`` of changes and a list of
+            ``pages``, each with its ``lines``, ``cues`` and ``cuts`` changes.
+        """
+        arguments = {}
+        for name in ("from", "to", "page"):
+            value = self.get_query_argument(name, None)
+            if value is None and name == "page":
+                continue
+            try:
+                arguments[name] = int(value)
+            except (TypeError, ValueError):
+                self.set_status(400)
+                await self.finish({"message": f"{name} must be an integer"})
+                return
+
+        current_show = self.get_current_show()
+        with self.make_session() as session:
+            script: Script = session.scalars(
+                select(Script).where(Script.show_id == current_show["id"])
+            ).first()
+            if not script:
+                self.set_status(404)
+                await self.finish({"message": ERROR_SCRIPT_NOT_FOUND})
+                return
+
+            for name in ("from", "to"):
+                revision = session.get(ScriptRevision, arguments[name])
+                if not revision:
+                    self.set_status(404)
+                    await self.finish({"message": ERROR_SCRIPT_REVISION_NOT_FOUND})
+                    return
+                if revision.script_id != script.id:
+                    self.set_status(400)
+                    await self.finish(
+                        {"message": "Revision is not for the current script"}
+                    )
+                    return
+
+            diff = diff_revisions(session, arguments["from"], arguments["to"])
+            pages = diff.by_page()
+            if "page" in arguments:
+                pages = {
+                    page: changes
+                    for page, changes in pages.items()
+                    if page == arguments["page"]
+                }
+
+            self.set_status(200)
+            self.set_header("Content-Type", "application/json; charset=UTF-8")
+            self.write(
+                escape.json_encode(
+                    {
+                        "from_revision": diff.from_revision_id,
+                        "to_revision": diff.to_revision_id,
+                        "summary": diff.summary(),
+                    }
+                )[:-1]
+                + ', "pages": ['
+            )
+            for index, (page, changes) in enumerate(pages.items()):
+                if index:
+                    self.write(",")
+                self.write(escape.json_encode(self._page(session, page, changes)))
+                await self.flush()
+            self.write("]}")
+        await self.finish()
+
+    @staticmethod
+    def _page(session, page: int, changes: RevisionDiff) -> dict:
+        line_ids = {change.line_id for change in changes.lines}
+        line_ids.update(change.from_line_id for change in changes.lines)
+        lines = {
+            line.id: dump_script_line(line)
+            for line in session.scalars(
+                select(ScriptLine)
+                .where(ScriptLine.id.in_(line_ids - {None}))
+                .options(selectinload(ScriptLine.line_parts))
+            )
+        }
+        cues = load_cues(session, {change.cue_id for change in changes.cues})
+        return {
+            "page": page,
+            "lines": [
+                {
+                    "type": change.kind,
+                    "line": lines.get(change.line_id),
+                    "from_line": lines.get(change.from_line_id),
+                    "from_page": change.from_page,
+                }
+                for change in changes.lines
+            ],
+            "cues": [
+                {
+                    "type": change.kind,
+                    "cue_id": change.cue_id,
+                    "line_id": change.line_id,
+                    "from_line_id": change.from_line_id,
+                    **cues.get(change.cue_id, {}),
+                }
+                for change in changes.cues
+            ],
+            "cuts": [
+                {
+                    "type": change.kind,
+                    "line_id": change.line_id,
+                    "part_index": change.part_index,
+                }
+                for change in changes.cuts
+            ],
+        }
@@ -1,3 +1,4 @@
+import gzip
 from datetime import UTC, datetime
 from functools import partial
 from typing import List, Optional
@@ -20,9 +21,10 @@ from models.script import (
 )
 from models.show import Show
 from rbac.role import Role
-from schemas.schemas import ScriptLineSchema
+from schemas.serializers import dump_script_line
 from utils.show.line_type_validator import LineTypeValidatorRegistry
 from utils.web.base_controller import BaseAPIController
+from utils.web.codec import JSON, quality_values
 from utils.web.route import ApiRoute, ApiVersion
 from utils.web.web_decorators import no_live_session, requires_show
 
@@ -42,8 +44,6 @@ class ScriptController(BaseAPIController):
 
         page = int(page)
 
-        line_schema = ScriptLineSchema()
-
         with self.make_session() as session:
             show = session.get(Show, show_id)
             if show:
@@ -89,7 +89,7 @@ class ScriptController(BaseAPIController):
                     if line_revision.line.page != page:
                         break
 
-                    lines.append(line_schema.dump(line_revision.line))
+                    lines.append(dump_script_line(line_revision.line))
                     line_revision = session.get(
                         ScriptLineRevisionAssociation,
                         (revision.id, line_revision.next_line_id),
@@ -703,16 +703,29 @@ class CompiledScriptController(BaseAPIController):
                     self.finish({"message": "Script does not have a current revision"})
                     return
 
-                compiled_script = CompiledScript.load_compiled_script(
-                    self.application, revision.id
-                )
-                if not compiled_script:
+                encoded = CompiledScript.load_encoded(self.application, revision.id)
+                if encoded is None or CompiledScript.is_empty(encoded):
                     self.set_status(404)
                     self.finish({"message": "Script does not have a compiled form"})
                     return
 
                 self.set_status(200)
-                self.finish(compiled_script)
+                self.set_header("Vary", "Accept, Accept-Encoding")
+                codec = self.response_codec
+                self.set_header("Content-Type", codec.content_type)
+                if codec is not JSON:
+                    self.finish(codec.dumps(CompiledScript.decode(encoded)))
+                    return
+                # Compiled scripts are stored as gzip compressed JSON, so can be
+                # sent as they are to clients which accept gzip
+                accepted = quality_values(
+                    self.request.headers.get("Accept-Encoding", "")
+                )
+                if accepted.get("gzip", accepted.get("*", 0.0)) > 0:
+                    self.set_header("Content-Encoding", "gzip")
+                    self.finish(encoded)
+                else:
+                    self.finish(gzip.decompress(encoded))
             else:
                 self.set_status(404)
                 self.finish({"message": ERROR_SHOW_NOT_FOUND})
@@ -0,0 +1,111 @@
+from sqlalchemy import select
+
+from controllers.api.constants import (
+    ERROR_SCRIPT_NOT_FOUND,
+    ERROR_SCRIPT_REVISION_NOT_FOUND,
+    ERROR_SHOW_NOT_FOUND,
+)
+from models.script import Script, ScriptRevision
+from models.show import Show
+from utils.show.script_search import build_match_query, count_matches, search_lines
+from utils.web.base_controller import BaseAPIController
+from utils.web.route import ApiRoute, ApiVersion
+from utils.web.web_decorators import requires_show
+
+
+_DEFAULT_LIMIT = 50
+_MAX_LIMIT = 200
+
+
+@ApiRoute("show/script/search", ApiVersion.V1)
+class ScriptSearchController(BaseAPIController):
+    """Full-text search over the lines of a script revision.
+
+    Query parameters
+    ----------------
+    q : str
+        Search text (required). Every word must match, and words are matched
+        as prefixes.
+    character_id : int
+        Restrict results to lines spoken by this character, either directly or
+        as part of a character group. May be given more than once.
+    revision_id : int
+        Revision to search, defaults to the current revision of the script.
+    limit : int
+        Maximum number of results to return (capped at 200, default 50).
+    offset : int
+        Number of results to skip (default 0).
+    """
+
+    @requires_show
+    def get(self):
+        current_show = self.get_current_show()
+        show_id = current_show["id"]
+
+        query = self.get_query_argument("q", "")
+        match_query = build_match_query(query)
+        if not match_query:
+            self.set_status(400)
+            self.finish({"message": "Search query missing"})
+            return
+
+        try:
+            character_ids = [
+                int(character_id)
+                for character_id in self.get_query_arguments("character_id")
+            ]
+            revision_id = self.get_query_argument("revision_id", None)
+            if revision_id is not None:
+                revision_id = int(revision_id)
+            limit = int(self.get_query_argument("limit", str(_DEFAULT_LIMIT)))
+            offset = int(self.get_query_argument("offset", "0"))
+        except ValueError:
+            self.set_status(400)
+            self.finish({"message": "Invalid search parameters"})
+            return
+        limit = max(min(limit, _MAX_LIMIT), 1)
+        offset = max(offset, 0)
+
+        with self.make_session() as session:
+            show = session.get(Show, show_id)
+            if not show:
+                self.set_status(404)
+                self.finish({"message": ERROR_SHOW_NOT_FOUND})
+                return
+
+            script: Script = session.scalars(
+                select(Script).where(Script.show_id == show.id)
+            ).first()
+            if not script:
+                self.set_status(404)
+                self.finish({"message": ERROR_SCRIPT_NOT_FOUND})
+                return
+
+            if revision_id is None:
+                revision_id = script.current_revision
+            revision: ScriptRevision = (
+                session.get(ScriptRevision, revision_id) if revision_id else None
+            )
+            if not revision or revision.script_id != script.id:
+                self.set_status(404)
+                self.finish({"message": ERROR_SCRIPT_REVISION_NOT_FOUND})
+                return
+
+            total = count_matches(session, revision.id, match_query, character_ids)
+            results = search_lines(
+                session,
+                revision.id,
+                match_query,
+                character_ids=character_ids,
+                limit=limit,
+                offset=offset,
+            )
+
+            self.set_status(200)
+            self.finish(
+                {
+                    "results": [result.as_json() for result in results],
+                    "total": total,
+                    "revision_id": revision.id,
+                }
+            )
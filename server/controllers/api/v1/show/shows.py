@@ -1,3 +1,4 @@
+import os
 from datetime import UTC, datetime
 
 from dateutil import parser
@@ -14,6 +15,7 @@ from models.script import Script, ScriptRevision
 from models.show import Show, ShowScriptType
 from rbac.role import Role
 from schemas.schemas import ShowSchema
+from utils.show.show_deletion import delete_show
 from utils.web.base_controller import BaseAPIController
 from utils.web.route import ApiRoute, ApiVersion
 from utils.web.web_decorators import (
@@ -258,24 +260,25 @@ class ShowController(BaseAPIController):
             return
 
         with self.make_session() as session:
-            show: Show = session.get(Show, show_id)
-            if show:
-                # Break circular FKs before cascade: shows.current_session_id → showsession,
-                # and script.current_revision → script_revisions.
-                show.current_session_id = None
-                for script in show.scripts:
-                    script.current_revision = None
-                session.flush()
-                with session.no_autoflush:
-                    session.delete(show)
-                session.commit()
-
-                self.set_status(200)
-                await self.application.ws_send_to_all("NOOP", "GET_SHOW_DETAILS", {})
-                await self.finish({"message": "Successfully deleted show"})
-            else:
+            result = delete_show(session, show_id)
+            if not result:
                 self.set_status(404)
                 await self.finish({"message": ERROR_SHOW_NOT_FOUND})
+                return
+            session.commit()
+
+        get_logger().info(
+            f"Deleted show {show_id} ({result.total_rows} rows): {result.row_counts}"
+        )
+        for data_path in result.compiled_script_paths:
+            try:
+                os.remove(data_path)
+            except OSError:
+                get_logger().exception("Failed to remove compiled script file")
+
+        self.set_status(200)
+        await self.application.ws_send_to_all("NOOP", "GET_SHOW_DETAILS", {})
+        await self.finish({"message": "Successfully deleted show"})
 
 
 @ApiRoute("show/script_modes", ApiVersion.V1)
@@ -21,6 +21,7 @@ from models.show import Scene, Show
 from models.stage import Props, Scenery
 from rbac.role import Role
 from utils.show.block_computation import (
+    delete_orphaned_assignments_for_items,
     delete_orphaned_assignments_for_prop,
     delete_orphaned_assignments_for_scenery,
 )
@@ -446,3 +447,152 @@ async def handle_allocation_delete(
             await controller.application.ws_send_to_all(
                 "NOOP", "GET_CREW_ASSIGNMENTS", {}
             )
+
+
+async def handle_allocation_batch(
+    controller,
+    item_model,
+    item_id_key,
+    allocation_model,
+    allocation_item_fk,
+    ws_action,
+    error_item_not_found,
+):
+    """
+    Handle PATCH request for adding and removing many allocations at once.
+
+    The request body has ``add`` and ``remove`` lists of allocations, each given
+    as an object with the item ID (under ``item_id_key``) and ``scene_id``. Adding
+    an allocation which already exists, or removing one which does not, is not an
+    error. All changes are made in one transaction, orphaned crew assignments are
+    recomputed once per affected item, and a single update is broadcast.
+
+    :param controller: The controller instance
+    :param item_model: SQLAlchemy model class for the item (Props/Scenery)
+    :param item_id_key: Key in request data (e.g., 'props_id', 'scenery_id')
+    :param allocation_model: SQLAlchemy model class for allocation
+    :param allocation_item_fk: Name of FK column on allocation model (e.g., 'props_id')
+    :param ws_action: WebSocket action to send on success
+    :param error_item_not_found: Error constant for item not found
+    """
+    current_show = controller.get_current_show()
+    show_id = current_show["id"]
+
+    with controller.make_session() as session:
+        show = session.get(Show, show_id)
+        if not show:
+            controller.set_status(404)
+            await controller.finish({"message": ERROR_SHOW_NOT_FOUND})
+            return
+
+        controller.requires_role(show, Role.WRITE)
+        data = escape.json_decode(controller.request.body)
+
+        changes = {}
+        for key in ("add", "remove"):
+            entries = data.get(key, [])
+            if not isinstance(entries, list):
+                controller.set_status(400)
+                await controller.finish({"message": f"{key} must be a list"})
+                return
+            try:
+                changes[key] = {
+                    (int(entry[item_id_key]), int(entry["scene_id"]))
+                    for entry in entries
+                }
+            except (KeyError, TypeError, ValueError):
+                controller.set_status(400)
+                await controller.finish({"message": f"Invalid allocation in {key}"})
+                return
+        to_add, to_remove = changes["add"], changes["remove"]
+
+        if to_add & to_remove:
+            controller.set_status(400)
+            await controller.finish(
+                {"message": "Allocation cannot be both added and removed"}
+            )
+            return
+
+        # Validate every item and scene in one query each
+        changed = to_add | to_remove
+        item_ids = {item_id for item_id, _ in changed}
+        scene_ids = {scene_id for _, scene_id in changed}
+        show_item_ids = set(
+            session.scalars(
+                select(item_model.id).where(
+                    item_model.id.in_(item_ids), item_model.show_id == show_id
+                )
+            )
+        )
+        if show_item_ids != item_ids:
+            controller.set_status(404)
+            await controller.finish({"message": error_item_not_found})
+            return
+        show_scene_ids = set(
+            session.scalars(
+                select(Scene.id).where(
+                    Scene.id.in_(scene_ids), Scene.show_id == show_id
+                )
+            )
+        )
+        if show_scene_ids != scene_ids:
+            controller.set_status(404)
+            await controller.finish({"message": ERROR_SCENE_NOT_FOUND})
+            return
+
+        item_fk_attr = getattr(allocation_model, allocation_item_fk)
+        existing = {
+            (getattr(allocation, allocation_item_fk), allocation.scene_id): allocation
+            for allocation in session.scalars(
+                select(allocation_model).where(item_fk_attr.in_(item_ids))
+            )
+        }
+
+        new_allocations = [
+            allocation_model(**{allocation_item_fk: item_id, "scene_id": scene_id})
+            for item_id, scene_id in sorted(to_add - existing.keys())
+        ]
+        session.add_all(new_allocations)
+        removed = [existing[key] for key in sorted(to_remove & existing.keys())]
+        for allocation in removed:
+            session.delete(allocation)
+        # Flush so block computation sees the new allocations
+        session.flush()
+
+        # Delete any crew assignments that are now orphaned due to block boundary changes
+        affected_item_ids = {
+            getattr(allocation, allocation_item_fk)
+            for allocation in (*new_allocations, *removed)
+        }
+        deleted_assignment_ids = []
+        if affected_item_ids:
+            if item_model is Props:
+                deleted_assignment_ids = delete_orphaned_assignments_for_items(
+                    session, show, prop_ids=affected_item_ids
+                )
+            elif item_model is Scenery:
+                deleted_assignment_ids = delete_orphaned_assignments_for_items(
+                    session, show, scenery_ids=affected_item_ids
+                )
+
+        # Commit the entire operation atomically (allocations + orphan deletions)
+        session.commit()
+
+        controller.set_status(200)
+        await controller.finish(
+            {
+                "added": [allocation.id for allocation in new_allocations],
+                "removed": len(removed),
+                "deleted_assignment_ids": deleted_assignment_ids,
+                "message": "Successfully updated allocations",
+            }
+        )
+
+        if affected_item_ids:
+            await controller.application.ws_send_to_all("NOOP", ws_action, {})
+
+        # Also notify about crew assignment changes if any were deleted
+        if deleted_assignment_ids:
+            await controller.application.ws_send_to_all(
+                "NOOP", "GET_CREW_ASSIGNMENTS", {}
+            )
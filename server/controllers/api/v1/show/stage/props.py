@@ -13,6 +13,7 @@ from controllers.api.constants import (
     ERROR_SHOW_NOT_FOUND,
 )
 from controllers.api.v1.show.stage.helpers import (
+    handle_allocation_batch,
     handle_allocation_delete,
     handle_allocation_post,
     handle_type_delete,
@@ -317,3 +318,22 @@ class PropsAllocationController(BaseAPIController):
             allocation_item_fk="props_id",
             ws_action="GET_PROPS_ALLOCATIONS",
         )
+
+
+@ApiRoute("show/stage/props/allocations/batch", ApiVersion.V1)
+class PropsAllocationBatchController(BaseAPIController):
+    """Controller for adding and removing many props allocations at once."""
+
+    @requires_show
+    @no_live_session
+    async def patch(self):
+        """Apply a diff of props allocations in one transaction."""
+        await handle_allocation_batch(
+            self,
+            item_model=Props,
+            item_id_key="props_id",
+            allocation_model=PropsAllocation,
+            allocation_item_fk="props_id",
+            ws_action="GET_PROPS_ALLOCATIONS",
+            error_item_not_found=ERROR_PROP_NOT_FOUND,
+        )
@@ -12,6 +12,7 @@ from controllers.api.constants import (
     ERROR_SHOW_NOT_FOUND,
 )
 from controllers.api.v1.show.stage.helpers import (
+    handle_allocation_batch,
     handle_allocation_delete,
     handle_allocation_post,
     handle_type_delete,
@@ -324,3 +325,22 @@ class SceneryAllocationController(BaseAPIController):
             allocation_item_fk="scenery_id",
             ws_action="GET_SCENERY_ALLOCATIONS",
         )
+
+
+@ApiRoute("show/stage/scenery/allocations/batch", ApiVersion.V1)
+class SceneryAllocationBatchController(BaseAPIController):
+    """Controller for adding and removing many scenery allocations at once."""
+
+    @requires_show
+    @no_live_session
+    async def patch(self):
+        """Apply a diff of scenery allocations in one transaction."""
+        await handle_allocation_batch(
+            self,
+            item_model=Scenery,
+            item_id_key="scenery_id",
+            allocation_model=SceneryAllocation,
+            allocation_item_fk="scenery_id",
+            ws_action="GET_SCENERY_ALLOCATIONS",
+            error_item_not_found=ERROR_SCENERY_NOT_FOUND,
+        )
@@ -0,0 +1,103 @@
+import re
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from controllers.api.constants import ERROR_SHOW_NOT_FOUND
+from digi_server.logger import get_logger
+from models.show import Show
+from utils.show.show_transfer import (
+    ShowImportError,
+    export_show_gzip,
+    import_show,
+    iter_lines,
+)
+from utils.web.base_controller import BaseAPIController
+from utils.web.route import ApiRoute, ApiVersion
+from utils.web.web_decorators import api_authenticated, require_admin
+
+
+@ApiRoute("show/export", ApiVersion.V1)
+class ShowExportController(BaseAPIController):
+    @api_authenticated
+    @require_admin
+    async def get(self):
+        """
+        Download a show as gzip-compressed JSON Lines, see
+        :mod:`utils.show.show_transfer`. The export is streamed as it is read from
+        the database.
+
+        Query parameters:
+            ``show_id``: Show to export (default: the current show).
+        """
+        show_id = self.get_query_argument("show_id", None)
+        if show_id is None:
+            current_show = self.get_current_show()
+            show_id = current_show["id"] if current_show else None
+        try:
+            show_id = int(show_id)
+        except (TypeError, ValueError):
+            self.set_status(400)
+            await self.finish({"message": "show_id must be an integer"})
+            return
+
+        with self.make_session() as session:
+            show_name = session.scalar(select(Show.name).where(Show.id == show_id))
+            if show_name is None:
+                self.set_status(404)
+                await self.finish({"message": ERROR_SHOW_NOT_FOUND})
+                return
+
+            file_name = re.sub(r"[^\w.-]+", "_", show_name).strip("_") or "show"
+            self.set_header("Content-Type", "application/gzip")
+            self.set_header(
+                "Content-Disposition",
+                f'attachment; filename="{file_name}.digiscript.jsonl.gz"',
+            )
+            for chunk in export_show_gzip(session, show_id):
+                self.write(chunk)
+                await self.flush()
+        await self.finish()
+
+
+@ApiRoute("show/import", ApiVersion.V1)
+class ShowImportController(BaseAPIController):
+    @api_authenticated
+    @require_admin
+    async def post(self):
+        """
+        Create a new show from an export made by :class:`ShowExportController`.
+        The request body is the export, compressed or not. Every row is inserted
+        in a single transaction, so a failed import leaves nothing behind.
+
+        Query parameters:
+            ``load``: Make the new show the current show if ``true``.
+
+        :returns: JSON response with the new ``show_id`` and the ``row_counts``
+            imported into each table.
+        """
+        with self.make_session() as session:
+            try:
+                result = import_show(session, iter_lines(self.request.body))
+                session.commit()
+            except (ShowImportError, IntegrityError) as error:
+                session.rollback()
+                get_logger().warning(f"Show import failed: {error}")
+                self.set_status(400)
+                await self.finish({"message": f"Unable to import show: {error}"})
+                return
+
+        get_logger().info(
+            f"Imported show {result.show_id} with {result.total_rows} rows"
+        )
+        if self.get_query_argument("load", default="false").lower() == "true":
+            await self.application.digi_settings.set("current_show", result.show_id)
+
+        self.set_status(200)
+        await self.finish(
+            {
+                "message": "Successfully imported show",
+                "show_id": result.show_id,
+                "row_counts": result.row_counts,
+            }
+        )
@@ -1,7 +1,7 @@
 import os
+from typing import Optional
 
 from tornado.escape import url_unescape
-from tornado.ioloop import IOLoop
 from tornado.web import HTTPError
 from tornado_prometheus import MetricsHandler
 
@@ -9,6 +9,7 @@ from digi_server.logger import get_logger
 from utils.module_discovery import get_resource_path, import_modules, is_frozen
 from utils.web.base_controller import BaseAPIController, BaseController
 from utils.web.route import ApiRoute, ApiVersion, Route
+from utils.web.static_assets import write_asset
 
 
 IMPORTED_CONTROLLERS = {}
@@ -25,56 +26,50 @@ def import_all_controllers():
     get_logger().debug(f"Imported controllers: {list(IMPORTED_CONTROLLERS.keys())}")
 
 
+def index_path(ui: Optional[str] = None) -> str:
+    """
+    :param ui: Subdirectory of the static directory the UI is built to, or None for
+               the current UI
+    :return: Path of the UI's index.html
+    """
+    parts = ["static"] + ([ui] if ui else []) + [INDEX_HTML]
+    if is_frozen():
+        # In PyInstaller mode, use resource path
+        return get_resource_path(os.path.join(*parts))
+    # In source mode, use relative path
+    return os.path.join(os.path.abspath(os.path.dirname(__file__)), "..", *parts)
+
+
 class RootController(BaseController):
-    def get(self, _path):
-        if is_frozen():
-            full_path = get_resource_path(os.path.join("static", "ui-old", INDEX_HTML))
-        else:
-            file_path = os.path.join(
-                os.path.abspath(os.path.dirname(__file__)), "..", "static", "ui-old"
-            )
-            full_path = os.path.join(file_path, INDEX_HTML)
-        if not os.path.isfile(full_path):
+    async def get(self, _path):
+        asset = await self.application.static_assets.load(index_path("ui-old"))
+        if asset is None:
             raise HTTPError(404)
-        with open(full_path, "r", encoding="utf-8") as file:
-            self.write(file.read())
+        write_asset(self, asset)
 
 
 class RootControllerV3(BaseController):
     async def get(self, path):
         if not path and not self.get_argument("_switch", None):
-            default_ui = await self.application.digi_settings.get("default_ui")
+            default_ui = self.application.digi_settings.snapshot["default_ui"]
             if default_ui == "old":
                 self.redirect("/ui-old/")
                 return
-        if is_frozen():
-            # In PyInstaller mode, use resource path
-            full_path = get_resource_path(os.path.join("static", INDEX_HTML))
-        else:
-            # In source mode, use relative path
-            file_path = os.path.join(
-                os.path.abspath(os.path.dirname(__file__)), "..", "static"
-            )
-            full_path = os.path.join(file_path, INDEX_HTML)
-
-        if not os.path.isfile(full_path):
-            get_logger().error(f"Index file not found: {full_path}")
-            raise HTTPError(404)
 
+        full_path = index_path()
         try:
-            content = await IOLoop.current().run_in_executor(
-                None, lambda: open(full_path, "r", encoding="utf-8").read()
-            )
-            self.write(content)
+            asset = await self.application.static_assets.load(full_path)
         except Exception as e:
             get_logger().error(f"Error serving {INDEX_HTML}: {str(e)}")
             raise HTTPError(500) from e
+        if asset is None:
+            get_logger().error(f"Index file not found: {full_path}")
+            raise HTTPError(404)
+        write_asset(self, asset)
 
 
 class StaticController(BaseController):
-    def get(self):
-        self.set_header("Content-Type", "")
-
+    async def get(self):
         uri = url_unescape(self.request.uri).strip(os.path.sep)
 
         if is_frozen():
@@ -89,23 +84,15 @@ class StaticController(BaseController):
                 uri,
             )
 
-        if not os.path.isfile(full_path):
-            get_logger().warning(f"Static file not found: {full_path}")
-            raise HTTPError(404)
-
         try:
-            with open(full_path, "r", encoding="utf-8") as file:
-                self.write(file.read())
-        except UnicodeDecodeError:
-            try:
-                with open(full_path, "rb") as file:
-                    self.write(file.read())
-            except Exception as exc:
-                get_logger().error(f"Error reading binary file {full_path}: {str(exc)}")
-                raise HTTPError(500) from exc
+            asset = await self.application.static_assets.load(full_path)
         except Exception as exc:
             get_logger().error(f"Error reading file {full_path}: {str(exc)}")
             raise HTTPError(500) from exc
+        if asset is None:
+            get_logger().warning(f"Static file not found: {full_path}")
+            raise HTTPError(404)
+        write_asset(self, asset)
 
 
 class ApiFallback(BaseAPIController):
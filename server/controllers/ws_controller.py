@@ -1,8 +1,7 @@
 from __future__ import annotations
 
 import datetime
-import json
-from typing import TYPE_CHECKING, Any, Awaitable, Dict, Optional, Union
+from typing import TYPE_CHECKING, Any, Awaitable, Dict, List, Optional, Union
 from uuid import uuid4
 
 from sqlalchemy import select
@@ -11,17 +10,37 @@ from tornado.concurrent import Future
 from tornado.ioloop import IOLoop
 from tornado.websocket import WebSocketClosedError, WebSocketHandler
 
+from digi_server import metrics
 from digi_server.logger import get_logger
 from models.session import Interval, Session, ShowSession
 from models.show import Act, Show
 from models.user import User
 from utils.web.base_controller import DatabaseMixin
+from utils.web.codec import JSON, Codec, codec_for_subprotocols
 from utils.web.route import ApiRoute, ApiVersion
 
 
 if TYPE_CHECKING:
     from digi_server.app_server import DigiScriptServer
 
+# OPs handled by on_message, any others are counted together in the metrics so
+# clients cannot create new metric labels
+KNOWN_OPS = frozenset(
+    [
+        "AUTHENTICATE",
+        "REFRESH_TOKEN",
+        "NEW_CLIENT",
+        "REFRESH_CLIENT",
+        "REQUEST_SCRIPT_EDIT",
+        "STOP_SCRIPT_EDIT",
+        "SCRIPT_SCROLL",
+        "BEGIN_INTERVAL",
+        "END_INTERVAL",
+        "RELOAD_CLIENTS",
+        "LIVE_SHOW_JUMP_TO_PAGE",
+    ]
+)
+
 
 @ApiRoute("ws", ApiVersion.V1)
 class WebSocketController(DatabaseMixin, WebSocketHandler):
@@ -32,6 +51,8 @@ class WebSocketController(DatabaseMixin, WebSocketHandler):
         self.current_username: str | None = None
         self._last_ping = 0.0
         self._last_pong = 0.0
+        # Replaced if the client asks for a codec's subprotocol
+        self.codec: Codec = JSON
 
     def update_session(self, is_editor=False, user_id=None):
         with self.make_session() as session:
@@ -61,6 +82,10 @@ class WebSocketController(DatabaseMixin, WebSocketHandler):
     def data_received(self, chunk: bytes) -> Optional[Awaitable[None]]:
         raise RuntimeError(f"Data streaming not supported for {self.__class__}")
 
+    def select_subprotocol(self, subprotocols: List[str]) -> Optional[str]:
+        subprotocol, self.codec = codec_for_subprotocols(subprotocols)
+        return subprotocol
+
     def check_origin(self, origin):
         if self.settings.get("debug", False):
             return True
@@ -70,6 +95,7 @@ class WebSocketController(DatabaseMixin, WebSocketHandler):
     def open(self, *args: str, **kwargs: str) -> Optional[Awaitable[None]]:
         self.__setattr__("internal_id", str(uuid4()))
         self.application.clients.append(self)
+        metrics.WS_CLIENTS.set(len(self.application.clients))
 
         self.update_session(user_id=self.current_user_id)
         get_logger().info(f"WebSocket opened from: {self.request.remote_ip}")
@@ -82,6 +108,7 @@ class WebSocketController(DatabaseMixin, WebSocketHandler):
     def on_close(self) -> None:
         if self in self.application.clients:
             self.application.clients.remove(self)
+            metrics.WS_CLIENTS.set(len(self.application.clients))
 
         notify_editor_change = False
         elect_live_leader = False
@@ -104,9 +131,7 @@ class WebSocketController(DatabaseMixin, WebSocketHandler):
                 )
 
         if elect_live_leader:
-            current_show = self.application.digi_settings.settings.get(
-                "current_show"
-            ).get_value()
+            current_show = self.application.digi_settings.snapshot["current_show"]
             if current_show:
                 with self.make_session() as session:
                     show = session.get(Show, current_show)
@@ -221,8 +246,12 @@ class WebSocketController(DatabaseMixin, WebSocketHandler):
         )
         get_logger().debug(f"WebSocket message from {user_part}: {message}")
 
-        message = json.loads(message)
+        # Text frames are always JSON, whichever codec the client asked for
+        message = (self.codec if isinstance(message, bytes) else JSON).loads(message)
         ws_op = message["OP"]
+        metrics.WS_MESSAGES.labels(
+            ws_op if isinstance(ws_op, str) and ws_op in KNOWN_OPS else "UNKNOWN"
+        ).inc()
 
         # Handle JWT authentication operations
         if ws_op == "AUTHENTICATE":
@@ -250,7 +279,7 @@ class WebSocketController(DatabaseMixin, WebSocketHandler):
 
         with self.make_session() as session:
             entry: Session = session.get(Session, self.__getattribute__("internal_id"))
-            current_show = await self.application.digi_settings.get("current_show")
+            current_show = self.application.digi_settings.snapshot["current_show"]
             if current_show:
                 show = session.get(Show, current_show)
             else:
@@ -426,6 +455,9 @@ class WebSocketController(DatabaseMixin, WebSocketHandler):
     def write_message(
         self, message: Union[bytes, str, Dict[str, Any]], binary: bool = False
     ) -> Future[None]:
+        if isinstance(message, dict):
+            message = self.codec.dumps(message)
+            binary = self.codec.binary
         try:
             return super().write_message(message, binary)
         except WebSocketClosedError:
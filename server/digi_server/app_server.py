@@ -1,10 +1,8 @@
-import glob
 import os
 import secrets
-import shutil
 import sys
-import time
-from typing import List, Optional
+from functools import cached_property
+from typing import Dict, List, Optional
 
 import sqlalchemy
 from alembic import command, script
@@ -12,11 +10,12 @@ from alembic.config import Config
 from alembic.runtime import migration
 from sqlalchemy import Column, String, delete, select
 from tornado.ioloop import IOLoop
-from tornado.web import Application, StaticFileHandler
+from tornado.web import Application
 from tornado_prometheus import PrometheusMixIn
 
 from controllers import controllers
 from controllers.ws_controller import WebSocketController
+from digi_server import metrics
 from digi_server.logger import (
     configure_client_buffer,
     configure_client_logging,
@@ -27,6 +26,7 @@ from digi_server.logger import (
     get_logger,
 )
 from digi_server.settings import Settings
+from digi_server.startup import StartupTimer
 from models import models
 from models.cue import CueType
 from models.script import CompiledScript, Script
@@ -35,6 +35,16 @@ from models.settings import SystemSettings
 from models.show import Show
 from models.user import User
 from rbac.rbac import RBACController
+from services.backup_service import (
+    REASON_MIGRATION,
+    BackupEntry,
+    BackupIndex,
+    BackupService,
+    backup_database,
+    get_db_file_path,
+)
+from services.client_log_service import ClientLogService
+from services.job_service import JobService
 from services.user_service import UserService
 from utils.database import DigiSQLAlchemy
 from utils.exceptions import DatabaseTypeException, DatabaseUpgradeRequired
@@ -42,7 +52,9 @@ from utils.mdns_service import MDNSAdvertiser
 from utils.module_discovery import get_resource_path, is_frozen
 from utils.version_checker import VersionChecker
 from utils.web.jwt_service import JWTService
+from utils.web.query_profiler import QueryProfiler
 from utils.web.route import Route
+from utils.web.static_assets import StaticAssetCache, StaticAssetHandler
 
 
 class DigiScriptServer(PrometheusMixIn, Application):
@@ -55,25 +67,116 @@ class DigiScriptServer(PrometheusMixIn, Application):
         skip_migrations_check=False,
     ):
         self._port: int = port
-        self.digi_settings: Settings = Settings(self, settings_path)
+        self.startup_timer = StartupTimer()
+        with self.startup_timer.phase("settings"):
+            self.digi_settings: Settings = Settings(self, settings_path)
         self.app_log_handler = None
         self.db_file_handler = None
         self.client_file_handler = None
         self.server_buffer = None
         self.client_buffer = None
 
-        # Controller imports (needed to trigger the decorator)
-        controllers.import_all_controllers()
-        # Import all the models
-        models.import_all_models()
+        with self.startup_timer.phase("imports"):
+            # Controller imports (needed to trigger the decorator)
+            controllers.import_all_controllers()
+            # Import all the models
+            models.import_all_models()
 
         self.clients: List[WebSocketController] = []
 
         self._db: DigiSQLAlchemy = models.db
+        metrics.install_query_listeners()
+        self.ioloop_lag_monitor = metrics.IOLoopLagMonitor()
+        self.query_profiler = QueryProfiler(enabled=debug)
         self.jwt_service: JWTService = None
         self.mdns_advertiser: Optional[MDNSAdvertiser] = None
         self.version_checker: Optional[VersionChecker] = None
 
+        with self.startup_timer.phase("database"):
+            self._configure_database(skip_migrations, skip_migrations_check)
+
+        with self.startup_timer.phase("services"):
+            # Configure the JWT service once we have set up the database
+            self.jwt_service = self._configure_jwt()
+
+            # Configure the User service
+            self.user_service = UserService(self)
+
+            # Configure the Job service for work run in background processes
+            self.job_service = JobService(self)
+            self.client_log_service = ClientLogService(self)
+            self.backup_service = BackupService(self)
+            metrics.collect_application(self)
+
+        with self.startup_timer.phase("startup_checks"):
+            self._startup_checks()
+
+        # Get static files path - adjust for PyInstaller if needed
+        if is_frozen():
+            static_files_path = get_resource_path(os.path.join("static", "assets"))
+            docs_files_path = get_resource_path(os.path.join("static", "docs"))
+            ui_old_static_files_path = get_resource_path(
+                os.path.join("static", "ui-old", "assets")
+            )
+            get_logger().info(f"Using packaged static files path: {static_files_path}")
+            get_logger().info(f"Using packaged docs files path: {docs_files_path}")
+        else:
+            static_files_path = os.path.join(
+                os.path.abspath(os.path.dirname(__file__)), "..", "static", "assets"
+            )
+            docs_files_path = os.path.join(
+                os.path.abspath(os.path.dirname(__file__)), "..", "static", "docs"
+            )
+            ui_old_static_files_path = os.path.join(
+                os.path.abspath(os.path.dirname(__file__)),
+                "..",
+                "static",
+                "ui-old",
+                "assets",
+            )
+            get_logger().info(f"Using relative static files path: {static_files_path}")
+            get_logger().info(f"Using relative docs files path: {docs_files_path}")
+
+        self.static_assets = StaticAssetCache()
+        self._preload_static_paths = [
+            controllers.index_path(),
+            controllers.index_path("ui-old"),
+            static_files_path,
+            ui_old_static_files_path,
+        ]
+
+        handlers = Route.routes()
+        handlers.append(("/favicon.ico", controllers.StaticController))
+        handlers.append(
+            (
+                r"/assets/(.*)",
+                StaticAssetHandler,
+                {"path": static_files_path, "hashed": True},
+            )
+        )
+        handlers.append(
+            (
+                r"/ui-old/assets/(.*)",
+                StaticAssetHandler,
+                {"path": ui_old_static_files_path, "hashed": True},
+            )
+        )
+        handlers.append((r"/docs/(.*)", StaticAssetHandler, {"path": docs_files_path}))
+        handlers.append((r"/api/.*", controllers.ApiFallback))
+        handlers.append((r"/ui-old(/?.*)", controllers.RootController))
+        handlers.append((r"/(.*)", controllers.RootControllerV3))
+        with self.startup_timer.phase("application"):
+            super().__init__(
+                handlers=handlers,
+                debug=debug,
+                db=self._db,
+                websocket_ping_interval=5,
+                cookie_secret=self._get_cookie_secret(),
+                login_url="/login",
+            )
+        self.startup_timer.log_report("Server initialised")
+
+    def _configure_database(self, skip_migrations: bool, skip_migrations_check: bool):
         db_path: str = self.digi_settings.settings.get("db_path").get_value()
         if db_path.startswith("sqlite://"):
             db_file_path = db_path.replace("sqlite:///", "")
@@ -121,21 +224,12 @@ class DigiScriptServer(PrometheusMixIn, Application):
             self._configure_rbac()
             self._db.create_all()
 
-        # Configure the JWT service once we have set up the database
-        self.jwt_service = self._configure_jwt()
-
-        # Configure the User service
-        self.user_service = UserService(self)
-
-        # On startup, perform the following checks/operations with the database:
+    def _startup_checks(self):
+        # On startup, perform the following checks/operations with the database.
+        # Checks which requests do not depend on are deferred until the server is
+        # listening, see _deferred_startup.
         with self._db.sessionmaker() as session:
-            # 1. Check for presence of admin user, and update settings to match
-            any_admin = session.scalars(select(User).where(User.is_admin)).first()
-            has_admin = any_admin is not None
-            self.digi_settings.settings["has_admin_user"].set_value(has_admin, False)
-            self.digi_settings._save()
-
-            # 2. Check the show we are expecting to be loaded exists
+            # 1. Check the show we are expecting to be loaded exists
             current_show = self.digi_settings.settings.get("current_show").get_value()
             if current_show:
                 show = session.get(Show, current_show)
@@ -147,9 +241,9 @@ class DigiScriptServer(PrometheusMixIn, Application):
                     self.digi_settings._save()
                     current_show = None
 
-            # 3. If there is a live session in progress:
-            # 3.1. Clean up the current client ID
-            # 3.2. Check that the revision of the script matches the current one,
+            # 2. If there is a live session in progress:
+            # 2.1. Clean up the current client ID
+            # 2.2. Check that the revision of the script matches the current one,
             #      if not then load the revision being used
             if current_show:
                 show = session.get(Show, current_show)
@@ -190,108 +284,20 @@ class DigiScriptServer(PrometheusMixIn, Application):
                         show.current_session_id = None
                     session.commit()
 
-            # 4. Tidy up compiled scripts
-            # 4.1. Remove any compiled scripts objects where the data file is missing
-            # 4.2. Remove any compiled script files on disk that are not referenced
-            removed_compiled_scripts = []
-            compiled_scripts: List[CompiledScript] = session.scalars(
-                select(CompiledScript)
-            ).all()
-            for compiled_script in compiled_scripts:
-                if not os.path.exists(compiled_script.data_path):
-                    get_logger().info(
-                        f"Removing compiled script for revision {compiled_script.revision_id} "
-                        f"as data file not found at {compiled_script.data_path}"
-                    )
-                    session.delete(compiled_script)
-                    removed_compiled_scripts.append(compiled_script)
-            if removed_compiled_scripts:
-                session.commit()
-                get_logger().info(
-                    f"Removed {len(removed_compiled_scripts)} compiled script objects from the database."
-                )
-
-            compiled_script_path = self.digi_settings.settings.get(
-                "compiled_script_path"
-            ).get_value()
-            for ds_file in glob.glob(f"{compiled_script_path}/*.ds"):
-                found = False
-                for compiled_script in compiled_scripts:
-                    if compiled_script in removed_compiled_scripts:
-                        continue
-                    if compiled_script.data_path == ds_file:
-                        found = True
-                        break
-                if not found:
-                    get_logger().info(
-                        f"Removing unreferenced compiled script file: {ds_file}"
-                    )
-                    try:
-                        os.remove(ds_file)
-                    except Exception:
-                        get_logger().exception(
-                            f"Failed to remove compiled script file: {ds_file}"
-                        )
-
-            # 5. Clear out all sessions since we are starting the app up
+            # 3. Clear out all sessions since we are starting the app up
             get_logger().debug("Emptying out sessions table!")
             session.execute(delete(Session))
             session.commit()
 
-        # Get static files path - adjust for PyInstaller if needed
-        if is_frozen():
-            static_files_path = get_resource_path(os.path.join("static", "assets"))
-            docs_files_path = get_resource_path(os.path.join("static", "docs"))
-            ui_old_static_files_path = get_resource_path(
-                os.path.join("static", "ui-old", "assets")
-            )
-            get_logger().info(f"Using packaged static files path: {static_files_path}")
-            get_logger().info(f"Using packaged docs files path: {docs_files_path}")
-        else:
-            static_files_path = os.path.join(
-                os.path.abspath(os.path.dirname(__file__)), "..", "static", "assets"
-            )
-            docs_files_path = os.path.join(
-                os.path.abspath(os.path.dirname(__file__)), "..", "static", "docs"
-            )
-            ui_old_static_files_path = os.path.join(
-                os.path.abspath(os.path.dirname(__file__)),
-                "..",
-                "static",
-                "ui-old",
-                "assets",
-            )
-            get_logger().info(f"Using relative static files path: {static_files_path}")
-            get_logger().info(f"Using relative docs files path: {docs_files_path}")
-
-        handlers = Route.routes()
-        handlers.append(("/favicon.ico", controllers.StaticController))
-        handlers.append(
-            (r"/assets/(.*)", StaticFileHandler, {"path": static_files_path})
-        )
-        handlers.append(
-            (
-                r"/ui-old/assets/(.*)",
-                StaticFileHandler,
-                {"path": ui_old_static_files_path},
-            )
-        )
-        handlers.append((r"/docs/(.*)", StaticFileHandler, {"path": docs_files_path}))
-        handlers.append((r"/api/.*", controllers.ApiFallback))
-        handlers.append((r"/ui-old(/?.*)", controllers.RootController))
-        handlers.append((r"/(.*)", controllers.RootControllerV3))
-        super().__init__(
-            handlers=handlers,
-            debug=debug,
-            db=self._db,
-            websocket_ping_interval=5,
-            cookie_secret=self._get_cookie_secret(),
-            login_url="/login",
-        )
-
     def log_request(self, handler):
         from tornado.log import access_log  # noqa: PLC0415
 
+        self.observe_request(handler)
+        query_stats = getattr(handler, "query_stats", None)
+        if query_stats is not None:
+            metrics.observe_request_queries(type(handler).__name__, query_stats)
+            self.query_profiler.record(handler)
+
         if handler.request.path in Route.ignored_logging_routes():
             return
 
@@ -322,10 +328,13 @@ class DigiScriptServer(PrometheusMixIn, Application):
                 "username": username,
                 "user_id": user_id,
                 "remote_ip": handler.request.remote_ip,
+                "request_bytes": len(handler.request.body),
+                "response_bytes": getattr(handler, "response_bytes", None),
+                "request_time_ms": request_time,
             },
         )
 
-    @property
+    @cached_property
     def _alembic_config(self):
         # Handle path differently if running in PyInstaller bundle
         if is_frozen():
@@ -378,17 +387,25 @@ class DigiScriptServer(PrometheusMixIn, Application):
             self._check_migrations()
         except DatabaseUpgradeRequired:
             get_logger().info("Running database migrations via Alembic")
-            # Create a copy of the database file as a backup before performing migrations
-            db_path: str = self.digi_settings.settings.get("db_path").get_value()
-            if db_path.startswith("sqlite:///"):
-                db_path = db_path.replace("sqlite:///", "")
+            # Back up the database before performing migrations
+            db_path = get_db_file_path(self)
             if os.path.exists(db_path) and os.path.isfile(db_path):
-                get_logger().info("Creating copy of database file as backup")
-                new_file_name = f"{db_path}.{int(time.time())}"
-                shutil.copyfile(db_path, new_file_name)
-                get_logger().info(
-                    f"Created copy of database file as backup, saved to {new_file_name}"
+                get_logger().info("Backing up database file")
+                index = BackupIndex(db_path)
+                timestamp = index.next_timestamp()
+                backup_path = index.path_for(timestamp, reason=REASON_MIGRATION)
+                # Nothing else is using the database yet, so copy it in one step
+                size = backup_database(db_path, backup_path, pages=-1)
+                index.add(
+                    BackupEntry(
+                        filename=os.path.basename(backup_path),
+                        created_at=timestamp,
+                        size_bytes=size,
+                        compressed=True,
+                        reason=REASON_MIGRATION,
+                    )
                 )
+                get_logger().info(f"Backed up database file to {backup_path}")
             else:
                 get_logger().warning(
                     "Database connection does not appear to be a file, cannot create backup!"
@@ -404,15 +421,50 @@ class DigiScriptServer(PrometheusMixIn, Application):
             self.digi_settings.settings.get("db_path").get_value()
         )
         script_ = script.ScriptDirectory.from_config(self._alembic_config)
-        with engine.begin() as conn:
-            context = migration.MigrationContext.configure(conn)
-            if context.get_current_revision() != script_.get_current_head():
-                raise DatabaseUpgradeRequired("Migrations required on the database")
+        try:
+            with engine.begin() as conn:
+                context = migration.MigrationContext.configure(conn)
+                current_revision = context.get_current_revision()
+        finally:
+            engine.dispose()
+        if current_revision != script_.get_current_head():
+            raise DatabaseUpgradeRequired("Migrations required on the database")
 
     async def configure(self):
-        await self._configure_logging()
-        await self.start_mdns_advertising()
-        await self.start_version_checker()
+        with self.startup_timer.phase("configure"):
+            await self._configure_logging()
+            self.ioloop_lag_monitor.start()
+            await self.start_mdns_advertising()
+            await self.start_version_checker()
+            self.backup_service.start()
+        get_logger().info(f"Server ready in {self.startup_timer.ready() * 1000:.0f}ms")
+        # Runs once the caller has started listening and yields to the IOLoop
+        IOLoop.current().spawn_callback(self._deferred_startup)
+
+    async def _deferred_startup(self):
+        """
+        Start up work which requests do not depend on:
+
+        1. Check for presence of admin user, and update settings to match
+        2. Remove compiled scripts whose data file is missing, and compiled script
+           files on disk which are not referenced
+        3. Read and compress the built client, so the first clients to load it do
+           not wait for that
+        """
+        with self.startup_timer.phase("deferred"):
+            try:
+                await self._validate_has_admin()
+                scripts_path = await self.digi_settings.get("compiled_script_path")
+                with self._db.sessionmaker() as session:
+                    CompiledScript.remove_orphans(session, scripts_path)
+            except Exception:
+                get_logger().exception("Deferred start up tasks failed")
+        with self.startup_timer.phase("static_assets"):
+            cached = 0
+            for path in self._preload_static_paths:
+                cached += await self.static_assets.preload(path)
+            get_logger().info(f"Cached {cached} static files")
+        self.startup_timer.log_report("Server start up")
 
     async def _configure_logging(self):
         get_logger().info("Reconfiguring logging!")
@@ -464,7 +516,6 @@ class DigiScriptServer(PrometheusMixIn, Application):
         )
 
     def _configure_rbac(self):
-        self._db.register_delete_hook(self.rbac.rbac_db.check_object_deletion)
         self.rbac.add_mapping(User, Show, [Show.id, Show.name])
         self.rbac.add_mapping(User, CueType, [CueType.id, CueType.prefix])
         self.rbac.add_mapping(User, Script, [Script.id])
@@ -555,19 +606,27 @@ class DigiScriptServer(PrometheusMixIn, Application):
                 return client
         return None
 
+    @staticmethod
+    async def _ws_send(
+        clients: List[WebSocketController], ws_op: str, ws_action: str, ws_data: dict
+    ):
+        message = {"OP": ws_op, "DATA": ws_data, "ACTION": ws_action}
+        # Encode the message once for each codec in use, not once for each client
+        encoded: Dict[str, bytes] = {}
+        for client in clients:
+            codec = client.codec
+            if codec.name not in encoded:
+                encoded[codec.name] = codec.dumps(message)
+            await client.write_message(encoded[codec.name], binary=codec.binary)
+
     async def ws_send_to_all(self, ws_op: str, ws_action: str, ws_data: dict):
-        for client in self.clients:
-            await client.write_message(
-                {"OP": ws_op, "DATA": ws_data, "ACTION": ws_action}
-            )
+        with metrics.WS_BROADCAST_SECONDS.time():
+            await self._ws_send(list(self.clients), ws_op, ws_action, ws_data)
 
     async def ws_send_to_user(
         self, user_id: int, ws_op: str, ws_action: str, ws_data: dict
     ):
-        for client in self.get_all_ws(user_id):
-            await client.write_message(
-                {"OP": ws_op, "DATA": ws_data, "ACTION": ws_action}
-            )
+        await self._ws_send(self.get_all_ws(user_id), ws_op, ws_action, ws_data)
 
     async def start_mdns_advertising(self) -> None:
         """Start mDNS advertising if enabled in settings."""
@@ -1,5 +1,6 @@
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Optional
 
 from tornado.log import LogFormatter
@@ -20,6 +21,69 @@ ALL_LOGGERS = [
 ]
 
 
+# Maximum number of records waiting to be written by each background handler
+LOG_QUEUE_SIZE = 10000
+
+
+class _BackgroundListener(QueueListener):
+    def enqueue_sentinel(self):
+        # The queue may be full, so wait for the listener thread to make room
+        # rather than failing to stop
+        self.queue.put(self._sentinel)
+
+
+class BackgroundHandler(QueueHandler):
+    """Pass records to handlers which run on a background thread.
+
+    Records are queued without blocking the thread which logged them. When the
+    queue is full the oldest queued record is dropped to make room, and counted in
+    :attr:`dropped`. Closing the handler writes any queued records, then closes the
+    wrapped handlers.
+
+    :param handlers: Handlers to run on the background thread.
+    :param maxsize: Maximum number of records to queue.
+    """
+
+    def __init__(self, *handlers: logging.Handler, maxsize: int = LOG_QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        self.target_handlers = handlers
+        self.listener = _BackgroundListener(
+            self.queue, *handlers, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Called with the handler lock held, so only the listener thread can be
+        # taking records from the queue at the same time
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def close(self) -> None:
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            for handler in self.target_handlers:
+                handler.close()
+        super().close()
+
+
+def _background_file_handler(log_path, size_bytes, log_backups) -> BackgroundHandler:
+    file_handler = RotatingFileHandler(
+        log_path, maxBytes=size_bytes, backupCount=log_backups
+    )
+    file_handler.setFormatter(LogFormatter(color=False))
+    return BackgroundHandler(file_handler)
+
+
 def get_logger(name: Optional[str] = None):
     if name:
         return logger.getChild(name)
@@ -43,11 +107,9 @@ def configure_file_logging(
     if handler:
         for _logger in ALL_LOGGERS:
             _logger.removeHandler(handler)
+        handler.close()
 
-    file_handler = RotatingFileHandler(
-        log_path, maxBytes=size_bytes, backupCount=log_backups
-    )
-    file_handler.setFormatter(LogFormatter(color=False))
+    file_handler = _background_file_handler(log_path, size_bytes, log_backups)
     for _logger in ALL_LOGGERS:
         _logger.addHandler(file_handler)
     return file_handler
@@ -66,6 +128,7 @@ def configure_db_logging(
 
     if handler:
         db_logger.removeHandler(handler)
+        handler.close()
 
     if not enable_db_logging:
         logger.info(f"Disabling logger: {db_logger.name}")
@@ -75,17 +138,17 @@ def configure_db_logging(
     db_logger.setLevel(log_level)
     file_handler = None
     if log_path:
-        file_handler = RotatingFileHandler(
-            log_path, maxBytes=size_bytes, backupCount=log_backups
-        )
-        file_handler.setFormatter(LogFormatter(color=False))
+        file_handler = _background_file_handler(log_path, size_bytes, log_backups)
         db_logger.addHandler(file_handler)
         db_logger.propagate = False
     return file_handler
 
 
+# Registered via add_logging_level("TRACE", TRACE_LEVEL) in main.py
+TRACE_LEVEL = logging.DEBUG - 5
+
 CLIENT_LEVEL_MAP = {
-    "TRACE": 5,  # Registered via add_logging_level("TRACE", logging.DEBUG - 5) in main.py
+    "TRACE": TRACE_LEVEL,
     "DEBUG": logging.DEBUG,
     "INFO": logging.INFO,
     "WARN": logging.WARNING,  # loglevel npm uses WARN; Python uses WARNING
@@ -115,6 +178,7 @@ def configure_client_logging(
 
     if handler:
         client_logger.removeHandler(handler)
+        handler.close()
 
     if isinstance(log_level, str):
         log_level = map_client_level(log_level)
@@ -122,10 +186,7 @@ def configure_client_logging(
     client_logger.setLevel(log_level)
     file_handler = None
     if log_path:
-        file_handler = RotatingFileHandler(
-            log_path, maxBytes=size_bytes, backupCount=log_backups
-        )
-        file_handler.setFormatter(LogFormatter(color=False))
+        file_handler = _background_file_handler(log_path, size_bytes, log_backups)
         client_logger.addHandler(file_handler)
         # Prevent propagation to avoid polluting the server console
         client_logger.propagate = False
@@ -0,0 +1,281 @@
+"""
+Application metrics, exported in the Prometheus format on ``/debug/metrics``.
+
+Every metric is registered here, in the default ``prometheus_client`` registry
+alongside the HTTP request metrics from ``tornado_prometheus``. Recording a
+value is a dictionary lookup and an addition, so the metrics are always on.
+
+SQL statements are counted by SQLAlchemy engine events, and attributed to the
+request handler which ran them through a context variable set when the handler
+is created. Statements run outside a request, or in an executor thread, are
+not attributed to any handler.
+"""
+
+import collections
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Optional
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from tornado.ioloop import IOLoop
+
+
+NAMESPACE = "digiscript"
+
+DB_QUERIES = Histogram(
+    namespace=NAMESPACE,
+    subsystem="db",
+    name="queries_per_request",
+    documentation="SQL statements executed per HTTP request",
+    labelnames=("handler",),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+DB_QUERY_SECONDS = Histogram(
+    namespace=NAMESPACE,
+    subsystem="db",
+    name="query_seconds_per_request",
+    documentation="Time spent executing SQL statements per HTTP request",
+    labelnames=("handler",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+IOLOOP_LAG_SECONDS = Histogram(
+    namespace=NAMESPACE,
+    subsystem="ioloop",
+    name="lag_seconds",
+    documentation="Delay between when a timer should have run and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+STARTUP_PHASE_SECONDS = Gauge(
+    namespace=NAMESPACE,
+    subsystem="startup",
+    name="phase_seconds",
+    documentation="Time taken by each phase of server start up",
+    labelnames=("phase",),
+)
+WS_CLIENTS = Gauge(
+    namespace=NAMESPACE,
+    subsystem="websocket",
+    name="clients",
+    documentation="Connected WebSocket clients",
+)
+WS_MESSAGES = Counter(
+    namespace=NAMESPACE,
+    subsystem="websocket",
+    name="messages_received_total",
+    documentation="WebSocket messages received, by OP",
+    labelnames=("op",),
+)
+WS_BROADCAST_SECONDS = Histogram(
+    namespace=NAMESPACE,
+    subsystem="websocket",
+    name="broadcast_seconds",
+    documentation="Time taken to send a message to every WebSocket client",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+COMPILE_SCRIPT_SECONDS = Histogram(
+    namespace=NAMESPACE,
+    subsystem="script",
+    name="compile_seconds",
+    documentation="Time taken to compile a script revision",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+COMPILE_SCRIPT_BYTES = Histogram(
+    namespace=NAMESPACE,
+    subsystem="script",
+    name="compile_bytes",
+    documentation="Size of compiled script files",
+    buckets=(1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7),
+)
+CACHE_REQUESTS = Counter(
+    namespace=NAMESPACE,
+    subsystem="cache",
+    name="requests_total",
+    documentation="Cache lookups, by cache and whether they hit or missed",
+    labelnames=("cache", "result"),
+)
+
+
+@dataclass
+class QueryStats:
+    """
+    SQL statements executed while handling a request.
+
+    :param statements: If set, the number of times each statement was executed
+    :param active: False once the request has finished, after which statements are
+                   no longer counted
+    """
+
+    count: int = 0
+    seconds: float = 0.0
+    statements: Optional[collections.Counter] = None
+    active: bool = True
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "digiscript_query_stats", default=None
+)
+
+
+def track_queries(stats: QueryStats) -> Token:
+    """
+    Count SQL statements executed from the current context, and contexts copied
+    from it, in ``stats``.
+
+    :param stats: Stats to add statements to
+    :return: Token to pass to :func:`untrack_queries`
+    """
+    return _query_stats.set(stats)
+
+
+def untrack_queries(stats: QueryStats, token: Token) -> None:
+    """
+    Stop counting SQL statements in ``stats``, including those executed by callbacks
+    whose contexts were copied while it was tracked.
+
+    :param stats: Stats passed to :func:`track_queries`
+    :param token: Token returned by :func:`track_queries`
+    """
+    stats.active = False
+    try:
+        _query_stats.reset(token)
+    except ValueError:
+        # Finished from another context, so the one tracking the stats is not
+        # current and cannot be reset from here
+        pass
+
+
+def observe_request_queries(handler_name: str, stats: QueryStats) -> None:
+    """
+    Record the SQL statements executed by a request.
+
+    :param handler_name: Name of the request handler class
+    :param stats: Statements executed while handling the request
+    """
+    DB_QUERIES.labels(handler_name).observe(stats.count)
+    DB_QUERY_SECONDS.labels(handler_name).observe(stats.seconds)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """
+    Record a lookup in one of the application's caches.
+
+    :param cache: Name of the cache
+    :param hit: Whether the value was found in the cache
+    """
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def _before_cursor_execute(
+    _conn, _cursor, _statement, _parameters, context, _executemany
+):
+    context._digiscript_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(
+    _conn, _cursor, statement, _parameters, context, _executemany
+):
+    stats = _query_stats.get()
+    if stats is not None and stats.active:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - context._digiscript_query_start
+        if stats.statements is not None:
+            stats.statements[statement] += 1
+
+
+def install_query_listeners() -> None:
+    """Listen for SQL statements executed by any engine. Safe to call repeatedly."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class _ApplicationCollector(Collector):
+    """Reads counters kept by the application when metrics are scraped."""
+
+    def __init__(self):
+        self.application = None
+
+    def collect(self):
+        application = self.application
+        if application is None:
+            return
+
+        client_logs = application.client_log_service.get_stats()
+        queued = client_logs.pop("queued")
+        client_logs.pop("rate_limited_clients")
+        entries = CounterMetricFamily(
+            f"{NAMESPACE}_client_log_entries",
+            "Client log entries received, by what happened to them",
+            labels=["outcome"],
+        )
+        for outcome, value in client_logs.items():
+            entries.add_metric([outcome], value)
+        yield entries
+        yield GaugeMetricFamily(
+            f"{NAMESPACE}_client_log_queued",
+            "Client log entries waiting to be written",
+            value=queued,
+        )
+
+        dropped = CounterMetricFamily(
+            f"{NAMESPACE}_log_records_dropped",
+            "Log records dropped because the log file writer fell behind",
+            labels=["log"],
+        )
+        for log, handler in (
+            ("app", application.app_log_handler),
+            ("db", application.db_file_handler),
+            ("client", application.client_file_handler),
+        ):
+            dropped.add_metric([log], getattr(handler, "dropped", 0))
+        yield dropped
+
+
+_application_collector = _ApplicationCollector()
+REGISTRY.register(_application_collector)
+
+
+def collect_application(application) -> None:
+    """
+    Export counters kept by the application's services and log handlers.
+
+    :param application: Tornado application instance
+    """
+    _application_collector.application = application
+
+
+class IOLoopLagMonitor:
+    """
+    Measures how late a timer on the IOLoop runs, as a sign of callbacks blocking
+    the loop.
+
+    :param interval: Seconds between measurements
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._io_loop: Optional[IOLoop] = None
+        self._expected = 0.0
+        self._timeout = None
+
+    def start(self) -> None:
+        self._io_loop = IOLoop.current()
+        self._schedule()
+
+    def stop(self) -> None:
+        if self._timeout is not None:
+            self._io_loop.remove_timeout(self._timeout)
+            self._timeout = None
+
+    def _schedule(self) -> None:
+        self._expected = self._io_loop.time() + self.interval
+        self._timeout = self._io_loop.call_at(self._expected, self._tick)
+
+    def _tick(self) -> None:
+        IOLOOP_LAG_SECONDS.observe(max(self._io_loop.time() - self._expected, 0.0))
+        self._schedule()
@@ -3,13 +3,14 @@ from __future__ import annotations
 import json
 import os
 import tomllib
+from collections.abc import Mapping
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
 
 from tornado.locks import Lock
 
 from digi_server.logger import get_level_names_by_order, get_logger
-from utils.file_watcher import IOLoopFileWatcher
+from utils.file_watcher import create_file_watcher
 
 
 if TYPE_CHECKING:
@@ -34,6 +35,37 @@ def get_version() -> str:
     return _get_version()
 
 
+class SettingsSnapshot(Mapping):
+    """
+    Values of every setting at one point in time.
+
+    Snapshots are never modified, :class:`Settings` replaces its snapshot with a new
+    one when a setting changes, so a snapshot can be read without awaiting the
+    settings lock and always holds values which were set together.
+    """
+
+    __slots__ = ("_values", "version")
+
+    def __init__(self, values: Dict[str, Any], version: int = 0):
+        object.__setattr__(self, "_values", dict(values))
+        object.__setattr__(self, "version", version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SettingsSnapshot is immutable")
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            raise KeyError(f"{key} is not a valid setting") from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
 class SettingsObject:
     ALLOWED_TYPES = [str, bool, int]
 
@@ -50,6 +82,7 @@ class SettingsObject:
         hide_from_ui: bool = False,
         choice_options: Optional[list] = None,
         choice_labels: Optional[list] = None,
+        on_change: Optional[Callable[[], None]] = None,
     ):
         if val_type not in self.ALLOWED_TYPES:
             raise RuntimeError(
@@ -107,10 +140,14 @@ class SettingsObject:
         self.hide_from_ui = hide_from_ui
         self.choice_options = choice_options
         self.choice_labels = choice_labels
+        self._on_change = on_change
 
     def set_to_default(self):
+        changed = self.value != self.default
         self.value = self.default
         self._loaded = True
+        if changed and self._on_change:
+            self._on_change()
 
     def set_value(self, value, spawn_callbacks=True):
         if not isinstance(value, self.val_type):
@@ -134,6 +171,8 @@ class SettingsObject:
         if value != self.value:
             changed = True
             self.value = value
+            if self._on_change:
+                self._on_change()
             if self._callback_fn and spawn_callbacks:
                 self._callback_fn()
 
@@ -185,9 +224,10 @@ class Settings:
 
         self.categories: Dict[str : List[str]] = {"General": []}
         self.settings: Dict[str, SettingsObject] = {}
+        self._snapshot = SettingsSnapshot({})
         self.init_settings()
         self._load(spawn_callbacks=False)
-        self._file_watcher = IOLoopFileWatcher(
+        self._file_watcher = create_file_watcher(
             self.settings_path, self.auto_reload_changes, 100
         )
         self._file_watcher.add_error_callback(self.file_deleted)
@@ -278,6 +318,26 @@ class Settings:
             help_text="When enabled, potentially sensitive information will be redacted from logs.",
             category="Logging",
         )
+        self.define(
+            "log_body_sample_percent",
+            int,
+            100,
+            True,
+            display_name="Request Body Log Sampling (%)",
+            help_text="Percentage of requests whose body is written to the debug log. "
+            "Bodies are only decoded for requests which are sampled.",
+            category="Logging",
+        )
+        self.define(
+            "log_body_max_bytes",
+            int,
+            65536,
+            True,
+            display_name="Request Body Log Size Limit (bytes)",
+            help_text="Request bodies larger than this are not written to the debug log, "
+            "only their size.",
+            category="Logging",
+        )
         self.define(
             "db_log_enabled",
             bool,
@@ -392,6 +452,37 @@ class Settings:
             "Larger values use more memory. Changes take effect after restart.",
             category="Client Logging",
         )
+        self.define(
+            "db_backup_interval_hours",
+            int,
+            24,
+            True,
+            display_name="Scheduled Backup Interval (Hours)",
+            help_text="Hours between scheduled database backups. Set to 0 to disable "
+            "scheduled backups.",
+            category="Database Backups",
+        )
+        self.define(
+            "db_backup_keep",
+            int,
+            10,
+            True,
+            display_name="Scheduled Backups to Keep",
+            help_text="Number of scheduled database backups to retain. Set to 0 to keep "
+            "all of them. Manual and pre-migration backups are never deleted "
+            "automatically.",
+            category="Database Backups",
+        )
+        self.define(
+            "db_backup_max_age_days",
+            int,
+            30,
+            True,
+            display_name="Scheduled Backup Max Age (Days)",
+            help_text="Scheduled database backups older than this are deleted. Set to 0 "
+            "for no limit.",
+            category="Database Backups",
+        )
         self.define(
             "jwt_token_lifetime_hours",
             int,
@@ -447,13 +538,39 @@ class Settings:
             hide_from_ui,
             choice_options,
             choice_labels,
+            on_change=self._update_snapshot,
         )
         if category not in self.categories:
             self.categories[category] = [key]
         else:
             self.categories[category].append(key)
 
+    @property
+    def snapshot(self) -> SettingsSnapshot:
+        """
+        Current values of every setting, which can be read without awaiting the
+        settings lock. Keep the snapshot rather than reading this again to use
+        several values which were set together.
+        """
+        return self._snapshot
+
+    def _update_snapshot(self):
+        # Replacing the attribute is atomic, so readers see the old snapshot or the
+        # new one and never a partly updated one
+        self._snapshot = SettingsSnapshot(self._json(), self._snapshot.version + 1)
+
+    def close(self):
+        """
+        Stop watching the settings file for changes.
+        """
+        self._file_watcher.stop()
+
     def file_deleted(self):
+        if not os.path.isdir(os.path.dirname(self.settings_path)):
+            get_logger().warning(
+                "Settings directory deleted; not recreating the settings file"
+            )
+            return
         get_logger().info("Settings file deleted; recreating from in memory settings")
         self._save()
 
@@ -461,9 +578,7 @@ class Settings:
         get_logger().info("Settings file changed; auto reloading")
         self._load(spawn_callbacks=True)
 
-        settings_json = {}
-        for key, value in self.settings.items():
-            settings_json[key] = value.get_value()
+        settings_json = dict(self.snapshot)
 
         for client in self._application.clients:
             client.write_message(
@@ -521,10 +636,7 @@ class Settings:
         get_logger().info(f"Saved settings to {self.settings_path}")
 
     async def get(self, key):
-        async with self.lock:
-            if key not in self.settings:
-                raise KeyError(f"{key} is not a valid setting")
-            return self.settings.get(key).get_value()
+        return self.snapshot[key]
 
     async def set(self, key, item):
         changed = False
@@ -550,13 +662,10 @@ class Settings:
         return settings_json
 
     async def as_json(self):
-        async with self.lock:
-            settings_json = {}
-            for key, value in self.settings.items():
-                settings_json[key] = value.get_value()
-            # Add version for Electron client compatibility checking
-            settings_json["version"] = _get_version()
-            return json.loads(json.dumps(settings_json))
+        settings_json = dict(self.snapshot)
+        # Add version for Electron client compatibility checking
+        settings_json["version"] = _get_version()
+        return settings_json
 
     async def raw_json(self):
         async with self.lock:
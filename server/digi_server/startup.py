@@ -0,0 +1,58 @@
+"""
+Timing of server start up.
+
+:class:`StartupTimer` records how long each phase of starting the server takes,
+from creating :class:`~digi_server.app_server.DigiScriptServer` to the work
+deferred until after it is listening. Each phase is logged and exported as the
+``digiscript_startup_phase_seconds`` metric.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from digi_server import metrics
+from digi_server.logger import get_logger
+
+
+class StartupTimer:
+    """Durations of the phases of server start up, in the order they ran."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.ready_seconds: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + duration
+            metrics.STARTUP_PHASE_SECONDS.labels(phase=name).set(self.phases[name])
+
+    def ready(self) -> float:
+        """
+        Record that the server is ready to listen for requests.
+
+        :return: Seconds since the timer was created
+        """
+        self.ready_seconds = time.perf_counter() - self.started_at
+        metrics.STARTUP_PHASE_SECONDS.labels(phase="ready").set(self.ready_seconds)
+        return self.ready_seconds
+
+    def report(self) -> dict:
+        return {
+            "ready_ms": (
+                None if self.ready_seconds is None else self.ready_seconds * 1000
+            ),
+            "phases_ms": {name: value * 1000 for name, value in self.phases.items()},
+        }
+
+    def log_report(self, title: str) -> None:
+        breakdown = ", ".join(
+            f"{name} {value * 1000:.0f}ms" for name, value in self.phases.items()
+        )
+        get_logger().info(f"{title}: {breakdown}")
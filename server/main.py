@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import asyncio
 import logging
+import multiprocessing
 import os
 
 from tornado.options import define, options, parse_command_line
@@ -32,10 +33,10 @@ except ImportError:
 
 
 from digi_server.app_server import DigiScriptServer
-from digi_server.logger import add_logging_level, get_logger
+from digi_server.logger import TRACE_LEVEL, add_logging_level, get_logger
 
 
-add_logging_level("TRACE", logging.DEBUG - 5)
+add_logging_level("TRACE", TRACE_LEVEL)
 get_logger().setLevel(logging.DEBUG)
 
 define("debug", type=bool, default=not IS_FROZEN, help="auto reload")
@@ -133,4 +134,6 @@ async def main():
 
 
 if __name__ == "__main__":
+    # Required for background job worker processes in PyInstaller bundles
+    multiprocessing.freeze_support()
     asyncio.run(main())
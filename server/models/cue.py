@@ -35,6 +35,10 @@ class CueType(db.Model, DeleteMixin):
     def post_delete(self, session):
         pass
 
+    @classmethod
+    def pre_bulk_delete(cls, session, primary_keys):
+        UserOverridesRegistry.cleanup_overrides(session, cls.__tablename__)
+
 
 class CueGroup(db.Model):
     __tablename__ = "cue_groups"
@@ -162,3 +166,8 @@ class CueAssociation(db.Model, DeleteMixin):
                 # Don't flush during post_delete to avoid FK constraint errors mid-cascade
                 CueAssociation.cleanup_orphaned_cue(session, self.cue.id, flush=False)
             CueAssociation.cleanup_orphaned_group(session, group_id)
+
+    @classmethod
+    def pre_bulk_delete(cls, session, primary_keys):
+        # Cues and cue groups are deleted along with the associations
+        pass
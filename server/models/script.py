@@ -2,13 +2,16 @@ from __future__ import annotations
 
 import datetime
 import enum
+import glob
 import gzip
-import json
 import os
+import time
+import zlib
 from functools import partial
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 from sqlalchemy import (
+    DDL,
     Boolean,
     DateTime,
     ForeignKey,
@@ -16,17 +19,21 @@ from sqlalchemy import (
     Integer,
     String,
     TypeDecorator,
+    delete,
+    event,
     func,
     select,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from tornado.ioloop import IOLoop
 
+from digi_server import metrics
 from digi_server.logger import get_logger
 from models.models import db
-from registry.schema import get_registry
 from registry.user_overrides import UserOverridesRegistry
+from schemas.serializers import dump_script_line
 from utils.database import DeleteMixin
+from utils.web.codec import JSON
 
 
 if TYPE_CHECKING:
@@ -276,6 +283,11 @@ class ScriptLineRevisionAssociation(db.Model, DeleteMixin):
                     session, self.line.id, flush=False
                 )
 
+    @classmethod
+    def pre_bulk_delete(cls, session, primary_keys):
+        # Lines are deleted along with the associations
+        pass
+
 
 class ScriptLinePart(db.Model):
     __tablename__ = "script_line_parts"
@@ -300,6 +312,49 @@ class ScriptLinePart(db.Model):
     )
 
 
+# Full-text search index over ScriptLinePart.line_text. This is an external
+# content FTS5 table (it stores no copy of the text itself) keyed by the line
+# part ID, kept in sync with script_line_parts by triggers so that every write
+# path (ORM, bulk statements, migrations) updates the index. Revision scoping is
+# applied at query time by joining through script_line_revision_association,
+# as line parts are shared between revisions.
+SCRIPT_LINE_SEARCH_TABLE = "script_line_search"
+SCRIPT_LINE_SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SCRIPT_LINE_SEARCH_TABLE} USING fts5("
+    "line_text, content='script_line_parts', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {SCRIPT_LINE_SEARCH_TABLE}_ai "
+    "AFTER INSERT ON script_line_parts BEGIN "
+    f"INSERT INTO {SCRIPT_LINE_SEARCH_TABLE}(rowid, line_text) "
+    "VALUES (new.id, new.line_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SCRIPT_LINE_SEARCH_TABLE}_ad "
+    "AFTER DELETE ON script_line_parts BEGIN "
+    f"INSERT INTO {SCRIPT_LINE_SEARCH_TABLE}"
+    f"({SCRIPT_LINE_SEARCH_TABLE}, rowid, line_text) "
+    "VALUES ('delete', old.id, old.line_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {SCRIPT_LINE_SEARCH_TABLE}_au "
+    "AFTER UPDATE OF line_text ON script_line_parts BEGIN "
+    f"INSERT INTO {SCRIPT_LINE_SEARCH_TABLE}"
+    f"({SCRIPT_LINE_SEARCH_TABLE}, rowid, line_text) "
+    "VALUES ('delete', old.id, old.line_text); "
+    f"INSERT INTO {SCRIPT_LINE_SEARCH_TABLE}(rowid, line_text) "
+    "VALUES (new.id, new.line_text); END",
+]
+for _search_ddl in SCRIPT_LINE_SEARCH_DDL:
+    event.listen(
+        ScriptLinePart.__table__,
+        "after_create",
+        DDL(_search_ddl).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    ScriptLinePart.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {SCRIPT_LINE_SEARCH_TABLE}").execute_if(
+        dialect="sqlite"
+    ),
+)
+
+
 class ScriptCuts(db.Model):
     __tablename__ = "script_line_cuts"
 
@@ -358,6 +413,14 @@ class StageDirectionStyle(db.Model, DeleteMixin):
     def post_delete(self, session):
         pass
 
+    @classmethod
+    def pre_bulk_delete(cls, session, primary_keys):
+        from registry.user_overrides import (  # noqa: PLC0415
+            UserOverridesRegistry,
+        )
+
+        UserOverridesRegistry.cleanup_overrides(session, cls.__tablename__)
+
 
 class CompiledScript(db.Model):
     __tablename__ = "compiled_scripts"
@@ -379,7 +442,7 @@ class CompiledScript(db.Model):
 
     @classmethod
     async def compile_script(cls, application: DigiScriptServer, revision_id):
-        line_schema = get_registry().get_schema_by_model(ScriptLine)()
+        start = time.perf_counter()
         with application.get_db().sessionmaker() as session:
             revision: ScriptRevision = session.get(ScriptRevision, revision_id)
             if not revision:
@@ -427,7 +490,7 @@ class CompiledScript(db.Model):
                     if line_revision.line.page != current_page:
                         break
 
-                    lines.append(line_schema.dump(line_revision.line))
+                    lines.append(dump_script_line(line_revision.line))
                     line_revision = session.get(
                         ScriptLineRevisionAssociation,
                         (revision.id, line_revision.next_line_id),
@@ -440,9 +503,9 @@ class CompiledScript(db.Model):
             if not os.path.exists(scripts_path):
                 os.makedirs(scripts_path)
             full_path = os.path.join(scripts_path, file_name)
-            script_contents = json.dumps(page_info)
+            script_contents = gzip.compress(JSON.dumps(page_info))
             with open(full_path, "wb") as file_pointer:
-                file_pointer.write(gzip.compress(script_contents.encode("utf-8")))
+                file_pointer.write(script_contents)
 
             # Update/Create entry in table
             entry = session.get(cls, revision_id)
@@ -452,47 +515,126 @@ class CompiledScript(db.Model):
                 entry.data_path = full_path
                 entry.updated_at = datetime.datetime.now(tz=datetime.timezone.utc)
             session.commit()
+            metrics.COMPILE_SCRIPT_SECONDS.observe(time.perf_counter() - start)
+            metrics.COMPILE_SCRIPT_BYTES.observe(len(script_contents))
 
             await application.ws_send_to_all("NOOP", "GET_COMPILED_SCRIPTS", {})
 
     @classmethod
-    def load_compiled_script(cls, application, revision_id):
+    def load_encoded(cls, application, revision_id) -> Optional[bytes]:
+        """
+        Read the compiled form of a revision, starting to compile it if there is
+        none.
+
+        :return: The compiled script as gzip compressed JSON, as stored, or None
+        """
         with application.get_db().sessionmaker() as session:
             revision: ScriptRevision = session.get(ScriptRevision, revision_id)
             if not revision:
-                return {}
+                return None
             compiled_script: cls = session.get(cls, revision.id)
+            metrics.record_cache_lookup("compiled_script", compiled_script is not None)
             if not compiled_script:
                 # Spawn a callback to create a compiled version of the script
                 IOLoop.current().add_callback(
                     partial(cls.compile_script, application, revision.id)
                 )
-                return {}
+                return None
             try:
                 with open(compiled_script.data_path, "rb") as file_pointer:
-                    data = json.loads(
-                        gzip.decompress(file_pointer.read()).decode("utf-8")
-                    )
+                    return file_pointer.read()
             except FileNotFoundError:
                 get_logger().warning(
                     f"Unable to open compiled script: {compiled_script.data_path}, file not found."
                 )
-                session.delete(compiled_script)
-                session.commit()
-                # Spawn a callback to create a compiled version of the script
-                IOLoop.current().add_callback(
-                    partial(cls.compile_script, application, revision.id)
-                )
-                return {}
             except Exception:
                 get_logger().exception(
                     f"Unable to open compiled script: {compiled_script.data_path}, unhandled error."
                 )
+        cls.discard(application, revision_id)
+        return None
+
+    @classmethod
+    def decode(cls, encoded: bytes) -> dict:
+        """
+        :param encoded: Compiled script as returned by :meth:`load_encoded`
+        :return: The lines of each page, keyed by the page number as a string
+        """
+        return JSON.loads(gzip.decompress(encoded))
+
+    @classmethod
+    def is_empty(cls, encoded: bytes) -> bool:
+        """
+        :param encoded: Compiled script as returned by :meth:`load_encoded`
+        :return: True if the script has no pages, without decompressing all of it
+        """
+        head = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(encoded, 3)
+        return head == b"{}"
+
+    @classmethod
+    def load_compiled_script(cls, application, revision_id):
+        encoded = cls.load_encoded(application, revision_id)
+        if encoded is None:
+            return {}
+        try:
+            return cls.decode(encoded)
+        except Exception:
+            get_logger().exception(
+                f"Unable to decode compiled script for revision {revision_id}."
+            )
+            cls.discard(application, revision_id)
+            return {}
+
+    @classmethod
+    def discard(cls, application, revision_id) -> None:
+        """Remove the compiled form of a revision, and start compiling it again."""
+        with application.get_db().sessionmaker() as session:
+            compiled_script = session.get(cls, revision_id)
+            if compiled_script:
                 session.delete(compiled_script)
                 session.commit()
-                # Spawn a callback to create a compiled version of the script
-                IOLoop.current().add_callback(
-                    partial(cls.compile_script, application, revision.id)
+        IOLoop.current().add_callback(
+            partial(cls.compile_script, application, revision_id)
+        )
+
+    @classmethod
+    def remove_orphans(cls, session, scripts_path: str) -> Tuple[int, int]:
+        """
+        Remove compiled scripts whose data file is missing, and compiled script files
+        which no compiled script refers to.
+
+        :param session: SQLAlchemy session, committed if any rows are removed
+        :param scripts_path: Directory compiled script files are saved in
+        :return: Number of rows and number of files removed
+        """
+        rows = session.execute(select(cls.revision_id, cls.data_path)).all()
+        files = {os.path.normpath(path) for path in glob.glob(f"{scripts_path}/*.ds")}
+
+        missing = []
+        referenced = set()
+        for revision_id, data_path in rows:
+            path = os.path.normpath(data_path) if data_path else None
+            if path in files or (path and os.path.exists(path)):
+                referenced.add(path)
+            else:
+                get_logger().info(
+                    f"Removing compiled script for revision {revision_id} as data "
+                    f"file not found at {data_path}"
                 )
-                return {}
-            return data
+                missing.append(revision_id)
+        if missing:
+            session.execute(delete(cls).where(cls.revision_id.in_(missing)))
+            session.commit()
+            get_logger().info(
+                f"Removed {len(missing)} compiled script objects from the database."
+            )
+
+        removed_files = 0
+        for path in sorted(files - referenced):
+            get_logger().info(f"Removing unreferenced compiled script file: {path}")
+            try:
+                os.remove(path)
+                removed_files += 1
+            except Exception:
+                get_logger().exception(f"Failed to remove compiled script file: {path}")
+        return len(missing), removed_files
@@ -12,8 +12,10 @@ from sqlalchemy import (
     Integer,
     Table,
     TypeDecorator,
+    delete,
     inspect,
     select,
+    tuple_,
 )
 
 from digi_server.logger import get_logger
@@ -93,6 +95,8 @@ class RBACDatabase:
         self._mappings = {}
         self._show_inspect = inspect(Show)
         self._resource_mappings = defaultdict(list)
+        # Resource table name to the names of the actor tables mapped to it
+        self._resource_actor_tables: Dict[str, List[str]] = defaultdict(list)
 
     def add_mapping(self, actor: type, resource: type) -> None:
         if not isinstance(actor, type):
@@ -145,37 +149,68 @@ class RBACDatabase:
         self._resource_mappings[actor_inspect.persist_selectable.fullname].append(
             resource
         )
+        self._resource_actor_tables[
+            resource_inspect.persist_selectable.fullname
+        ].append(actor_inspect.persist_selectable.fullname)
+        for mapped_class in (actor, resource):
+            self._db.register_delete_hook(self.check_object_deletion, mapped_class)
+            self._db.register_bulk_delete_hook(self.check_bulk_deletion, mapped_class)
         logger.info(f"Created RBAC mapping {table_name}")
 
     @property
     def mapped_resource_tables(self) -> List[str]:
-        mapped_tables = set()
-        for _actor_table, resource_tables in self._resource_mappings.items():
-            for resource_table in resource_tables:
-                resource_inspect = inspect(resource_table)
-                mapped_tables.add(resource_inspect.persist_selectable.fullname)
-        return list(mapped_tables)
+        return list(self._resource_actor_tables)
 
     @property
     def resource_table_mappings(self) -> Dict[str, List[str]]:
-        output = defaultdict(set)
-        for actor_table, resource_tables in self._resource_mappings.items():
-            for resource_table in resource_tables:
-                resource_inspect = inspect(resource_table)
-                output[resource_inspect.persist_selectable.fullname].add(actor_table)
-        real_output = {}
-        for resource_table in output:
-            real_output[resource_table] = list(output[resource_table])
-        return real_output
+        return {
+            resource_table: list(actor_tables)
+            for resource_table, actor_tables in self._resource_actor_tables.items()
+        }
 
     def check_object_deletion(self, _session: DigiDBSession, delete_object: db.Model):
-        obj_inspect = inspect(delete_object)
-        table_name = obj_inspect.mapper.persist_selectable.fullname
+        table_name = inspect(delete_object).mapper.persist_selectable.fullname
         if table_name in self._resource_mappings:
             self.delete_actor(delete_object)
-        if table_name in self.mapped_resource_tables:
+        if table_name in self._resource_actor_tables:
             self.delete_resource(delete_object)
 
+    def check_bulk_deletion(
+        self, session: DigiDBSession, model: type, primary_keys: List[tuple]
+    ):
+        model_inspect = inspect(model)
+        table_name = model_inspect.persist_selectable.fullname
+        rbac_tables = []
+        if table_name in self._resource_mappings:
+            rbac_tables.extend(
+                f"rbac_{table_name}_{inspect(resource).persist_selectable.fullname}"
+                for resource in self._resource_mappings[table_name]
+            )
+        rbac_tables.extend(
+            f"rbac_{actor}_{table_name}"
+            for actor in self._resource_actor_tables.get(table_name, [])
+        )
+        for rbac_table in rbac_tables:
+            if rbac_table not in self._mappings:
+                raise RBACException("Could not get table for actor/resource")
+            rbac_class = self._mappings[rbac_table]
+            cols = [
+                getattr(rbac_class, f"{table_name}_{col.key}")
+                for col in model_inspect.primary_key
+            ]
+            # Keep the number of bound parameters within SQLite limits
+            for i in range(0, len(primary_keys), 500):
+                chunk = primary_keys[i : i + 500]
+                if len(cols) == 1:
+                    condition = cols[0].in_([pk[0] for pk in chunk])
+                else:
+                    condition = tuple_(*cols).in_(chunk)
+                session.execute(
+                    delete(rbac_class)
+                    .where(condition)
+                    .execution_options(synchronize_session=False)
+                )
+
     def _validate_mapping(self, actor: db.Model, resource: db.Model) -> str:
         if not isinstance(actor, db.Model):
             raise RBACException("actor must be class instance, not object")
@@ -277,7 +312,7 @@ class RBACDatabase:
     def delete_resource(self, resource: db.Model):
         resource_inspect = inspect(resource)
         resource_cols = _get_mapping_columns(actor=None, resource=resource)
-        actor_mappings = self.resource_table_mappings.get(
+        actor_mappings = self._resource_actor_tables.get(
             resource_inspect.mapper.persist_selectable.fullname, []
         )
         for actor in actor_mappings:
@@ -0,0 +1,113 @@
+"""
+Hand-written equivalents of ``dump`` for the schemas used on hot paths.
+
+Marshmallow looks up, and calls the serialise method of, a field object for every
+attribute of every object it dumps, which is most of the time taken to dump a page
+of script lines or the cue list. These functions build the same dictionaries, with
+the same keys in the same order, directly from the model. Integer and string
+columns are passed through as SQLAlchemy loads them as ``int`` and ``str`` already.
+
+The tests check each function against its schema field for field, so a column
+added to one of these models must be added here too.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+
+if TYPE_CHECKING:
+    import datetime
+    import enum
+
+    from models.cue import Cue, CueAssociation
+    from models.script import ScriptLine, ScriptLinePart
+    from models.show import Show
+    from models.user import User
+
+
+def _enum(value: Optional[enum.IntEnum]) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+def _iso(value: Optional[datetime.date]) -> Optional[str]:
+    return None if value is None else value.isoformat()
+
+
+def _bool(value) -> Optional[bool]:
+    return None if value is None else bool(value)
+
+
+def dump_script_line_part(part: ScriptLinePart) -> dict:
+    """Equivalent of ``ScriptLinePartSchema().dump(part)``."""
+    return {
+        "id": part.id,
+        "line_id": part.line_id,
+        "part_index": part.part_index,
+        "character_id": part.character_id,
+        "character_group_id": part.character_group_id,
+        "line_text": part.line_text,
+    }
+
+
+def dump_script_line(line: ScriptLine) -> dict:
+    """Equivalent of ``ScriptLineSchema().dump(line)``, including its parts."""
+    return {
+        "line_parts": [dump_script_line_part(part) for part in line.line_parts],
+        "id": line.id,
+        "act_id": line.act_id,
+        "scene_id": line.scene_id,
+        "page": line.page,
+        "line_type": _enum(line.line_type),
+        "stage_direction_style_id": line.stage_direction_style_id,
+    }
+
+
+def dump_cue(cue: Cue) -> dict:
+    """Equivalent of ``CueSchema().dump(cue)``."""
+    return {"id": cue.id, "cue_type_id": cue.cue_type_id, "ident": cue.ident}
+
+
+def dump_cue_association(association: CueAssociation) -> dict:
+    """
+    The cue of an association, as :func:`dump_cue`, with its grouping and position
+    in the revision the association is for.
+    """
+    cue = association.cue
+    return {
+        "id": cue.id,
+        "cue_type_id": cue.cue_type_id,
+        "ident": cue.ident,
+        "group_id": association.group_id,
+        "sort_order": association.sort_order,
+        "line_position": association.line_position,
+    }
+
+
+def dump_show(show: Show) -> dict:
+    """Equivalent of ``ShowSchema().dump(show)``."""
+    return {
+        "first_act_id": show.first_act_id,
+        "id": show.id,
+        "name": show.name,
+        "start_date": _iso(show.start_date),
+        "end_date": _iso(show.end_date),
+        "created_at": _iso(show.created_at),
+        "edited_at": _iso(show.edited_at),
+        "current_session_id": show.current_session_id,
+        "script_mode": _enum(show.script_mode),
+    }
+
+
+def dump_user(user: User) -> dict:
+    """Equivalent of ``UserSchema().dump(user)``, which excludes the secrets."""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "is_admin": _bool(user.is_admin),
+        "created_on": _iso(user.created_on),
+        "last_login": _iso(user.last_login),
+        "last_seen": _iso(user.last_seen),
+        "requires_password_change": _bool(user.requires_password_change),
+        "token_version": user.token_version,
+    }
@@ -0,0 +1,468 @@
+"""
+Database backups, made with the SQLite online backup API.
+
+Backups copy the live database a few pages at a time with
+:meth:`sqlite3.Connection.backup`, which gives a consistent snapshot even in WAL
+mode and while other connections are writing, then compress the copy with gzip.
+The copy runs on a worker thread so requests continue to be served.
+
+Backup files sit next to the database, named ``<database>.<timestamp>.<reason>.gz``,
+or ``<database>.<timestamp>`` for uncompressed copies made by older versions. The
+reason is kept in the name so it can be recovered if the index is lost, as scheduled
+backups are only pruned if their reason is known. They are listed from an index
+file, ``<database>.backups.json``, which is only rescanned when the directory has
+changed since the index was written, and then only new files are examined.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from tornado.ioloop import IOLoop, PeriodicCallback
+
+from digi_server.logger import get_logger
+from utils.show.show_structure import invalidate_show_structure
+
+
+if TYPE_CHECKING:
+    from digi_server.app_server import DigiScriptServer
+
+# Database pages copied in each step of a backup, and seconds slept between steps
+# so that writers are not held up
+BACKUP_PAGES = 256
+BACKUP_SLEEP = 0.005
+# Seconds between checks for a scheduled backup being due
+SCHEDULE_CHECK_MS = 60 * 1000
+# Directory changes within this many seconds of being indexed may share its
+# modification time, so the directory is rescanned until they are older
+RACY_SECONDS = 2.0
+
+REASON_MANUAL = "manual"
+REASON_MIGRATION = "migration"
+REASON_PRE_RESTORE = "pre_restore"
+REASON_SCHEDULED = "scheduled"
+REASONS = (REASON_MANUAL, REASON_MIGRATION, REASON_PRE_RESTORE, REASON_SCHEDULED)
+
+
+class BackupError(Exception):
+    """A backup could not be made or restored."""
+
+
+def get_db_file_path(application: DigiScriptServer) -> str:
+    """
+    :return: Filesystem path to the SQLite database file.
+    :rtype: str
+    """
+    db_path: str = application.digi_settings.settings.get("db_path").get_value()
+    if db_path.startswith("sqlite:///"):
+        db_path = db_path.replace("sqlite:///", "")
+    return db_path
+
+
+@dataclass
+class BackupEntry:
+    """
+    A backup file in the index.
+
+    :param filename: Name of the file, in the database directory
+    :param created_at: Unix timestamp the backup was made, from the file name
+    :param size_bytes: Size of the file
+    :param compressed: Whether the file is gzip-compressed
+    :param reason: Why the backup was made, or None if it is not known
+    """
+
+    filename: str
+    created_at: int
+    size_bytes: int
+    compressed: bool
+    reason: Optional[str] = None
+
+
+class BackupIndex:
+    """
+    Index of the backups of a database file.
+
+    :param db_path: Filesystem path to the database file
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.directory = os.path.dirname(db_path) or "."
+        self.path = f"{db_path}.backups.json"
+        self._pattern = re.compile(
+            rf"^{re.escape(os.path.basename(db_path))}\.(\d+)"
+            rf"(?:\.({'|'.join(REASONS)}))?(\.gz)?$"
+        )
+        self._entries: Dict[str, BackupEntry] = {}
+        self._directory_mtime_ns: Optional[int] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as file_pointer:
+                data = json.load(file_pointer)
+            self._entries = {
+                entry["filename"]: BackupEntry(**entry) for entry in data["backups"]
+            }
+            self._directory_mtime_ns = data["directory_mtime_ns"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError):
+            get_logger().warning(f"Backup index {self.path} is invalid, rebuilding it")
+
+    def _save(self) -> None:
+        # Creating the index changes the directory, rewriting it in place does not
+        if not os.path.exists(self.path):
+            open(self.path, "a", encoding="utf-8").close()
+        self._directory_mtime_ns = os.stat(self.directory).st_mtime_ns
+        with open(self.path, "w", encoding="utf-8") as file_pointer:
+            json.dump(
+                {
+                    "directory_mtime_ns": self._directory_mtime_ns,
+                    "backups": [asdict(entry) for entry in self._entries.values()],
+                },
+                file_pointer,
+            )
+
+    def path_for(
+        self, timestamp: int, compressed: bool = True, reason: Optional[str] = None
+    ) -> str:
+        """
+        :param timestamp: Unix timestamp the backup was made
+        :param compressed: Whether the backup is gzip-compressed
+        :param reason: Why the backup was made, which is kept in the file name
+        :return: Filesystem path for the backup
+        """
+        return (
+            f"{self.db_path}.{timestamp}{f'.{reason}' if reason else ''}"
+            f"{'.gz' if compressed else ''}"
+        )
+
+    def _refresh(self) -> None:
+        try:
+            mtime_ns = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            self._entries = {}
+            return
+        if (
+            mtime_ns == self._directory_mtime_ns
+            and time.time_ns() - mtime_ns > RACY_SECONDS * 1e9
+        ):
+            return
+
+        entries = {}
+        with os.scandir(self.directory) as directory:
+            for dir_entry in directory:
+                match = self._pattern.match(dir_entry.name)
+                if not match:
+                    continue
+                entry = self._entries.get(dir_entry.name)
+                if entry is None:
+                    entry = BackupEntry(
+                        filename=dir_entry.name,
+                        created_at=int(match.group(1)),
+                        size_bytes=dir_entry.stat().st_size,
+                        compressed=match.group(3) is not None,
+                        reason=match.group(2),
+                    )
+                entries[dir_entry.name] = entry
+        if entries == self._entries:
+            # Nothing to write, but the directory need not be rescanned again
+            self._directory_mtime_ns = mtime_ns
+            return
+        self._entries = entries
+        self._save()
+
+    def list(self) -> List[BackupEntry]:
+        """
+        :return: Backups, newest first
+        """
+        self._refresh()
+        return sorted(self._entries.values(), key=lambda e: e.created_at, reverse=True)
+
+    def get(self, timestamp: int) -> Optional[BackupEntry]:
+        return next((e for e in self.list() if e.created_at == timestamp), None)
+
+    def next_timestamp(self) -> int:
+        """
+        :return: The current time, or a later one if a backup already has it
+        """
+        timestamp = int(time.time())
+        taken = {entry.created_at for entry in self.list()}
+        while timestamp in taken:
+            timestamp += 1
+        return timestamp
+
+    def add(self, entry: BackupEntry) -> None:
+        self._refresh()
+        self._entries[entry.filename] = entry
+        self._save()
+
+    def remove(self, entry: BackupEntry) -> None:
+        """Delete a backup file and remove it from the index."""
+        try:
+            os.remove(os.path.join(self.directory, entry.filename))
+        except FileNotFoundError:
+            pass
+        self._entries.pop(entry.filename, None)
+        self._save()
+
+
+def backup_database(
+    db_path: str,
+    destination: str,
+    pages: int = BACKUP_PAGES,
+    sleep: float = BACKUP_SLEEP,
+) -> int:
+    """
+    Copy a database with the SQLite online backup API and gzip-compress the copy.
+
+    :param db_path: Filesystem path to the database file
+    :param destination: Filesystem path of the compressed backup to write
+    :param pages: Pages copied in each step, or -1 to copy all at once
+    :param sleep: Seconds slept between steps
+    :return: Size of the compressed backup
+    """
+    copy_path = f"{destination}.partial"
+    try:
+        source = sqlite3.connect(db_path)
+        try:
+            target = sqlite3.connect(copy_path)
+            try:
+                source.backup(target, pages=pages, sleep=sleep)
+            finally:
+                target.close()
+        finally:
+            source.close()
+
+        compressed_path = f"{destination}.partial.gz"
+        with open(copy_path, "rb") as copy, gzip.open(compressed_path, "wb") as output:
+            shutil.copyfileobj(copy, output, 1024 * 1024)
+        os.replace(compressed_path, destination)
+    finally:
+        for path in (copy_path, f"{destination}.partial.gz"):
+            if os.path.exists(path):
+                os.remove(path)
+    return os.path.getsize(destination)
+
+
+def _schema_version(db_path: str) -> Optional[str]:
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute("SELECT version_num FROM alembic_version").fetchone()[
+            0
+        ]
+    except (sqlite3.Error, TypeError):
+        return None
+    finally:
+        connection.close()
+
+
+def restore_database(backup_path: str, db_path: str, compressed: bool) -> None:
+    """
+    Replace the contents of a database with a backup, with the SQLite online backup
+    API so that open connections see the restored database.
+
+    :param backup_path: Filesystem path to the backup file
+    :param db_path: Filesystem path to the database file
+    :param compressed: Whether the backup file is gzip-compressed
+    :raises BackupError: If the backup is from a different database schema version
+    """
+    copy_path = f"{db_path}.restore.partial"
+    try:
+        if compressed:
+            with gzip.open(backup_path, "rb") as backup, open(copy_path, "wb") as copy:
+                shutil.copyfileobj(backup, copy, 1024 * 1024)
+        else:
+            shutil.copyfile(backup_path, copy_path)
+
+        if _schema_version(copy_path) != _schema_version(db_path):
+            raise BackupError("Backup is from a different database version")
+
+        source = sqlite3.connect(copy_path)
+        try:
+            target = sqlite3.connect(db_path)
+            try:
+                # The destination stays locked until the copy completes, so copy
+                # every page in one step
+                source.backup(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+    finally:
+        if os.path.exists(copy_path):
+            os.remove(copy_path)
+
+
+class BackupService:
+    """
+    Makes, schedules, prunes and restores database backups.
+
+    :param application: The DigiScript server application instance.
+    """
+
+    def __init__(self, application: DigiScriptServer):
+        self._application = application
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="db-backup"
+        )
+        self._lock = asyncio.Lock()
+        self._index: Optional[BackupIndex] = None
+        self._periodic_callback: Optional[PeriodicCallback] = None
+
+    @property
+    def index(self) -> BackupIndex:
+        """Index of the current database's backups."""
+        db_path = get_db_file_path(self._application)
+        if self._index is None or self._index.db_path != db_path:
+            self._index = BackupIndex(db_path)
+        return self._index
+
+    def list_backups(self) -> List[BackupEntry]:
+        return self.index.list()
+
+    async def create_backup(self, reason: str = REASON_MANUAL) -> BackupEntry:
+        """
+        Back up the database.
+
+        :param reason: Why the backup is being made
+        :return: The new backup
+        :raises BackupError: If the database is not a file
+        """
+        async with self._lock:
+            return await self._create_backup(reason)
+
+    async def _create_backup(self, reason: str) -> BackupEntry:
+        index = self.index
+        if not os.path.isfile(index.db_path):
+            raise BackupError("Database is not stored in a file")
+        timestamp = index.next_timestamp()
+        destination = index.path_for(timestamp, reason=reason)
+        start = time.perf_counter()
+        size = await IOLoop.current().run_in_executor(
+            self._executor, backup_database, index.db_path, destination
+        )
+        entry = BackupEntry(
+            filename=os.path.basename(destination),
+            created_at=timestamp,
+            size_bytes=size,
+            compressed=True,
+            reason=reason,
+        )
+        index.add(entry)
+        get_logger().info(
+            f"Created {reason} database backup {destination} "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return entry
+
+    def delete_backup(self, timestamp: int) -> bool:
+        """
+        :return: Whether a backup with the timestamp existed
+        """
+        entry = self.index.get(timestamp)
+        if entry is None:
+            return False
+        self.index.remove(entry)
+        return True
+
+    async def restore_backup(self, timestamp: int) -> BackupEntry:
+        """
+        Restore the database from a backup, backing up the current database first.
+
+        :param timestamp: Timestamp of the backup to restore
+        :return: The backup made of the database before it was restored
+        :raises KeyError: If there is no backup with the timestamp
+        :raises BackupError: If the backup cannot be restored
+        """
+        async with self._lock:
+            entry = self.index.get(timestamp)
+            if entry is None:
+                raise KeyError(timestamp)
+            safety_backup = await self._create_backup(REASON_PRE_RESTORE)
+            index = self.index
+            await IOLoop.current().run_in_executor(
+                self._executor,
+                restore_database,
+                os.path.join(index.directory, entry.filename),
+                index.db_path,
+                entry.compressed,
+            )
+            # Pooled connections may hold pages cached from before the restore
+            engine = self._application.get_db().engine
+            if engine.url.database and os.path.abspath(
+                engine.url.database
+            ) == os.path.abspath(index.db_path):
+                engine.dispose()
+            invalidate_show_structure()
+            get_logger().warning(f"Restored database from backup {entry.filename}")
+            return safety_backup
+
+    def prune(self) -> List[BackupEntry]:
+        """
+        Delete scheduled backups beyond the configured number to keep, or older than
+        the configured age. Backups made for any other reason are kept.
+
+        :return: The backups deleted
+        """
+        settings = self._application.digi_settings.settings
+        keep = settings["db_backup_keep"].get_value()
+        max_age_days = settings["db_backup_max_age_days"].get_value()
+        scheduled = [e for e in self.list_backups() if e.reason == REASON_SCHEDULED]
+        expired = scheduled[keep:] if keep > 0 else []
+        if max_age_days > 0:
+            cutoff = time.time() - max_age_days * 24 * 60 * 60
+            expired.extend(
+                e for e in scheduled if e.created_at < cutoff and e not in expired
+            )
+        for entry in expired:
+            self.index.remove(entry)
+            get_logger().info(f"Deleted expired database backup {entry.filename}")
+        return expired
+
+    async def run_scheduled(self) -> Optional[BackupEntry]:
+        """
+        Make a scheduled backup if one is due, then prune old scheduled backups.
+
+        :return: The new backup, or None if no backup was due
+        """
+        interval_hours = self._application.digi_settings.settings[
+            "db_backup_interval_hours"
+        ].get_value()
+        if interval_hours <= 0 or self._lock.locked():
+            return None
+        last = next(
+            (e for e in self.list_backups() if e.reason == REASON_SCHEDULED), None
+        )
+        if last is not None and time.time() - last.created_at < interval_hours * 3600:
+            return None
+        try:
+            entry = await self.create_backup(REASON_SCHEDULED)
+        except (BackupError, OSError, sqlite3.Error):
+            get_logger().exception("Scheduled database backup failed")
+            return None
+        self.prune()
+        return entry
+
+    def start(self) -> None:
+        """Check for scheduled backups being due every minute."""
+        self._periodic_callback = PeriodicCallback(
+            self.run_scheduled, SCHEDULE_CHECK_MS
+        )
+        self._periodic_callback.start()
+
+    def stop(self) -> None:
+        if self._periodic_callback:
+            self._periodic_callback.stop()
+            self._periodic_callback = None
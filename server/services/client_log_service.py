@@ -0,0 +1,308 @@
+"""Client log service for rate limiting, deduplicating and writing client logs"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from digi_server.logger import get_logger, map_client_level
+
+
+# Most entries accepted in one request
+MAX_BATCH_SIZE = 100
+# Entries each client may send per second on average, and in a single burst
+CLIENT_RATE = 20.0
+CLIENT_BURST = 200
+# Entries waiting to be written, further entries are dropped
+QUEUE_SIZE = 2000
+# Seconds over which repeats of the same message from a client are counted rather
+# than written
+DEDUPE_WINDOW = 10.0
+# Most distinct messages tracked for deduplication at once
+MAX_DEDUPE_KEYS = 1000
+# Clients tracked for rate limiting before unused buckets are expired
+MAX_CLIENTS = 1000
+# Seconds after which an unused rate limit bucket is forgotten
+BUCKET_EXPIRY = 600.0
+# Entries written before yielding to the IOLoop
+WRITE_CHUNK_SIZE = 50
+
+
+@dataclass
+class ClientLogStats:
+    """Counters for client log ingestion since the server started."""
+
+    received: int = 0
+    written: int = 0
+    deduplicated: int = 0
+    rate_limited: int = 0
+    dropped_batch_too_large: int = 0
+    dropped_queue_full: int = 0
+    dropped_below_level: int = 0
+
+
+class TokenBucket:
+    """Token bucket allowing ``rate`` entries a second, up to ``capacity`` at once."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.limited = False
+
+    def take(self, count: int) -> int:
+        """
+        Take up to ``count`` tokens.
+
+        :param count: Number of tokens wanted
+        :return: Number of tokens taken
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        taken = min(count, int(self.tokens))
+        self.tokens -= taken
+        return taken
+
+
+@dataclass
+class _QueuedEntry:
+    client_key: str
+    level: int
+    message: str
+    extra: dict
+    user_id: Optional[int]
+    username: Optional[str]
+    remote_ip: Optional[str]
+
+
+@dataclass
+class _Repeat:
+    entry: _QueuedEntry
+    first_seen: float
+    count: int = 0
+
+
+class ClientLogService:
+    """Service for accepting log entries from clients and writing them to the log"""
+
+    def __init__(self, application):
+        """
+        Initialize ClientLogService.
+
+        :param application: Tornado application instance
+        """
+        self.application = application
+        self.stats = ClientLogStats()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._repeats: "OrderedDict[Tuple, _Repeat]" = OrderedDict()
+
+    def submit(
+        self,
+        entries: List[dict],
+        client_key: str,
+        user_id: Optional[int] = None,
+        username: Optional[str] = None,
+        remote_ip: Optional[str] = None,
+        agent: Optional[str] = None,
+    ) -> dict:
+        """
+        Queue log entries from a client to be written.
+
+        :param entries: Entries with ``level``, ``message`` and ``extra`` keys
+        :param client_key: Key identifying the client for rate limiting
+        :param user_id: ID of the user logged in on the client
+        :param username: Username of the user logged in on the client
+        :param remote_ip: IP address of the client
+        :param agent: User agent of the client
+        :return: Counts of entries which were ``accepted``, ``rate_limited`` and
+                 ``dropped``
+        """
+        self.stats.received += len(entries)
+        client_logger = get_logger("Client")
+        request_extra = {"remote_ip": remote_ip, "agent": agent}
+        if user_id is not None:
+            request_extra["user_id"] = user_id
+            request_extra["username"] = username
+
+        # Entries the logger would discard cost nothing beyond this check, and do
+        # not count against the rate limit
+        queued = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            level = map_client_level(str(entry.get("level", "INFO")))
+            if not client_logger.isEnabledFor(level):
+                self.stats.dropped_below_level += 1
+                continue
+            extra = entry.get("extra")
+            queued.append(
+                _QueuedEntry(
+                    client_key=client_key,
+                    level=level,
+                    message=str(entry.get("message", "")),
+                    extra={
+                        **(extra if isinstance(extra, dict) else {}),
+                        **request_extra,
+                    },
+                    user_id=user_id,
+                    username=username,
+                    remote_ip=remote_ip,
+                )
+            )
+
+        bucket = self._bucket(client_key)
+        allowed = bucket.take(len(queued))
+        rate_limited = len(queued) - allowed
+        if rate_limited:
+            self.stats.rate_limited += rate_limited
+            if not bucket.limited:
+                bucket.limited = True
+                get_logger().warning(f"Rate limiting client logs from {client_key}")
+        elif queued:
+            bucket.limited = False
+
+        queue = self._ensure_writer()
+        accepted = 0
+        dropped = 0
+        for entry in queued[:allowed]:
+            try:
+                queue.put_nowait(entry)
+                accepted += 1
+            except asyncio.QueueFull:
+                dropped += 1
+        self.stats.dropped_queue_full += dropped
+
+        return {"accepted": accepted, "rate_limited": rate_limited, "dropped": dropped}
+
+    def reject_batch(self, size: int) -> None:
+        """
+        Record a batch rejected for being larger than :data:`MAX_BATCH_SIZE`.
+
+        :param size: Number of entries in the batch
+        """
+        self.stats.received += size
+        self.stats.dropped_batch_too_large += size
+
+    def get_stats(self) -> dict:
+        """Get the ingestion counters, and the number of entries waiting."""
+        return {
+            **asdict(self.stats),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "rate_limited_clients": sum(
+                1 for bucket in self._buckets.values() if bucket.limited
+            ),
+        }
+
+    async def drain(self) -> None:
+        """Wait until every queued entry has been written."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def flush_repeats(self, older_than: float = 0.0) -> None:
+        """
+        Write a summary for messages which were repeated within the dedupe window.
+
+        :param older_than: Only flush messages first seen at least this many seconds
+                           ago
+        """
+        now = time.monotonic()
+        while self._repeats:
+            key, repeat = next(iter(self._repeats.items()))
+            if now - repeat.first_seen < older_than:
+                break
+            del self._repeats[key]
+            self._write_repeat_summary(repeat)
+
+    def _bucket(self, client_key: str) -> TokenBucket:
+        bucket = self._buckets.get(client_key)
+        if bucket is None:
+            if len(self._buckets) >= MAX_CLIENTS:
+                self._expire_buckets()
+            bucket = TokenBucket(CLIENT_RATE, CLIENT_BURST)
+            self._buckets[client_key] = bucket
+        return bucket
+
+    def _expire_buckets(self) -> None:
+        cutoff = time.monotonic() - BUCKET_EXPIRY
+        for client_key in [
+            key for key, bucket in self._buckets.items() if bucket.updated < cutoff
+        ]:
+            del self._buckets[client_key]
+
+    def _ensure_writer(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.ensure_future(self._write_entries())
+        return self._queue
+
+    async def _write_entries(self) -> None:
+        while True:
+            try:
+                entry = await asyncio.wait_for(self._queue.get(), DEDUPE_WINDOW)
+            except asyncio.TimeoutError:
+                self.flush_repeats(older_than=DEDUPE_WINDOW)
+                continue
+
+            written = 0
+            while True:
+                try:
+                    self._write(entry)
+                except Exception:
+                    get_logger().exception("Unable to write client log entry")
+                finally:
+                    self._queue.task_done()
+                written += 1
+                if written >= WRITE_CHUNK_SIZE or self._queue.empty():
+                    break
+                entry = self._queue.get_nowait()
+
+            self.flush_repeats(older_than=DEDUPE_WINDOW)
+            # Let request handlers run between chunks
+            await asyncio.sleep(0)
+
+    def _write(self, entry: _QueuedEntry) -> None:
+        key = (entry.client_key, entry.level, entry.message)
+        repeat = self._repeats.get(key)
+        if repeat is not None:
+            if time.monotonic() - repeat.first_seen < DEDUPE_WINDOW:
+                repeat.count += 1
+                self.stats.deduplicated += 1
+                return
+            del self._repeats[key]
+            self._write_repeat_summary(repeat)
+
+        self._log(entry, entry.message)
+        self._repeats[key] = _Repeat(entry=entry, first_seen=time.monotonic())
+        if len(self._repeats) > MAX_DEDUPE_KEYS:
+            _key, oldest = self._repeats.popitem(last=False)
+            self._write_repeat_summary(oldest)
+
+    def _write_repeat_summary(self, repeat: _Repeat) -> None:
+        if repeat.count:
+            self._log(
+                repeat.entry,
+                f"{repeat.entry.message} (repeated {repeat.count} more times)",
+            )
+
+    def _log(self, entry: _QueuedEntry, message: str) -> None:
+        self.stats.written += 1
+        # Pass structured fields via extra so LogBufferHandler can read them.
+        # Tornado's LogFormatter ignores unknown extra fields, so file output
+        # is unaffected.
+        get_logger("Client").log(
+            entry.level,
+            "[Client] %s | Extra: %s",
+            message,
+            entry.extra,
+            extra={
+                "user_id": entry.user_id,
+                "username": entry.username,
+                "remote_ip": entry.remote_ip,
+            },
+        )
@@ -0,0 +1,323 @@
+"""Job service for running long computations in worker processes"""
+
+import multiprocessing
+import sys
+import time
+import traceback
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Set
+
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+
+from digi_server.logger import get_logger
+
+
+# Number of jobs which may run at once, further jobs queue until one finishes
+MAX_RUNNING_JOBS = 2
+# Seconds a finished job is kept for, so results can be fetched and reused
+JOB_RETENTION = 600
+
+# Job states
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = {JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED}
+
+# WebSocket OP used to send job updates to users
+JOB_UPDATE_OP = "JOB_UPDATE"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobFailed(Exception):
+    pass
+
+
+def _mp_context():
+    # Fork is not safe in a process running an IOLoop and database connections,
+    # so workers are forked from a clean server process where supported
+    if sys.platform != "win32" and not getattr(sys, "frozen", False):
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["services.job_service"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _run_job(connection, func: Callable, args: tuple) -> None:
+    """
+    Entry point for worker processes.
+
+    Runs ``func(*args, on_progress=...)`` and sends progress updates, then the
+    result or error, back to the server over ``connection``.
+    """
+    last_percent = -1
+
+    def on_progress(fraction: float) -> None:
+        nonlocal last_percent
+        percent = int(fraction * 100)
+        if percent != last_percent:
+            last_percent = percent
+            connection.send(("progress", fraction))
+
+    try:
+        result = func(*args, on_progress=on_progress)
+    except Exception:
+        connection.send(("error", traceback.format_exc()))
+    else:
+        connection.send(("result", result))
+    finally:
+        connection.close()
+
+
+@dataclass
+class Job:
+    """A computation running, or waiting to run, in a worker process."""
+
+    id: str
+    kind: str
+    show_id: int
+    dedupe_key: str
+    func: Callable
+    args: tuple
+    user_ids: Set[int] = field(default_factory=set)
+    status: str = JOB_PENDING
+    progress: float = 0.0
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    _process: Any = None
+    _connection: Any = None
+    _future: Future = field(default_factory=Future)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def as_json(self, include_result: bool = True) -> dict:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "show_id": self.show_id,
+            "status": self.status,
+            "progress": self.progress,
+        }
+        if self.status == JOB_FAILED:
+            data["error"] = "Job failed"
+        if include_result and self.status == JOB_COMPLETED:
+            data["result"] = self.result
+        return data
+
+
+class JobService:
+    """Service for running jobs in worker processes and reporting on them"""
+
+    def __init__(self, application):
+        """
+        Initialize JobService.
+
+        :param application: Tornado application instance
+        """
+        self.application = application
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Deque[Job] = deque()
+        self._running: Set[str] = set()
+
+    def submit(
+        self,
+        kind: str,
+        show_id: int,
+        user_id: Optional[int],
+        dedupe_key: str,
+        func: Callable,
+        *args,
+    ) -> Job:
+        """
+        Submit a job, or join an existing job with identical inputs.
+
+        ``func`` must be importable by worker processes, and is called as
+        ``func(*args, on_progress=callback)`` where the callback takes the fraction
+        of work completed. Its arguments and return value must be picklable.
+
+        :param kind: Type of job, e.g. ``mic_suggest``
+        :param show_id: Show the job belongs to
+        :param user_id: User requesting the job, who is sent updates over WebSocket
+        :param dedupe_key: Key identifying the job inputs
+        :param func: Function to run
+        :param args: Arguments to pass to the function
+        :return: The new job, or the unfinished or completed job with the same inputs
+        """
+        self._purge_finished()
+
+        for job in self._jobs.values():
+            if (
+                job.kind == kind
+                and job.show_id == show_id
+                and job.dedupe_key == dedupe_key
+                and job.status not in {JOB_FAILED, JOB_CANCELLED}
+            ):
+                if user_id is not None:
+                    job.user_ids.add(user_id)
+                return job
+
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            show_id=show_id,
+            dedupe_key=dedupe_key,
+            func=func,
+            args=args,
+        )
+        if user_id is not None:
+            job.user_ids.add(user_id)
+        self._jobs[job.id] = job
+        self._queue.append(job)
+        self._start_queued()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Get a job by ID.
+
+        :param job_id: ID of the job
+        :return: The job, or None if it does not exist or has expired
+        """
+        return self._jobs.get(job_id)
+
+    async def wait(self, job: Job) -> Any:
+        """
+        Wait for a job to finish.
+
+        :param job: Job to wait for
+        :return: Result of the job
+        :raises JobCancelled: If the job was cancelled
+        :raises JobFailed: If the job raised an exception
+        """
+        await job._future
+        if job.status == JOB_CANCELLED:
+            raise JobCancelled(job.id)
+        if job.status == JOB_FAILED:
+            raise JobFailed(job.error)
+        return job.result
+
+    async def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a pending or running job.
+
+        :param job_id: ID of the job
+        :return: True if the job was cancelled, False if it had already finished
+        """
+        job = self._jobs.get(job_id)
+        if not job or job.finished:
+            return False
+
+        if job in self._queue:
+            self._queue.remove(job)
+        if job._process is not None:
+            job._process.terminate()
+        self._finish(job, JOB_CANCELLED)
+        await self._notify(job, job.as_json())
+        return True
+
+    def _start_queued(self) -> None:
+        while self._queue and len(self._running) < MAX_RUNNING_JOBS:
+            job = self._queue.popleft()
+            self._start(job)
+
+    def _start(self, job: Job) -> None:
+        context = _mp_context()
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_run_job,
+            args=(sender, job.func, job.args),
+            name=f"DigiScript-{job.kind}-{job.id}",
+            daemon=True,
+        )
+        process.start()
+        # The worker holds the only open sending end, so EOF means it has exited
+        sender.close()
+
+        job._process = process
+        job._connection = receiver
+        job.status = JOB_RUNNING
+        self._running.add(job.id)
+        IOLoop.current().add_handler(
+            receiver.fileno(),
+            lambda fd, events: self._on_message(job),
+            IOLoop.READ | IOLoop.ERROR,
+        )
+        IOLoop.current().spawn_callback(self._notify, job, job.as_json())
+
+    def _on_message(self, job: Job) -> None:
+        if job.finished:
+            return
+        try:
+            while job._connection.poll():
+                kind, payload = job._connection.recv()
+                if kind == "progress":
+                    job.progress = payload
+                elif kind == "result":
+                    job.result = payload
+                    job.progress = 1.0
+                    self._finish(job, JOB_COMPLETED)
+                    break
+                elif kind == "error":
+                    get_logger().error(f"Job {job.id} ({job.kind}) failed:\n{payload}")
+                    job.error = payload
+                    self._finish(job, JOB_FAILED)
+                    break
+        except (EOFError, OSError):
+            get_logger().error(f"Job {job.id} ({job.kind}) worker exited unexpectedly")
+            job.error = "Worker exited unexpectedly"
+            self._finish(job, JOB_FAILED)
+        IOLoop.current().spawn_callback(self._notify, job, job.as_json())
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        if job._connection is not None:
+            IOLoop.current().remove_handler(job._connection.fileno())
+            job._connection.close()
+            job._connection = None
+        if job._process is not None:
+            process = job._process
+            job._process = None
+            # Reap the worker without blocking the IOLoop
+            IOLoop.current().run_in_executor(None, process.join)
+        self._running.discard(job.id)
+        self._start_queued()
+
+    def _purge_finished(self) -> None:
+        cutoff = time.time() - JOB_RETENTION
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _notify(self, job: Job, data: dict) -> None:
+        try:
+            for user_id in list(job.user_ids):
+                try:
+                    await self.application.ws_send_to_user(
+                        user_id, JOB_UPDATE_OP, "NOOP", data
+                    )
+                except Exception:
+                    get_logger().exception(
+                        f"Unable to send update for job {job.id} to user {user_id}"
+                    )
+        finally:
+            # Waiters are released once the final update has been sent, so anyone
+            # watching the WebSocket sees the result no later than they do
+            if job.finished and data["status"] == job.status:
+                if not job._future.done():
+                    job._future.set_result(None)
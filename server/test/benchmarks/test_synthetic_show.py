@@ -0,0 +1,69 @@
+"""Tests for the synthetic show generator used by the benchmarks."""
+
+from dataclasses import replace
+
+from sqlalchemy import func, select
+from tornado import escape
+
+from benchmarks.synthetic_show import SMALL, generate_show
+from models.cue import CueAssociation
+from models.script import ScriptLine, ScriptLinePart
+from test.conftest import DigiScriptTestCase
+
+
+class TestSyntheticShow(DigiScriptTestCase):
+    """Tests that generated shows match their spec and load through the API."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            self.show = generate_show(session, SMALL)
+        self._app.digi_settings.settings["current_show"].set_value(self.show.show_id)
+
+    def _line_texts(self, show):
+        with self._app.get_db().sessionmaker() as session:
+            return [
+                [
+                    part.line_text
+                    for part in session.scalars(
+                        select(ScriptLinePart)
+                        .where(ScriptLinePart.line_id == line_id)
+                        .order_by(ScriptLinePart.part_index)
+                    )
+                ]
+                for line_id in show.line_ids
+            ]
+
+    def test_matches_spec(self):
+        self.assertEqual(SMALL.scenes, len(self.show.scene_ids))
+        self.assertEqual(SMALL.characters, len(self.show.character_ids))
+        self.assertEqual(SMALL.mics, len(self.show.mic_ids))
+        with self._app.get_db().sessionmaker() as session:
+            self.assertEqual(
+                SMALL.lines, session.scalar(select(func.count(ScriptLine.id)))
+            )
+            self.assertEqual(
+                SMALL.pages, session.scalar(select(func.max(ScriptLine.page)))
+            )
+            self.assertEqual(
+                SMALL.cues,
+                session.scalar(select(func.count()).select_from(CueAssociation)),
+            )
+
+    def test_pages_load_in_script_order(self):
+        line_ids = []
+        for page in range(1, SMALL.pages + 1):
+            response = self.fetch(f"/api/v1/show/script?page={page}")
+            self.assertEqual(200, response.code)
+            line_ids.extend(
+                line["id"] for line in escape.json_decode(response.body)["lines"]
+            )
+        self.assertEqual(self.show.line_ids, line_ids)
+
+    def test_deterministic(self):
+        with self._app.get_db().sessionmaker() as session:
+            same_seed = generate_show(session, SMALL)
+            other_seed = generate_show(session, replace(SMALL, seed=1))
+        texts = self._line_texts(self.show)
+        self.assertEqual(texts, self._line_texts(same_seed))
+        self.assertNotEqual(texts, self._line_texts(other_seed))
@@ -1,5 +1,6 @@
 import json
 import os
+from contextlib import contextmanager
 
 from sqlalchemy import inspect
 from tornado import escape
@@ -34,6 +35,11 @@ class DigiScriptTestCase(AsyncHTTPTestCase):
 
     def tearDown(self):
         os.remove(self.settings_path)
+        # Hooks are registered on the shared database object for each mapping, so
+        # remove them to stop them running for the applications of later tests
+        rbac_db = self._app.rbac._rbac_db
+        models.db.unregister_delete_hook(rbac_db.check_object_deletion)
+        models.db.unregister_bulk_delete_hook(rbac_db.check_bulk_deletion)
         for rbac_table in self._app.rbac._rbac_db._mappings:
             table = self._app.rbac._rbac_db._mappings[rbac_table]
             table_inspect = inspect(table)
@@ -75,3 +81,37 @@ class DigiScriptTestCase(AsyncHTTPTestCase):
             body=escape.json_encode({"username": username, "password": password}),
         )
         return escape.json_decode(resp.body)["access_token"]
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries, max_repeats=None):
+        """
+        Assert that each request made within the block executes at most
+        ``max_queries`` SQL statements and, if given, runs no statement more than
+        ``max_repeats`` times.
+
+        :param max_queries: Most statements each request may execute
+        :param max_repeats: Most times each request may execute the same statement
+        """
+        profiler = self._app.query_profiler
+        recorded = profiler.recorded
+        yield
+        profiles = profiler.profiles_since(recorded)
+        self.assertTrue(profiles, "No requests were made")
+        for profile in profiles:
+            repeated = "".join(
+                f"\n  {count}x {statement}" for statement, count in profile.repeated
+            )
+            self.assertLessEqual(
+                profile.queries,
+                max_queries,
+                f"{profile.endpoint} {profile.path} executed {profile.queries} "
+                f"queries, over the budget of {max_queries}{repeated}",
+            )
+            if max_repeats is not None and profile.repeated:
+                statement, count = profile.repeated[0]
+                self.assertLessEqual(
+                    count,
+                    max_repeats,
+                    f"{profile.endpoint} {profile.path} executed the same statement "
+                    f"{count} times{repeated}",
+                )
@@ -11,6 +11,7 @@ from models.script import (
 from models.show import Act, Character, Scene, Show, ShowScriptType
 from models.user import User
 from test.conftest import DigiScriptTestCase
+from test.utils.show.test_revision_diff import add_line, set_lines
 
 
 class TestScriptRevisionsController(DigiScriptTestCase):
@@ -1214,3 +1215,87 @@ class TestScriptRevisionDeletionTreeIntegrity(DigiScriptTestCase):
                 revision_e.previous_revision_id,
                 "Revision E should now point to B after C is deleted",
             )
+
+
+class TestScriptRevisionDiffController(DigiScriptTestCase):
+    """Test suite for /api/v1/show/script/revisions/diff endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            show = Show(name="Test Show", script_mode=ShowScriptType.FULL)
+            session.add(show)
+            session.flush()
+            self.show_id = show.id
+
+            script = Script(show_id=show.id)
+            session.add(script)
+            session.flush()
+
+            revisions = []
+            for number in (1, 2):
+                revision = ScriptRevision(
+                    script_id=script.id, revision=number, description=str(number)
+                )
+                session.add(revision)
+                session.flush()
+                revisions.append(revision.id)
+            self.from_id, self.to_id = revisions
+            script.current_revision = self.to_id
+
+            lines = [add_line(session, 1 + i // 2, f"Line {i}") for i in range(4)]
+            set_lines(session, self.from_id, lines)
+            self.changed_id = add_line(session, 2, "Changed")
+            set_lines(session, self.to_id, lines[:2] + [self.changed_id])
+            self.removed_id = lines[3]
+            session.commit()
+
+        self._app.digi_settings.settings["current_show"].set_value(self.show_id)
+
+    def _diff(self, query):
+        return self.fetch(
+            f"/api/v1/show/script/revisions/diff{query}", raise_error=False
+        )
+
+    def test_diff(self):
+        response = self._diff(f"?from={self.from_id}&to={self.to_id}")
+        self.assertEqual(200, response.code)
+        body = tornado.escape.json_decode(response.body)
+        self.assertEqual(self.from_id, body["from_revision"])
+        self.assertEqual(1, body["summary"]["lines_modified"])
+        self.assertEqual(1, body["summary"]["lines_removed"])
+        self.assertEqual([2], [page["page"] for page in body["pages"]])
+        changes = body["pages"][0]["lines"]
+        self.assertEqual(["modified", "removed"], [c["type"] for c in changes])
+        self.assertEqual(self.changed_id, changes[0]["line"]["id"])
+        self.assertEqual("Changed", changes[0]["line"]["line_parts"][0]["line_text"])
+        self.assertIsNone(changes[1]["line"])
+        self.assertEqual(self.removed_id, changes[1]["from_line"]["id"])
+
+    def test_diff_single_page(self):
+        response = self._diff(f"?from={self.from_id}&to={self.to_id}&page=1")
+        self.assertEqual(200, response.code)
+        body = tornado.escape.json_decode(response.body)
+        self.assertEqual([], body["pages"])
+        self.assertEqual(1, body["summary"]["lines_modified"])
+
+    def test_diff_invalid_arguments(self):
+        self.assertEqual(400, self._diff(f"?from={self.from_id}").code)
+        self.assertEqual(400, self._diff(f"?from=a&to={self.to_id}").code)
+        self.assertEqual(404, self._diff(f"?from=9999&to={self.to_id}").code)
+
+    def test_diff_revision_from_other_script(self):
+        with self._app.get_db().sessionmaker() as session:
+            other = Show(name="Other Show", script_mode=ShowScriptType.FULL)
+            session.add(other)
+            session.flush()
+            script = Script(show_id=other.id)
+            session.add(script)
+            session.flush()
+            revision = ScriptRevision(script_id=script.id, revision=1)
+            session.add(revision)
+            session.commit()
+            other_id = revision.id
+
+        response = self._diff(f"?from={other_id}&to={self.to_id}")
+        self.assertEqual(400, response.code)
@@ -1,8 +1,13 @@
+import gzip
+import tempfile
+
+import msgpack
 import tornado.escape
 from sqlalchemy import select
 
 from models.cue import Cue, CueAssociation, CueGroup, CueType
 from models.script import (
+    CompiledScript,
     Script,
     ScriptCuts,
     ScriptLine,
@@ -239,6 +244,57 @@ class TestCompiledScriptController(DigiScriptTestCase):
         # Empty script won't have compiled form yet, so expect 404
         self.assertEqual(404, response.code)
 
+    def _compile(self, temp_dir):
+        with self._app.get_db().sessionmaker() as session:
+            script = session.scalars(
+                select(Script).where(Script.show_id == self.show_id)
+            ).one()
+            revision_id = script.current_revision
+            line = ScriptLine(page=1, line_type=ScriptLineType.DIALOGUE)
+            session.add(line)
+            session.flush()
+            session.add(ScriptLinePart(line_id=line.id, part_index=0, line_text="Hi"))
+            session.add(
+                ScriptLineRevisionAssociation(revision_id=revision_id, line_id=line.id)
+            )
+            session.commit()
+        self._app.digi_settings.settings["compiled_script_path"].set_value(temp_dir)
+        self.io_loop.run_sync(
+            lambda: CompiledScript.compile_script(self._app, revision_id)
+        )
+
+    def test_get_compiled_script_encodings(self):
+        """Test the compiled script is sent as stored to clients accepting gzip,
+        decompressed to other clients, and as MessagePack if asked for."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self._compile(temp_dir)
+            gzipped = self.fetch(
+                "/api/v1/show/script/compiled",
+                headers={"Accept-Encoding": "gzip"},
+                decompress_response=False,
+            )
+            plain = self.fetch(
+                "/api/v1/show/script/compiled",
+                headers={"Accept-Encoding": "identity"},
+                decompress_response=False,
+            )
+            packed = self.fetch(
+                "/api/v1/show/script/compiled",
+                headers={"Accept": "application/msgpack"},
+            )
+
+        self.assertEqual(200, gzipped.code)
+        self.assertEqual("gzip", gzipped.headers["Content-Encoding"])
+        expected = tornado.escape.json_decode(gzip.decompress(gzipped.body))
+        self.assertEqual(["1"], list(expected))
+        self.assertEqual("Hi", expected["1"][0]["line_parts"][0]["line_text"])
+
+        self.assertNotIn("Content-Encoding", plain.headers)
+        self.assertEqual(expected, tornado.escape.json_decode(plain.body))
+
+        self.assertEqual("application/msgpack", packed.headers["Content-Type"])
+        self.assertEqual(expected, msgpack.unpackb(packed.body))
+
 
 class TestScriptCutsController(DigiScriptTestCase):
     """Test suite for /api/v1/show/script/cuts endpoint."""
@@ -0,0 +1,262 @@
+import tornado.escape
+from sqlalchemy import delete
+
+from models.script import (
+    Script,
+    ScriptCuts,
+    ScriptLine,
+    ScriptLinePart,
+    ScriptLineRevisionAssociation,
+    ScriptLineType,
+    ScriptRevision,
+)
+from models.show import Act, Character, CharacterGroup, Scene, Show, ShowScriptType
+from test.conftest import DigiScriptTestCase
+from utils.show.script_search import build_match_query
+
+
+class TestBuildMatchQuery:
+    """Unit tests for converting user input into FTS5 queries."""
+
+    def test_words_are_quoted_prefixes(self):
+        assert build_match_query("hello world") == '"hello"* "world"*'
+
+    def test_operators_and_punctuation_are_stripped(self):
+        assert build_match_query('NEAR("a" OR b)') == '"NEAR"* "a"* "OR"* "b"*'
+
+    def test_no_words(self):
+        assert build_match_query("") is None
+        assert build_match_query("  ?! ") is None
+
+
+class TestScriptSearchController(DigiScriptTestCase):
+    """Test suite for /api/v1/show/script/search endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            show = Show(name="Test Show", script_mode=ShowScriptType.FULL)
+            session.add(show)
+            session.flush()
+            self.show_id = show.id
+
+            script = Script(show_id=show.id)
+            session.add(script)
+            session.flush()
+
+            revision = ScriptRevision(
+                script_id=script.id, revision=1, description="Test Rev"
+            )
+            session.add(revision)
+            session.flush()
+            self.revision_id = revision.id
+            script.current_revision = revision.id
+
+            other_revision = ScriptRevision(
+                script_id=script.id, revision=2, description="Other Rev"
+            )
+            session.add(other_revision)
+            session.flush()
+            self.other_revision_id = other_revision.id
+
+            act = Act(show_id=show.id, name="Act 1")
+            session.add(act)
+            session.flush()
+            scene = Scene(show_id=show.id, act_id=act.id, name="Scene 1")
+            session.add(scene)
+            session.flush()
+
+            alice = Character(show_id=show.id, name="Alice")
+            bob = Character(show_id=show.id, name="Bob")
+            session.add_all([alice, bob])
+            session.flush()
+            self.alice_id = alice.id
+            self.bob_id = bob.id
+
+            group = CharacterGroup(show_id=show.id, name="Everyone")
+            group.characters = [alice, bob]
+            session.add(group)
+            session.flush()
+            self.group_id = group.id
+
+            # Page 1: three lines, page 2: one line, all in the current revision
+            texts = [
+                (1, {"character_id": alice.id}, "The rain in Spain"),
+                (1, {"character_id": bob.id}, "Falls mainly on the plain"),
+                (1, {"character_group_id": group.id}, "Singing in the rain"),
+                (2, {"character_id": bob.id}, "A plain old line"),
+            ]
+            self.line_ids = []
+            self.part_ids = []
+            previous_line = None
+            for page, speaker, line_text in texts:
+                line = ScriptLine(
+                    act_id=act.id,
+                    scene_id=scene.id,
+                    page=page,
+                    line_type=ScriptLineType.DIALOGUE,
+                )
+                session.add(line)
+                session.flush()
+                part = ScriptLinePart(
+                    line_id=line.id, part_index=0, line_text=line_text, **speaker
+                )
+                session.add(part)
+                session.flush()
+                session.add(
+                    ScriptLineRevisionAssociation(
+                        revision_id=revision.id,
+                        line_id=line.id,
+                        previous_line_id=previous_line.id if previous_line else None,
+                    )
+                )
+                session.flush()
+                if previous_line:
+                    prev_assoc = session.get(
+                        ScriptLineRevisionAssociation, (revision.id, previous_line.id)
+                    )
+                    prev_assoc.next_line_id = line.id
+                previous_line = line
+                self.line_ids.append(line.id)
+                self.part_ids.append(part.id)
+
+            # A line which only exists in the other revision
+            other_line = ScriptLine(
+                act_id=act.id,
+                scene_id=scene.id,
+                page=1,
+                line_type=ScriptLineType.DIALOGUE,
+            )
+            session.add(other_line)
+            session.flush()
+            session.add(
+                ScriptLinePart(
+                    line_id=other_line.id,
+                    part_index=0,
+                    character_id=alice.id,
+                    line_text="Rain only in the other revision",
+                )
+            )
+            session.add(
+                ScriptLineRevisionAssociation(
+                    revision_id=other_revision.id, line_id=other_line.id
+                )
+            )
+            session.commit()
+
+        self._app.digi_settings.settings["current_show"].set_value(self.show_id)
+
+    def _search(self, query_string):
+        response = self.fetch(f"/api/v1/show/script/search?{query_string}")
+        return response.code, tornado.escape.json_decode(response.body)
+
+    def test_search_missing_query(self):
+        code, body = self._search("q=")
+        self.assertEqual(400, code)
+        self.assertEqual("Search query missing", body["message"])
+
+    def test_search_invalid_parameters(self):
+        code, _ = self._search("q=rain&character_id=abc")
+        self.assertEqual(400, code)
+
+    def test_search_returns_ranked_matches_with_positions(self):
+        code, body = self._search("q=rain")
+        self.assertEqual(200, code)
+        self.assertEqual(self.revision_id, body["revision_id"])
+        self.assertEqual(2, body["total"])
+
+        results = {r["line_id"]: r for r in body["results"]}
+        self.assertEqual({self.line_ids[0], self.line_ids[2]}, set(results))
+
+        first = results[self.line_ids[0]]
+        self.assertEqual(1, first["page"])
+        self.assertEqual(0, first["line_index"])
+        self.assertEqual(self.part_ids[0], first["line_part_id"])
+        self.assertEqual("The <mark>rain</mark> in Spain", first["highlight"])
+        self.assertIn("<mark>rain</mark>", first["snippet"])
+        self.assertFalse(first["is_cut"])
+
+        self.assertEqual(2, results[self.line_ids[2]]["line_index"])
+
+    def test_search_prefix_and_multiple_words(self):
+        code, body = self._search("q=plai")
+        self.assertEqual(200, code)
+        self.assertEqual(2, body["total"])
+
+        code, body = self._search("q=plain+old")
+        self.assertEqual(200, code)
+        self.assertEqual(1, body["total"])
+        self.assertEqual(self.line_ids[3], body["results"][0]["line_id"])
+        self.assertEqual(2, body["results"][0]["page"])
+        self.assertEqual(0, body["results"][0]["line_index"])
+
+    def test_search_is_scoped_to_revision(self):
+        code, body = self._search(f"q=revision&revision_id={self.revision_id}")
+        self.assertEqual(200, code)
+        self.assertEqual(0, body["total"])
+
+        code, body = self._search(f"q=revision&revision_id={self.other_revision_id}")
+        self.assertEqual(200, code)
+        self.assertEqual(1, body["total"])
+
+    def test_search_unknown_revision(self):
+        code, _ = self._search("q=rain&revision_id=9999")
+        self.assertEqual(404, code)
+
+    def test_search_character_filter_includes_groups(self):
+        code, body = self._search(f"q=rain&character_id={self.alice_id}")
+        self.assertEqual(200, code)
+        self.assertEqual(
+            {self.line_ids[0], self.line_ids[2]},
+            {r["line_id"] for r in body["results"]},
+        )
+
+        code, body = self._search(f"q=rain&character_id={self.bob_id}")
+        self.assertEqual(200, code)
+        self.assertEqual([self.line_ids[2]], [r["line_id"] for r in body["results"]])
+
+        code, body = self._search(
+            f"q=plain&character_id={self.alice_id}&character_id={self.bob_id}"
+        )
+        self.assertEqual(200, code)
+        self.assertEqual(2, body["total"])
+
+    def test_search_limit_and_offset(self):
+        code, body = self._search("q=rain&limit=1")
+        self.assertEqual(200, code)
+        self.assertEqual(2, body["total"])
+        self.assertEqual(1, len(body["results"]))
+
+        code, second_page = self._search("q=rain&limit=1&offset=1")
+        self.assertEqual(200, code)
+        self.assertNotEqual(
+            body["results"][0]["line_part_id"],
+            second_page["results"][0]["line_part_id"],
+        )
+
+    def test_search_reports_cut_line_parts(self):
+        with self._app.get_db().sessionmaker() as session:
+            session.add(
+                ScriptCuts(line_part_id=self.part_ids[0], revision_id=self.revision_id)
+            )
+            session.commit()
+
+        code, body = self._search("q=spain")
+        self.assertEqual(200, code)
+        self.assertTrue(body["results"][0]["is_cut"])
+
+    def test_search_index_follows_writes(self):
+        with self._app.get_db().sessionmaker() as session:
+            session.execute(
+                delete(ScriptLinePart).where(ScriptLinePart.id == self.part_ids[0])
+            )
+            part = session.get(ScriptLinePart, self.part_ids[1])
+            part.line_text = "Falls mainly on the rainy plain"
+            session.commit()
+
+        code, body = self._search("q=rain")
+        self.assertEqual(200, code)
+        self.assertEqual(
+            {self.line_ids[1], self.line_ids[2]},
+            {r["line_id"] for r in body["results"]},
+        )
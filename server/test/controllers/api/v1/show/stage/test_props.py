@@ -1,9 +1,20 @@
+from unittest.mock import AsyncMock, patch
+
 import tornado.escape
+from sqlalchemy import select
 
+from controllers.api.constants import ERROR_SCENE_NOT_FOUND
 from models.show import Act, Scene, Show, ShowScriptType
-from models.stage import Props, PropsAllocation, PropType
+from models.stage import CrewAssignment, Props, PropsAllocation, PropType
 from models.user import User
 from test.conftest import DigiScriptTestCase
+from test.helpers.stage_fixtures import (
+    create_act_with_scenes,
+    create_admin_user,
+    create_crew,
+    create_prop,
+    create_show,
+)
 
 
 class TestPropsAllocationController(DigiScriptTestCase):
@@ -294,6 +305,156 @@ class TestPropsAllocationController(DigiScriptTestCase):
         self.assertEqual(400, response.code)
 
 
+class TestPropsAllocationBatchController(DigiScriptTestCase):
+    """Test suite for /api/v1/show/stage/props/allocations/batch endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            self.show_id = create_show(session)
+            _, self.scene_ids = create_act_with_scenes(
+                session, self.show_id, "Act 1", 3, link_to_show=True
+            )
+            _, self.prop_id = create_prop(session, self.show_id)
+            _, self.other_prop_id = create_prop(
+                session, self.show_id, name="Shield", type_name="Armour"
+            )
+            self.crew_id = create_crew(session, self.show_id)
+
+            # Prop is allocated to scenes 1 and 2, and struck in scene 2
+            session.add_all(
+                [
+                    PropsAllocation(props_id=self.prop_id, scene_id=scene_id)
+                    for scene_id in self.scene_ids[:2]
+                ]
+            )
+            strike = CrewAssignment(
+                crew_id=self.crew_id,
+                scene_id=self.scene_ids[1],
+                assignment_type="strike",
+                prop_id=self.prop_id,
+            )
+            session.add(strike)
+            session.flush()
+            self.strike_id = strike.id
+
+            self.user_id = create_admin_user(session)
+            session.commit()
+
+        self._app.digi_settings.settings["current_show"].set_value(self.show_id)
+        self.token = self._app.jwt_service.create_access_token(
+            data={"user_id": self.user_id}
+        )
+
+    def _batch(self, body):
+        response = self.fetch(
+            "/api/v1/show/stage/props/allocations/batch",
+            method="PATCH",
+            body=tornado.escape.json_encode(body),
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        return response.code, tornado.escape.json_decode(response.body)
+
+    @staticmethod
+    def _broadcast_actions(ws_send_to_all):
+        # Loading the show in setUp also broadcasts, which may land in the request
+        return [
+            call.args[1]
+            for call in ws_send_to_all.await_args_list
+            if call.args[1] != "SHOW_CHANGED"
+        ]
+
+    def _allocated(self):
+        with self._app.get_db().sessionmaker() as session:
+            return {
+                (allocation.props_id, allocation.scene_id)
+                for allocation in session.scalars(select(PropsAllocation))
+            }
+
+    def test_batch_adds_and_removes(self):
+        scene1, scene2, scene3 = self.scene_ids
+        with patch.object(
+            self._app, "ws_send_to_all", new_callable=AsyncMock
+        ) as ws_send_to_all:
+            code, body = self._batch(
+                {
+                    "add": [
+                        {"props_id": self.other_prop_id, "scene_id": scene_id}
+                        for scene_id in self.scene_ids
+                    ],
+                    "remove": [{"props_id": self.prop_id, "scene_id": scene1}],
+                }
+            )
+        self.assertEqual(200, code)
+        self.assertEqual(3, len(body["added"]))
+        self.assertEqual(1, body["removed"])
+        self.assertEqual(
+            {(self.prop_id, scene2)}
+            | {(self.other_prop_id, scene_id) for scene_id in self.scene_ids},
+            self._allocated(),
+        )
+        # Scene 2 is still the end of the block, so the strike is kept
+        self.assertEqual([], body["deleted_assignment_ids"])
+        self.assertEqual(
+            ["GET_PROPS_ALLOCATIONS"], self._broadcast_actions(ws_send_to_all)
+        )
+
+    def test_batch_deletes_orphaned_assignments(self):
+        with patch.object(
+            self._app, "ws_send_to_all", new_callable=AsyncMock
+        ) as ws_send_to_all:
+            code, body = self._batch(
+                {"add": [{"props_id": self.prop_id, "scene_id": self.scene_ids[2]}]}
+            )
+        self.assertEqual(200, code)
+        self.assertEqual([self.strike_id], body["deleted_assignment_ids"])
+        with self._app.get_db().sessionmaker() as session:
+            self.assertIsNone(session.get(CrewAssignment, self.strike_id))
+        self.assertEqual(
+            ["GET_PROPS_ALLOCATIONS", "GET_CREW_ASSIGNMENTS"],
+            self._broadcast_actions(ws_send_to_all),
+        )
+
+    def test_batch_is_idempotent(self):
+        code, body = self._batch(
+            {
+                "add": [{"props_id": self.prop_id, "scene_id": self.scene_ids[0]}],
+                "remove": [
+                    {"props_id": self.other_prop_id, "scene_id": self.scene_ids[0]}
+                ],
+            }
+        )
+        self.assertEqual(200, code)
+        self.assertEqual([], body["added"])
+        self.assertEqual(0, body["removed"])
+        self.assertEqual(2, len(self._allocated()))
+
+    def test_batch_conflicting_changes(self):
+        entry = {"props_id": self.prop_id, "scene_id": self.scene_ids[2]}
+        code, body = self._batch({"add": [entry], "remove": [entry]})
+        self.assertEqual(400, code)
+        self.assertIn("both added and removed", body["message"])
+
+    def test_batch_invalid_entry(self):
+        code, _ = self._batch({"add": [{"props_id": self.prop_id}]})
+        self.assertEqual(400, code)
+        code, _ = self._batch({"remove": {"props_id": self.prop_id}})
+        self.assertEqual(400, code)
+
+    def test_batch_unknown_prop_or_scene(self):
+        code, _ = self._batch(
+            {"add": [{"props_id": 99999, "scene_id": self.scene_ids[0]}]}
+        )
+        self.assertEqual(404, code)
+        code, body = self._batch(
+            {"add": [{"props_id": self.prop_id, "scene_id": 99999}]}
+        )
+        self.assertEqual(404, code)
+        self.assertEqual(ERROR_SCENE_NOT_FOUND, body["message"])
+        # Nothing is changed when any entry is rejected
+        self.assertEqual(2, len(self._allocated()))
+
+
 class TestPropTypesController(DigiScriptTestCase):
     """Test suite for /api/v1/show/stage/props/types endpoint."""
 
@@ -1,9 +1,16 @@
 import tornado.escape
+from sqlalchemy import select
 
 from models.show import Act, Scene, Show, ShowScriptType
 from models.stage import Scenery, SceneryAllocation, SceneryType
 from models.user import User
 from test.conftest import DigiScriptTestCase
+from test.helpers.stage_fixtures import (
+    create_act_with_scenes,
+    create_admin_user,
+    create_scenery,
+    create_show,
+)
 
 
 class TestSceneryAllocationController(DigiScriptTestCase):
@@ -302,6 +309,71 @@ class TestSceneryAllocationController(DigiScriptTestCase):
         self.assertEqual(400, response.code)
 
 
+class TestSceneryAllocationBatchController(DigiScriptTestCase):
+    """Test suite for /api/v1/show/stage/scenery/allocations/batch endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            self.show_id = create_show(session)
+            _, self.scene_ids = create_act_with_scenes(
+                session, self.show_id, "Act 1", 2, link_to_show=True
+            )
+            _, self.scenery_id = create_scenery(session, self.show_id)
+            self.user_id = create_admin_user(session)
+            session.commit()
+
+        self._app.digi_settings.settings["current_show"].set_value(self.show_id)
+        self.token = self._app.jwt_service.create_access_token(
+            data={"user_id": self.user_id}
+        )
+
+    def test_batch_adds_and_removes(self):
+        entries = [
+            {"scenery_id": self.scenery_id, "scene_id": scene_id}
+            for scene_id in self.scene_ids
+        ]
+        for body, expected in (
+            ({"add": entries}, set(self.scene_ids)),
+            ({"remove": entries[:1]}, {self.scene_ids[1]}),
+        ):
+            response = self.fetch(
+                "/api/v1/show/stage/scenery/allocations/batch",
+                method="PATCH",
+                body=tornado.escape.json_encode(body),
+                headers={"Authorization": f"Bearer {self.token}"},
+            )
+            self.assertEqual(200, response.code)
+            with self._app.get_db().sessionmaker() as session:
+                self.assertEqual(
+                    expected,
+                    {
+                        allocation.scene_id
+                        for allocation in session.scalars(select(SceneryAllocation))
+                    },
+                )
+
+    def test_batch_scenery_wrong_show(self):
+        with self._app.get_db().sessionmaker() as session:
+            other_show_id = create_show(session, name="Other Show")
+            _, other_scenery_id = create_scenery(session, other_show_id)
+            session.commit()
+
+        response = self.fetch(
+            "/api/v1/show/stage/scenery/allocations/batch",
+            method="PATCH",
+            body=tornado.escape.json_encode(
+                {
+                    "add": [
+                        {"scenery_id": other_scenery_id, "scene_id": self.scene_ids[0]}
+                    ]
+                }
+            ),
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        self.assertEqual(404, response.code)
+
+
 class TestSceneryTypesController(DigiScriptTestCase):
     """Test suite for /api/v1/show/stage/scenery/types endpoint."""
 
@@ -1,7 +1,17 @@
+import time
+
 import tornado.escape
 
 from models.mics import Microphone
-from models.show import Show, ShowScriptType
+from models.script import (
+    Script,
+    ScriptLine,
+    ScriptLinePart,
+    ScriptLineRevisionAssociation,
+    ScriptLineType,
+    ScriptRevision,
+)
+from models.show import Act, Character, Scene, Show, ShowScriptType
 from test.conftest import DigiScriptTestCase
 
 
@@ -92,3 +102,252 @@ class TestMicrophoneAllocationsController(DigiScriptTestCase):
         self.assertEqual(200, response.code)
         response_body = tornado.escape.json_decode(response.body)
         self.assertIn(str(mic_id), response_body["allocations"])
+
+
+class TestMicrophoneAutoAssignmentController(DigiScriptTestCase):
+    """Test suite for /api/v1/show/microphones/suggest endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            show = Show(name="Test Show", script_mode=ShowScriptType.FULL)
+            session.add(show)
+            session.flush()
+            self.show_id = show.id
+
+            # Act 1 (scenes 1 and 2) is followed by an interval, Act 2 has scene 3
+            act_1 = Act(show_id=show.id, name="Act 1", interval_after=True)
+            act_2 = Act(show_id=show.id, name="Act 2", interval_after=False)
+            session.add_all([act_1, act_2])
+            session.flush()
+            act_2.previous_act = act_1
+            show.first_act = act_1
+
+            scenes = [
+                Scene(show_id=show.id, act_id=act_1.id, name="Scene 1"),
+                Scene(show_id=show.id, act_id=act_1.id, name="Scene 2"),
+                Scene(show_id=show.id, act_id=act_2.id, name="Scene 3"),
+            ]
+            session.add_all(scenes)
+            session.flush()
+            scenes[1].previous_scene = scenes[0]
+            act_1.first_scene = scenes[0]
+            act_2.first_scene = scenes[2]
+            self.scene_ids = [scene.id for scene in scenes]
+
+            characters = [
+                Character(show_id=show.id, name=name) for name in ("A", "B", "C")
+            ]
+            session.add_all(characters)
+            session.flush()
+            self.character_ids = [character.id for character in characters]
+
+            mics = [Microphone(show_id=show.id, name=f"Mic {i}") for i in (1, 2)]
+            session.add_all(mics)
+            session.flush()
+            self.mic_ids = [mic.id for mic in mics]
+
+            script = Script(show_id=show.id)
+            session.add(script)
+            session.flush()
+            revision = ScriptRevision(script_id=script.id, revision=1, description="")
+            session.add(revision)
+            session.flush()
+            script.current_revision = revision.id
+
+            # A speaks in every scene, B only in scene 1, C only in scene 2
+            appearances = [(0, 0), (0, 1), (1, 0), (1, 2), (2, 0)]
+            for scene_index, character_index in appearances:
+                line = ScriptLine(
+                    act_id=scenes[scene_index].act_id,
+                    scene_id=scenes[scene_index].id,
+                    page=1,
+                    line_type=ScriptLineType.DIALOGUE,
+                )
+                session.add(line)
+                session.flush()
+                session.add(
+                    ScriptLinePart(
+                        line_id=line.id,
+                        part_index=0,
+                        character_id=characters[character_index].id,
+                        line_text="Line",
+                    )
+                )
+                session.add(
+                    ScriptLineRevisionAssociation(
+                        revision_id=revision.id, line_id=line.id
+                    )
+                )
+            session.commit()
+
+        self._app.digi_settings.settings["current_show"].set_value(self.show_id)
+        self.token = self._create_and_login_admin()
+
+    def _suggest(self, **overrides):
+        body = {"excluded_mics": [], "static_characters": [], "gap_mode": "leave_gaps"}
+        body.update(overrides)
+        response = self.fetch(
+            "/api/v1/show/microphones/suggest",
+            method="POST",
+            body=tornado.escape.json_encode(body),
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        return response.code, tornado.escape.json_decode(response.body)
+
+    def test_suggest_missing_parameters(self):
+        response = self.fetch(
+            "/api/v1/show/microphones/suggest",
+            method="POST",
+            body=tornado.escape.json_encode({}),
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        self.assertEqual(400, response.code)
+
+    def test_suggest_allocates_every_appearance(self):
+        code, body = self._suggest()
+        self.assertEqual(200, code)
+        self.assertEqual([], body["hints"])
+
+        assigned = set()
+        for scene_allocations in body["allocations"].values():
+            for scene_id, character_id in scene_allocations.items():
+                assigned.add((int(scene_id), character_id))
+        char_a, char_b, char_c = self.character_ids
+        scene_1, scene_2, scene_3 = self.scene_ids
+        self.assertEqual(
+            {
+                (scene_1, char_a),
+                (scene_2, char_a),
+                (scene_3, char_a),
+                (scene_1, char_b),
+                (scene_2, char_c),
+            },
+            assigned,
+        )
+
+        # A speaks the most, so keeps a single mic throughout
+        mics_for_a = {
+            mic_id
+            for mic_id, scene_allocations in body["allocations"].items()
+            if char_a in scene_allocations.values()
+        }
+        self.assertEqual(1, len(mics_for_a))
+
+    def test_suggest_reports_unallocated_appearances(self):
+        code, body = self._suggest(excluded_mics=[self.mic_ids[1]])
+        self.assertEqual(200, code)
+        # A takes the only mic in every scene, leaving nothing for B or C
+        self.assertEqual(
+            {
+                (self.character_ids[1], self.scene_ids[0]),
+                (self.character_ids[2], self.scene_ids[1]),
+            },
+            {
+                (hint["character_id"], hint["scene_id"])
+                for hint in body["hints"]
+                if hint["type"] == "allocation"
+            },
+        )
+
+    def test_suggest_static_character(self):
+        code, body = self._suggest(static_characters=[self.character_ids[2]])
+        self.assertEqual(200, code)
+        static_mics = [
+            scene_allocations
+            for scene_allocations in body["allocations"].values()
+            if set(scene_allocations.values()) == {self.character_ids[2]}
+        ]
+        self.assertEqual(1, len(static_mics))
+        self.assertEqual(
+            {str(scene_id) for scene_id in self.scene_ids}, set(static_mics[0])
+        )
+
+    def test_suggest_reports_greedy_cost(self):
+        code, body = self._suggest()
+        self.assertEqual(200, code)
+        self.assertEqual("greedy", body["solver"])
+        self.assertEqual(["greedy"], list(body["costs"]))
+
+    def test_suggest_invalid_solver(self):
+        code, body = self._suggest(solver="fastest")
+        self.assertEqual(400, code)
+        self.assertEqual("Invalid solver value", body["message"])
+
+    def test_suggest_optimal_solver(self):
+        code, body = self._suggest(solver="optimal")
+        self.assertEqual(200, code)
+        self.assertIn(body["solver"], ["greedy", "optimal"])
+        self.assertIsNotNone(body["costs"]["optimal"])
+        # The optimal solution is only used when it is cheaper
+        if body["solver"] == "optimal":
+            self.assertLess(body["costs"]["optimal"], body["costs"]["greedy"])
+        else:
+            self.assertGreaterEqual(body["costs"]["optimal"], body["costs"]["greedy"])
+        self.assertEqual([], body["hints"])
+
+    def _jobs(self, method="GET", job_id=None, **overrides):
+        url = "/api/v1/show/microphones/suggest/jobs"
+        if job_id is not None:
+            url += f"?job_id={job_id}"
+        body = None
+        if method == "POST":
+            body = {
+                "excluded_mics": [],
+                "static_characters": [],
+                "gap_mode": "leave_gaps",
+            }
+            body.update(overrides)
+            body = tornado.escape.json_encode(body)
+        response = self.fetch(
+            url,
+            method=method,
+            body=body,
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        return response.code, tornado.escape.json_decode(response.body)
+
+    def _wait_for_job(self, job_id):
+        for _ in range(100):
+            code, body = self._jobs(job_id=job_id)
+            self.assertEqual(200, code)
+            if body["status"] != "running" and body["status"] != "pending":
+                return body
+            time.sleep(0.05)
+        self.fail("Job did not finish")
+
+    def test_suggest_job_lifecycle(self):
+        code, body = self._jobs(method="POST")
+        self.assertEqual(202, code)
+        self.assertIn(body["status"], ["pending", "running"])
+        job_id = body["job_id"]
+
+        body = self._wait_for_job(job_id)
+        self.assertEqual("completed", body["status"])
+        self.assertEqual(1.0, body["progress"])
+        self.assertEqual([], body["result"]["hints"])
+
+        # Finished jobs cannot be cancelled
+        code, body = self._jobs(method="DELETE", job_id=job_id)
+        self.assertEqual(409, code)
+
+    def test_suggest_job_is_reused_for_identical_input(self):
+        _, first = self._jobs(method="POST")
+        _, second = self._jobs(method="POST")
+        self.assertEqual(first["job_id"], second["job_id"])
+
+        _, other = self._jobs(method="POST", gap_mode="no_gaps")
+        self.assertNotEqual(first["job_id"], other["job_id"])
+
+    def test_suggest_job_validates_input(self):
+        code, body = self._jobs(method="POST", solver="fastest")
+        self.assertEqual(400, code)
+        self.assertEqual("Invalid solver value", body["message"])
+
+    def test_suggest_job_unknown_or_missing(self):
+        code, _ = self._jobs(job_id="unknown")
+        self.assertEqual(404, code)
+        code, _ = self._jobs(method="DELETE", job_id="unknown")
+        self.assertEqual(404, code)
+        code, _ = self._jobs()
+        self.assertEqual(400, code)
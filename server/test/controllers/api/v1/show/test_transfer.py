@@ -0,0 +1,88 @@
+import gzip
+import json
+
+import tornado.escape
+from sqlalchemy import func, select
+
+from models.show import Show
+from test.conftest import DigiScriptTestCase
+from test.utils.show.test_show_deletion import populate_show
+
+
+class TestShowTransferController(DigiScriptTestCase):
+    """Test suite for /api/v1/show/export and /api/v1/show/import."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            self.show_id = populate_show(session, "Show: Exported")
+            session.commit()
+        self._app.digi_settings.settings["current_show"].set_value(self.show_id)
+        self.token = self._create_and_login_admin()
+
+    def _headers(self, token=None):
+        return {"Authorization": f"Bearer {token or self.token}"}
+
+    def _export(self, query="", token=None):
+        return self.fetch(
+            f"/api/v1/show/export{query}",
+            headers=self._headers(token),
+            raise_error=False,
+        )
+
+    def _import(self, body, query="", token=None):
+        return self.fetch(
+            f"/api/v1/show/import{query}",
+            method="POST",
+            body=body,
+            headers=self._headers(token),
+            raise_error=False,
+        )
+
+    def _show_count(self):
+        with self._app.get_db().sessionmaker() as session:
+            return session.scalar(select(func.count()).select_from(Show))
+
+    def test_export_current_show(self):
+        response = self._export()
+        self.assertEqual(200, response.code)
+        self.assertEqual("application/gzip", response.headers["Content-Type"])
+        self.assertIn(
+            'filename="Show_Exported.digiscript.jsonl.gz"',
+            response.headers["Content-Disposition"],
+        )
+        lines = gzip.decompress(response.body).decode().splitlines()
+        self.assertEqual(self.show_id, json.loads(lines[0])["show_id"])
+        self.assertTrue(json.loads(lines[-1])["end"])
+
+    def test_export_unknown_show_returns_404(self):
+        response = self._export("?show_id=9999")
+        self.assertEqual(404, response.code)
+
+    def test_export_invalid_show_id_returns_400(self):
+        response = self._export("?show_id=abc")
+        self.assertEqual(400, response.code)
+
+    def test_non_admin_returns_401(self):
+        user_token = self._create_and_login_user(self.token)
+        self.assertEqual(401, self._export(token=user_token).code)
+        self.assertEqual(401, self._import(b"", token=user_token).code)
+
+    def test_import_creates_show(self):
+        export = self._export().body
+        response = self._import(export, "?load=true")
+        self.assertEqual(200, response.code)
+        body = tornado.escape.json_decode(response.body)
+        self.assertNotEqual(self.show_id, body["show_id"])
+        self.assertEqual(3, body["row_counts"]["script_lines"])
+        self.assertEqual(2, self._show_count())
+        self.assertEqual(
+            body["show_id"],
+            self._app.digi_settings.settings["current_show"].get_value(),
+        )
+
+    def test_import_invalid_data_returns_400(self):
+        export = gzip.decompress(self._export().body).splitlines()
+        response = self._import(b"\n".join(export[:-1]))
+        self.assertEqual(400, response.code)
+        self.assertEqual(1, self._show_count())
@@ -1,4 +1,4 @@
-"""Integration tests for GET /api/v1/admin/db-backups and DELETE /api/v1/admin/db-backups."""
+"""Integration tests for the /api/v1/admin/db-backups endpoints."""
 
 import os
 import shutil
@@ -186,3 +186,83 @@ class TestDbBackupsController(DigiScriptTestCase):
         body = escape.json_decode(resp.body)
         self.assertEqual(1, body["count"])
         self.assertEqual(ts2, body["backups"][0]["created_at"])
+
+    # ------------------------------------------------------------------
+    # POST — create
+    # ------------------------------------------------------------------
+
+    def _post(self, path, body, token=None):
+        headers = {}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return self.fetch(
+            path,
+            method="POST",
+            body=escape.json_encode(body),
+            headers=headers,
+            raise_error=False,
+        )
+
+    def test_post_non_admin_returns_401(self):
+        admin_token = self._create_and_login_admin()
+        user_token = self._create_and_login_user(admin_token)
+        resp = self._post("/api/v1/admin/db-backups", {}, token=user_token)
+        self.assertEqual(401, resp.code)
+
+    def test_post_creates_compressed_backup(self):
+        token = self._create_and_login_admin()
+        resp = self._post("/api/v1/admin/db-backups", {}, token=token)
+        self.assertEqual(200, resp.code)
+        backup = escape.json_decode(resp.body)["backup"]
+        self.assertTrue(backup["filename"].endswith(".gz"))
+        self.assertTrue(os.path.isfile(os.path.join(self._tmp_dir, backup["filename"])))
+
+        body = escape.json_decode(self._fetch_backups(token=token).body)
+        self.assertEqual(1, body["count"])
+        self.assertEqual("manual", body["backups"][0]["reason"])
+
+    # ------------------------------------------------------------------
+    # POST — restore
+    # ------------------------------------------------------------------
+
+    def test_restore_non_admin_returns_401(self):
+        admin_token = self._create_and_login_admin()
+        user_token = self._create_and_login_user(admin_token)
+        resp = self._post(
+            "/api/v1/admin/db-backups/restore",
+            {"timestamp": 1700000000},
+            token=user_token,
+        )
+        self.assertEqual(401, resp.code)
+
+    def test_restore_invalid_timestamp_returns_400(self):
+        token = self._create_and_login_admin()
+        resp = self._post(
+            "/api/v1/admin/db-backups/restore", {"timestamp": "abc"}, token=token
+        )
+        self.assertEqual(400, resp.code)
+
+    def test_restore_nonexistent_timestamp_returns_404(self):
+        token = self._create_and_login_admin()
+        resp = self._post(
+            "/api/v1/admin/db-backups/restore", {"timestamp": 9999999999}, token=token
+        )
+        self.assertEqual(404, resp.code)
+
+    def test_restore_backs_up_current_database_first(self):
+        token = self._create_and_login_admin()
+        created = escape.json_decode(
+            self._post("/api/v1/admin/db-backups", {}, token=token).body
+        )["backup"]
+
+        resp = self._post(
+            "/api/v1/admin/db-backups/restore",
+            {"timestamp": created["created_at"]},
+            token=token,
+        )
+        self.assertEqual(200, resp.code)
+        self.assertEqual(
+            "pre_restore", escape.json_decode(resp.body)["backup"]["reason"]
+        )
+        body = escape.json_decode(self._fetch_backups(token=token).body)
+        self.assertEqual(2, body["count"])
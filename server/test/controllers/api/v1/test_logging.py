@@ -3,6 +3,7 @@ import json
 from tornado import escape
 from tornado.testing import gen_test
 
+from services.client_log_service import CLIENT_BURST, MAX_BATCH_SIZE
 from test.conftest import DigiScriptTestCase
 
 
@@ -70,3 +71,66 @@ class TestLoggingController(DigiScriptTestCase):
                 headers={"Content-Type": "application/json"},
             )
             self.assertEqual(200, response.code)
+
+    @gen_test
+    async def test_batch_endpoint_success(self):
+        """Test that the batch endpoint accepts a list of entries."""
+        payload = {
+            "batch": [
+                {"level": "INFO", "message": "First"},
+                {"level": "ERROR", "message": "Second"},
+            ]
+        }
+        response = await self.http_client.fetch(
+            self.get_url("/api/v1/logs/batch"),
+            method="POST",
+            body=json.dumps(payload),
+            headers={"Content-Type": "application/json"},
+        )
+        self.assertEqual(200, response.code)
+        data = escape.json_decode(response.body)
+        self.assertEqual("OK", data["status"])
+        self.assertEqual(0, data["rate_limited"])
+
+    @gen_test
+    async def test_batch_endpoint_rejects_large_batch(self):
+        """Test that batches over the maximum size are rejected."""
+        payload = {
+            "batch": [
+                {"level": "INFO", "message": f"Entry {i}"}
+                for i in range(MAX_BATCH_SIZE + 1)
+            ]
+        }
+        response = await self.http_client.fetch(
+            self.get_url("/api/v1/logs/batch"),
+            method="POST",
+            body=json.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            raise_error=False,
+        )
+        self.assertEqual(413, response.code)
+        stats = self._app.client_log_service.get_stats()
+        self.assertEqual(MAX_BATCH_SIZE + 1, stats["dropped_batch_too_large"])
+
+    @gen_test
+    async def test_batch_endpoint_rate_limited(self):
+        """Test that a client sending too many entries receives a 429."""
+        payload = {
+            "batch": [
+                {"level": "ERROR", "message": f"Entry {i}"}
+                for i in range(MAX_BATCH_SIZE)
+            ]
+        }
+        codes = []
+        for _ in range(CLIENT_BURST // MAX_BATCH_SIZE + 2):
+            response = await self.http_client.fetch(
+                self.get_url("/api/v1/logs/batch"),
+                method="POST",
+                body=json.dumps(payload),
+                headers={"Content-Type": "application/json"},
+                raise_error=False,
+            )
+            codes.append(response.code)
+        self.assertEqual(200, codes[0])
+        self.assertEqual(429, codes[-1])
+        await self._app.client_log_service.drain()
@@ -1,11 +1,14 @@
 """Integration tests for GET /api/v1/logs/view."""
 
+import asyncio
 import logging
 
 from tornado import escape
 
+from controllers.api.v1.logs_viewer import _get_fanout
 from test.conftest import DigiScriptTestCase
-from utils.log_buffer import get_client_buffer, get_server_buffer
+from utils.log_buffer import LogBufferHandler, get_client_buffer, get_server_buffer
+from utils.log_query import LogQuery
 
 
 def _make_record(msg, level=logging.INFO, name="test", **extra_attrs):
@@ -123,6 +126,12 @@ class TestLogViewerController(DigiScriptTestCase):
         resp = self._fetch_view(token=token, source="client")
         body = escape.json_decode(resp.body)
         self.assertEqual("client", body["source"])
+        self.assertEqual(0, body["ingestion"]["rate_limited"])
+
+    def test_source_server_has_no_ingestion_stats(self):
+        token = self._create_and_login_admin()
+        resp = self._fetch_view(token=token, source="server")
+        self.assertNotIn("ingestion", escape.json_decode(resp.body))
 
     def test_server_and_client_buffers_are_independent(self):
         """Entries injected into server buffer must not appear in client view."""
@@ -335,6 +344,45 @@ class TestLogViewerController(DigiScriptTestCase):
         self.assertEqual(15, resp["total"])
         self.assertEqual(5, resp["returned"])
 
+    def test_newest_first_with_cursor(self):
+        """Pages of newest-first entries follow on from next_cursor."""
+        for i in range(5):
+            self._inject_server_entry(f"cursor_test_entry {i}")
+        token = self._create_and_login_admin()
+
+        first = escape.json_decode(
+            self._fetch_view(
+                token=token, search="cursor_test_entry", order="newest", limit=3
+            ).body
+        )
+        self.assertEqual(
+            ["cursor_test_entry 4", "cursor_test_entry 3", "cursor_test_entry 2"],
+            [e["message"] for e in first["entries"]],
+        )
+        self.assertEqual(5, first["total"])
+        self.assertEqual(first["entries"][-1]["seq"], first["next_cursor"])
+
+        second = escape.json_decode(
+            self._fetch_view(
+                token=token,
+                search="cursor_test_entry",
+                order="newest",
+                limit=3,
+                before=first["next_cursor"],
+            ).body
+        )
+        self.assertEqual(
+            ["cursor_test_entry 1", "cursor_test_entry 0"],
+            [e["message"] for e in second["entries"]],
+        )
+        self.assertIsNone(second["total"])
+        self.assertIsNone(second["next_cursor"])
+
+    def test_invalid_timestamp_returns_400(self):
+        token = self._create_and_login_admin()
+        resp = self._fetch_view(token=token, since="yesterday")
+        self.assertEqual(400, resp.code)
+
     # ------------------------------------------------------------------
     # SSE stream endpoint — auth and header checks
     # ------------------------------------------------------------------
@@ -405,3 +453,86 @@ class TestLogViewerController(DigiScriptTestCase):
         # Verify SSE wire format: events must begin with "data: "
         data_lines = [ln for ln in full_body.splitlines() if ln.startswith("data: ")]
         self.assertTrue(len(data_lines) > 0)
+
+    def _read_stream(self, token, headers=None, **params):
+        """Collect the body sent by the SSE stream before the request times out."""
+        qs = "&".join(f"{k}={v}" for k, v in params.items())
+        received_chunks = []
+        try:
+            self.fetch(
+                f"/api/v1/logs/stream?{qs}",
+                method="GET",
+                headers={"Authorization": f"Bearer {token}", **(headers or {})},
+                raise_error=False,
+                request_timeout=1.0,
+                streaming_callback=received_chunks.append,
+            )
+        except Exception:
+            pass
+        return b"".join(received_chunks).decode()
+
+    def test_stream_events_have_ids(self):
+        """Each event carries the buffer epoch and entry sequence number."""
+        self._inject_server_entry("sse_id_unique_xyz")
+        entry = get_server_buffer().get_entries()[-1]
+        token = self._create_and_login_admin()
+
+        body = self._read_stream(token, source="server", search="sse_id_unique_xyz")
+
+        self.assertIn(
+            f"id: {get_server_buffer().epoch}-{entry['seq']}\ndata: {entry.encoded}",
+            body,
+        )
+
+    def test_stream_resumes_after_last_event_id(self):
+        """Only entries after Last-Event-ID are sent in the backfill."""
+        buffer = get_server_buffer()
+        self._inject_server_entry("sse_resume_seen")
+        seen = buffer.get_entries()[-1]
+        self._inject_server_entry("sse_resume_missed")
+        token = self._create_and_login_admin()
+
+        body = self._read_stream(
+            token,
+            headers={"Last-Event-ID": f"{buffer.epoch}-{seen['seq']}"},
+            search="sse_resume",
+        )
+
+        self.assertNotIn("sse_resume_seen", body)
+        self.assertIn("sse_resume_missed", body)
+
+    def test_stream_unknown_epoch_sends_full_backfill(self):
+        """An ID from another epoch, e.g. before a restart, resends everything."""
+        self._inject_server_entry("sse_epoch_first")
+        self._inject_server_entry("sse_epoch_second")
+        token = self._create_and_login_admin()
+
+        body = self._read_stream(
+            token, headers={"Last-Event-ID": "other-999999"}, search="sse_epoch"
+        )
+
+        self.assertIn("sse_epoch_first", body)
+        self.assertIn("sse_epoch_second", body)
+
+
+class TestStreamFanout:
+    """Tests for sharing buffer subscriptions between identical streams."""
+
+    def test_identical_filters_share_one_subscription(self):
+        buffer = LogBufferHandler()
+        key = ("server", LogQuery(min_level_no=logging.ERROR))
+        fanout = _get_fanout(key, buffer)
+        assert _get_fanout(key, buffer) is fanout
+        assert _get_fanout(("server", LogQuery()), buffer) is not fanout
+
+        queue_a, queue_b = asyncio.Queue(), asyncio.Queue()
+        fanout.add(queue_a)
+        fanout.add(queue_b)
+        buffer.emit(_make_record("info"))
+        buffer.emit(_make_record("error", level=logging.ERROR))
+        assert [queue_a.qsize(), queue_b.qsize()] == [1, 1]
+        assert queue_a.get_nowait() is queue_b.get_nowait()
+
+        fanout.remove(queue_a)
+        fanout.remove(queue_b)
+        assert _get_fanout(key, buffer) is not fanout
@@ -0,0 +1,55 @@
+"""Integration tests for query profiling and GET /api/v1/debug/queries."""
+
+from tornado import escape
+
+from test.conftest import DigiScriptTestCase
+
+
+class TestQueryProfilerController(DigiScriptTestCase):
+    def _fetch_report(self, token=None, method="GET"):
+        headers = {}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return self.fetch(
+            "/api/v1/debug/queries", method=method, headers=headers, raise_error=False
+        )
+
+    def test_non_admin_returns_401(self):
+        admin_token = self._create_and_login_admin()
+        user_token = self._create_and_login_user(admin_token)
+        self.assertEqual(401, self._fetch_report().code)
+        self.assertEqual(401, self._fetch_report(token=user_token).code)
+
+    def test_report_lists_endpoints(self):
+        token = self._create_and_login_admin()
+        resp = self._fetch_report(token=token)
+        self.assertEqual(200, resp.code)
+        body = escape.json_decode(resp.body)
+        self.assertTrue(body["enabled"])
+        endpoints = {summary["endpoint"]: summary for summary in body["endpoints"]}
+        self.assertIn("LoginHandler.POST", endpoints)
+        self.assertGreater(endpoints["LoginHandler.POST"]["max_queries"], 0)
+
+    def test_delete_clears_report(self):
+        token = self._create_and_login_admin()
+        self.assertEqual(200, self._fetch_report(token=token, method="DELETE").code)
+        # Only the DELETE request itself, recorded once it finished
+        history = self._app.query_profiler.history
+        self.assertEqual(
+            ["QueryProfilerController.DELETE"], [p.endpoint for p in history]
+        )
+
+    def test_server_timing_header(self):
+        resp = self.fetch("/api/v1/debug")
+        self.assertRegex(
+            resp.headers["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$',
+        )
+
+    def test_query_budget(self):
+        with self.assertQueryBudget(max_queries=10, max_repeats=1):
+            self.fetch("/api/v1/debug")
+
+        with self.assertRaisesRegex(AssertionError, "over the budget of 0"):
+            with self.assertQueryBudget(max_queries=0):
+                self._create_and_login_admin()
@@ -6,6 +6,7 @@ the query patterns in ws_controller.py, following our endpoint-based testing app
 
 import json
 
+import msgpack
 from sqlalchemy import select
 from tornado.testing import gen_test
 from tornado.websocket import websocket_connect
@@ -272,3 +273,36 @@ class TestWSControllerIntegration(DigiScriptTestCase):
         self.assertEqual("NO_LEADER", response_data["ACTION"])
 
         ws_observer.close()
+
+    @gen_test
+    async def test_message_pack_subprotocol(self):
+        """Test that a client asking for the MessagePack subprotocol is sent binary
+        MessagePack messages, shares broadcasts with JSON clients and can send
+        either format."""
+        ws_url = self.get_url("/api/v1/ws").replace("http://", "ws://")
+        ws = await websocket_connect(ws_url, subprotocols=["digiscript.msgpack"])
+        json_ws = await websocket_connect(ws_url)
+        self.assertEqual("digiscript.msgpack", ws.selected_subprotocol)
+
+        msg1 = await ws.read_message()
+        self.assertIsInstance(msg1, bytes)
+        self.assertEqual("SET_UUID", msgpack.unpackb(msg1)["OP"])
+        await ws.read_message()  # Consume GET_SETTINGS
+        await json_ws.read_message()
+        await json_ws.read_message()
+
+        await ws.write_message(
+            msgpack.packb({"OP": "REQUEST_SCRIPT_EDIT", "DATA": {}}), binary=True
+        )
+        response = msgpack.unpackb(await ws.read_message())
+        self.assertEqual("GET_SCRIPT_CONFIG_STATUS", response["ACTION"])
+        json_response = json.loads(await json_ws.read_message())
+        self.assertEqual(response, json_response)
+
+        # Text frames are JSON whichever subprotocol was chosen
+        await ws.write_message(json.dumps({"OP": "STOP_SCRIPT_EDIT", "DATA": {}}))
+        response = msgpack.unpackb(await ws.read_message())
+        self.assertEqual("GET_SCRIPT_CONFIG_STATUS", response["ACTION"])
+
+        ws.close()
+        json_ws.close()
@@ -1,3 +1,5 @@
+import tempfile
+
 import tornado.escape
 from sqlalchemy import func, select
 from tornado.testing import gen_test
@@ -32,6 +34,34 @@ class TestDigiScriptServer(DigiScriptTestCase):
 
         self.assertEqual(200, response.code)
 
+    def test_startup_phases_timed(self):
+        self.assertEqual(
+            [
+                "settings",
+                "imports",
+                "database",
+                "services",
+                "startup_checks",
+                "application",
+            ],
+            list(self._app.startup_timer.phases),
+        )
+
+    @gen_test
+    async def test_deferred_startup(self):
+        """Test that the start up work deferred until after the server is listening
+        detects an admin user."""
+        with self._app.get_db().sessionmaker() as session:
+            session.add(User(username="admin", is_admin=True, password="test"))
+            session.commit()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            await self._app.digi_settings.set("compiled_script_path", temp_dir)
+            await self._app._deferred_startup()
+
+        self.assertTrue(self._app.digi_settings.settings["has_admin_user"].get_value())
+        self.assertIn("deferred", self._app.startup_timer.phases)
+
     def test_initialization_detects_no_admin(self):
         """Test that initialization correctly detects when no admin exists.
 
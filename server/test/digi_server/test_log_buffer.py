@@ -1,3 +1,4 @@
+import json
 import logging
 import unittest
 from datetime import datetime
@@ -64,6 +65,35 @@ class TestLogBufferHandler(unittest.TestCase):
     def test_empty_buffer_returns_empty_list(self):
         self.assertEqual([], self.handler.get_entries())
 
+    # ------------------------------------------------------------------
+    # Sequence numbers and encoding
+    # ------------------------------------------------------------------
+
+    def test_sequence_numbers_increase(self):
+        """Each entry gets the next sequence number, tracked by last_seq."""
+        self.assertEqual(0, self.handler.last_seq)
+        for i in range(3):
+            self.handler.emit(_make_record(f"msg {i}"))
+        self.assertEqual([1, 2, 3], [e["seq"] for e in self.handler.get_entries()])
+        self.assertEqual(3, self.handler.last_seq)
+
+    def test_get_entries_since(self):
+        """Only entries after the given sequence number are returned."""
+        handler = LogBufferHandler(maxlen=5)
+        for i in range(8):
+            handler.emit(_make_record(f"msg {i}"))
+        self.assertEqual([7, 8], [e.seq for e in handler.get_entries_since(6)])
+        self.assertEqual([], handler.get_entries_since(8))
+        # Entries 2 and 3 have been evicted, so everything buffered is returned
+        self.assertEqual([4, 5, 6, 7, 8], [e.seq for e in handler.get_entries_since(1)])
+
+    def test_encoded_entry_is_cached(self):
+        """The JSON encoding matches the entry and is only built once."""
+        self.handler.emit(_make_record("encode me"))
+        entry = self.handler.get_entries()[0]
+        self.assertEqual(entry, json.loads(entry.encoded))
+        self.assertIs(entry.encoded, entry.encoded)
+
     # ------------------------------------------------------------------
     # Circular buffer (maxlen eviction)
     # ------------------------------------------------------------------
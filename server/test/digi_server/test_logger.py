@@ -1,7 +1,16 @@
 import logging
+import os
+import tempfile
+import threading
 import unittest
 
-from digi_server.logger import CLIENT_LEVEL_MAP, map_client_level
+from digi_server.logger import (
+    CLIENT_LEVEL_MAP,
+    BackgroundHandler,
+    configure_client_logging,
+    get_logger,
+    map_client_level,
+)
 
 
 class TestMapClientLevel(unittest.TestCase):
@@ -38,3 +47,87 @@ class TestMapClientLevel(unittest.TestCase):
     def test_client_level_map_contains_all_expected_keys(self):
         expected = {"TRACE", "DEBUG", "INFO", "WARN", "ERROR", "SILENT"}
         self.assertEqual(expected, set(CLIENT_LEVEL_MAP.keys()))
+
+
+class _RecordingHandler(logging.Handler):
+    """Handler which records messages, optionally blocking until released."""
+
+    def __init__(self, block=False):
+        super().__init__()
+        self.messages = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def emit(self, record):
+        self.started.set()
+        self.release.wait(5)
+        self.messages.append(record.getMessage())
+
+
+class TestBackgroundHandler(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("DigiScript.test_background_handler")
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+
+    def _attach(self, handler):
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+
+    def test_records_written_on_close(self):
+        target = _RecordingHandler()
+        handler = BackgroundHandler(target)
+        self._attach(handler)
+
+        for i in range(100):
+            self.logger.info("message %d", i)
+        handler.close()
+
+        self.assertEqual([f"message {i}" for i in range(100)], target.messages)
+        self.assertEqual(0, handler.dropped)
+
+    def test_drops_oldest_when_full(self):
+        target = _RecordingHandler(block=True)
+        handler = BackgroundHandler(target, maxsize=2)
+        self._attach(handler)
+
+        # The listener takes the first record and blocks writing it, so the rest
+        # fill the queue
+        self.logger.info("first")
+        self.assertTrue(target.started.wait(5))
+        for i in range(5):
+            self.logger.info("queued %d", i)
+        self.assertEqual(3, handler.dropped)
+
+        target.release.set()
+        handler.close()
+        self.assertEqual(["first", "queued 3", "queued 4"], target.messages)
+
+    def test_respects_target_level(self):
+        target = _RecordingHandler()
+        target.setLevel(logging.WARNING)
+        handler = BackgroundHandler(target)
+        self._attach(handler)
+
+        self.logger.info("info")
+        self.logger.warning("warning")
+        handler.close()
+        self.assertEqual(["warning"], target.messages)
+
+    def test_configure_client_logging_writes_file(self):
+        client_logger = get_logger("Client")
+        self.addCleanup(setattr, client_logger, "propagate", client_logger.propagate)
+        self.addCleanup(client_logger.setLevel, client_logger.level)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_path = os.path.join(temp_dir, "client.log")
+            handler = configure_client_logging(log_path)
+            self.assertIsInstance(handler, BackgroundHandler)
+            client_logger.info("client message")
+
+            # Reconfiguring closes the previous handler, which flushes its queue
+            new_handler = configure_client_logging(None, handler=handler)
+            self.assertIsNone(new_handler)
+            with open(log_path, encoding="utf-8") as log_file:
+                self.assertIn("client message", log_file.read())
@@ -0,0 +1,164 @@
+"""Tests for application metrics, read by scraping /debug/metrics."""
+
+import asyncio
+import contextvars
+import json
+from types import SimpleNamespace
+
+from prometheus_client.parser import text_string_to_metric_families
+from tornado import escape
+from tornado.testing import gen_test
+from tornado.websocket import websocket_connect
+
+from digi_server import metrics
+from digi_server.metrics import IOLoopLagMonitor, QueryStats
+from test.conftest import DigiScriptTestCase
+from test.helpers.stage_fixtures import create_act_with_scenes, create_show
+from utils.show.show_structure import get_show_structure, invalidate_show_structure
+
+
+def _execute_statement():
+    metrics._after_cursor_execute(
+        None, None, "SELECT 1", None, SimpleNamespace(_digiscript_query_start=0), False
+    )
+
+
+class TestQueryTracking:
+    """Tests that statements are counted only while a request is tracking them."""
+
+    def test_untrack_resets_context(self):
+        stats = QueryStats()
+
+        def request():
+            token = metrics.track_queries(stats)
+            _execute_statement()
+            metrics.untrack_queries(stats, token)
+            _execute_statement()
+            return metrics._query_stats.get()
+
+        assert contextvars.copy_context().run(request) is None
+        assert stats.count == 1
+        assert not stats.active
+
+    def test_copied_contexts_stop_counting(self):
+        stats = QueryStats()
+        context = contextvars.copy_context()
+        token = context.run(metrics.track_queries, stats)
+        # As a callback scheduled while the request was running
+        callback_context = context.copy()
+        context.run(metrics.untrack_queries, stats, token)
+
+        callback_context.run(_execute_statement)
+        assert stats.count == 0
+
+    def test_untrack_from_other_context(self):
+        stats = QueryStats()
+        token = contextvars.copy_context().run(metrics.track_queries, stats)
+        contextvars.copy_context().run(metrics.untrack_queries, stats, token)
+        assert not stats.active
+
+
+class TestMetrics(DigiScriptTestCase):
+    """Tests that application metrics are recorded and exported."""
+
+    async def _scrape(self):
+        response = await self.http_client.fetch(self.get_url("/debug/metrics"))
+        samples = {}
+        for family in text_string_to_metric_families(response.body.decode()):
+            for sample in family.samples:
+                samples[(sample.name, tuple(sorted(sample.labels.items())))] = (
+                    sample.value
+                )
+        return samples
+
+    async def _login(self):
+        await self.http_client.fetch(
+            self.get_url("/api/v1/auth/login"),
+            method="POST",
+            body=escape.json_encode({"username": "nobody", "password": "secret"}),
+            raise_error=False,
+        )
+
+    @gen_test
+    async def test_request_metrics(self):
+        handler = (("handler", "LoginHandler"),)
+        before = await self._scrape()
+        await self._login()
+        after = await self._scrape()
+
+        key = ("digiscript_db_queries_per_request_count", handler)
+        self.assertEqual(before.get(key, 0) + 1, after[key])
+        key = ("digiscript_db_queries_per_request_sum", handler)
+        self.assertGreaterEqual(after[key] - before.get(key, 0), 1)
+        self.assertIn(("digiscript_db_query_seconds_per_request_sum", handler), after)
+        key = (
+            "tornado_http_requests_total",
+            (("handler", "LoginHandler"), ("method", "POST"), ("status", "4xx")),
+        )
+        self.assertEqual(before.get(key, 0) + 1, after[key])
+
+    @gen_test
+    async def test_websocket_metrics(self):
+        before = await self._scrape()
+        ws = await websocket_connect(self.get_url("/api/v1/ws").replace("http", "ws"))
+        await ws.read_message()
+        await ws.read_message()
+
+        await ws.write_message(json.dumps({"OP": "REQUEST_SCRIPT_EDIT", "DATA": {}}))
+        await ws.read_message()
+        await ws.write_message(json.dumps({"OP": "NOT_AN_OP", "DATA": {}}))
+        await ws.write_message(json.dumps({"OP": "STOP_SCRIPT_EDIT", "DATA": {}}))
+        await ws.read_message()
+        after = await self._scrape()
+        ws.close()
+
+        self.assertEqual(1, after[("digiscript_websocket_clients", ())])
+        for op in ("REQUEST_SCRIPT_EDIT", "UNKNOWN"):
+            key = ("digiscript_websocket_messages_received_total", (("op", op),))
+            self.assertEqual(before.get(key, 0) + 1, after[key])
+        key = ("digiscript_websocket_broadcast_seconds_count", ())
+        self.assertGreater(after[key], before.get(key, 0))
+
+    @gen_test
+    async def test_cache_metrics(self):
+        with self._app.get_db().sessionmaker() as session:
+            show_id = create_show(session)
+            create_act_with_scenes(session, show_id, "Act 1", 2, link_to_show=True)
+            session.commit()
+        invalidate_show_structure()
+
+        before = await self._scrape()
+        with self._app.get_db().sessionmaker() as session:
+            get_show_structure(session, show_id)
+            get_show_structure(session, show_id)
+        after = await self._scrape()
+
+        for result in ("hit", "miss"):
+            key = (
+                "digiscript_cache_requests_total",
+                (("cache", "show_structure"), ("result", result)),
+            )
+            self.assertEqual(before.get(key, 0) + 1, after[key])
+
+    @gen_test
+    async def test_log_metrics(self):
+        self._app.client_log_service.reject_batch(3)
+        samples = await self._scrape()
+
+        key = ("digiscript_client_log_entries_total", (("outcome", "received"),))
+        self.assertEqual(3, samples[key])
+        self.assertEqual(0, samples[("digiscript_client_log_queued", ())])
+        key = ("digiscript_log_records_dropped_total", (("log", "app"),))
+        self.assertEqual(0, samples[key])
+
+    @gen_test
+    async def test_ioloop_lag(self):
+        before = await self._scrape()
+        monitor = IOLoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        monitor.stop()
+        after = await self._scrape()
+
+        key = ("digiscript_ioloop_lag_seconds_count", ())
+        self.assertGreater(after[key], before.get(key, 0))
@@ -0,0 +1,74 @@
+import os
+from unittest import mock
+
+import pytest
+from tornado.testing import gen_test
+
+from digi_server.settings import SettingsSnapshot
+from test.conftest import DigiScriptTestCase
+
+
+class TestSettingsSnapshot:
+    def test_mapping(self):
+        snapshot = SettingsSnapshot({"a": 1, "b": "two"}, version=3)
+        assert snapshot["a"] == 1
+        assert dict(snapshot) == {"a": 1, "b": "two"}
+        assert snapshot.version == 3
+
+    def test_immutable(self):
+        values = {"a": 1}
+        snapshot = SettingsSnapshot(values)
+        values["a"] = 2
+        assert snapshot["a"] == 1
+        with pytest.raises(AttributeError):
+            snapshot.version = 1
+        with pytest.raises(TypeError):
+            snapshot["a"] = 3
+
+    def test_unknown_setting(self):
+        with pytest.raises(KeyError, match="not a valid setting"):
+            SettingsSnapshot({})["missing"]
+
+
+class TestSettings(DigiScriptTestCase):
+    @gen_test
+    async def test_set_replaces_snapshot(self):
+        settings = self._app.digi_settings
+        before = settings.snapshot
+        await settings.set("log_body_max_bytes", before["log_body_max_bytes"] + 1)
+
+        after = settings.snapshot
+        self.assertIsNot(before, after)
+        self.assertEqual(before["log_body_max_bytes"] + 1, after["log_body_max_bytes"])
+        self.assertGreater(after.version, before.version)
+
+    def test_set_value_replaces_snapshot(self):
+        settings = self._app.digi_settings
+        settings.settings["current_show"].set_value(5, False)
+        self.assertEqual(5, settings.snapshot["current_show"])
+        settings.settings["current_show"].set_to_default()
+        self.assertIsNone(settings.snapshot["current_show"])
+
+    @gen_test
+    async def test_get_does_not_wait_for_lock(self):
+        settings = self._app.digi_settings
+        async with settings.lock:
+            self.assertEqual(
+                settings.snapshot["db_path"], await settings.get("db_path")
+            )
+            self.assertIn("version", await settings.as_json())
+        with self.assertRaises(KeyError):
+            await settings.get("missing")
+
+    def test_file_deleted_without_directory(self):
+        settings = self._app.digi_settings
+        missing = os.path.join(os.path.dirname(self.settings_path), "missing", "a.json")
+        with mock.patch.object(settings, "settings_path", missing):
+            settings.file_deleted()
+        self.assertFalse(os.path.exists(missing))
+
+    def test_close_stops_watching(self):
+        settings = self._app.digi_settings
+        with mock.patch.object(settings._file_watcher, "stop") as stop:
+            settings.close()
+        stop.assert_called_once_with()
@@ -0,0 +1,36 @@
+from digi_server.startup import StartupTimer
+
+
+class TestStartupTimer:
+    def test_phases_recorded_in_order(self):
+        timer = StartupTimer()
+        with timer.phase("first"):
+            pass
+        with timer.phase("second"):
+            pass
+        assert list(timer.phases) == ["first", "second"]
+        assert timer.report()["ready_ms"] is None
+
+    def test_repeated_phase_accumulates(self):
+        timer = StartupTimer()
+        with timer.phase("phase"):
+            pass
+        first = timer.phases["phase"]
+        with timer.phase("phase"):
+            pass
+        assert timer.phases["phase"] >= first
+
+    def test_phase_recorded_when_it_fails(self):
+        timer = StartupTimer()
+        try:
+            with timer.phase("failing"):
+                raise ValueError
+        except ValueError:
+            pass
+        assert "failing" in timer.phases
+
+    def test_ready(self):
+        timer = StartupTimer()
+        ready = timer.ready()
+        assert ready >= 0
+        assert timer.report()["ready_ms"] == ready * 1000
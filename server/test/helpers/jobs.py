@@ -0,0 +1,26 @@
+"""Job functions for JobService tests.
+
+Worker processes import job functions by module path, so they live here rather
+than in the test module.
+"""
+
+import time
+
+
+def add_numbers(a, b, on_progress):
+    """Report progress in two steps and return the sum."""
+    on_progress(0.5)
+    on_progress(1.0)
+    return a + b
+
+
+def sleep_forever(on_progress):
+    """Never finish, so the job has to be cancelled."""
+    on_progress(0.1)
+    while True:
+        time.sleep(0.1)
+
+
+def raise_error(on_progress):
+    """Fail immediately."""
+    raise ValueError("Job went wrong")
@@ -1,3 +1,4 @@
+import gzip
 import os
 import tempfile
 
@@ -164,3 +165,54 @@ class TestScriptModels(DigiScriptTestCase):
 
         # Verify: Result should be a dict (empty since we have no lines, but should work)
         self.assertIsInstance(result, dict)
+
+    def test_decode_and_is_empty(self):
+        """Test reading the stored form of a compiled script."""
+        empty = gzip.compress(b"{}")
+        script = gzip.compress(b'{"1": [{"id": 1}]}')
+        self.assertTrue(CompiledScript.is_empty(empty))
+        self.assertFalse(CompiledScript.is_empty(script))
+        self.assertEqual({}, CompiledScript.decode(empty))
+        self.assertEqual({"1": [{"id": 1}]}, CompiledScript.decode(script))
+
+    def test_remove_orphans(self):
+        """Test that CompiledScript.remove_orphans() removes rows whose file is
+        missing and files no row refers to, and keeps the rest."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with self._app.get_db().sessionmaker() as session:
+                show = Show(name="Test Show", script_mode=ShowScriptType.FULL)
+                session.add(show)
+                session.flush()
+                script = Script(show_id=show.id)
+                session.add(script)
+                session.flush()
+                revision_ids = []
+                for number in (1, 2):
+                    revision = ScriptRevision(script_id=script.id, revision=number)
+                    session.add(revision)
+                    session.flush()
+                    revision_ids.append(revision.id)
+
+                kept = os.path.join(temp_dir, "kept.ds")
+                orphan = os.path.join(temp_dir, "orphan.ds")
+                for path in (kept, orphan):
+                    with open(path, "wb") as file_pointer:
+                        file_pointer.write(b"")
+                session.add(CompiledScript(revision_id=revision_ids[0], data_path=kept))
+                session.add(
+                    CompiledScript(
+                        revision_id=revision_ids[1],
+                        data_path=os.path.join(temp_dir, "missing.ds"),
+                    )
+                )
+                session.commit()
+
+                self.assertEqual(
+                    (1, 1), CompiledScript.remove_orphans(session, temp_dir)
+                )
+                self.assertEqual(
+                    [revision_ids[0]],
+                    session.scalars(select(CompiledScript.revision_id)).all(),
+                )
+            self.assertTrue(os.path.exists(kept))
+            self.assertFalse(os.path.exists(orphan))
@@ -0,0 +1,200 @@
+"""Tests that the hand-written serializers match their marshmallow schemas."""
+
+import datetime
+
+from models.cue import Cue, CueAssociation, CueGroup, CueType
+from models.script import (
+    Script,
+    ScriptLine,
+    ScriptLinePart,
+    ScriptLineType,
+    ScriptRevision,
+    StageDirectionStyle,
+)
+from models.show import Act, Character, CharacterGroup, Scene, Show, ShowScriptType
+from models.user import User
+from schemas.schemas import (
+    CueSchema,
+    ScriptLinePartSchema,
+    ScriptLineSchema,
+    ShowSchema,
+    UserSchema,
+)
+from schemas.serializers import (
+    dump_cue,
+    dump_cue_association,
+    dump_script_line,
+    dump_script_line_part,
+    dump_show,
+    dump_user,
+)
+from test.conftest import DigiScriptTestCase
+
+
+class TestSerializers(DigiScriptTestCase):
+    """Each serializer must give the same keys, in the same order, and values."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            show = Show(
+                name="Test Show",
+                script_mode=ShowScriptType.FULL,
+                start_date=datetime.date(2026, 3, 1),
+                end_date=datetime.date(2026, 3, 8),
+                created_at=datetime.datetime(2026, 1, 2, 3, 4, 5, 6000),
+            )
+            empty_show = Show(name=None, script_mode=ShowScriptType.COMPACT)
+            session.add_all([show, empty_show])
+            session.flush()
+            act = Act(show_id=show.id, name="Act 1")
+            session.add(act)
+            session.flush()
+            show.first_act_id = act.id
+            scene = Scene(show_id=show.id, act_id=act.id, name="Scene 1")
+            character = Character(show_id=show.id, name="Character")
+            group = CharacterGroup(show_id=show.id, name="Group")
+            script = Script(show_id=show.id)
+            session.add_all([scene, character, group, script])
+            session.flush()
+            revision = ScriptRevision(script_id=script.id, revision=1, description="1")
+            style = StageDirectionStyle(
+                script_id=script.id,
+                description="Style",
+                bold=True,
+                italic=False,
+                underline=False,
+                text_format="default",
+                text_colour="#000000",
+            )
+            session.add_all([revision, style])
+            session.flush()
+
+            line = ScriptLine(
+                act_id=act.id,
+                scene_id=scene.id,
+                page=3,
+                line_type=ScriptLineType.DIALOGUE,
+            )
+            direction = ScriptLine(
+                page=4,
+                line_type=ScriptLineType.STAGE_DIRECTION,
+                stage_direction_style_id=style.id,
+            )
+            session.add_all([line, direction])
+            session.flush()
+            session.add_all(
+                [
+                    ScriptLinePart(
+                        line_id=line.id,
+                        part_index=0,
+                        character_id=character.id,
+                        line_text="Hello",
+                    ),
+                    ScriptLinePart(
+                        line_id=line.id,
+                        part_index=1,
+                        character_group_id=group.id,
+                        line_text="World",
+                    ),
+                    ScriptLinePart(line_id=direction.id, part_index=0, line_text=None),
+                ]
+            )
+            cue_type = CueType(show_id=show.id, prefix="LX")
+            session.add(cue_type)
+            session.flush()
+            cue_group = CueGroup(cue_type_id=cue_type.id, label_override="LX 1-3")
+            cue = Cue(cue_type_id=cue_type.id, ident="1")
+            session.add_all([cue_group, cue, Cue(cue_type_id=None, ident=None)])
+            session.flush()
+            session.add_all(
+                [
+                    CueAssociation(
+                        revision_id=revision.id,
+                        line_id=line.id,
+                        cue_id=cue.id,
+                        group_id=cue_group.id,
+                        sort_order=2,
+                        line_position=1,
+                    ),
+                    CueAssociation(
+                        revision_id=revision.id, line_id=direction.id, cue_id=cue.id
+                    ),
+                ]
+            )
+            session.add_all(
+                [
+                    User(
+                        username="admin",
+                        password="hash",
+                        api_token="token",
+                        is_admin=True,
+                        created_on=datetime.datetime(2026, 1, 1),
+                        last_login=datetime.datetime(2026, 2, 1, 12, 30),
+                        requires_password_change=True,
+                        token_version=3,
+                    ),
+                    User(username="user"),
+                ]
+            )
+            session.commit()
+
+    def _assert_matches(self, model, schema, dump):
+        with self._app.get_db().sessionmaker() as session:
+            objects = session.query(model).all()
+            self.assertTrue(objects)
+            for obj in objects:
+                expected = schema().dump(obj)
+                actual = dump(obj)
+                self.assertEqual(expected, actual)
+                self.assertEqual(list(expected), list(actual))
+
+    def test_script_line(self):
+        self._assert_matches(ScriptLine, ScriptLineSchema, dump_script_line)
+
+    def test_script_line_part(self):
+        self._assert_matches(
+            ScriptLinePart, ScriptLinePartSchema, dump_script_line_part
+        )
+
+    def test_cue(self):
+        self._assert_matches(Cue, CueSchema, dump_cue)
+
+    def test_cue_association(self):
+        with self._app.get_db().sessionmaker() as session:
+            for association in session.query(CueAssociation):
+                self.assertEqual(
+                    {
+                        **CueSchema().dump(association.cue),
+                        "group_id": association.group_id,
+                        "sort_order": association.sort_order,
+                        "line_position": association.line_position,
+                    },
+                    dump_cue_association(association),
+                )
+
+    def test_show(self):
+        self._assert_matches(Show, ShowSchema, dump_show)
+
+    def test_user(self):
+        self._assert_matches(User, UserSchema, dump_user)
+        with self._app.get_db().sessionmaker() as session:
+            user = session.query(User).filter_by(username="admin").one()
+            self.assertNotIn("password", dump_user(user))
+            self.assertNotIn("api_token", dump_user(user))
+
+    def test_fields_match_schemas(self):
+        # Catches a column added to a model, and so to its schema, but not here
+        for schema, expected in (
+            (ScriptLineSchema, dump_script_line),
+            (ScriptLinePartSchema, dump_script_line_part),
+            (CueSchema, dump_cue),
+            (ShowSchema, dump_show),
+            (UserSchema, dump_user),
+        ):
+            model = schema.Meta.model
+            with self._app.get_db().sessionmaker() as session:
+                obj = session.query(model).first()
+                self.assertEqual(
+                    list(schema().dump_fields), list(expected(obj)), schema.__name__
+                )
@@ -0,0 +1,279 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+
+import pytest
+from tornado.testing import gen_test
+
+from services import backup_service
+from services.backup_service import (
+    REASON_MANUAL,
+    REASON_SCHEDULED,
+    BackupEntry,
+    BackupError,
+    BackupIndex,
+    backup_database,
+    restore_database,
+)
+from test.conftest import DigiScriptTestCase
+
+
+def _create_database(path, version="abc123", rows=100):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE alembic_version (version_num VARCHAR(32))")
+    connection.execute("INSERT INTO alembic_version VALUES (?)", (version,))
+    connection.execute("CREATE TABLE line (id INTEGER PRIMARY KEY, text TEXT)")
+    connection.executemany(
+        "INSERT INTO line (text) VALUES (?)", [(f"line {i}",) for i in range(rows)]
+    )
+    connection.commit()
+    connection.close()
+
+
+def _count_lines(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM line").fetchone()[0]
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "digiscript.sqlite")
+    _create_database(path)
+    return path
+
+
+class TestBackupDatabase:
+    def test_backup_is_compressed_copy(self, db_path):
+        destination = f"{db_path}.1700000000.gz"
+        size = backup_database(db_path, destination, pages=1, sleep=0)
+
+        assert size == os.path.getsize(destination)
+        copy_path = f"{db_path}.copy"
+        with gzip.open(destination, "rb") as backup, open(copy_path, "wb") as copy:
+            shutil.copyfileobj(backup, copy)
+        assert _count_lines(copy_path) == 100
+        assert sorted(os.listdir(os.path.dirname(db_path))) == [
+            "digiscript.sqlite",
+            "digiscript.sqlite.1700000000.gz",
+            "digiscript.sqlite.copy",
+        ]
+
+    def test_restore_replaces_contents(self, db_path):
+        destination = f"{db_path}.1700000000.gz"
+        backup_database(db_path, destination)
+        connection = sqlite3.connect(db_path)
+        connection.execute("DELETE FROM line")
+        connection.commit()
+
+        restore_database(destination, db_path, compressed=True)
+
+        # The open connection sees the restored database
+        assert connection.execute("SELECT COUNT(*) FROM line").fetchone()[0] == 100
+        connection.close()
+
+    def test_restore_rejects_other_schema_version(self, db_path, tmp_path):
+        other = str(tmp_path / "other.sqlite")
+        _create_database(other, version="def456", rows=1)
+
+        with pytest.raises(BackupError):
+            restore_database(other, db_path, compressed=False)
+        assert _count_lines(db_path) == 100
+
+
+class TestBackupIndex:
+    def test_lists_compressed_and_legacy_backups(self, db_path):
+        for name in ("1700000000", "1700001000.gz", "notabackup", "123abc", "1.gz.x"):
+            with open(f"{db_path}.{name}", "wb") as file_pointer:
+                file_pointer.write(b"x" * 10)
+
+        backups = BackupIndex(db_path).list()
+
+        assert [(b.created_at, b.compressed) for b in backups] == [
+            (1700001000, True),
+            (1700000000, False),
+        ]
+
+    def test_reason_recovered_without_index(self, db_path):
+        index = BackupIndex(db_path)
+        for timestamp, reason in ((1700000000, REASON_SCHEDULED), (1700001000, None)):
+            with open(index.path_for(timestamp, reason=reason), "wb"):
+                pass
+
+        backups = BackupIndex(db_path).list()
+
+        assert [(b.created_at, b.compressed, b.reason) for b in backups] == [
+            (1700001000, True, None),
+            (1700000000, True, REASON_SCHEDULED),
+        ]
+
+    def test_unchanged_entries_not_written(self, db_path):
+        with open(f"{db_path}.1700000000", "wb"):
+            pass
+        index = BackupIndex(db_path)
+        index.list()
+        # A change to the directory which does not touch any backup
+        with open(f"{db_path}-wal", "wb"):
+            pass
+
+        with mock.patch.object(index, "_save") as save:
+            assert len(index.list()) == 1
+        save.assert_not_called()
+
+    def test_unchanged_directory_is_not_rescanned(self, db_path, monkeypatch):
+        with open(f"{db_path}.1700000000", "wb"):
+            pass
+        index = BackupIndex(db_path)
+        index.list()
+        monkeypatch.setattr(backup_service, "RACY_SECONDS", 0)
+
+        with mock.patch.object(os, "scandir", wraps=os.scandir) as scandir:
+            assert len(index.list()) == 1
+            assert len(BackupIndex(db_path).list()) == 1
+        scandir.assert_not_called()
+
+    def test_added_entries_persist(self, db_path):
+        index = BackupIndex(db_path)
+        with open(index.path_for(1700000000), "wb"):
+            pass
+        index.add(
+            BackupEntry(
+                filename=os.path.basename(index.path_for(1700000000)),
+                created_at=1700000000,
+                size_bytes=0,
+                compressed=True,
+                reason=REASON_MANUAL,
+            )
+        )
+
+        backups = BackupIndex(db_path).list()
+        assert [b.reason for b in backups] == [REASON_MANUAL]
+
+    def test_removed_files_are_dropped(self, db_path):
+        with open(f"{db_path}.1700000000", "wb"):
+            pass
+        index = BackupIndex(db_path)
+        assert len(index.list()) == 1
+
+        os.remove(f"{db_path}.1700000000")
+        assert index.list() == []
+
+    def test_next_timestamp_skips_existing(self, db_path):
+        now = int(time.time())
+        with open(f"{db_path}.{now}.gz", "wb"):
+            pass
+        assert BackupIndex(db_path).next_timestamp() > now
+
+
+class TestBackupService(DigiScriptTestCase):
+    """Unit tests for BackupService"""
+
+    def setUp(self):
+        super().setUp()
+        self._tmp_dir = tempfile.mkdtemp()
+        self._db_file = os.path.join(self._tmp_dir, "digiscript.sqlite")
+        _create_database(self._db_file)
+        self._app.digi_settings.settings["db_path"].set_value(
+            f"sqlite:///{self._db_file}"
+        )
+        self.service = self._app.backup_service
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+        super().tearDown()
+
+    def _add_backup(self, timestamp, reason):
+        path = self.service.index.path_for(timestamp, reason=reason)
+        with open(path, "wb"):
+            pass
+        self.service.index.add(
+            BackupEntry(
+                filename=os.path.basename(path),
+                created_at=timestamp,
+                size_bytes=0,
+                compressed=True,
+                reason=reason,
+            )
+        )
+
+    @gen_test
+    async def test_create_backup(self):
+        backup = await self.service.create_backup()
+
+        self.assertEqual(REASON_MANUAL, backup.reason)
+        self.assertEqual([backup], self.service.list_backups())
+        self.assertTrue(os.path.isfile(os.path.join(self._tmp_dir, backup.filename)))
+
+    @gen_test
+    async def test_restore_backup(self):
+        backup = await self.service.create_backup()
+        connection = sqlite3.connect(self._db_file)
+        connection.execute("DELETE FROM line")
+        connection.commit()
+        connection.close()
+
+        safety_backup = await self.service.restore_backup(backup.created_at)
+
+        self.assertEqual(100, _count_lines(self._db_file))
+        self.assertEqual("pre_restore", safety_backup.reason)
+        self.assertEqual(2, len(self.service.list_backups()))
+
+    @gen_test
+    async def test_restore_missing_backup(self):
+        with self.assertRaises(KeyError):
+            await self.service.restore_backup(1700000000)
+
+    @gen_test
+    async def test_scheduled_backup_only_when_due(self):
+        await self._app.digi_settings.set("db_backup_interval_hours", 1)
+        first = await self.service.run_scheduled()
+        self.assertEqual(REASON_SCHEDULED, first.reason)
+        self.assertIsNone(await self.service.run_scheduled())
+
+        await self._app.digi_settings.set("db_backup_interval_hours", 0)
+        os.remove(os.path.join(self._tmp_dir, first.filename))
+        self.assertIsNone(await self.service.run_scheduled())
+
+    @gen_test
+    async def test_prune_only_removes_scheduled_backups(self):
+        await self._app.digi_settings.set("db_backup_keep", 2)
+        await self._app.digi_settings.set("db_backup_max_age_days", 30)
+        now = int(time.time())
+        for age in range(4):
+            self._add_backup(now - age * 60, REASON_SCHEDULED)
+        self._add_backup(now - 40 * 24 * 3600, REASON_MANUAL)
+        self._add_backup(now - 41 * 24 * 3600, REASON_SCHEDULED)
+
+        expired = self.service.prune()
+
+        self.assertEqual(
+            [now - 120, now - 180, now - 41 * 24 * 3600],
+            [b.created_at for b in expired],
+        )
+        self.assertEqual(
+            [now, now - 60, now - 40 * 24 * 3600],
+            [b.created_at for b in self.service.list_backups()],
+        )
+
+    @gen_test
+    async def test_prune_after_index_lost(self):
+        await self._app.digi_settings.set("db_backup_keep", 1)
+        now = int(time.time())
+        for age in range(3):
+            self._add_backup(now - age * 60, REASON_SCHEDULED)
+        self._add_backup(now - 180, REASON_MANUAL)
+        os.remove(self.service.index.path)
+        self.service._index = None
+
+        expired = self.service.prune()
+
+        self.assertEqual([now - 60, now - 120], [b.created_at for b in expired])
+        self.assertEqual(
+            [now, now - 180], [b.created_at for b in self.service.list_backups()]
+        )
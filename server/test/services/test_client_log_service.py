@@ -0,0 +1,101 @@
+import logging
+
+from tornado.testing import gen_test
+
+from digi_server.logger import get_logger
+from services import client_log_service
+from services.client_log_service import CLIENT_BURST, TokenBucket
+from test.conftest import DigiScriptTestCase
+
+
+def _entries(count, message="message", level="INFO"):
+    return [{"level": level, "message": message, "extra": {}} for _ in range(count)]
+
+
+class TestTokenBucket:
+    def test_take_limited_by_capacity(self):
+        bucket = TokenBucket(rate=0, capacity=5)
+        assert bucket.take(3) == 3
+        assert bucket.take(3) == 2
+        assert bucket.take(1) == 0
+
+
+class TestClientLogService(DigiScriptTestCase):
+    """Unit tests for ClientLogService"""
+
+    def setUp(self):
+        super().setUp()
+        self.service = self._app.client_log_service
+        self.client_logger = get_logger("Client")
+        self.addCleanup(self.client_logger.setLevel, self.client_logger.level)
+        self.client_logger.setLevel(logging.DEBUG)
+
+    @gen_test
+    async def test_entries_written_by_writer(self):
+        with self.assertLogs(self.client_logger, logging.DEBUG) as logs:
+            result = self.service.submit(
+                [
+                    {"level": "INFO", "message": "first", "extra": {"a": 1}},
+                    {"level": "ERROR", "message": "second"},
+                ],
+                client_key="client",
+                remote_ip="127.0.0.1",
+            )
+            await self.service.drain()
+
+        self.assertEqual({"accepted": 2, "rate_limited": 0, "dropped": 0}, result)
+        self.assertEqual(2, len(logs.records))
+        self.assertIn("[Client] first | Extra: {'a': 1", logs.output[0])
+        self.assertEqual(logging.ERROR, logs.records[1].levelno)
+        self.assertEqual("127.0.0.1", logs.records[1].remote_ip)
+
+    @gen_test
+    async def test_entries_below_level_are_skipped(self):
+        self.client_logger.setLevel(logging.ERROR)
+        result = self.service.submit(_entries(5), client_key="client")
+        self.assertEqual(0, result["accepted"])
+        self.assertEqual(5, self.service.get_stats()["dropped_below_level"])
+
+    @gen_test
+    async def test_rate_limited_per_client(self):
+        result = self.service.submit(
+            _entries(client_log_service.MAX_BATCH_SIZE), client_key="a"
+        )
+        self.assertEqual(client_log_service.MAX_BATCH_SIZE, result["accepted"])
+        result = self.service.submit(_entries(CLIENT_BURST), client_key="a")
+        self.assertGreater(result["rate_limited"], 0)
+        self.assertLess(result["accepted"], CLIENT_BURST)
+
+        # Other clients have their own limit
+        result = self.service.submit(_entries(10), client_key="b")
+        self.assertEqual(10, result["accepted"])
+
+        stats = self.service.get_stats()
+        self.assertEqual(1, stats["rate_limited_clients"])
+        await self.service.drain()
+
+    @gen_test
+    async def test_repeated_messages_deduplicated(self):
+        with self.assertLogs(self.client_logger, logging.DEBUG) as logs:
+            self.service.submit(_entries(5, "same"), client_key="client")
+            self.service.submit(_entries(1, "different"), client_key="client")
+            await self.service.drain()
+            self.service.flush_repeats()
+
+        messages = [record.getMessage() for record in logs.records]
+        self.assertEqual(3, len(messages))
+        self.assertIn("[Client] same |", messages[0])
+        self.assertIn("[Client] different |", messages[1])
+        self.assertIn("same (repeated 4 more times)", messages[2])
+        self.assertEqual(4, self.service.get_stats()["deduplicated"])
+
+    @gen_test
+    async def test_queue_full_drops_entries(self):
+        original_size = client_log_service.QUEUE_SIZE
+        client_log_service.QUEUE_SIZE = 3
+        self.addCleanup(setattr, client_log_service, "QUEUE_SIZE", original_size)
+
+        result = self.service.submit(_entries(5), client_key="client")
+        self.assertEqual({"accepted": 3, "rate_limited": 0, "dropped": 2}, result)
+        self.assertEqual(2, self.service.get_stats()["dropped_queue_full"])
+        await self.service.drain()
@@ -0,0 +1,108 @@
+from unittest.mock import AsyncMock
+
+from tornado.testing import gen_test
+
+from services.job_service import (
+    JOB_CANCELLED,
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_RUNNING,
+    JOB_UPDATE_OP,
+    JobCancelled,
+    JobFailed,
+)
+from test.conftest import DigiScriptTestCase
+from test.helpers.jobs import add_numbers, raise_error, sleep_forever
+
+
+class TestJobService(DigiScriptTestCase):
+    """Unit tests for JobService"""
+
+    def setUp(self):
+        super().setUp()
+        self.job_service = self._app.job_service
+        self._app.ws_send_to_user = AsyncMock()
+
+    @gen_test(timeout=30)
+    async def test_job_runs_in_worker_and_reports_progress(self):
+        job = self.job_service.submit("test", 1, 7, "key", add_numbers, 2, 3)
+        self.assertEqual(JOB_RUNNING, job.status)
+
+        result = await self.job_service.wait(job)
+
+        self.assertEqual(5, result)
+        self.assertEqual(JOB_COMPLETED, job.status)
+        self.assertEqual(1.0, job.progress)
+        self.assertEqual(5, job.as_json()["result"])
+
+        # The final update is sent before waiters are released
+        updates = [call.args for call in self._app.ws_send_to_user.call_args_list]
+        self.assertTrue(all(update[0] == 7 for update in updates))
+        self.assertTrue(all(update[1] == JOB_UPDATE_OP for update in updates))
+        self.assertEqual(JOB_COMPLETED, updates[-1][3]["status"])
+        self.assertEqual(5, updates[-1][3]["result"])
+
+    @gen_test(timeout=30)
+    async def test_identical_jobs_are_deduplicated(self):
+        job = self.job_service.submit("test", 1, 7, "key", add_numbers, 2, 3)
+        duplicate = self.job_service.submit("test", 1, 8, "key", add_numbers, 2, 3)
+        self.assertIs(job, duplicate)
+        self.assertEqual({7, 8}, job.user_ids)
+
+        await self.job_service.wait(job)
+
+        # Completed jobs are reused while they are retained
+        self.assertIs(
+            job, self.job_service.submit("test", 1, 7, "key", add_numbers, 2, 3)
+        )
+
+        # Different inputs, kind or show start a new job
+        other_key = self.job_service.submit("test", 1, 7, "other", add_numbers, 1, 1)
+        other_show = self.job_service.submit("test", 2, 7, "key", add_numbers, 2, 3)
+        self.assertIsNot(job, other_key)
+        self.assertIsNot(job, other_show)
+        await self.job_service.wait(other_key)
+        await self.job_service.wait(other_show)
+
+    @gen_test(timeout=30)
+    async def test_cancel_running_job(self):
+        job = self.job_service.submit("test", 1, 7, "key", sleep_forever)
+
+        self.assertTrue(await self.job_service.cancel(job.id))
+        self.assertEqual(JOB_CANCELLED, job.status)
+        self.assertFalse(await self.job_service.cancel(job.id))
+        with self.assertRaises(JobCancelled):
+            await self.job_service.wait(job)
+
+        # A cancelled job is not reused
+        retry = self.job_service.submit("test", 1, 7, "key", sleep_forever)
+        self.assertIsNot(job, retry)
+        await self.job_service.cancel(retry.id)
+
+    @gen_test(timeout=30)
+    async def test_failed_job(self):
+        job = self.job_service.submit("test", 1, 7, "key", raise_error)
+
+        with self.assertRaises(JobFailed) as context:
+            await self.job_service.wait(job)
+        self.assertIn("Job went wrong", str(context.exception))
+        self.assertEqual(JOB_FAILED, job.status)
+        self.assertNotIn("result", job.as_json())
+
+    @gen_test(timeout=30)
+    async def test_jobs_queue_beyond_running_limit(self):
+        blockers = [
+            self.job_service.submit("test", 1, 7, f"block-{i}", sleep_forever)
+            for i in range(2)
+        ]
+        queued = self.job_service.submit("test", 1, 7, "queued", add_numbers, 1, 2)
+        self.assertEqual("pending", queued.status)
+
+        await self.job_service.cancel(blockers[0].id)
+        self.assertEqual(JOB_RUNNING, queued.status)
+        self.assertEqual(3, await self.job_service.wait(queued))
+
+        await self.job_service.cancel(blockers[1].id)
+
+    def test_get_unknown_job(self):
+        self.assertIsNone(self.job_service.get("missing"))
@@ -1,5 +1,7 @@
 """Unit tests for block computation utilities."""
 
+from sqlalchemy import delete
+
 from models.show import Scene, Show
 from models.stage import (
     CrewAssignment,
@@ -20,6 +22,7 @@ from utils.show.block_computation import (
     Block,
     compute_blocks_for_prop,
     compute_blocks_for_scenery,
+    delete_orphaned_assignments_for_items,
     delete_orphaned_assignments_for_prop,
     delete_orphaned_assignments_for_scenery,
     find_orphaned_assignments_for_prop,
@@ -654,6 +657,53 @@ class TestOrphanDetection(DigiScriptTestCase):
             )
             self.assertEqual([assignment_id], deleted_ids)
 
+    def test_delete_orphaned_assignments_for_items(self):
+        """Test bulk orphan deletion across props and scenery."""
+        with self._app.get_db().sessionmaker() as session:
+            _, scenery_id = create_scenery(session, self.show_id)
+            session.add(
+                SceneryAllocation(scenery_id=scenery_id, scene_id=self.scene4_id)
+            )
+
+            # Prop strike at scene 3 becomes orphaned, the SET at scene 1 does not
+            prop_strike = CrewAssignment(
+                crew_id=self.crew_id,
+                scene_id=self.scene3_id,
+                assignment_type="strike",
+                prop_id=self.prop_id,
+            )
+            prop_set = CrewAssignment(
+                crew_id=self.crew_id,
+                scene_id=self.scene1_id,
+                assignment_type="set",
+                prop_id=self.prop_id,
+            )
+            # Scenery SET at scene 3 has no allocation to match
+            scenery_set = CrewAssignment(
+                crew_id=self.crew_id,
+                scene_id=self.scene3_id,
+                assignment_type="set",
+                scenery_id=scenery_id,
+            )
+            session.add_all([prop_strike, prop_set, scenery_set])
+            session.flush()
+
+            session.execute(
+                delete(PropsAllocation).where(
+                    PropsAllocation.props_id == self.prop_id,
+                    PropsAllocation.scene_id == self.scene3_id,
+                )
+            )
+
+            show = session.get(Show, self.show_id)
+            deleted_ids = delete_orphaned_assignments_for_items(
+                session, show, prop_ids=[self.prop_id], scenery_ids=[scenery_id]
+            )
+            session.commit()
+
+            self.assertEqual({prop_strike.id, scenery_set.id}, set(deleted_ids))
+            self.assertIsNotNone(session.get(CrewAssignment, prop_set.id))
+
 
 class TestBlockDataclass(DigiScriptTestCase):
     """Tests for Block dataclass."""
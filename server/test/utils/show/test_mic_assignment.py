@@ -5,6 +5,7 @@ Tests cover character priority ordering, distance-based costs, existing allocati
 preservation, over-capacity handling, and edge cases.
 """
 
+import random
 from collections import defaultdict
 from unittest.mock import MagicMock
 
@@ -12,10 +13,12 @@ import pytest
 
 from models.script import ScriptLineType
 from utils.show.mic_assignment import (
+    MicAssignmentModel,
     SceneMetadata,
     _mic_already_used_in_scene,
     _mic_manually_allocated_to_character,
     _mic_used_by_character_in_new_allocations,
+    assign_greedy,
     calculate_swap_cost_with_cast,
     collect_character_appearances,
     find_best_mic,
@@ -587,3 +590,145 @@ class TestCastMemberSwapCost:
         # Mic 2 score: 0 (unused)
         # Both have same score, so either is acceptable
         assert best_mic in [1, 2]
+
+
+def make_grouped_scene_metadata(group_sizes):
+    """Helper function to create scene_metadata for several scene groups."""
+    metadata = {}
+    position = 0
+    for group_idx, size in enumerate(group_sizes):
+        for scene_idx in range(size):
+            scene_id = position + 1
+            metadata[scene_id] = SceneMetadata(
+                scene_id=scene_id,
+                group_idx=group_idx,
+                scene_idx=scene_idx,
+                position=position,
+            )
+            position += 1
+    return metadata
+
+
+class TestMicAssignmentModel:
+    """Test the precomputed cost model used by the suggestion endpoint."""
+
+    def test_swap_cost_matrix(self):
+        """Test swap costs are distance based within a group and zero across groups."""
+        model = MicAssignmentModel(make_grouped_scene_metadata([3, 2]), {})
+
+        assert model.swap_costs[0][0] == 0.0
+        assert model.swap_costs[0][1] == 100.0
+        assert model.swap_costs[0][2] == 50.0
+        assert model.swap_costs[2][3] == 0.0
+        assert model.swap_costs[3][4] == 100.0
+
+    def test_occupied_scene_not_available(self):
+        """Test a mic in use in a scene cannot be given to anyone else."""
+        model = MicAssignmentModel(make_scene_metadata(3), {})
+        model.record_allocation(1, 2, 20, manual=True)
+
+        assert model.mic_score(1, 10, 2) is None
+        assert model.find_best_mic(10, 2, [1]) is None
+        assert model.find_best_mic(10, 2, [1, 2]) == 2
+
+    def test_same_cast_member_zero_cost(self):
+        """Test mics previously worn by the same cast member carry no swap cost."""
+        model = MicAssignmentModel(make_scene_metadata(3), {10: 100, 20: 100, 30: 200})
+        model.record_allocation(1, 1, 20)
+
+        assert model.mic_score(1, 10, 2) == 0.0
+        assert model.mic_score(1, 30, 2) == 100.0
+
+    def test_continuity_bonuses(self):
+        """Test manual and algorithm continuity bonuses."""
+        model = MicAssignmentModel(make_scene_metadata(3), {})
+        model.record_allocation(1, 1, 10, manual=True)
+        model.record_allocation(2, 1, 20)
+
+        assert model.mic_score(1, 10, 3) == -100.0
+        assert model.mic_score(2, 20, 3) == -50.0
+
+    def test_matches_find_best_mic(self):
+        """Test the model scores and picks mics identically to find_best_mic."""
+        rng = random.Random(1234)
+        scene_metadata = make_grouped_scene_metadata([4, 5, 3])
+        scene_ids = list(scene_metadata)
+        mic_ids = list(range(1, 9))
+        character_ids = list(range(100, 116))
+        cast = {char_id: rng.choice([None, 1, 2, 3, 4]) for char_id in character_ids}
+
+        characters = {}
+        for char_id, cast_id in cast.items():
+            character = MagicMock()
+            character.played_by = cast_id
+            characters[char_id] = character
+        session = MagicMock()
+        session.get.side_effect = lambda model, id: characters[id]
+
+        model = MicAssignmentModel(scene_metadata, cast)
+        mic_usage_tracker = defaultdict(list)
+        existing_allocations = []
+        new_allocations = []
+
+        # Random manual allocations, with no mic used twice in a scene
+        for mic_id in mic_ids:
+            for scene_id in rng.sample(scene_ids, 3):
+                char_id = rng.choice(character_ids)
+                alloc = MagicMock()
+                alloc.mic_id = mic_id
+                alloc.scene_id = scene_id
+                alloc.character_id = char_id
+                existing_allocations.append(alloc)
+                mic_usage_tracker[mic_id].append((scene_id, char_id))
+                model.record_allocation(mic_id, scene_id, char_id, manual=True)
+
+        for _ in range(60):
+            char_id = rng.choice(character_ids)
+            scene_id = rng.choice(scene_ids)
+            expected = find_best_mic(
+                session,
+                char_id,
+                scene_id,
+                mic_ids,
+                mic_usage_tracker,
+                existing_allocations,
+                new_allocations,
+                scene_metadata,
+            )
+            assert model.find_best_mic(char_id, scene_id, mic_ids) == expected
+            if expected:
+                new_allocations.append((expected, scene_id, char_id))
+                mic_usage_tracker[expected].append((scene_id, char_id))
+                model.record_allocation(expected, scene_id, char_id)
+
+    def test_assign_greedy(self):
+        """Test greedy assignment gives each appearance a mic in scene order."""
+        model = MicAssignmentModel(make_scene_metadata(3), {})
+        appearances = {(3, 10): 2, (1, 10): 1, (2, 20): 5, (1, 20): 1, (1, 30): 1}
+
+        new_allocations, unassigned = assign_greedy(
+            model, [20, 10, 30], appearances, [1, 2]
+        )
+
+        assert unassigned == [(30, 1)]
+        assert [alloc[1:] for alloc in new_allocations] == [
+            (1, 20),
+            (2, 20),
+            (1, 10),
+            (3, 10),
+        ]
+        # Each character keeps the same mic across their scenes
+        mics_by_character = defaultdict(set)
+        for mic_id, _, char_id in new_allocations:
+            mics_by_character[char_id].add(mic_id)
+        assert all(len(mics) == 1 for mics in mics_by_character.values())
+
+    def test_assign_greedy_skips_characters(self):
+        """Test characters handled elsewhere are not assigned."""
+        model = MicAssignmentModel(make_scene_metadata(2), {})
+        new_allocations, unassigned = assign_greedy(
+            model, [10, 20], {(1, 10): 1, (1, 20): 1}, [1], skip_characters={10}
+        )
+
+        assert new_allocations == [(1, 1, 20)]
+        assert unassigned == []
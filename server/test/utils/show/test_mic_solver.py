@@ -0,0 +1,137 @@
+"""
+Unit tests for the optimal mic assignment solver.
+"""
+
+import itertools
+import random
+
+import pytest
+
+from utils.show.mic_assignment import MicAssignmentModel, SceneMetadata, assign_greedy
+from utils.show.mic_solver import (
+    MicSolverTimeout,
+    assign_optimal,
+    linear_sum_assignment,
+)
+
+
+def make_scene_metadata(num_scenes: int):
+    """Helper function to create a single scene group with scene IDs from 1."""
+    return {
+        i + 1: SceneMetadata(scene_id=i + 1, group_idx=0, scene_idx=i, position=i)
+        for i in range(num_scenes)
+    }
+
+
+class TestLinearSumAssignment:
+    """Test the Hungarian algorithm implementation."""
+
+    def test_empty(self):
+        assert linear_sum_assignment([]) == []
+        assert linear_sum_assignment([[]]) == []
+
+    def test_square(self):
+        cost = [[4, 1, 3], [2, 0, 5], [3, 2, 2]]
+        assert linear_sum_assignment(cost) == [(0, 1), (1, 0), (2, 2)]
+
+    def test_negative_costs(self):
+        cost = [[-10, 0], [0, -10]]
+        assert linear_sum_assignment(cost) == [(0, 0), (1, 1)]
+
+    @pytest.mark.parametrize("shape", [(2, 4), (4, 2), (3, 3), (1, 5), (5, 1)])
+    def test_matches_brute_force(self, shape):
+        """Test the result is optimal for random rectangular matrices."""
+        rows, cols = shape
+        rng = random.Random(rows * 10 + cols)
+        for _ in range(25):
+            cost = [[rng.randint(-50, 50) for _ in range(cols)] for _ in range(rows)]
+            result = linear_sum_assignment(cost)
+
+            assert len(result) == min(rows, cols)
+            assert len({row for row, _ in result}) == len(result)
+            assert len({col for _, col in result}) == len(result)
+
+            if rows <= cols:
+                best = min(
+                    sum(cost[row][perm[row]] for row in range(rows))
+                    for perm in itertools.permutations(range(cols), rows)
+                )
+            else:
+                best = min(
+                    sum(cost[perm[col]][col] for col in range(cols))
+                    for perm in itertools.permutations(range(rows), cols)
+                )
+            assert sum(cost[row][col] for row, col in result) == best
+
+
+class TestAssignOptimal:
+    """Test scene by scene optimal assignment."""
+
+    def test_beats_greedy_ordering(self):
+        """
+        Test a case where greedy character ordering forces an expensive swap.
+
+        Character 30 has more lines than character 20, so greedy gives them the
+        unused mic in scene 3 first, leaving character 20 in scene 2 next to a
+        different wearer on either mic. Solving scenes in order instead puts
+        character 20 on the unused mic and shares mic 1 between scenes 1 and 3.
+        """
+        scene_metadata = make_scene_metadata(3)
+        appearances = {(1, 10): 5, (2, 20): 1, (3, 30): 3}
+        order = [10, 30, 20]
+
+        greedy_model = MicAssignmentModel(scene_metadata, {})
+        assign_greedy(greedy_model, order, appearances, [1, 2])
+        optimal_model = MicAssignmentModel(scene_metadata, {})
+        allocations, unassigned = assign_optimal(
+            optimal_model, order, appearances, [1, 2]
+        )
+
+        assert unassigned == []
+        assert allocations == [(1, 1, 10), (2, 2, 20), (1, 3, 30)]
+        assert greedy_model.total_cost == 100.0
+        assert optimal_model.total_cost == 50.0
+
+    def test_no_mic_used_twice_in_a_scene(self):
+        rng = random.Random(42)
+        scene_metadata = make_scene_metadata(8)
+        appearances = {
+            (scene_id, char_id): rng.randint(1, 10)
+            for scene_id in scene_metadata
+            for char_id in range(100, 112)
+            if rng.random() < 0.5
+        }
+        order = sorted({char_id for _, char_id in appearances})
+
+        model = MicAssignmentModel(scene_metadata, {})
+        allocations, unassigned = assign_optimal(model, order, appearances, [1, 2, 3])
+
+        pairs = [(mic_id, scene_id) for mic_id, scene_id, _ in allocations]
+        assert len(pairs) == len(set(pairs))
+        assert len(allocations) + len(unassigned) == len(appearances)
+
+    def test_prefers_characters_with_more_lines(self):
+        """Test that when mics run out, the characters with most lines get them."""
+        model = MicAssignmentModel(make_scene_metadata(1), {})
+        appearances = {(1, 10): 1, (1, 20): 9, (1, 30): 5}
+
+        allocations, unassigned = assign_optimal(
+            model, [20, 30, 10], appearances, [1, 2]
+        )
+
+        assert {char_id for _, _, char_id in allocations} == {20, 30}
+        assert unassigned == [(10, 1)]
+
+    def test_skips_characters(self):
+        model = MicAssignmentModel(make_scene_metadata(1), {})
+        allocations, unassigned = assign_optimal(
+            model, [10, 20], {(1, 10): 1, (1, 20): 1}, [1], skip_characters={10}
+        )
+
+        assert allocations == [(1, 1, 20)]
+        assert unassigned == []
+
+    def test_deadline(self):
+        model = MicAssignmentModel(make_scene_metadata(1), {})
+        with pytest.raises(MicSolverTimeout):
+            assign_optimal(model, [10], {(1, 10): 1}, [1], deadline=0.0)
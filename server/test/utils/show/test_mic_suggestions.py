@@ -0,0 +1,70 @@
+"""
+Unit tests for computing mic suggestions from a show snapshot.
+"""
+
+import pickle
+from unittest.mock import patch
+
+from utils.show.mic_solver import MicSolverTimeout
+from utils.show.mic_suggestions import MicSuggestionInput, compute_suggestions
+
+
+def make_input(**overrides):
+    """Helper function for two scenes either side of an interval and two mics."""
+    values = {
+        "scene_groups": ((1,), (2,)),
+        "allocatable_mic_ids": (10, 20),
+        "existing_allocations": (),
+        "unallocated_appearances": ((1, 100, 3), (2, 100, 2), (1, 200, 1)),
+        "character_total_lines": ((100, 5), (200, 1)),
+        "character_cast": ((100, None), (200, None)),
+        "static_characters": (),
+        "gap_mode": "leave_gaps",
+        "solver": "greedy",
+    }
+    values.update(overrides)
+    return MicSuggestionInput(**values)
+
+
+class TestMicSuggestionInput:
+    """Test the snapshot passed to worker processes."""
+
+    def test_picklable(self):
+        suggestion_input = make_input()
+        assert pickle.loads(pickle.dumps(suggestion_input)) == suggestion_input
+
+    def test_dedupe_key(self):
+        assert make_input().dedupe_key == make_input().dedupe_key
+        assert make_input().dedupe_key != make_input(gap_mode="no_gaps").dedupe_key
+
+
+class TestComputeSuggestions:
+    """Test computing suggestions without a database."""
+
+    def test_allocates_every_appearance(self):
+        result = compute_suggestions(make_input())
+        assert result["hints"] == []
+        assert result["solver"] == "greedy"
+        assigned = {
+            (scene_id, character_id)
+            for scene_allocations in result["allocations"].values()
+            for scene_id, character_id in scene_allocations.items()
+        }
+        assert assigned == {(1, 100), (2, 100), (1, 200)}
+
+    def test_reports_progress(self):
+        progress = []
+        compute_suggestions(make_input(solver="optimal"), on_progress=progress.append)
+        assert progress == sorted(progress)
+        assert all(0 <= fraction <= 1 for fraction in progress)
+        assert progress[-1] == 1.0
+
+    def test_optimal_solver_timeout_falls_back(self):
+        with patch(
+            "utils.show.mic_suggestions.assign_optimal",
+            side_effect=MicSolverTimeout(),
+        ):
+            result = compute_suggestions(make_input(solver="optimal"))
+        assert result["solver"] == "greedy"
+        assert result["costs"]["optimal"] is None
+        assert result["hints"] == []
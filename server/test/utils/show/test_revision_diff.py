@@ -0,0 +1,254 @@
+"""Unit tests for comparing script revisions."""
+
+from models.cue import Cue, CueAssociation, CueType
+from models.script import (
+    Script,
+    ScriptCuts,
+    ScriptLine,
+    ScriptLinePart,
+    ScriptLineRevisionAssociation,
+    ScriptLineType,
+    ScriptRevision,
+)
+from models.show import Show, ShowScriptType
+from test.conftest import DigiScriptTestCase
+from utils.show.revision_diff import _longest_increasing, diff_revisions, load_cues
+
+
+def add_line(session, page, text):
+    """Add a single-part dialogue line, returning its ID."""
+    line = ScriptLine(page=page, line_type=ScriptLineType.DIALOGUE)
+    session.add(line)
+    session.flush()
+    session.add(ScriptLinePart(line_id=line.id, part_index=0, line_text=text))
+    session.flush()
+    return line.id
+
+
+def set_lines(session, revision_id, line_ids):
+    """Make the lines of a revision the given lines, in order."""
+    for index, line_id in enumerate(line_ids):
+        session.add(
+            ScriptLineRevisionAssociation(
+                revision_id=revision_id,
+                line_id=line_id,
+                previous_line_id=line_ids[index - 1] if index else None,
+                next_line_id=line_ids[index + 1] if index + 1 < len(line_ids) else None,
+            )
+        )
+    session.flush()
+
+
+def part_id(session, line_id):
+    return session.query(ScriptLinePart.id).filter_by(line_id=line_id).scalar()
+
+
+class TestLongestIncreasing:
+    def test_empty(self):
+        assert _longest_increasing([]) == []
+
+    def test_in_order(self):
+        assert _longest_increasing([0, 1, 2, 3]) == [0, 1, 2, 3]
+
+    def test_one_moved(self):
+        # The line at position 1 in the new order was moved to the end
+        assert _longest_increasing([0, 4, 1, 2, 3, 5]) == [0, 2, 3, 4, 5]
+
+    def test_reversed(self):
+        assert len(_longest_increasing([3, 2, 1, 0])) == 1
+
+
+class TestDiffRevisions(DigiScriptTestCase):
+    """Tests for the changes found between two revisions."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            show = Show(name="Test Show", script_mode=ShowScriptType.FULL)
+            session.add(show)
+            session.flush()
+            self.show_id = show.id
+            script = Script(show_id=show.id)
+            session.add(script)
+            session.flush()
+            self.script_id = script.id
+            self.from_id = self._revision(session, 1)
+            self.to_id = self._revision(session, 2)
+            self.lines = [
+                add_line(session, 1 if index < 3 else 2, f"Line {index}")
+                for index in range(6)
+            ]
+            set_lines(session, self.from_id, self.lines)
+            cue_type = CueType(show_id=show.id, prefix="LX")
+            session.add(cue_type)
+            session.flush()
+            self.cues = []
+            for index in range(5):
+                cue = Cue(cue_type_id=cue_type.id, ident=str(index))
+                session.add(cue)
+                session.flush()
+                self.cues.append(cue.id)
+            session.commit()
+
+    def _revision(self, session, number):
+        revision = ScriptRevision(
+            script_id=self.script_id, revision=number, description=str(number)
+        )
+        session.add(revision)
+        session.flush()
+        return revision.id
+
+    def _diff(self, to_lines, setup=None):
+        with self._app.get_db().sessionmaker() as session:
+            to_lines = [
+                add_line(session, *line) if isinstance(line, tuple) else line
+                for line in to_lines
+            ]
+            set_lines(session, self.to_id, to_lines)
+            if setup:
+                setup(session, to_lines)
+            session.commit()
+            return diff_revisions(session, self.from_id, self.to_id), to_lines
+
+    def _changes(self, diff):
+        return [
+            (change.kind, change.page, change.line_id, change.from_line_id)
+            for change in diff.lines
+        ]
+
+    def test_same_lines(self):
+        diff, _lines = self._diff(self.lines)
+        self.assertEqual([], diff.lines + diff.cues + diff.cuts)
+        self.assertEqual({}, diff.by_page())
+
+    def test_added_line(self):
+        diff, lines = self._diff(self.lines[:2] + [(1, "New")] + self.lines[2:])
+        self.assertEqual([("added", 1, lines[2], None)], self._changes(diff))
+        self.assertEqual(1, diff.summary()["lines_added"])
+
+    def test_removed_line(self):
+        diff, _lines = self._diff(self.lines[:3] + self.lines[4:])
+        self.assertEqual([("removed", 2, None, self.lines[3])], self._changes(diff))
+
+    def test_modified_line(self):
+        diff, lines = self._diff(
+            [self.lines[0], (1, "Changed")] + self.lines[2:5] + [(2, "Line 5")]
+        )
+        # The last line was replaced by an identical one, so is not a change
+        self.assertEqual(
+            [("modified", 1, lines[1], self.lines[1])], self._changes(diff)
+        )
+
+    def test_moved_line(self):
+        order = [self.lines[i] for i in (0, 2, 3, 4, 1, 5)]
+        diff, _lines = self._diff(order)
+        self.assertEqual(
+            [("moved", 1, self.lines[1], self.lines[1])], self._changes(diff)
+        )
+
+    def test_changes_grouped_by_page(self):
+        diff, _lines = self._diff([self.lines[0], (1, "New")] + self.lines[2:5])
+        pages = diff.by_page()
+        self.assertEqual([1, 2], list(pages))
+        self.assertEqual(["modified"], [c.kind for c in pages[1].lines])
+        self.assertEqual(["removed"], [c.kind for c in pages[2].lines])
+
+    def test_cue_changes(self):
+        with self._app.get_db().sessionmaker() as session:
+            for cue, line in ((0, 0), (1, 1), (3, 4), (4, 3)):
+                session.add(
+                    CueAssociation(
+                        revision_id=self.from_id,
+                        line_id=self.lines[line],
+                        cue_id=self.cues[cue],
+                    )
+                )
+            session.commit()
+
+        def setup(session, lines):
+            # Cue 1 stays on the replacement for its line, cue 2 is new, cue 3
+            # moves to another line and cue 4 is removed
+            for cue, line in ((0, 0), (1, 1), (2, 2), (3, 5)):
+                session.add(
+                    CueAssociation(
+                        revision_id=self.to_id,
+                        line_id=lines[line],
+                        cue_id=self.cues[cue],
+                    )
+                )
+
+        diff, lines = self._diff(
+            [self.lines[0], (1, "Changed")] + self.lines[2:], setup
+        )
+        self.assertEqual(
+            [
+                ("added", self.cues[2], lines[2], None),
+                ("moved", self.cues[3], lines[5], self.lines[4]),
+                ("removed", self.cues[4], None, self.lines[3]),
+            ],
+            [
+                (change.kind, change.cue_id, change.line_id, change.from_line_id)
+                for change in diff.cues
+            ],
+        )
+        with self._app.get_db().sessionmaker() as session:
+            self.assertEqual(
+                {"ident": "2", "prefix": "LX"},
+                load_cues(session, [self.cues[2]])[self.cues[2]],
+            )
+
+    def test_cut_changes(self):
+        with self._app.get_db().sessionmaker() as session:
+            for line in (self.lines[1], self.lines[4]):
+                session.add(
+                    ScriptCuts(
+                        revision_id=self.from_id, line_part_id=part_id(session, line)
+                    )
+                )
+            session.commit()
+
+        def setup(session, lines):
+            # The cut on the replaced line is carried over, the cut on line 4 is
+            # removed and line 2 is cut
+            for line in (lines[1], lines[2]):
+                session.add(
+                    ScriptCuts(
+                        revision_id=self.to_id, line_part_id=part_id(session, line)
+                    )
+                )
+
+        diff, lines = self._diff(
+            [self.lines[0], (1, "Changed")] + self.lines[2:], setup
+        )
+        self.assertEqual(
+            [("added", 1, lines[2], 0), ("removed", 2, self.lines[4], 0)],
+            [
+                (change.kind, change.page, change.line_id, change.part_index)
+                for change in diff.cuts
+            ],
+        )
+        self.assertEqual(1, diff.summary()["cuts_added"])
+
+    def test_cut_on_deleted_line(self):
+        def setup(session, lines):
+            # Deleting a line from a revision leaves its cuts
+            session.add(
+                ScriptCuts(
+                    revision_id=self.to_id,
+                    line_part_id=part_id(session, self.lines[1]),
+                )
+            )
+
+        diff, _lines = self._diff(self.lines[:1] + self.lines[2:], setup)
+        self.assertEqual([], diff.cuts)
+        self.assertEqual([("removed", 1, None, self.lines[1])], self._changes(diff))
+
+    def test_long_script(self):
+        with self._app.get_db().sessionmaker() as session:
+            lines = [add_line(session, 1 + i // 20, f"Line {i}") for i in range(3000)]
+            set_lines(session, self.to_id, lines)
+            other = self._revision(session, 3)
+            set_lines(session, other, lines[:1500] + lines[1501:])
+            session.commit()
+            diff = diff_revisions(session, self.to_id, other)
+        self.assertEqual([("removed", 76, None, lines[1500])], self._changes(diff))
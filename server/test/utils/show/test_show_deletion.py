@@ -0,0 +1,256 @@
+"""Unit tests for set-based show deletion."""
+
+from sqlalchemy import func, select
+
+from models.cue import Cue, CueAssociation, CueGroup, CueType
+from models.mics import Microphone, MicrophoneAllocation
+from models.models import db
+from models.script import (
+    CompiledScript,
+    Script,
+    ScriptCuts,
+    ScriptLine,
+    ScriptLinePart,
+    ScriptLineRevisionAssociation,
+    ScriptLineType,
+    ScriptRevision,
+    StageDirectionStyle,
+)
+from models.session import Interval, SessionTag, ShowSession
+from models.show import Cast, Character, CharacterGroup, Scene, Show
+from models.stage import (
+    Crew,
+    CrewAssignment,
+    Props,
+    PropsAllocation,
+    PropType,
+    Scenery,
+    SceneryAllocation,
+    SceneryType,
+)
+from models.user import User, UserOverrides
+from rbac.role import Role
+from test.conftest import DigiScriptTestCase
+from test.helpers.stage_fixtures import create_act_with_scenes, create_show
+from utils.show.show_deletion import delete_show
+
+
+def populate_show(session, name):
+    """Helper function to create a show with rows in every table belonging to it."""
+    show_id = create_show(session, name=name)
+    act1_id, act1_scenes = create_act_with_scenes(
+        session, show_id, "Act 1", 2, interval_after=True, link_to_show=True
+    )
+    _act2_id, act2_scenes = create_act_with_scenes(
+        session, show_id, "Act 2", 1, previous_act_id=act1_id
+    )
+    scene_ids = act1_scenes + act2_scenes
+
+    cast = Cast(show_id=show_id, first_name="Alex", last_name="Smith")
+    session.add(cast)
+    session.flush()
+    character = Character(show_id=show_id, name="Character", played_by=cast.id)
+    group = CharacterGroup(show_id=show_id, name="Group")
+    group.characters.append(character)
+    session.add_all([character, group])
+
+    script = Script(show_id=show_id)
+    session.add(script)
+    session.flush()
+    revision = ScriptRevision(script_id=script.id, revision=1, description="Initial")
+    session.add(revision)
+    session.flush()
+    script.current_revision = revision.id
+    style = StageDirectionStyle(script_id=script.id, description="Style")
+    session.add(style)
+    session.flush()
+
+    previous_line_id = None
+    part_ids = []
+    line_ids = []
+    for scene_id in scene_ids:
+        line = ScriptLine(
+            act_id=session.get(Scene, scene_id).act_id,
+            scene_id=scene_id,
+            page=1,
+            line_type=ScriptLineType.DIALOGUE,
+            stage_direction_style_id=style.id,
+        )
+        session.add(line)
+        session.flush()
+        part = ScriptLinePart(
+            line_id=line.id,
+            part_index=0,
+            character_id=character.id,
+            character_group_id=group.id,
+            line_text="Line",
+        )
+        session.add(part)
+        session.flush()
+        session.add(
+            ScriptLineRevisionAssociation(
+                revision_id=revision.id,
+                line_id=line.id,
+                previous_line_id=previous_line_id,
+            )
+        )
+        previous_line_id = line.id
+        part_ids.append(part.id)
+        line_ids.append(line.id)
+    session.add(ScriptCuts(line_part_id=part_ids[0], revision_id=revision.id))
+    session.add(CompiledScript(revision_id=revision.id, data_path=None))
+
+    cue_type = CueType(show_id=show_id, prefix="LX", description="Lighting")
+    session.add(cue_type)
+    session.flush()
+    cue = Cue(cue_type_id=cue_type.id, ident="1")
+    cue_group = CueGroup(cue_type_id=cue_type.id)
+    session.add_all([cue, cue_group])
+    session.flush()
+    session.add(
+        CueAssociation(
+            revision_id=revision.id,
+            line_id=line_ids[0],
+            cue_id=cue.id,
+            group_id=cue_group.id,
+        )
+    )
+
+    tag = SessionTag(show_id=show_id, tag="Tag", colour="#ffffff")
+    show_session = ShowSession(show_id=show_id, script_revision_id=revision.id)
+    show_session.tags.append(tag)
+    session.add_all([tag, show_session])
+    session.flush()
+    interval = Interval(session_id=show_session.id, act_id=act1_id)
+    session.add(interval)
+    session.flush()
+    show_session.current_interval_id = interval.id
+    session.get(Show, show_id).current_session_id = show_session.id
+
+    mic = Microphone(show_id=show_id, name="Mic")
+    session.add(mic)
+    session.flush()
+    session.add(
+        MicrophoneAllocation(
+            mic_id=mic.id, scene_id=scene_ids[0], character_id=character.id
+        )
+    )
+
+    crew = Crew(show_id=show_id, first_name="Sam")
+    prop_type = PropType(show_id=show_id, name="Props")
+    scenery_type = SceneryType(show_id=show_id, name="Scenery")
+    session.add_all([crew, prop_type, scenery_type])
+    session.flush()
+    prop = Props(show_id=show_id, prop_type_id=prop_type.id, name="Prop")
+    scenery = Scenery(show_id=show_id, scenery_type_id=scenery_type.id, name="Flat")
+    session.add_all([prop, scenery])
+    session.flush()
+    session.add_all(
+        [
+            PropsAllocation(props_id=prop.id, scene_id=scene_ids[0]),
+            SceneryAllocation(scenery_id=scenery.id, scene_id=scene_ids[0]),
+            CrewAssignment(
+                crew_id=crew.id,
+                scene_id=scene_ids[0],
+                assignment_type="set",
+                prop_id=prop.id,
+            ),
+        ]
+    )
+    session.flush()
+    return show_id
+
+
+class TestDeleteShow(DigiScriptTestCase):
+    """Tests for deleting a show's object graph with set-based statements."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            self.show_id = populate_show(session, "Deleted")
+            self.other_show_id = populate_show(session, "Kept")
+            session.commit()
+
+    def _count_rows(self):
+        counts = {}
+        with self._app.get_db().sessionmaker() as session:
+            for table in db.metadata.tables.values():
+                counts[table.name] = session.scalar(
+                    select(func.count()).select_from(table)
+                )
+        return counts
+
+    def test_deletes_only_the_show(self):
+        before = self._count_rows()
+        with self._app.get_db().sessionmaker() as session:
+            result = delete_show(session, self.show_id)
+            session.commit()
+        after = self._count_rows()
+
+        # Both shows were created identically, so every table belonging to a show
+        # should have lost exactly half of its rows, and nothing else should change
+        for table_name, count in before.items():
+            if table_name in result.row_counts:
+                self.assertEqual(count // 2, after[table_name], table_name)
+                self.assertEqual(count // 2, result.row_counts[table_name])
+            else:
+                self.assertEqual(count, after[table_name], table_name)
+        self.assertNotIn("user", result.row_counts)
+        self.assertIn("script_line_cuts", result.row_counts)
+        self.assertIn("session_tag_associations", result.row_counts)
+        self.assertIn("character_group_association", result.row_counts)
+
+        with self._app.get_db().sessionmaker() as session:
+            self.assertIsNone(session.get(Show, self.show_id))
+            self.assertIsNotNone(session.get(Show, self.other_show_id))
+
+    def test_missing_show(self):
+        with self._app.get_db().sessionmaker() as session:
+            self.assertIsNone(delete_show(session, 9999))
+
+    def test_hooks_called_once_per_table(self):
+        calls = []
+
+        def hook(_session, model, primary_keys):
+            calls.append((model, len(primary_keys)))
+
+        self._app.get_db().register_bulk_delete_hook(hook)
+        try:
+            with self._app.get_db().sessionmaker() as session:
+                result = delete_show(session, self.show_id)
+                session.commit()
+        finally:
+            self._app.get_db().unregister_bulk_delete_hook(hook)
+
+        models = [model for model, _ in calls]
+        self.assertEqual(len(models), len(set(models)))
+        for model, count in calls:
+            self.assertEqual(result.row_counts[model.__tablename__], count)
+
+    def test_removes_rbac_roles_and_overrides(self):
+        with self._app.get_db().sessionmaker() as session:
+            user = User(username="user", is_admin=False, password="test")
+            session.add(user)
+            session.add(UserOverrides(settings_type="cuetypes", settings="{}"))
+            session.commit()
+            show = session.get(Show, self.show_id)
+            other_show = session.get(Show, self.other_show_id)
+            cue_type = session.scalars(
+                select(CueType).where(CueType.show_id == self.show_id)
+            ).one()
+
+        self._app.rbac.give_role(user, show, Role.READ)
+        self._app.rbac.give_role(user, other_show, Role.READ)
+        self._app.rbac.give_role(user, cue_type, Role.WRITE)
+
+        with self._app.get_db().sessionmaker() as session:
+            delete_show(session, self.show_id)
+            session.commit()
+
+        self.assertFalse(self._app.rbac.has_role(user, show, Role.READ))
+        self.assertFalse(self._app.rbac.has_role(user, cue_type, Role.WRITE))
+        self.assertTrue(self._app.rbac.has_role(user, other_show, Role.READ))
+        with self._app.get_db().sessionmaker() as session:
+            self.assertEqual(
+                0, session.scalar(select(func.count()).select_from(UserOverrides))
+            )
@@ -0,0 +1,95 @@
+"""Unit tests for the cached show structure."""
+
+from models.show import Act, Scene
+from test.conftest import DigiScriptTestCase
+from test.helpers.stage_fixtures import create_act_with_scenes, create_show
+from utils.show.show_structure import get_show_structure, load_show_structure
+
+
+class TestShowStructure(DigiScriptTestCase):
+    """Tests for reading and caching the running order of a show."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            self.show_id = create_show(session)
+            self.act1_id, self.act1_scenes = create_act_with_scenes(
+                session,
+                self.show_id,
+                "Act 1",
+                2,
+                interval_after=True,
+                link_to_show=True,
+            )
+            self.act2_id, self.act2_scenes = create_act_with_scenes(
+                session, self.show_id, "Act 2", 2, previous_act_id=self.act1_id
+            )
+            session.commit()
+
+    def test_structure(self):
+        with self._app.get_db().sessionmaker() as session:
+            structure = load_show_structure(session, self.show_id)
+
+        scene_ids = tuple(self.act1_scenes + self.act2_scenes)
+        self.assertEqual((self.act1_id, self.act2_id), structure.act_ids)
+        self.assertEqual(scene_ids, structure.scene_ids)
+        self.assertEqual(
+            {
+                self.act1_id: tuple(self.act1_scenes),
+                self.act2_id: tuple(self.act2_scenes),
+            },
+            structure.act_scene_ids,
+        )
+        self.assertEqual(
+            (tuple(self.act1_scenes), tuple(self.act2_scenes)), structure.scene_groups
+        )
+        self.assertEqual(
+            {scene_id: i for i, scene_id in enumerate(scene_ids)},
+            structure.scene_positions,
+        )
+        self.assertEqual(self.act2_id, structure.scene_acts[self.act2_scenes[0]])
+
+    def test_empty_show(self):
+        with self._app.get_db().sessionmaker() as session:
+            show_id = create_show(session, name="Empty")
+            structure = load_show_structure(session, show_id)
+        self.assertEqual((), structure.act_ids)
+        self.assertEqual((), structure.scene_groups)
+
+    def test_structure_is_cached(self):
+        with self._app.get_db().sessionmaker() as session:
+            first = get_show_structure(session, self.show_id)
+        with self._app.get_db().sessionmaker() as session:
+            self.assertIs(first, get_show_structure(session, self.show_id))
+
+    def test_commit_invalidates_cache(self):
+        with self._app.get_db().sessionmaker() as session:
+            first = get_show_structure(session, self.show_id)
+
+            # Move the interval to after act 2
+            session.get(Act, self.act1_id).interval_after = False
+            session.get(Act, self.act2_id).interval_after = True
+            session.flush()
+            self.assertEqual(
+                1, len(get_show_structure(session, self.show_id).scene_groups)
+            )
+            session.commit()
+
+        with self._app.get_db().sessionmaker() as session:
+            second = get_show_structure(session, self.show_id)
+        self.assertIsNot(first, second)
+        self.assertEqual(1, len(second.scene_groups))
+
+    def test_rollback_discards_uncommitted_structure(self):
+        with self._app.get_db().sessionmaker() as session:
+            session.delete(session.get(Scene, self.act2_scenes[1]))
+            session.flush()
+            self.assertEqual(
+                3, len(get_show_structure(session, self.show_id).scene_ids)
+            )
+            session.rollback()
+
+        with self._app.get_db().sessionmaker() as session:
+            self.assertEqual(
+                4, len(get_show_structure(session, self.show_id).scene_ids)
+            )
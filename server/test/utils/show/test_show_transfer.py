@@ -0,0 +1,190 @@
+"""Unit tests for exporting and importing shows."""
+
+import gzip
+import json
+
+from sqlalchemy import func, select
+
+from models.models import db
+from models.script import ScriptLinePart, ScriptLineRevisionAssociation
+from models.show import Act, Character, Scene, Show
+from test.conftest import DigiScriptTestCase
+from test.utils.show.test_show_deletion import populate_show
+from utils.show.show_deletion import delete_show
+from utils.show.show_structure import load_show_structure
+from utils.show.show_transfer import (
+    TABLES,
+    ShowImportError,
+    _references,
+    export_show,
+    export_show_gzip,
+    import_show,
+    iter_lines,
+)
+
+
+def _contents(lines):
+    """Rows of each table in an export, without IDs or references to other rows."""
+    contents = {}
+    table = None
+    for line in lines[1:-1]:
+        item = json.loads(line)
+        if isinstance(item, dict):
+            table = next(t for t in TABLES if t.name == item["table"])
+            columns = item["columns"]
+            contents[table.name] = []
+        else:
+            contents[table.name].append(
+                [
+                    value
+                    for column, value in zip(columns, item)
+                    if column != "id" and not _references(table.c[column])
+                ]
+            )
+    return contents
+
+
+class TestShowTransfer(DigiScriptTestCase):
+    """Tests for round-tripping a show through an export."""
+
+    def setUp(self):
+        super().setUp()
+        with self._app.get_db().sessionmaker() as session:
+            self.show_id = populate_show(session, "Exported")
+            populate_show(session, "Other")
+            session.commit()
+
+    def _export(self, show_id):
+        with self._app.get_db().sessionmaker() as session:
+            return b"".join(export_show_gzip(session, show_id))
+
+    def _import(self, data):
+        with self._app.get_db().sessionmaker() as session:
+            result = import_show(session, iter_lines(data))
+            session.commit()
+        return result
+
+    def test_round_trip(self):
+        data = self._export(self.show_id)
+        result = self._import(data)
+
+        self.assertNotEqual(self.show_id, result.show_id)
+        original = gzip.decompress(data).decode().splitlines()
+        copy = gzip.decompress(self._export(result.show_id)).decode().splitlines()
+        self.assertEqual(_contents(original), _contents(copy))
+        self.assertEqual(json.loads(original[-1]), json.loads(copy[-1]))
+        for table in TABLES:
+            self.assertIn(table.name, _contents(original))
+
+    def test_imported_rows_belong_to_new_show(self):
+        result = self._import(self._export(self.show_id))
+
+        with self._app.get_db().sessionmaker() as session:
+            show = session.get(Show, result.show_id)
+            self.assertIsNone(show.current_session_id)
+            structure = load_show_structure(session, result.show_id)
+            self.assertEqual(2, len(structure.act_ids))
+            self.assertEqual(3, len(structure.scene_ids))
+            self.assertEqual(show.first_act_id, structure.act_ids[0])
+            self.assertEqual(
+                set(structure.scene_ids),
+                set(
+                    session.scalars(
+                        select(Scene.id).where(Scene.show_id == result.show_id)
+                    )
+                ),
+            )
+
+            characters = set(
+                session.scalars(
+                    select(Character.id).where(Character.show_id == result.show_id)
+                )
+            )
+            revision_id = show.scripts[0].current_revision
+            associations = session.scalars(
+                select(ScriptLineRevisionAssociation).where(
+                    ScriptLineRevisionAssociation.revision_id == revision_id
+                )
+            ).all()
+            self.assertEqual(3, len(associations))
+            line_ids = {association.line_id for association in associations}
+            for association in associations:
+                if association.previous_line_id is not None:
+                    self.assertIn(association.previous_line_id, line_ids)
+                part = session.scalars(
+                    select(ScriptLinePart).where(
+                        ScriptLinePart.line_id == association.line_id
+                    )
+                ).one()
+                self.assertIn(part.character_id, characters)
+
+        # Everything imported belongs to the new show, so deleting it removes the
+        # same rows again
+        with self._app.get_db().sessionmaker() as session:
+            deletion = delete_show(session, result.show_id)
+            session.commit()
+        for table_name, count in result.row_counts.items():
+            self.assertEqual(count, deletion.row_counts.get(table_name, 0), table_name)
+
+    def test_acts_exported_in_running_order(self):
+        with self._app.get_db().sessionmaker() as session:
+            expected = list(load_show_structure(session, self.show_id).act_ids)
+            lines = list(export_show(session, self.show_id))
+        rows = "".join(lines).splitlines()
+        start = rows.index(next(r for r in rows if r.startswith('{"table": "act"')))
+        self.assertEqual(
+            expected, [json.loads(r)[0] for r in rows[start + 1 : start + 3]]
+        )
+
+    def test_uncompressed_import(self):
+        with self._app.get_db().sessionmaker() as session:
+            data = "".join(export_show(session, self.show_id)).encode()
+        result = self._import(data)
+        self.assertEqual(1, result.row_counts["shows"])
+
+    def test_truncated_export_rejected(self):
+        with self._app.get_db().sessionmaker() as session:
+            lines = "".join(export_show(session, self.show_id)).splitlines()
+            before = session.scalar(select(func.count()).select_from(Act))
+            with self.assertRaises(ShowImportError):
+                import_show(session, [line.encode() for line in lines[:-3]])
+            session.rollback()
+            self.assertEqual(
+                before, session.scalar(select(func.count()).select_from(Act))
+            )
+
+    def test_unknown_column_rejected(self):
+        with self._app.get_db().sessionmaker() as session:
+            lines = "".join(export_show(session, self.show_id)).splitlines()
+        lines[1] = lines[1].replace('"name"', '"not_a_column"')
+        with self._app.get_db().sessionmaker() as session:
+            with self.assertRaises(ShowImportError):
+                import_show(session, [line.encode() for line in lines])
+
+    def test_not_an_export_rejected(self):
+        with self._app.get_db().sessionmaker() as session:
+            with self.assertRaises(ShowImportError):
+                import_show(session, iter_lines(b'{"hello": "world"}\n'))
+            with self.assertRaises(ShowImportError):
+                import_show(session, iter_lines(b"\x1f\x8bnot gzip"))
+
+    def test_every_show_table_exported(self):
+        exported = {table.name for table in TABLES}
+        not_exported = {
+            "compiled_scripts",
+            "showsession",
+            "showinterval",
+            "session_tag_associations",
+        }
+        for table in db.metadata.tables.values():
+            # User permissions on the show are not part of it
+            if table.name.startswith("rbac_"):
+                continue
+            if any(
+                _references(column) in exported and column.name != "id"
+                for column in table.columns
+            ):
+                self.assertTrue(
+                    table.name in exported or table.name in not_exported,
+                    table.name,
+                )
@@ -0,0 +1,89 @@
+"""Unit tests for delete hook dispatch in DigiSQLAlchemy."""
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from utils.database import DigiSQLAlchemy
+
+
+def make_db():
+    """Helper function for a database with two unrelated models."""
+    db = DigiSQLAlchemy()
+
+    class Parent(db.Model):
+        __tablename__ = "parent"
+        id: Mapped[int] = mapped_column(primary_key=True)
+
+    class Other(db.Model):
+        __tablename__ = "other"
+        id: Mapped[int] = mapped_column(primary_key=True)
+
+    db.configure(url="sqlite://")
+    db.create_all()
+    return db, Parent, Other
+
+
+class TestDeleteHookDispatch:
+    """Test that delete hooks are only called for the models they target."""
+
+    def test_hooks_by_target(self):
+        db, parent, other = make_db()
+
+        def every_model(*_args):
+            pass
+
+        def by_class(*_args):
+            pass
+
+        def by_table(*_args):
+            pass
+
+        db.register_delete_hook(every_model)
+        db.register_delete_hook(by_class, parent)
+        db.register_delete_hook(by_table, "other")
+
+        assert db.get_delete_hooks(parent) == (every_model, by_class)
+        assert db.get_delete_hooks(other) == (every_model, by_table)
+
+    def test_dispatch_table_updated_on_registration(self):
+        db, parent, _other = make_db()
+
+        def hook(*_args):
+            pass
+
+        assert db.get_delete_hooks(parent) == ()
+        assert db.get_delete_hooks(parent) is db.get_delete_hooks(parent)
+        db.register_delete_hook(hook, parent)
+        db.register_delete_hook(hook, parent)
+        assert db.get_delete_hooks(parent) == (hook,)
+        db.unregister_delete_hook(hook)
+        assert db.get_delete_hooks(parent) == ()
+
+    def test_session_delete_calls_targeted_hooks(self):
+        db, parent, other = make_db()
+        deleted = []
+        db.register_delete_hook(lambda _session, obj: deleted.append(obj), parent)
+
+        with db.sessionmaker() as session:
+            parent_obj = parent(id=1)
+            other_obj = other(id=1)
+            session.add_all([parent_obj, other_obj])
+            session.flush()
+            session.delete(other_obj)
+            session.delete(parent_obj)
+
+        assert deleted == [parent_obj]
+
+    def test_bulk_hooks_called_once_per_model(self):
+        db, parent, other = make_db()
+        calls = []
+        db.register_bulk_delete_hook(
+            lambda _session, model, primary_keys: calls.append((model, primary_keys)),
+            "parent",
+        )
+
+        with db.sessionmaker() as session:
+            db.run_bulk_delete_hooks(session, parent, [(1,), (2,)])
+            db.run_bulk_delete_hooks(session, parent, [])
+            db.run_bulk_delete_hooks(session, other, [(1,)])
+
+        assert calls == [(parent, [(1,), (2,)])]
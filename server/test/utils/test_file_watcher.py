@@ -0,0 +1,125 @@
+import asyncio
+import os
+import sys
+import tempfile
+from unittest import mock
+
+import pytest
+from tornado.testing import AsyncTestCase, gen_test
+
+from utils import file_watcher
+from utils.file_watcher import IOLoopInotifyWatcher
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux only"
+)
+class TestIOLoopInotifyWatcher(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "settings.json")
+        self._write("{}")
+        self.changes = 0
+        self.watcher = IOLoopInotifyWatcher(self.path, self._changed, 50)
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.temp_dir.cleanup()
+        super().tearDown()
+
+    def _changed(self):
+        self.changes += 1
+
+    def _write(self, contents):
+        with open(self.path, "w", encoding="UTF-8") as file_pointer:
+            file_pointer.write(contents)
+
+    async def _wait(self):
+        for _ in range(20):
+            await asyncio.sleep(0.02)
+            if self.changes:
+                return
+
+    @gen_test
+    async def test_change_detected(self):
+        self.watcher.watch()
+        self.assertFalse(self.watcher.polling)
+        # Make sure the modification time moves on
+        os.utime(self.path, ns=(0, 0))
+        self.watcher.update_m_time()
+        self._write('{"a": 1}')
+        await self._wait()
+        self.assertEqual(1, self.changes)
+
+    @gen_test
+    async def test_own_write_ignored(self):
+        self.watcher.watch()
+        self.watcher.pause()
+        self._write('{"a": 1}')
+        self.watcher.update_m_time()
+        self.watcher.resume()
+        await asyncio.sleep(0.1)
+        self.assertEqual(0, self.changes)
+
+    @gen_test
+    async def test_stopped_watcher_not_called(self):
+        self.watcher.watch()
+        self.watcher.stop()
+        os.utime(self.path, ns=(0, 0))
+        self.watcher.update_m_time()
+        self._write('{"a": 1}')
+        await asyncio.sleep(0.1)
+        self.assertEqual(0, self.changes)
+
+    @gen_test
+    async def test_deleted_file_recreated(self):
+        def recreate():
+            self._write("{}")
+            self.watcher.update_m_time()
+
+        self.watcher.add_error_callback(recreate)
+        self.watcher.watch()
+        os.remove(self.path)
+        await asyncio.sleep(0.1)
+        self.assertTrue(os.path.isfile(self.path))
+        self.assertFalse(self.watcher.polling)
+
+    @gen_test
+    async def test_deleted_directory(self):
+        self.watcher.add_error_callback(lambda: None)
+        self.watcher.watch()
+        self.temp_dir.cleanup()
+        # Must not raise when the file cannot be recreated
+        self.watcher._check_file()
+        self.assertEqual(0, self.changes)
+
+    @gen_test
+    async def test_watch_removed_with_last_watcher(self):
+        other = IOLoopInotifyWatcher(self.path, self._changed, 50)
+        self.watcher.watch()
+        other.watch()
+        inotify = file_watcher._Inotify.get()
+        wd, _name = self.watcher._watch_key
+        self.assertEqual(2, inotify._watch_counts[wd])
+
+        with mock.patch.object(
+            inotify._libc, "inotify_rm_watch", wraps=inotify._libc.inotify_rm_watch
+        ) as rm_watch:
+            other.stop()
+            rm_watch.assert_not_called()
+            self.watcher.stop()
+            rm_watch.assert_called_once_with(inotify.fd, wd)
+        self.assertNotIn(wd, inotify._watch_counts)
+        self.assertNotIn(self.watcher._watch_key, inotify._watchers)
+
+    @gen_test
+    async def test_falls_back_to_polling(self):
+        with mock.patch.object(file_watcher._Inotify, "get", return_value=None):
+            self.watcher.watch()
+        self.assertTrue(self.watcher.polling)
+        os.utime(self.path, ns=(0, 0))
+        self.watcher.update_m_time()
+        self._write('{"a": 1}')
+        await self._wait()
+        self.assertEqual(1, self.changes)
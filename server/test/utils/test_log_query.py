@@ -0,0 +1,95 @@
+"""Unit tests for querying the in-memory log buffers."""
+
+import logging
+
+from utils.log_buffer import LogBufferHandler
+from utils.log_query import LogQuery, run_query
+
+
+def make_buffer(levels, maxlen=100):
+    """Helper function for a buffer with one entry per level, created a second apart."""
+    buffer = LogBufferHandler(maxlen=maxlen)
+    for index, level in enumerate(levels):
+        record = logging.LogRecord(
+            name="test",
+            level=level,
+            pathname="test_file.py",
+            lineno=1,
+            msg=f"Message {index}",
+            args=(),
+            exc_info=None,
+        )
+        record.created = 1000.0 + index
+        buffer.emit(record)
+    return buffer
+
+
+def messages(page):
+    return [entry["message"] for entry in page.entries]
+
+
+class TestRunQuery:
+    """Tests for filtering and paging buffered entries."""
+
+    def test_level_index_merges_levels_in_order(self):
+        buffer = make_buffer(
+            [logging.INFO, logging.ERROR, logging.DEBUG, logging.WARNING]
+        )
+        page = run_query(buffer, LogQuery(min_level_no=logging.WARNING), limit=10)
+        assert messages(page) == ["Message 1", "Message 3"]
+        assert page.total == 2
+
+        page = run_query(
+            buffer,
+            LogQuery(min_level_no=logging.INFO),
+            limit=10,
+            newest_first=True,
+        )
+        assert messages(page) == ["Message 3", "Message 1", "Message 0"]
+
+    def test_level_index_follows_eviction_and_resize(self):
+        buffer = make_buffer([logging.ERROR, logging.INFO, logging.ERROR], maxlen=2)
+        query = LogQuery(min_level_no=logging.ERROR)
+        assert messages(run_query(buffer, query, limit=10)) == ["Message 2"]
+
+        buffer.resize(1)
+        assert buffer.count_entries(logging.INFO) == 1
+        assert messages(run_query(buffer, query, limit=10)) == ["Message 2"]
+
+    def test_cursor_pages(self):
+        buffer = make_buffer([logging.INFO] * 5)
+        first = run_query(buffer, LogQuery(), limit=2)
+        assert messages(first) == ["Message 0", "Message 1"]
+        assert first.total == 5
+
+        second = run_query(buffer, LogQuery(), limit=2, after=first.next_cursor)
+        assert messages(second) == ["Message 2", "Message 3"]
+        assert second.total is None
+
+        last = run_query(buffer, LogQuery(), limit=2, after=second.next_cursor)
+        assert messages(last) == ["Message 4"]
+        assert last.next_cursor is None
+
+    def test_search_is_case_insensitive(self):
+        buffer = make_buffer([logging.INFO] * 3)
+        page = run_query(buffer, LogQuery(search="message 1"), limit=10)
+        assert messages(page) == ["Message 1"]
+        assert page.total == 1
+
+    def test_time_range(self):
+        buffer = make_buffer([logging.INFO] * 5)
+        query = LogQuery(since=1001.0, until=1003.0)
+        assert messages(run_query(buffer, query, limit=10)) == [
+            "Message 1",
+            "Message 2",
+            "Message 3",
+        ]
+        page = run_query(buffer, query, limit=2, newest_first=True)
+        assert messages(page) == ["Message 3", "Message 2"]
+        assert page.total == 3
+
+    def test_offset_counted_in_total(self):
+        buffer = make_buffer([logging.INFO] * 3)
+        page = run_query(buffer, LogQuery(search="message"), limit=10, offset=5)
+        assert page.entries == []
+        assert page.total == 3
@@ -0,0 +1,19 @@
+import os
+
+from utils.pkg_utils import find_end_modules, find_packages
+
+
+SERVER_DIRECTORY = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+class TestPkgUtils:
+    def test_find_packages(self):
+        packages = find_packages(SERVER_DIRECTORY)
+        assert "controllers.api.v1.show.script" in packages
+        # Directories without an __init__.py are not packages
+        assert "alembic_config.versions" not in packages
+
+    def test_find_end_modules(self):
+        modules = find_end_modules(SERVER_DIRECTORY, prefix="controllers")
+        assert "controllers.api.v1.show.script.revisions" in modules
+        assert "controllers.api.v1.show" not in modules
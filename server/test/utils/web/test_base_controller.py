@@ -0,0 +1,82 @@
+"""Tests for request body logging in BaseAPIController."""
+
+import logging
+from unittest.mock import patch
+
+from tornado import escape
+
+from digi_server.logger import get_logger
+from test.conftest import DigiScriptTestCase
+from utils.web.base_controller import BaseAPIController
+
+
+class TestRequestBodyLogging(DigiScriptTestCase):
+    """Tests that request bodies are only decoded and logged when they will be seen."""
+
+    def setUp(self):
+        super().setUp()
+        self.logger = get_logger()
+        self.addCleanup(self.logger.setLevel, self.logger.level)
+        self.logger.setLevel(logging.DEBUG)
+
+    def _set_setting(self, key, value):
+        setting = self._app.digi_settings.settings[key]
+        self.addCleanup(setting.set_value, setting.get_value(), False)
+        setting.set_value(value, False)
+
+    def _login(self, password="secret"):
+        return self.fetch(
+            "/api/v1/auth/login",
+            method="POST",
+            body=escape.json_encode({"username": "nobody", "password": password}),
+            raise_error=False,
+        )
+
+    def _body_logs(self, logs):
+        return [
+            record.getMessage()
+            for record in logs.records
+            if record.getMessage().startswith("POST /api/v1/auth/login")
+        ]
+
+    def test_body_logged_and_redacted(self):
+        self._set_setting("log_redaction", True)
+        with self.assertLogs(self.logger, logging.DEBUG) as logs:
+            self._login()
+        messages = self._body_logs(logs)
+        self.assertEqual(1, len(messages))
+        self.assertIn("'username': 'nobody'", messages[0])
+        self.assertIn("<-- REDACTED -->", messages[0])
+        self.assertNotIn("secret", messages[0])
+
+    def test_body_not_decoded_when_level_disabled(self):
+        self.logger.setLevel(logging.INFO)
+        with patch.object(BaseAPIController, "_log_request_body") as log_body:
+            self._login()
+        log_body.assert_not_called()
+
+    def test_body_not_decoded_when_not_sampled(self):
+        self._set_setting("log_body_sample_percent", 0)
+        with patch.object(BaseAPIController, "_log_request_body") as log_body:
+            self._login()
+        log_body.assert_not_called()
+
+    def test_large_body_logs_size_only(self):
+        self._set_setting("log_body_max_bytes", 10)
+        with self.assertLogs(self.logger, logging.DEBUG) as logs:
+            self._login()
+        messages = self._body_logs(logs)
+        self.assertEqual(1, len(messages))
+        self.assertIn("byte body not logged>", messages[0])
+        self.assertNotIn("nobody", messages[0])
+
+    def test_access_log_records_sizes_and_time(self):
+        with self.assertLogs("tornado.access", logging.INFO) as logs:
+            response = self._login()
+        record = logs.records[-1]
+        self.assertEqual(
+            len(escape.json_encode({"username": "nobody", "password": "secret"})),
+            record.request_bytes,
+        )
+        self.assertEqual(len(response.body), record.response_bytes)
+        self.assertGreater(record.request_time_ms, 0)
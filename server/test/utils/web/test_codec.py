@@ -0,0 +1,121 @@
+"""Unit tests for encoding responses and messages."""
+
+import json
+
+import msgpack
+import pytest
+from tornado import escape
+
+from test.conftest import DigiScriptTestCase
+from utils.web.codec import (
+    JSON,
+    MESSAGE_PACK,
+    JSONCodec,
+    codec_for_accept,
+    codec_for_subprotocols,
+    orjson,
+    quality_values,
+)
+
+
+class TestQualityValues:
+    """Tests for parsing Accept and Accept-Encoding headers."""
+
+    def test_quality_values(self):
+        assert quality_values("gzip, deflate;q=0.5, br;q=0") == {
+            "gzip": 1.0,
+            "deflate": 0.5,
+            "br": 0.0,
+        }
+
+    def test_invalid_quality(self):
+        assert quality_values("gzip;q=high") == {"gzip": 0.0}
+
+    def test_empty(self):
+        assert quality_values("") == {}
+
+
+class TestJSONCodec:
+    """Tests for the JSON codec, with and without orjson."""
+
+    @pytest.fixture(
+        params=[
+            False,
+            pytest.param(
+                True,
+                marks=pytest.mark.skipif(orjson is None, reason="orjson not installed"),
+            ),
+        ]
+    )
+    def codec(self, request):
+        return JSONCodec(use_orjson=request.param)
+
+    def test_round_trip(self, codec):
+        data = {"lines": [{"id": 1, "text": "Ça va?", "cut": None, "ok": True}]}
+        assert codec.loads(codec.dumps(data)) == data
+
+    def test_integer_keys(self, codec):
+        # Compiled scripts are keyed by page number
+        assert codec.loads(codec.dumps({1: [], 2: []})) == {"1": [], "2": []}
+
+    def test_matches_tornado(self, codec):
+        data = {"html": "</script>", "values": [1, 2.5, "a"]}
+        assert json.loads(codec.dumps(data)) == json.loads(escape.json_encode(data))
+        assert b"</" not in codec.dumps(data)
+
+
+class TestNegotiation:
+    """Tests for choosing a codec from the Accept header and subprotocols."""
+
+    @pytest.mark.parametrize(
+        "accept, expected",
+        [
+            (None, JSON),
+            ("", JSON),
+            ("application/json, text/plain, */*", JSON),
+            ("application/msgpack", MESSAGE_PACK),
+            ("application/x-msgpack, application/json;q=0.9", MESSAGE_PACK),
+            ("application/json, application/msgpack;q=0.5", JSON),
+            ("application/msgpack;q=0", JSON),
+        ],
+    )
+    def test_accept(self, accept, expected):
+        assert codec_for_accept(accept) is expected
+
+    def test_subprotocols(self):
+        assert codec_for_subprotocols(["other", "digiscript.msgpack"]) == (
+            "digiscript.msgpack",
+            MESSAGE_PACK,
+        )
+        assert codec_for_subprotocols(["digiscript.json"]) == ("digiscript.json", JSON)
+        assert codec_for_subprotocols(["other"]) == (None, JSON)
+
+
+class TestResponseCodec(DigiScriptTestCase):
+    """Tests for API responses in the negotiated format."""
+
+    def test_json_by_default(self):
+        response = self.fetch("/api/v1/debug")
+        self.assertEqual(200, response.code)
+        self.assertEqual(
+            "application/json; charset=UTF-8", response.headers["Content-Type"]
+        )
+        self.assertEqual("Accept", response.headers["Vary"])
+        self.assertEqual("OK", escape.json_decode(response.body)["status"])
+
+    def test_message_pack(self):
+        response = self.fetch(
+            "/api/v1/debug", headers={"Accept": "application/msgpack"}
+        )
+        self.assertEqual(200, response.code)
+        self.assertEqual("application/msgpack", response.headers["Content-Type"])
+        self.assertEqual("OK", msgpack.unpackb(response.body)["status"])
+
+    def test_errors_negotiated(self):
+        response = self.fetch(
+            "/api/v1/not_a_route", headers={"Accept": "application/msgpack"}
+        )
+        self.assertEqual(404, response.code)
+        self.assertEqual(
+            {"message": "404 not found"}, MESSAGE_PACK.loads(response.body)
+        )
@@ -0,0 +1,90 @@
+"""Unit tests for the per-request query profiler."""
+
+from collections import Counter
+from types import SimpleNamespace
+
+from digi_server.metrics import QueryStats
+from utils.web.query_profiler import REPEAT_THRESHOLD, QueryProfiler, fingerprint
+
+
+def make_handler(statements, method="GET", seconds=0.01, status=200):
+    """Helper function for a finished handler which executed the given statements."""
+    return SimpleNamespace(
+        query_stats=QueryStats(
+            count=sum(statements.values()),
+            seconds=seconds,
+            statements=Counter(statements),
+        ),
+        request=SimpleNamespace(method=method, path="/api/v1/test"),
+        get_status=lambda: status,
+    )
+
+
+class TestFingerprint:
+    """Tests for normalising SQL statements."""
+
+    def test_whitespace_collapsed(self):
+        assert fingerprint("SELECT *\n  FROM  cue\n") == "SELECT * FROM cue"
+
+    def test_in_lists_and_literals_normalised(self):
+        assert fingerprint(
+            "SELECT * FROM cue WHERE id IN (?, ?, ?) LIMIT 10"
+        ) == fingerprint("SELECT * FROM cue WHERE id IN (?,?) LIMIT 20")
+
+
+class TestQueryProfiler:
+    """Tests for recording and reporting request profiles."""
+
+    def test_disabled_records_nothing(self):
+        profiler = QueryProfiler(enabled=False)
+        assert profiler.record(make_handler({"SELECT 1": 1})) is None
+        assert profiler.recorded == 0
+        assert profiler.report() == []
+
+    def test_repeated_statements_counted_by_fingerprint(self):
+        profiler = QueryProfiler(enabled=True)
+        profile = profiler.record(
+            make_handler(
+                {
+                    "SELECT * FROM cue WHERE id = ?": 3,
+                    "SELECT * FROM cue  WHERE id = ?": 2,
+                    "SELECT * FROM show": 1,
+                }
+            )
+        )
+        assert profile.queries == 6
+        assert profile.repeated == [("SELECT * FROM cue WHERE id = ?", 5)]
+
+    def test_report_sorted_worst_first(self):
+        profiler = QueryProfiler(enabled=True)
+        n_plus_one = {"SELECT * FROM line WHERE id = ?": REPEAT_THRESHOLD * 2}
+        profiler.record(make_handler({"SELECT 1": 1}, method="POST"))
+        profiler.record(make_handler(n_plus_one))
+        profiler.record(make_handler({"SELECT * FROM line": 1}))
+
+        report = profiler.report()
+        assert [summary["endpoint"] for summary in report] == [
+            "SimpleNamespace.GET",
+            "SimpleNamespace.POST",
+        ]
+        assert report[0]["requests"] == 2
+        assert report[0]["max_queries"] == REPEAT_THRESHOLD * 2
+        assert report[0]["avg_queries"] == (REPEAT_THRESHOLD * 2 + 1) / 2
+        assert report[0]["repeated"] == [
+            {
+                "statement": "SELECT * FROM line WHERE id = ?",
+                "max_count": REPEAT_THRESHOLD * 2,
+            }
+        ]
+        assert report[1]["repeated"] == []
+
+    def test_profiles_since_limited_to_history(self):
+        profiler = QueryProfiler(enabled=True, history_size=2)
+        for _ in range(3):
+            profiler.record(make_handler({"SELECT 1": 1}))
+        assert len(profiler.profiles_since(2)) == 1
+        assert len(profiler.profiles_since(0)) == 2
+
+        profiler.clear()
+        assert profiler.report() == []
+        assert profiler.profiles_since(2) == []
@@ -0,0 +1,220 @@
+"""Unit tests for serving static files from memory."""
+
+import asyncio
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from tornado.testing import AsyncHTTPTestCase, gen_test
+from tornado.web import Application
+
+from test.conftest import DigiScriptTestCase
+from utils.web import static_assets
+from utils.web.static_assets import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    StaticAssetCache,
+    StaticAssetHandler,
+)
+
+
+SCRIPT = b"console.log('DigiScript');\n" * 200
+
+
+def write_file(directory, name, body):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as file:
+        file.write(body)
+    return path
+
+
+class TestStaticAssetCache(AsyncHTTPTestCase):
+    """Tests for reading and compressing files into the cache."""
+
+    def get_app(self):
+        return Application()
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.cache = StaticAssetCache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    @gen_test
+    async def test_compressed_copies(self):
+        path = write_file(self.directory, "index-Ab3dE_9z.js", SCRIPT)
+        asset = await self.cache.load(path)
+        self.assertEqual(SCRIPT, asset.body)
+        self.assertEqual("text/javascript", asset.content_type)
+        self.assertEqual(SCRIPT, gzip.decompress(asset.encoded["gzip"]))
+        if static_assets.brotli is not None:
+            self.assertEqual(
+                SCRIPT, static_assets.brotli.decompress(asset.encoded["br"])
+            )
+            self.assertEqual(("br", asset.encoded["br"]), asset.negotiate("gzip, br"))
+        self.assertEqual(("gzip", asset.encoded["gzip"]), asset.negotiate("gzip"))
+        self.assertEqual((None, SCRIPT), asset.negotiate("gzip;q=0, br;q=0"))
+        self.assertEqual((None, SCRIPT), asset.negotiate(""))
+
+    @gen_test
+    async def test_small_and_binary_files_not_compressed(self):
+        small = await self.cache.load(write_file(self.directory, "a.css", b"a{}"))
+        image = await self.cache.load(
+            write_file(self.directory, "a.png", os.urandom(4096))
+        )
+        self.assertEqual({}, small.encoded)
+        self.assertEqual({}, image.encoded)
+
+    @gen_test
+    async def test_reloaded_when_changed(self):
+        path = write_file(self.directory, "index.html", b"old")
+        first = await self.cache.load(path)
+        self.assertIs(first, await self.cache.load(path))
+        write_file(self.directory, "index.html", b"newer")
+        second = await self.cache.load(path)
+        self.assertEqual(b"newer", second.body)
+        self.assertNotEqual(first.etag(), second.etag())
+
+    @gen_test
+    async def test_missing_and_large_files(self):
+        cache = StaticAssetCache(max_file_size=10)
+        path = write_file(self.directory, "large.js", SCRIPT)
+        self.assertIsNone(await cache.load(path))
+        self.assertIsNone(await cache.load(os.path.join(self.directory, "missing")))
+        self.assertIsNone(await cache.load(self.directory))
+
+    @gen_test
+    async def test_concurrent_loads_read_once(self):
+        path = write_file(self.directory, "index.html", b"index")
+        with mock.patch.object(
+            static_assets, "load_asset", wraps=static_assets.load_asset
+        ) as load_asset:
+            loads = [self.cache.load(path) for _ in range(5)]
+            results = await asyncio.gather(*loads)
+        self.assertEqual(1, load_asset.call_count)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    @gen_test
+    async def test_preload(self):
+        os.mkdir(os.path.join(self.directory, "fonts"))
+        write_file(self.directory, "index.html", b"index")
+        write_file(os.path.join(self.directory, "fonts"), "a.woff2", b"font")
+        self.assertEqual(2, await self.cache.preload(self.directory))
+        self.assertEqual(
+            1, await self.cache.preload(os.path.join(self.directory, "index.html"))
+        )
+        self.assertEqual(0, await self.cache.preload(os.path.join(self.directory, "x")))
+
+
+class TestStaticAssetHandler(AsyncHTTPTestCase):
+    """Tests for serving cached files over HTTP."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        write_file(self.directory, "index-Ab3dE_9z.js", SCRIPT)
+        write_file(self.directory, "logo.svg", b"<svg/>")
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.directory)
+
+    def get_app(self):
+        app = Application(
+            [
+                (
+                    r"/assets/(.*)",
+                    StaticAssetHandler,
+                    {"path": self.directory, "hashed": True},
+                )
+            ]
+        )
+        app.static_assets = StaticAssetCache()
+        return app
+
+    def _fetch(self, path, **headers):
+        return self.fetch(path, headers=headers, decompress_response=False)
+
+    def test_encoded_and_immutable(self):
+        response = self._fetch(
+            "/assets/index-Ab3dE_9z.js", **{"Accept-Encoding": "gzip"}
+        )
+        self.assertEqual(200, response.code)
+        self.assertEqual("gzip", response.headers["Content-Encoding"])
+        self.assertEqual("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(IMMUTABLE_CACHE_CONTROL, response.headers["Cache-Control"])
+        self.assertEqual(SCRIPT, gzip.decompress(response.body))
+        self.assertTrue(response.headers["Etag"].endswith('-gzip"'))
+
+    def test_identity(self):
+        response = self._fetch("/assets/index-Ab3dE_9z.js", **{"Accept-Encoding": ""})
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(SCRIPT, response.body)
+        self.assertEqual(str(len(SCRIPT)), response.headers["Content-Length"])
+
+    def test_unhashed_file_revalidated(self):
+        response = self._fetch("/assets/logo.svg")
+        self.assertEqual(b"<svg/>", response.body)
+        self.assertEqual("image/svg+xml", response.headers["Content-Type"])
+        self.assertEqual(REVALIDATE_CACHE_CONTROL, response.headers["Cache-Control"])
+        self.assertNotIn("Vary", response.headers)
+
+    def test_not_modified(self):
+        etag = self._fetch("/assets/logo.svg").headers["Etag"]
+        response = self._fetch("/assets/logo.svg", **{"If-None-Match": etag})
+        self.assertEqual(304, response.code)
+        self.assertEqual(b"", response.body)
+        modified = self._fetch("/assets/logo.svg").headers["Last-Modified"]
+        response = self._fetch("/assets/logo.svg", **{"If-Modified-Since": modified})
+        self.assertEqual(304, response.code)
+
+    def test_head(self):
+        response = self.fetch("/assets/logo.svg", method="HEAD")
+        self.assertEqual(200, response.code)
+        self.assertEqual("6", response.headers["Content-Length"])
+
+    def test_range_served_from_disk(self):
+        response = self._fetch("/assets/logo.svg", Range="bytes=0-3")
+        self.assertEqual(206, response.code)
+        self.assertEqual(b"<svg", response.body)
+        self.assertEqual(REVALIDATE_CACHE_CONTROL, response.headers["Cache-Control"])
+
+    def test_missing_and_outside_root(self):
+        self.assertEqual(404, self._fetch("/assets/missing.js").code)
+        self.assertEqual(403, self._fetch("/assets/..%2F..%2Fetc%2Fpasswd").code)
+
+
+class TestIndexControllers(DigiScriptTestCase):
+    """Tests for serving the UI's index.html from the cache."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.index = write_file(self.directory, "index.html", b"<html>v3</html>")
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.directory)
+
+    def test_index_cached(self):
+        with mock.patch("controllers.controllers.index_path", return_value=self.index):
+            response = self.fetch("/show/1?_switch=1")
+            etag = response.headers["Etag"]
+            cached = self.fetch("/show/2?_switch=1", headers={"If-None-Match": etag})
+        self.assertEqual(200, response.code)
+        self.assertEqual(b"<html>v3</html>", response.body)
+        self.assertEqual(REVALIDATE_CACHE_CONTROL, response.headers["Cache-Control"])
+        self.assertEqual(304, cached.code)
+
+    def test_index_missing(self):
+        with mock.patch(
+            "controllers.controllers.index_path",
+            return_value=os.path.join(self.directory, "missing.html"),
+        ):
+            self.assertEqual(404, self.fetch("/show/1?_switch=1").code)
+            self.assertEqual(404, self.fetch("/ui-old/").code)
@@ -1,8 +1,8 @@
 import functools
 from contextlib import asynccontextmanager, contextmanager
-from typing import Callable, List
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
-from sqlalchemy import MetaData, create_engine, event
+from sqlalchemy import MetaData, create_engine, event, inspect
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 from tornado.ioloop import IOLoop
 
@@ -14,6 +14,37 @@ class DeleteMixin:
     def post_delete(self, session: "DigiDBSession"):
         raise NotImplementedError
 
+    @classmethod
+    def pre_bulk_delete(cls, session: "DigiDBSession", primary_keys: List[tuple]):
+        """
+        Called once before rows of this model are deleted with a set-based DELETE.
+
+        Bulk deletion removes whole object graphs, so implementations only need to
+        clean up data outside of the graph being deleted.
+
+        :param session: Session the rows are being deleted in
+        :param primary_keys: Primary keys of the rows being deleted
+        """
+        raise NotImplementedError
+
+
+# What a delete hook is registered for: a mapped class, a table name, or None for
+# every model
+HookTarget = Optional[Union[type, str]]
+
+
+def _resolve_hooks(
+    registrations: List[Tuple[Callable, HookTarget]], model: type
+) -> Tuple[Callable, ...]:
+    table_name = inspect(model).persist_selectable.fullname
+    return tuple(
+        hook
+        for hook, target in registrations
+        if target is None
+        or target == table_name
+        or (isinstance(target, type) and issubclass(model, target))
+    )
+
 
 class DigiDBSession(Session):
     """Custom session class with delete hook support."""
@@ -24,8 +55,8 @@ class DigiDBSession(Session):
 
     def _delete_impl(self, state, obj, head):
         """Override delete to call hooks before and after deletion."""
-        # Call registered delete hooks
-        for hook in self.db.delete_hooks:
+        # Call delete hooks registered for this model
+        for hook in self.db.get_delete_hooks(type(obj)):
             hook(self, obj)
 
         # Call DeleteMixin methods if object implements them
@@ -43,7 +74,11 @@ class DigiSQLAlchemy:
     def __init__(self, url=None, binds=None, session_options=None, engine_options=None):
         self._engine = None
         self._sessionmaker = None
-        self._delete_hooks: List[Callable] = []
+        # Registered (hook, target) pairs, and the hooks resolved for each model
+        self._delete_hooks: List[Tuple[Callable, HookTarget]] = []
+        self._bulk_delete_hooks: List[Tuple[Callable, HookTarget]] = []
+        self._delete_hook_dispatch: Dict[type, Tuple[Callable, ...]] = {}
+        self._bulk_delete_hook_dispatch: Dict[type, Tuple[Callable, ...]] = {}
         self.Model = None
 
         # Create declarative base
@@ -157,15 +192,69 @@ class DigiSQLAlchemy:
 
         return Base
 
-    @property
-    def delete_hooks(self):
-        """Get list of registered delete hooks."""
-        return self._delete_hooks
-
-    def register_delete_hook(self, hook: Callable):
-        """Register a delete hook to be called when objects are deleted."""
-        if hook not in self._delete_hooks:
-            self._delete_hooks.append(hook)
+    def register_delete_hook(self, hook: Callable, target: HookTarget = None):
+        """Register a delete hook to be called when objects are deleted.
+
+        Hooks are called as ``hook(session, obj)`` before the object is deleted.
+
+        :param hook: Hook to call
+        :param target: Mapped class or table name to call the hook for, or None to
+                       call it for every model
+        """
+        if (hook, target) not in self._delete_hooks:
+            self._delete_hooks.append((hook, target))
+            self._delete_hook_dispatch.clear()
+
+    def unregister_delete_hook(self, hook: Callable):
+        """Remove a delete hook from every target it was registered for."""
+        self._delete_hooks = [entry for entry in self._delete_hooks if entry[0] != hook]
+        self._delete_hook_dispatch.clear()
+
+    def get_delete_hooks(self, model: type) -> Tuple[Callable, ...]:
+        """Get the delete hooks to call for objects of a mapped class."""
+        hooks = self._delete_hook_dispatch.get(model)
+        if hooks is None:
+            hooks = _resolve_hooks(self._delete_hooks, model)
+            self._delete_hook_dispatch[model] = hooks
+        return hooks
+
+    def register_bulk_delete_hook(self, hook: Callable, target: HookTarget = None):
+        """Register a hook to be called once per model when rows are deleted in bulk.
+
+        Hooks are called as ``hook(session, model, primary_keys)`` before the rows
+        are deleted, with the primary key tuples of every row being deleted.
+
+        :param hook: Hook to call
+        :param target: Mapped class or table name to call the hook for, or None to
+                       call it for every model
+        """
+        if (hook, target) not in self._bulk_delete_hooks:
+            self._bulk_delete_hooks.append((hook, target))
+            self._bulk_delete_hook_dispatch.clear()
+
+    def unregister_bulk_delete_hook(self, hook: Callable):
+        """Remove a bulk delete hook from every target it was registered for."""
+        self._bulk_delete_hooks = [
+            entry for entry in self._bulk_delete_hooks if entry[0] != hook
+        ]
+        self._bulk_delete_hook_dispatch.clear()
+
+    def get_bulk_delete_hooks(self, model: type) -> Tuple[Callable, ...]:
+        """Get the bulk delete hooks to call for rows of a mapped class."""
+        hooks = self._bulk_delete_hook_dispatch.get(model)
+        if hooks is None:
+            hooks = _resolve_hooks(self._bulk_delete_hooks, model)
+            self._bulk_delete_hook_dispatch[model] = hooks
+        return hooks
+
+    def run_bulk_delete_hooks(self, session, model, primary_keys: List[tuple]):
+        """Run the delete hooks for rows of a model about to be deleted in bulk."""
+        if not primary_keys:
+            return
+        for hook in self.get_bulk_delete_hooks(model):
+            hook(session, model, primary_keys)
+        if issubclass(model, DeleteMixin):
+            model.pre_bulk_delete(session, primary_keys)
 
     @property
     def metadata(self):
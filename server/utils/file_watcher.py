@@ -1,4 +1,11 @@
+import ctypes
+import ctypes.util
+import functools
 import os.path
+import struct
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 from tornado.ioloop import IOLoop, PeriodicCallback
 
@@ -50,6 +57,8 @@ class IOLoopFileWatcher(FileWatcher):
             )
             self.stop()
             self._error_callback()
+            if not os.path.isfile(self._file_path):
+                return
 
         current_file_time = os.path.getmtime(self._file_path)
         if current_file_time > self._last_fs_time and not self._paused:
@@ -67,3 +76,190 @@ class IOLoopFileWatcher(FileWatcher):
 
     def stop(self):
         self._task.stop()
+
+
+# From <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_IN_EVENT = struct.Struct("iIII")
+
+
+@functools.cache
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+    except OSError:
+        # Not glibc, so look the C library up, which runs external programs
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        except OSError:
+            return None
+    if not hasattr(libc, "inotify_init1") or not hasattr(libc, "inotify_add_watch"):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return libc
+
+
+class _Inotify:
+    """
+    The inotify instance shared by every watcher in the process.
+
+    Closing an inotify instance waits for the kernel to finish with it, which takes
+    tens of milliseconds, so one instance is kept open. Each watcher adds a
+    duplicate of its file descriptor to the handlers of its IOLoop, and events are
+    passed to the watchers of the file they are for. A directory is watched until
+    the last watcher of a file in it stops.
+    """
+
+    _instance = None
+
+    def __init__(self, libc, fd: int):
+        self._libc = libc
+        self.fd = fd
+        self._watchers: Dict[Tuple[int, bytes], List["IOLoopInotifyWatcher"]] = (
+            defaultdict(list)
+        )
+        # Number of watchers using each watch descriptor
+        self._watch_counts: Dict[int, int] = defaultdict(int)
+
+    @classmethod
+    def get(cls) -> Optional["_Inotify"]:
+        """
+        :return: The shared instance, or None if inotify cannot be used
+        """
+        if cls._instance is None:
+            libc = _load_inotify()
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC) if libc else -1
+            if fd < 0:
+                error = ctypes.get_errno() if libc else 0
+                get_logger().info(
+                    "Unable to use inotify "
+                    f"({os.strerror(error) if error else 'not available'})"
+                )
+                cls._instance = False
+            else:
+                cls._instance = cls(libc, fd)
+        return cls._instance or None
+
+    def add(self, watcher: "IOLoopInotifyWatcher", path: str) -> bool:
+        directory = os.path.dirname(os.path.abspath(path))
+        # Watching a directory again returns the same watch descriptor
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _IN_MASK)
+        if wd < 0:
+            return False
+        watcher._watch_key = (wd, os.fsencode(os.path.basename(path)))
+        self._watchers[watcher._watch_key].append(watcher)
+        self._watch_counts[wd] += 1
+        return True
+
+    def remove(self, watcher: "IOLoopInotifyWatcher") -> None:
+        watchers = self._watchers.get(watcher._watch_key, [])
+        if watcher not in watchers:
+            return
+        watchers.remove(watcher)
+        if not watchers:
+            del self._watchers[watcher._watch_key]
+
+        wd = watcher._watch_key[0]
+        self._watch_counts[wd] -= 1
+        if self._watch_counts[wd] <= 0:
+            del self._watch_counts[wd]
+            # Fails harmlessly if the kernel already removed the watch, as it does
+            # when the directory is deleted
+            self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, _fd, _events) -> None:
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        changed = set()
+        offset = 0
+        while offset + _IN_EVENT.size <= len(data):
+            wd, _mask, _cookie, length = _IN_EVENT.unpack_from(data, offset)
+            start = offset + _IN_EVENT.size
+            offset = start + length
+            changed.add((wd, data[start:offset].rstrip(b"\0")))
+        for key in changed:
+            for watcher in list(self._watchers.get(key, [])):
+                watcher._file_event()
+
+
+class IOLoopInotifyWatcher(IOLoopFileWatcher):
+    """
+    Watch a file with inotify, so it is checked when its directory reports a change
+    to it rather than every ``poll_interval`` milliseconds. The directory is watched
+    rather than the file, so the file being replaced or deleted is seen too. Falls
+    back to polling if inotify cannot be used.
+    """
+
+    def __init__(self, file_path, callback, poll_interval=500):
+        super().__init__(file_path, callback, poll_interval)
+        self._io_loop = IOLoop.current()
+        self._inotify: Optional[_Inotify] = None
+        self._handler_fd = None
+        self._watch_key = None
+
+    @property
+    def polling(self):
+        return self._inotify is None
+
+    def watch(self):
+        self._last_fs_time = os.path.getmtime(self._file_path)
+        if self._inotify is not None:
+            return
+        inotify = _Inotify.get()
+        if inotify is None or not inotify.add(self, self._file_path):
+            get_logger().info(f"Polling {self._file_path} for changes")
+            super().watch()
+            return
+
+        self._inotify = inotify
+        self._handler_fd = os.dup(inotify.fd)
+        self._io_loop.add_handler(self._handler_fd, inotify.read_events, IOLoop.READ)
+
+    def stop(self):
+        super().stop()
+        if self._inotify is not None:
+            self._inotify.remove(self)
+            self._inotify = None
+            self._io_loop.remove_handler(self._handler_fd)
+            os.close(self._handler_fd)
+            self._handler_fd = None
+
+    def _file_event(self):
+        if self._io_loop.asyncio_loop.is_closed():
+            # The IOLoop closed its duplicate of the file descriptor
+            self._inotify.remove(self)
+            self._inotify = None
+        elif IOLoop.current(instance=False) is self._io_loop:
+            self._check_file()
+        else:
+            self._io_loop.add_callback(self._check_file)
+
+    def _check_file(self):
+        if self._inotify is None:
+            return
+        self._poll_file()
+        # The error callback stops watching, and may have recreated the file
+        if self._inotify is None and os.path.isfile(self._file_path):
+            self.watch()
+
+
+def create_file_watcher(file_path, callback, poll_interval=500) -> IOLoopFileWatcher:
+    """
+    :return: Watcher for the file, using inotify on Linux and polling elsewhere
+    """
+    if sys.platform.startswith("linux"):
+        return IOLoopInotifyWatcher(file_path, callback, poll_interval)
+    return IOLoopFileWatcher(file_path, callback, poll_interval)
@@ -13,12 +13,54 @@ Design rationale
   oldest entry when the buffer is full.
 * ``list(deque)`` is GIL-atomic in CPython, making snapshot reads safe even
   if a background thread were to emit a record concurrently.
+* Every entry carries a ``seq`` number, increasing by one for each record
+  emitted, so a reader can ask for only the entries it has not yet seen with
+  :meth:`LogBufferHandler.get_entries_since`.  Sequence numbers restart with
+  the process, so each buffer also has a random :attr:`~LogBufferHandler.epoch`
+  identifying the sequence.
+* Entries are :class:`LogEntry` dicts which cache their JSON encoding, so an
+  entry sent to many stream subscribers is only encoded once.  They also keep
+  their lower-cased message and creation time, so queries do not recompute
+  them for every entry on every request.
+* Entries are also indexed in one deque per level, so a query for a minimum
+  level only visits entries at or above it.  See :mod:`utils.log_query`.
 """
 
+import heapq
+import itertools
+import json
 import logging
+import uuid
 from collections import deque
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Dict, Iterator, List, Optional
+
+
+class LogEntry(dict):
+    """A buffered log entry, which caches its JSON encoding.
+
+    Entries must not be modified once they have been buffered, as the cached
+    encoding would no longer match.
+
+    :ivar message_lower: The message lower-cased, for case-insensitive search.
+    :ivar created: Time the record was created, as a UNIX timestamp.
+    """
+
+    __slots__ = ("_encoded", "message_lower", "created")
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the entry within its buffer."""
+        return self["seq"]
+
+    @property
+    def encoded(self) -> str:
+        """The entry encoded as JSON, encoded on first access."""
+        try:
+            return self._encoded
+        except AttributeError:
+            self._encoded = json.dumps(self)
+            return self._encoded
 
 
 class LogBufferHandler(logging.Handler):
@@ -31,7 +73,11 @@ class LogBufferHandler(logging.Handler):
     def __init__(self, maxlen: int = 2000):
         super().__init__()
         self._buffer: deque = deque(maxlen=maxlen)
+        self._levels: Dict[int, deque] = {}
         self._subscribers: set = set()
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self.epoch: str = uuid.uuid4().hex[:8]
 
     def emit(self, record: logging.LogRecord) -> None:
         """Build a structured dict from *record* and append it to the buffer.
@@ -46,19 +92,29 @@ class LogBufferHandler(logging.Handler):
             ts = datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(
                 timespec="milliseconds"
             )
-            entry = {
-                "ts": ts,
-                "level": record.levelname,
-                "level_no": record.levelno,
-                "logger": record.name,
-                "message": record.getMessage(),
-                "filename": record.filename,
-                "lineno": record.lineno,
-                "user_id": getattr(record, "user_id", None),
-                "username": getattr(record, "username", None),
-                "remote_ip": getattr(record, "remote_ip", None),
-            }
+            seq = next(self._seq)
+            entry = LogEntry(
+                seq=seq,
+                ts=ts,
+                level=record.levelname,
+                level_no=record.levelno,
+                logger=record.name,
+                message=record.getMessage(),
+                filename=record.filename,
+                lineno=record.lineno,
+                user_id=getattr(record, "user_id", None),
+                username=getattr(record, "username", None),
+                remote_ip=getattr(record, "remote_ip", None),
+            )
+            entry.message_lower = entry["message"].lower()
+            entry.created = record.created
+            if len(self._buffer) == self._buffer.maxlen:
+                # The oldest entry is about to be evicted, and is also the oldest
+                # entry of its level
+                self._levels[self._buffer[0]["level_no"]].popleft()
             self._buffer.append(entry)
+            self._levels.setdefault(record.levelno, deque()).append(entry)
+            self._last_seq = seq
             for cb in list(self._subscribers):
                 try:
                     cb(entry)
@@ -77,6 +133,116 @@ class LogBufferHandler(logging.Handler):
         """
         return list(self._buffer)
 
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the newest entry emitted, or 0 if none have been."""
+        return self._last_seq
+
+    def get_entries_since(self, seq: int) -> List[LogEntry]:
+        """Return the buffered entries with a sequence number greater than *seq*.
+
+        Sequence numbers are contiguous within the buffer, so the first entry
+        wanted is found by its offset from the oldest entry rather than by
+        scanning.  If entries after *seq* have already been evicted, every
+        buffered entry is returned.
+
+        :param seq: Sequence number of the last entry already seen.
+        :returns: List of entry dicts ordered oldest-first.
+        """
+        snapshot = list(self._buffer)
+        if not snapshot:
+            return []
+        start = max(seq - snapshot[0]["seq"] + 1, 0)
+        return snapshot[start:]
+
+    def count_entries(self, min_level_no: Optional[int] = None) -> int:
+        """Count the buffered entries at or above a level.
+
+        :param min_level_no: Only count entries at or above this level.
+        :returns: Number of entries.
+        """
+        if min_level_no is None:
+            return len(self._buffer)
+        return sum(
+            len(entries)
+            for level_no, entries in self._levels.items()
+            if level_no >= min_level_no
+        )
+
+    def iter_entries(
+        self,
+        min_level_no: Optional[int] = None,
+        newest_first: bool = False,
+        after: Optional[int] = None,
+        before: Optional[int] = None,
+        snapshot: bool = False,
+    ) -> Iterator[LogEntry]:
+        """Iterate over buffered entries without copying the buffer.
+
+        Only the level indexes at or above *min_level_no* are visited, merged
+        by sequence number.  The iterator must be consumed without yielding to
+        other code which may log, as the buffer must not change while it is
+        iterated; pass *snapshot* to iterate over a copy instead.
+
+        :param min_level_no: Only include entries at or above this level.
+        :param newest_first: Iterate from the newest entry to the oldest.
+        :param after: Only include entries with a greater sequence number.
+        :param before: Only include entries with a smaller sequence number.
+        :param snapshot: Iterate over a copy of the buffer.
+        :returns: Iterator of entries.
+        """
+        if min_level_no is None:
+            sources = [self._buffer]
+        else:
+            sources = [
+                entries
+                for level_no, entries in self._levels.items()
+                if level_no >= min_level_no and entries
+            ]
+        if snapshot:
+            sources = [list(entries) for entries in sources]
+
+        if after is not None and before is not None and after + 1 >= before:
+            return iter(())
+
+        if min_level_no is None:
+            # Sequence numbers are contiguous in the main buffer, so the bounds
+            # can be applied by position
+            entries = sources[0]
+            if not entries:
+                return iter(())
+            first_seq = entries[0]["seq"]
+            start, stop = 0, len(entries)
+            if after is not None:
+                start = min(max(after - first_seq + 1, 0), stop)
+            if before is not None:
+                stop = min(max(before - first_seq, 0), stop)
+            if start >= stop:
+                return iter(())
+            if newest_first:
+                return itertools.islice(
+                    reversed(entries), len(entries) - stop, len(entries) - start
+                )
+            return itertools.islice(entries, start, stop)
+
+        if newest_first:
+            merged = heapq.merge(
+                *(reversed(entries) for entries in sources),
+                key=lambda entry: entry["seq"],
+                reverse=True,
+            )
+            if before is not None:
+                merged = itertools.dropwhile(lambda e: e["seq"] >= before, merged)
+            if after is not None:
+                merged = itertools.takewhile(lambda e: e["seq"] > after, merged)
+        else:
+            merged = heapq.merge(*sources, key=lambda entry: entry["seq"])
+            if after is not None:
+                merged = itertools.dropwhile(lambda e: e["seq"] <= after, merged)
+            if before is not None:
+                merged = itertools.takewhile(lambda e: e["seq"] < before, merged)
+        return merged
+
     def subscribe(self, callback) -> "callable":
         """Register *callback* to be called with each new entry dict.
 
@@ -103,7 +269,11 @@ class LogBufferHandler(logging.Handler):
         :param maxlen: New maximum number of entries.
         """
         new_buf: deque = deque(self._buffer, maxlen=maxlen)
+        levels: Dict[int, deque] = {}
+        for entry in new_buf:
+            levels.setdefault(entry["level_no"], deque()).append(entry)
         self._buffer = new_buf
+        self._levels = levels
 
 
 # Module-level singletons — one per log source.
@@ -0,0 +1,179 @@
+"""Query engine for the in-memory log buffers.
+
+Queries walk a :class:`~utils.log_buffer.LogBufferHandler` lazily through
+:meth:`~utils.log_buffer.LogBufferHandler.iter_entries`, rather than copying
+the buffer and filtering it into new lists on every request:
+
+* The minimum level filter is applied by only visiting the buffer's indexes
+  for matching levels.
+* Search and username filters compare against text lower-cased when the entry
+  was buffered.
+* Pages are selected with sequence number cursors, and iteration stops as
+  soon as the page is full.
+* Time range filters stop iterating once entries fall outside the range, as
+  entries are buffered in the order they were logged.
+
+Both the log viewer and the log stream endpoints filter entries with
+:class:`LogQuery`.
+"""
+
+import itertools
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from utils.log_buffer import LogBufferHandler, LogEntry
+
+
+@dataclass(frozen=True)
+class LogQuery:
+    """Filters for log buffer entries.
+
+    :param min_level_no: Only match entries at or above this level.
+    :param search: Lower-cased substring the message must contain.
+    :param username: Lower-cased substring the username must contain.
+    :param since: Only match entries created at or after this UNIX timestamp.
+    :param until: Only match entries created at or before this UNIX timestamp.
+    """
+
+    min_level_no: Optional[int] = None
+    search: str = ""
+    username: str = ""
+    since: Optional[float] = None
+    until: Optional[float] = None
+
+    @property
+    def filters_entries(self) -> bool:
+        """Whether the query filters on anything other than the level."""
+        return bool(
+            self.search
+            or self.username
+            or self.since is not None
+            or self.until is not None
+        )
+
+    def matches(self, entry: LogEntry) -> bool:
+        """
+        Check whether an entry passes all of the filters.
+
+        :param entry: Buffered entry to check
+        :return: True if the entry matches
+        """
+        if self.min_level_no is not None and entry["level_no"] < self.min_level_no:
+            return False
+        if self.since is not None and entry.created < self.since:
+            return False
+        if self.until is not None and entry.created > self.until:
+            return False
+        if self.search and self.search not in entry.message_lower:
+            return False
+        if self.username:
+            username = entry["username"]
+            if not username or self.username not in username.lower():
+                return False
+        return True
+
+
+@dataclass
+class LogPage:
+    """A page of entries matched by a query.
+
+    :param entries: Matching entries, in the order requested.
+    :param total: Number of entries matching the query, only counted for the
+        first page.
+    :param next_cursor: Sequence number to pass as the cursor for the next page,
+        or None if there are no more matching entries.
+    """
+
+    entries: List[LogEntry] = field(default_factory=list)
+    total: Optional[int] = None
+    next_cursor: Optional[int] = None
+
+
+def run_query(
+    buffer: LogBufferHandler,
+    query: LogQuery,
+    limit: int,
+    offset: int = 0,
+    newest_first: bool = False,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+) -> LogPage:
+    """
+    Get a page of entries matching a query.
+
+    Pages are selected with cursors: when iterating oldest first, pass the
+    previous page's ``next_cursor`` as *after*, and when iterating newest first
+    pass it as *before*.  The total number of matches is only counted when
+    neither cursor is given.
+
+    :param buffer: Buffer to query
+    :param query: Filters entries must match
+    :param limit: Most entries to return
+    :param offset: Number of matching entries to skip
+    :param newest_first: Return the newest entries first
+    :param after: Only return entries with a greater sequence number
+    :param before: Only return entries with a smaller sequence number
+    :return: The page of entries
+    """
+    try:
+        return _run_query(
+            buffer, query, limit, offset, newest_first, after, before, False
+        )
+    except RuntimeError:
+        # The buffer changed while it was iterated, from a record logged on
+        # another thread
+        return _run_query(
+            buffer, query, limit, offset, newest_first, after, before, True
+        )
+
+
+def _run_query(
+    buffer: LogBufferHandler,
+    query: LogQuery,
+    limit: int,
+    offset: int,
+    newest_first: bool,
+    after: Optional[int],
+    before: Optional[int],
+    snapshot: bool,
+) -> LogPage:
+    entries = buffer.iter_entries(
+        min_level_no=query.min_level_no,
+        newest_first=newest_first,
+        after=after,
+        before=before,
+        snapshot=snapshot,
+    )
+    count_total = after is None and before is None
+
+    if query.filters_entries:
+        if newest_first and query.since is not None:
+            since = query.since
+            entries = itertools.takewhile(lambda e: e.created >= since, entries)
+        elif not newest_first and query.until is not None:
+            until = query.until
+            entries = itertools.takewhile(lambda e: e.created <= until, entries)
+        entries = filter(query.matches, entries)
+    elif count_total:
+        # Without other filters the number of matches is the size of the level
+        # indexes, so the page can be taken without counting the rest
+        total = buffer.count_entries(query.min_level_no)
+        page = LogPage(
+            entries=list(itertools.islice(entries, offset, offset + max(limit, 0))),
+            total=total,
+        )
+        if page.entries and offset + len(page.entries) < total:
+            page.next_cursor = page.entries[-1]["seq"]
+        return page
+
+    skipped = sum(1 for _ in itertools.islice(entries, offset))
+    page = LogPage(entries=list(itertools.islice(entries, max(limit, 0))))
+    if count_total:
+        remaining = sum(1 for _ in entries)
+        page.total = skipped + len(page.entries) + remaining
+        has_more = remaining > 0
+    else:
+        has_more = next(entries, None) is not None
+    if page.entries and has_more:
+        page.next_cursor = page.entries[-1]["seq"]
+    return page
@@ -1,7 +1,29 @@
+import os
 import sys
 from pkgutil import iter_modules
 
-from setuptools import find_packages
+
+def find_packages(path):
+    """
+    Find the packages under a directory, as :func:`setuptools.find_packages` does,
+    without the cost of importing setuptools when the server starts.
+
+    :param path: Directory to search
+    :return: Dotted names of the packages, relative to ``path``
+    """
+    packages = []
+    for root, dirs, _files in os.walk(path, followlinks=True):
+        all_dirs = dirs[:]
+        dirs.clear()
+        for directory in all_dirs:
+            full_path = os.path.join(root, directory)
+            if "." in directory or not os.path.isfile(
+                os.path.join(full_path, "__init__.py")
+            ):
+                continue
+            packages.append(os.path.relpath(full_path, path).replace(os.path.sep, "."))
+            dirs.append(directory)
+    return packages
 
 
 def find_modules(path, prefix=None):
@@ -10,14 +10,22 @@ For each block:
 - Single-scene blocks have both SET and STRIKE on the same scene
 """
 
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import List, Set
+from typing import Dict, Iterable, List, Set, Tuple
 
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, object_session
 
 from models.show import Scene, Show
-from models.stage import CrewAssignment, Props, Scenery
+from models.stage import (
+    CrewAssignment,
+    Props,
+    PropsAllocation,
+    Scenery,
+    SceneryAllocation,
+)
+from utils.show.show_structure import ShowStructure, get_show_structure
 
 
 @dataclass
@@ -49,21 +57,16 @@ def get_ordered_scenes_by_act(show: Show) -> dict[int, List[Scene]]:
     :param show: The show to get scenes for
     :returns: Dictionary mapping act_id to list of scenes in order
     """
-    result: dict[int, List[Scene]] = {}
-
-    # Traverse acts in order via linked list
-    act = show.first_act
-    while act:
-        scenes = []
-        scene = act.first_scene
-        while scene:
-            scenes.append(scene)
-            scene = scene.next_scene
-        if scenes:
-            result[act.id] = scenes
-        act = act.next_act
-
-    return result
+    session = object_session(show)
+    structure = get_show_structure(session, show.id)
+    scenes = {
+        scene.id: scene
+        for scene in session.scalars(select(Scene).where(Scene.show_id == show.id))
+    }
+    return {
+        act_id: [scenes[scene_id] for scene_id in scene_ids]
+        for act_id, scene_ids in structure.act_scene_ids.items()
+    }
 
 
 def compute_blocks_for_prop(prop: Props, show: Show) -> List[Block]:
@@ -77,7 +80,9 @@ def compute_blocks_for_prop(prop: Props, show: Show) -> List[Block]:
     # Get all scene IDs where this prop is allocated
     allocated_scene_ids: Set[int] = {alloc.scene_id for alloc in prop.scene_allocations}
 
-    return _compute_blocks(show, allocated_scene_ids)
+    return _compute_blocks(
+        get_show_structure(object_session(show), show.id), allocated_scene_ids
+    )
 
 
 def compute_blocks_for_scenery(scenery: Scenery, show: Show) -> List[Block]:
@@ -93,14 +98,18 @@ def compute_blocks_for_scenery(scenery: Scenery, show: Show) -> List[Block]:
         alloc.scene_id for alloc in scenery.scene_allocations
     }
 
-    return _compute_blocks(show, allocated_scene_ids)
+    return _compute_blocks(
+        get_show_structure(object_session(show), show.id), allocated_scene_ids
+    )
 
 
-def _compute_blocks(show: Show, allocated_scene_ids: Set[int]) -> List[Block]:
+def _compute_blocks(
+    structure: ShowStructure, allocated_scene_ids: Set[int]
+) -> List[Block]:
     """
     Internal function to compute blocks from a set of allocated scene IDs.
 
-    :param show: The show to compute blocks for
+    :param structure: Running order of the show to compute blocks for
     :param allocated_scene_ids: Set of scene IDs where the item is allocated
     :returns: List of Block objects
     """
@@ -108,15 +117,14 @@ def _compute_blocks(show: Show, allocated_scene_ids: Set[int]) -> List[Block]:
         return []
 
     blocks: List[Block] = []
-    ordered_scenes_by_act = get_ordered_scenes_by_act(show)
 
-    for act_id, scenes in ordered_scenes_by_act.items():
+    for act_id, scene_ids in structure.act_scene_ids.items():
         current_block_scenes: List[int] = []
 
-        for scene in scenes:
-            if scene.id in allocated_scene_ids:
+        for scene_id in scene_ids:
+            if scene_id in allocated_scene_ids:
                 # Scene is allocated - add to current block
-                current_block_scenes.append(scene.id)
+                current_block_scenes.append(scene_id)
             # Scene is not allocated - end current block if one exists
             elif current_block_scenes:
                 blocks.append(
@@ -344,3 +352,71 @@ def delete_orphaned_assignments_for_scenery(
         session.delete(assignment)
 
     return deleted_ids
+
+
+def delete_orphaned_assignments_for_items(
+    session: Session,
+    show: Show,
+    prop_ids: Iterable[int] = (),
+    scenery_ids: Iterable[int] = (),
+) -> List[int]:
+    """
+    Delete crew assignments for many items that are no longer on valid block boundaries.
+
+    Equivalent to calling :func:`delete_orphaned_assignments_for_prop` and
+    :func:`delete_orphaned_assignments_for_scenery` for each item, but reads the
+    allocations and crew assignments of each item type in one query.
+
+    :param session: Database session
+    :param show: The show
+    :param prop_ids: IDs of the props to check
+    :param scenery_ids: IDs of the scenery items to check
+    :returns: List of IDs of deleted assignments
+    """
+    structure = get_show_structure(session, show.id)
+    orphaned: List[CrewAssignment] = []
+
+    for item_ids, allocation_fk, assignment_fk in (
+        (set(prop_ids), PropsAllocation.props_id, CrewAssignment.prop_id),
+        (set(scenery_ids), SceneryAllocation.scenery_id, CrewAssignment.scenery_id),
+    ):
+        if not item_ids:
+            continue
+
+        allocated_scene_ids: Dict[int, Set[int]] = defaultdict(set)
+        for item_id, scene_id in session.execute(
+            select(allocation_fk, allocation_fk.class_.scene_id).where(
+                allocation_fk.in_(item_ids)
+            )
+        ):
+            allocated_scene_ids[item_id].add(scene_id)
+
+        valid_scenes: Dict[int, Tuple[Set[int], Set[int]]] = {}
+        for item_id in item_ids:
+            blocks = _compute_blocks(structure, allocated_scene_ids[item_id])
+            valid_scenes[item_id] = (
+                {block.set_scene_id for block in blocks},
+                {block.strike_scene_id for block in blocks},
+            )
+
+        assignments = session.scalars(
+            select(CrewAssignment).where(assignment_fk.in_(item_ids))
+        ).all()
+        for assignment in assignments:
+            valid_set_scenes, valid_strike_scenes = valid_scenes[
+                assignment.prop_id
+                if assignment.prop_id is not None
+                else assignment.scenery_id
+            ]
+            if assignment.assignment_type == "set":
+                if assignment.scene_id not in valid_set_scenes:
+                    orphaned.append(assignment)
+            elif assignment.assignment_type == "strike":
+                if assignment.scene_id not in valid_strike_scenes:
+                    orphaned.append(assignment)
+
+    deleted_ids = [a.id for a in orphaned]
+    for assignment in orphaned:
+        session.delete(assignment)
+
+    return deleted_ids
@@ -4,12 +4,19 @@ Auto mic assignment algorithm.
 This module implements a character-first holistic approach to assigning microphones
 to characters across scenes, minimizing the cost of mic swaps with a distance-based
 cost function.
+
+The suggestion endpoint uses :class:`MicAssignmentModel`, which precomputes the
+scene swap cost matrix and cast lookups once and tracks mic occupancy in sets, so
+scoring a candidate mic needs no database access or scans over allocation lists.
+The standalone :func:`find_best_mic` function implements the same scoring rules
+directly against allocation lists.
 """
 
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from models.mics import MicrophoneAllocation
@@ -119,6 +126,9 @@ def collect_character_appearances(
         (alloc.scene_id, alloc.character_id) for alloc in existing_allocations
     }
 
+    # Group membership is looked up once per group rather than once per line part
+    group_members: Dict[int, List[int]] = {}
+
     # Process all lines in the revision
     for line_assoc in revision.line_associations:
         line: ScriptLine = line_assoc.line
@@ -138,11 +148,13 @@ def collect_character_appearances(
             if line_part.character_id:
                 character_ids.append(line_part.character_id)
             elif line_part.character_group_id:
-                group: CharacterGroup = session.get(
-                    CharacterGroup, line_part.character_group_id
-                )
-                if group:
-                    character_ids.extend([char.id for char in group.characters])
+                group_id = line_part.character_group_id
+                if group_id not in group_members:
+                    group: CharacterGroup = session.get(CharacterGroup, group_id)
+                    group_members[group_id] = (
+                        [char.id for char in group.characters] if group else []
+                    )
+                character_ids.extend(group_members[group_id])
 
             # Count lines for each character
             for character_id in character_ids:
@@ -294,3 +306,262 @@ def _mic_used_by_character_in_new_allocations(
         if new_mic_id == mic_id and new_char_id == character_id:
             return True
     return False
+
+
+def load_character_cast(
+    session: Session, character_ids: Iterable[int]
+) -> Dict[int, Optional[int]]:
+    """
+    Load the cast member playing each character in a single query.
+
+    :param session: SQLAlchemy session
+    :param character_ids: IDs of the characters to look up
+    :return: Dict mapping character_id to the ID of the cast member playing them (or None)
+    """
+    character_ids = set(character_ids)
+    if not character_ids:
+        return {}
+    rows = session.execute(
+        select(Character.id, Character.played_by).where(Character.id.in_(character_ids))
+    ).all()
+    return {row.id: row.played_by for row in rows}
+
+
+# Scores closer than this are treated as equal, so the first mic considered wins
+# regardless of the order its penalties were summed in
+_SCORE_TOLERANCE = 1e-9
+
+
+class MicAssignmentModel:
+    """
+    Precomputed swap cost model and mic occupancy state for auto assignment.
+
+    Scenes are mapped to dense indexes in show order and the swap cost between
+    every pair of scenes is computed once up front. For each mic, the swap cost
+    rows of every scene it is used in are accumulated per wearer (a cast member,
+    or the character itself if nobody is cast), so the penalty for giving the mic
+    to a new character in a scene is a sum over a handful of wearers rather than
+    a walk over every previous allocation. Scene occupancy and continuity checks
+    are set lookups. The total swap cost of everything recorded is kept in
+    :attr:`total_cost`, so different assignment strategies can be compared.
+
+    Scoring matches :func:`find_best_mic`.
+    """
+
+    def __init__(
+        self,
+        scene_metadata: Dict[int, SceneMetadata],
+        character_cast: Dict[int, Optional[int]],
+    ):
+        """
+        :param scene_metadata: Dict mapping scene_id to SceneMetadata
+        :param character_cast: Dict mapping character_id to the cast member playing them
+        """
+        self.scene_metadata = scene_metadata
+        self.character_cast = character_cast
+
+        ordered = sorted(scene_metadata.values(), key=lambda meta: meta.position)
+        self.scene_index: Dict[int, int] = {
+            meta.scene_id: index for index, meta in enumerate(ordered)
+        }
+        self.swap_costs: List[List[float]] = [
+            [
+                swap_cost(meta_1.scene_idx, meta_2.scene_idx)
+                if meta_1.group_idx == meta_2.group_idx
+                else 0.0
+                for meta_2 in ordered
+            ]
+            for meta_1 in ordered
+        ]
+
+        # Sum of swap costs between every pair of recorded allocations sharing a mic
+        self.total_cost = 0.0
+        self._occupied_scenes: Dict[int, Set[int]] = defaultdict(set)
+        self._manual_characters: Dict[int, Set[int]] = defaultdict(set)
+        self._new_characters: Dict[int, Set[int]] = defaultdict(set)
+        self._penalty_rows: Dict[int, Dict[Hashable, List[float]]] = defaultdict(dict)
+        self._usage_counts: Dict[int, Dict[int, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self._unplaced_usages: Dict[int, Dict[int, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+
+    def _wearer(self, character_id: int) -> Hashable:
+        cast_id = self.character_cast.get(character_id)
+        if cast_id:
+            return "cast", cast_id
+        return "character", character_id
+
+    def record_allocation(
+        self, mic_id: int, scene_id: int, character_id: int, manual: bool = False
+    ) -> None:
+        """
+        Record that a mic is used by a character in a scene.
+
+        :param mic_id: Microphone ID
+        :param scene_id: Scene ID
+        :param character_id: Character ID
+        :param manual: True for an existing manual allocation, False for one made by
+                       the algorithm
+        """
+        self.total_cost += self.swap_penalty(mic_id, character_id, scene_id)
+        self._occupied_scenes[mic_id].add(scene_id)
+        if manual:
+            self._manual_characters[mic_id].add(character_id)
+        else:
+            self._new_characters[mic_id].add(character_id)
+        self._usage_counts[mic_id][character_id] += 1
+
+        index = self.scene_index.get(scene_id)
+        if index is None:
+            self._unplaced_usages[mic_id][character_id] += 1
+            return
+
+        rows = self._penalty_rows[mic_id]
+        wearer = self._wearer(character_id)
+        costs = self.swap_costs[index]
+        row = rows.get(wearer)
+        if row is None:
+            rows[wearer] = list(costs)
+        else:
+            for i, cost in enumerate(costs):
+                row[i] += cost
+
+    def is_scene_occupied(self, mic_id: int, scene_id: int) -> bool:
+        """
+        Check if a mic is already assigned to someone in a scene.
+
+        :param mic_id: Microphone ID
+        :param scene_id: Scene ID
+        :return: True if mic is already used in this scene
+        """
+        return scene_id in self._occupied_scenes.get(mic_id, ())
+
+    def mic_score(
+        self, mic_id: int, character_id: int, scene_id: int
+    ) -> Optional[float]:
+        """
+        Score giving a mic to a character in a scene (lower is better).
+
+        :param mic_id: Microphone ID
+        :param character_id: Character ID
+        :param scene_id: Scene ID
+        :return: Score, or None if the mic is already in use in the scene
+        """
+        if self.is_scene_occupied(mic_id, scene_id):
+            return None
+
+        score = self.swap_penalty(mic_id, character_id, scene_id)
+        if character_id in self._manual_characters.get(mic_id, ()):
+            score -= 100.0
+        if character_id in self._new_characters.get(mic_id, ()):
+            score -= 50.0
+        return score
+
+    def swap_penalty(self, mic_id: int, character_id: int, scene_id: int) -> float:
+        """
+        Total swap cost between giving a mic to a character in a scene and every
+        existing use of that mic.
+
+        :param mic_id: Microphone ID
+        :param character_id: Character ID
+        :param scene_id: Scene ID
+        :return: Summed swap cost
+        """
+        penalty = 0.0
+        index = self.scene_index.get(scene_id)
+        if index is None:
+            # Unknown scenes are penalised for every use by another character
+            for used_by, count in self._usage_counts.get(mic_id, {}).items():
+                if used_by != character_id:
+                    penalty += 100.0 * count
+            return penalty
+
+        wearer = self._wearer(character_id)
+        for used_by, row in self._penalty_rows.get(mic_id, {}).items():
+            if used_by != wearer:
+                penalty += row[index]
+        for used_by, count in self._unplaced_usages.get(mic_id, {}).items():
+            if used_by != character_id:
+                penalty += 100.0 * count
+        return penalty
+
+    def find_best_mic(
+        self, character_id: int, scene_id: int, available_mics: List[int]
+    ) -> Optional[int]:
+        """
+        Find the best microphone for a character in a specific scene.
+
+        :param character_id: ID of the character needing a mic
+        :param scene_id: ID of the scene
+        :param available_mics: List of available microphone IDs, in preference order
+        :return: Best microphone ID, or None if no mic available
+        """
+        best_mic: Optional[int] = None
+        best_score = float("inf")
+        for mic_id in available_mics:
+            score = self.mic_score(mic_id, character_id, scene_id)
+            if score is not None and score < best_score - _SCORE_TOLERANCE:
+                best_score = score
+                best_mic = mic_id
+        return best_mic
+
+
+def assign_greedy(
+    model: MicAssignmentModel,
+    sorted_characters: List[int],
+    unallocated_appearances: Dict[Tuple[int, int], int],
+    available_mics: List[int],
+    skip_characters: Optional[Set[int]] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int]]]:
+    """
+    Assign mics character by character, picking the best mic for each scene in turn.
+
+    Each new allocation is recorded in the model as it is made.
+
+    :param model: Cost model, populated with any allocations made so far
+    :param sorted_characters: Character IDs in priority order
+    :param unallocated_appearances: Dict mapping (scene_id, character_id) to line count
+    :param available_mics: List of microphone IDs which may be allocated
+    :param skip_characters: Character IDs which should not be assigned
+    :param on_progress: Called with (character number, total characters) as each
+                        character is reached
+    :return: Tuple of (new_allocations, unassigned) where new_allocations is a list of
+             (mic_id, scene_id, character_id) tuples and unassigned is a list of
+             (character_id, scene_id) pairs for which no mic was available
+    """
+    skip_characters = skip_characters or set()
+
+    # Group appearances by character once, rather than rescanning per character
+    character_scenes: Dict[int, List[int]] = defaultdict(list)
+    for scene_id, character_id in unallocated_appearances:
+        character_scenes[character_id].append(scene_id)
+
+    new_allocations: List[Tuple[int, int, int]] = []
+    unassigned: List[Tuple[int, int]] = []
+    for done, character_id in enumerate(sorted_characters, start=1):
+        if on_progress:
+            on_progress(done, len(sorted_characters))
+        if character_id in skip_characters:
+            continue
+
+        # Sort by scene position (chronological order)
+        scene_ids = sorted(
+            character_scenes.get(character_id, []),
+            key=lambda scene_id: (
+                model.scene_metadata[scene_id].position
+                if scene_id in model.scene_metadata
+                else 0
+            ),
+        )
+        for scene_id in scene_ids:
+            best_mic = model.find_best_mic(character_id, scene_id, available_mics)
+            if best_mic:
+                new_allocations.append((best_mic, scene_id, character_id))
+                model.record_allocation(best_mic, scene_id, character_id)
+            else:
+                unassigned.append((character_id, scene_id))
+
+    return new_allocations, unassigned
@@ -0,0 +1,192 @@
+"""
+Optimal mic assignment solver.
+
+Where the greedy assignment in :mod:`utils.show.mic_assignment` gives each
+character their mics one after another in priority order, this solver works
+through each scene group in show order and, for every scene, solves the
+assignment of (character, mic) pairs exactly with the Hungarian algorithm. The
+cost of each pair is the score from :class:`~utils.show.mic_assignment.MicAssignmentModel`,
+so swap costs, cast sharing, intervals and continuity bonuses all carry over
+from the greedy heuristic, but characters in a scene no longer compete for mics
+in whatever order they happen to be visited.
+
+The swap cost of a whole allocation depends on pairs of allocations, which makes
+the joint problem across scenes a quadratic assignment problem; solving each
+scene exactly against everything allocated before it keeps the solver
+polynomial.
+"""
+
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from utils.show.mic_assignment import MicAssignmentModel
+
+
+# Seconds the optimal solver may run before the greedy result is used instead
+OPTIMAL_SOLVER_TIME_BUDGET = 5.0
+
+# Cost of giving a character a mic which is already in use in the scene
+_INFEASIBLE_COST = 1e9
+# Cost of leaving a character without a mic, on top of their line count so that
+# characters with more lines are preferred when there are not enough mics
+_UNASSIGNED_COST = 1e6
+
+
+class MicSolverTimeout(Exception):
+    """Raised when the optimal solver runs past its time budget."""
+
+
+def linear_sum_assignment(
+    cost_matrix: Sequence[Sequence[float]],
+) -> List[Tuple[int, int]]:
+    """
+    Solve the rectangular linear assignment problem with the Hungarian algorithm.
+
+    Every row is assigned a distinct column (or every column a distinct row, if
+    there are more rows than columns) so that the total cost is minimal.
+
+    :param cost_matrix: Matrix of costs, indexed by [row][column]
+    :return: List of (row, column) pairs, sorted by row
+    """
+    num_rows = len(cost_matrix)
+    num_cols = len(cost_matrix[0]) if num_rows else 0
+    if not num_rows or not num_cols:
+        return []
+    if num_rows > num_cols:
+        transposed = [
+            [cost_matrix[row][col] for row in range(num_rows)]
+            for col in range(num_cols)
+        ]
+        return sorted((row, col) for col, row in linear_sum_assignment(transposed))
+
+    # Shortest augmenting path with row/column potentials, O(rows^2 * cols). Rows
+    # and columns are 1-indexed, with column 0 used as the search root.
+    inf = float("inf")
+    row_potential = [0.0] * (num_rows + 1)
+    col_potential = [0.0] * (num_cols + 1)
+    col_owner = [0] * (num_cols + 1)
+    way = [0] * (num_cols + 1)
+    for row in range(1, num_rows + 1):
+        col_owner[0] = row
+        current_col = 0
+        min_slack = [inf] * (num_cols + 1)
+        used = [False] * (num_cols + 1)
+        while True:
+            used[current_col] = True
+            current_row = col_owner[current_col]
+            row_costs = cost_matrix[current_row - 1]
+            row_offset = row_potential[current_row]
+            delta = inf
+            next_col = 0
+            for col in range(1, num_cols + 1):
+                if used[col]:
+                    continue
+                slack = row_costs[col - 1] - row_offset - col_potential[col]
+                if slack < min_slack[col]:
+                    min_slack[col] = slack
+                    way[col] = current_col
+                if min_slack[col] < delta:
+                    delta = min_slack[col]
+                    next_col = col
+            for col in range(num_cols + 1):
+                if used[col]:
+                    row_potential[col_owner[col]] += delta
+                    col_potential[col] -= delta
+                else:
+                    min_slack[col] -= delta
+            current_col = next_col
+            if col_owner[current_col] == 0:
+                break
+        # Flip the augmenting path
+        while current_col:
+            previous_col = way[current_col]
+            col_owner[current_col] = col_owner[previous_col]
+            current_col = previous_col
+
+    return sorted(
+        (col_owner[col] - 1, col - 1)
+        for col in range(1, num_cols + 1)
+        if col_owner[col]
+    )
+
+
+def assign_optimal(
+    model: MicAssignmentModel,
+    sorted_characters: List[int],
+    unallocated_appearances: Dict[Tuple[int, int], int],
+    available_mics: List[int],
+    skip_characters: Optional[Set[int]] = None,
+    deadline: Optional[float] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int]]]:
+    """
+    Assign mics scene by scene, solving each scene as a min-cost assignment.
+
+    Each new allocation is recorded in the model as it is made.
+
+    :param model: Cost model, populated with any allocations made so far
+    :param sorted_characters: Character IDs in priority order
+    :param unallocated_appearances: Dict mapping (scene_id, character_id) to line count
+    :param available_mics: List of microphone IDs which may be allocated
+    :param skip_characters: Character IDs which should not be assigned
+    :param deadline: Value of :func:`time.monotonic` after which to give up
+    :param on_progress: Called with (scene number, total scenes) as each scene is
+                        reached
+    :return: Tuple of (new_allocations, unassigned) in the same form as
+             :func:`~utils.show.mic_assignment.assign_greedy`
+    :raises MicSolverTimeout: If the deadline passes before all scenes are solved
+    """
+    skip_characters = skip_characters or set()
+    priority = {char_id: index for index, char_id in enumerate(sorted_characters)}
+
+    scene_characters: Dict[int, List[int]] = defaultdict(list)
+    character_lines: Dict[int, int] = defaultdict(int)
+    for (scene_id, character_id), line_count in unallocated_appearances.items():
+        if character_id in skip_characters or character_id not in priority:
+            continue
+        scene_characters[scene_id].append(character_id)
+        character_lines[character_id] += line_count
+
+    # Scene groups in show order, then each scene in the group in order
+    ordered_scenes = sorted(
+        scene_characters,
+        key=lambda scene_id: (
+            model.scene_metadata[scene_id].position
+            if scene_id in model.scene_metadata
+            else 0
+        ),
+    )
+
+    new_allocations: List[Tuple[int, int, int]] = []
+    unassigned: List[Tuple[int, int]] = []
+    for done, scene_id in enumerate(ordered_scenes, start=1):
+        if deadline is not None and time.monotonic() > deadline:
+            raise MicSolverTimeout()
+        if on_progress:
+            on_progress(done, len(ordered_scenes))
+
+        characters = sorted(scene_characters[scene_id], key=priority.__getitem__)
+        cost_matrix = []
+        for character_id in characters:
+            row = []
+            for mic_id in available_mics:
+                score = model.mic_score(mic_id, character_id, scene_id)
+                row.append(_INFEASIBLE_COST if score is None else score)
+            # One "no mic" column per character, so every character can be left
+            # unassigned if that is cheaper
+            row.extend(
+                [_UNASSIGNED_COST + character_lines[character_id]] * len(characters)
+            )
+            cost_matrix.append(row)
+
+        for row, col in linear_sum_assignment(cost_matrix):
+            character_id = characters[row]
+            if col < len(available_mics) and cost_matrix[row][col] < _INFEASIBLE_COST:
+                mic_id = available_mics[col]
+                new_allocations.append((mic_id, scene_id, character_id))
+                model.record_allocation(mic_id, scene_id, character_id)
+            else:
+                unassigned.append((character_id, scene_id))
+
+    return new_allocations, unassigned
@@ -0,0 +1,351 @@
+"""
+Microphone allocation suggestions.
+
+Suggestions are computed in two steps. :func:`build_suggestion_input` reads
+everything the algorithm needs from the database into a
+:class:`MicSuggestionInput`, a plain, picklable snapshot of the show, and
+:func:`compute_suggestions` then runs the assignment against that snapshot
+without touching the database, so it can run in a worker process.
+"""
+
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.mics import MicrophoneAllocation
+from models.script import ScriptRevision
+from utils.show.mic_assignment import (
+    MicAssignmentModel,
+    SceneMetadata,
+    assign_greedy,
+    collect_character_appearances,
+    load_character_cast,
+)
+from utils.show.mic_solver import (
+    OPTIMAL_SOLVER_TIME_BUDGET,
+    MicSolverTimeout,
+    assign_optimal,
+)
+
+
+GAP_MODES = ["leave_gaps", "no_gaps"]
+SOLVERS = ["greedy", "optimal"]
+
+
+@dataclass(frozen=True)
+class MicSuggestionInput:
+    """
+    Snapshot of a show used to compute mic allocation suggestions.
+
+    Sequences preserve the order they were read from the database in, as
+    characters with equal line counts are assigned in that order.
+
+    :param scene_groups: Scene IDs in show order, split into groups at each interval
+    :param allocatable_mic_ids: IDs of mics which may be allocated
+    :param existing_allocations: (mic_id, scene_id, character_id) of existing allocations
+    :param unallocated_appearances: (scene_id, character_id, line_count) for every
+                                    appearance without an existing allocation
+    :param character_total_lines: (character_id, line_count) totals for those appearances
+    :param character_cast: (character_id, cast_id) for every character involved
+    :param static_characters: IDs of characters which should keep one mic all show
+    :param gap_mode: One of :data:`GAP_MODES`
+    :param solver: One of :data:`SOLVERS`
+    """
+
+    scene_groups: Tuple[Tuple[int, ...], ...]
+    allocatable_mic_ids: Tuple[int, ...]
+    existing_allocations: Tuple[Tuple[int, int, int], ...]
+    unallocated_appearances: Tuple[Tuple[int, int, int], ...]
+    character_total_lines: Tuple[Tuple[int, int], ...]
+    character_cast: Tuple[Tuple[int, Optional[int]], ...]
+    static_characters: Tuple[int, ...]
+    gap_mode: str
+    solver: str
+
+    @property
+    def dedupe_key(self) -> str:
+        """Hash identifying this input, identical inputs give identical suggestions."""
+        encoded = json.dumps(asdict(self), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def build_suggestion_input(
+    session: Session,
+    revision: ScriptRevision,
+    scene_groups: List[List[int]],
+    available_mic_ids: List[int],
+    excluded_mics: List[int],
+    static_characters: List[int],
+    gap_mode: str,
+    solver: str,
+) -> MicSuggestionInput:
+    """
+    Read the data needed to suggest mic allocations for a show.
+
+    :param session: SQLAlchemy session
+    :param revision: Current script revision
+    :param scene_groups: Scene IDs in show order, split into groups at each interval
+    :param available_mic_ids: IDs of all mics in the show
+    :param excluded_mics: IDs of mics which should not be allocated
+    :param static_characters: IDs of characters which should keep one mic all show
+    :param gap_mode: One of :data:`GAP_MODES`
+    :param solver: One of :data:`SOLVERS`
+    :return: Snapshot to pass to :func:`compute_suggestions`
+    """
+    existing_allocations: List[MicrophoneAllocation] = session.scalars(
+        select(MicrophoneAllocation).where(
+            MicrophoneAllocation.mic_id.in_(available_mic_ids)
+        )
+    ).all()
+
+    # Collect character appearances (only unallocated pairs)
+    unallocated_appearances, character_total_lines = collect_character_appearances(
+        session, revision, existing_allocations
+    )
+    character_cast = load_character_cast(
+        session,
+        set(character_total_lines)
+        | {alloc.character_id for alloc in existing_allocations},
+    )
+
+    return MicSuggestionInput(
+        scene_groups=tuple(tuple(group) for group in scene_groups),
+        allocatable_mic_ids=tuple(
+            mic_id for mic_id in available_mic_ids if mic_id not in excluded_mics
+        ),
+        existing_allocations=tuple(
+            (alloc.mic_id, alloc.scene_id, alloc.character_id)
+            for alloc in existing_allocations
+        ),
+        unallocated_appearances=tuple(
+            (scene_id, character_id, line_count)
+            for (scene_id, character_id), line_count in unallocated_appearances.items()
+        ),
+        character_total_lines=tuple(character_total_lines.items()),
+        character_cast=tuple(sorted(character_cast.items())),
+        static_characters=tuple(static_characters),
+        gap_mode=gap_mode,
+        solver=solver,
+    )
+
+
+def compute_suggestions(
+    suggestion_input: MicSuggestionInput,
+    on_progress: Optional[Callable[[float], None]] = None,
+) -> dict:
+    """
+    Suggest mic allocations for every unallocated character appearance.
+
+    :param suggestion_input: Snapshot from :func:`build_suggestion_input`
+    :param on_progress: Called with the fraction of work done, between 0 and 1
+    :return: Dict with ``allocations`` (mic_id -> scene_id -> character_id, in the
+             same format as the allocations PATCH endpoint), ``hints`` about
+             appearances which could not be allocated, ``solver`` (the solver whose
+             result was used) and ``costs`` (total swap cost for each solver run,
+             None if the optimal solver ran out of time)
+    """
+
+    def report(start: float, end: float) -> Optional[Callable[[int, int], None]]:
+        # Map progress through one stage of the work onto [start, end]
+        if not on_progress:
+            return None
+        return lambda done, total: on_progress(start + (end - start) * done / total)
+
+    allocatable_mic_ids = list(suggestion_input.allocatable_mic_ids)
+    unallocated_appearances: Dict[Tuple[int, int], int] = {
+        (scene_id, character_id): line_count
+        for scene_id, character_id, line_count in suggestion_input.unallocated_appearances
+    }
+    character_total_lines = dict(suggestion_input.character_total_lines)
+    static_characters = set(suggestion_input.static_characters)
+
+    # Sort characters by total line count (descending) - high priority first
+    sorted_characters = sorted(
+        character_total_lines.keys(),
+        key=lambda char_id: character_total_lines[char_id],
+        reverse=True,
+    )
+
+    # Build comprehensive scene metadata
+    scene_metadata: Dict[int, SceneMetadata] = {}
+    position = 0
+    for group_idx, scene_group in enumerate(suggestion_input.scene_groups):
+        for scene_idx, scene_id in enumerate(scene_group):
+            scene_metadata[scene_id] = SceneMetadata(
+                scene_id=scene_id,
+                group_idx=group_idx,
+                scene_idx=scene_idx,
+                position=position,
+            )
+            position += 1
+    all_scene_ids = set(scene_metadata.keys())
+
+    used_mic_ids = {mic_id for mic_id, _, _ in suggestion_input.existing_allocations}
+    allocated_character_ids = {
+        character_id for _, _, character_id in suggestion_input.existing_allocations
+    }
+
+    new_allocations: List[Tuple[int, int, int]] = []
+    hints = []
+
+    # Assign mics per static character allocation
+    static_mic_options = {
+        mic_id for mic_id in allocatable_mic_ids if mic_id not in used_mic_ids
+    }
+    static_sorted_characters = [
+        char_id for char_id in sorted_characters if char_id in static_characters
+    ]
+    for character_id in static_sorted_characters:
+        # Check if character already has an allocation, skip and record hint if so
+        if character_id in allocated_character_ids:
+            hints.append(
+                {
+                    "character_id": character_id,
+                    "reason": "Character already has existing microphone allocation",
+                    "type": "static",
+                }
+            )
+            continue
+
+        # Try get next available static mic, if there are not any left, skip and record hint
+        try:
+            next_mic = static_mic_options.pop()
+        except KeyError:
+            hints.append(
+                {
+                    "character_id": character_id,
+                    "reason": "No available microphone for static assignment",
+                    "type": "static",
+                }
+            )
+        else:
+            # Record new allocation for each scene
+            for scene_id in all_scene_ids:
+                new_allocations.append((next_mic, scene_id, character_id))
+
+    # Give each solver its own cost model seeded with the existing and static
+    # allocations
+    character_cast = dict(suggestion_input.character_cast)
+
+    def seeded_model() -> MicAssignmentModel:
+        model = MicAssignmentModel(scene_metadata, character_cast)
+        for mic_id, scene_id, character_id in suggestion_input.existing_allocations:
+            model.record_allocation(mic_id, scene_id, character_id, manual=True)
+        for mic_id, scene_id, character_id in new_allocations:
+            model.record_allocation(mic_id, scene_id, character_id)
+        return model
+
+    optimal = suggestion_input.solver == "optimal"
+
+    # Assign mics per character
+    greedy_model = seeded_model()
+    solved_allocations, unassigned = assign_greedy(
+        greedy_model,
+        sorted_characters,
+        unallocated_appearances,
+        allocatable_mic_ids,
+        skip_characters=set(static_sorted_characters),
+        on_progress=report(0.0, 0.5 if optimal else 1.0),
+    )
+    costs = {"greedy": greedy_model.total_cost}
+    solver_used = "greedy"
+
+    if optimal:
+        optimal_model = seeded_model()
+        try:
+            optimal_allocations, optimal_unassigned = assign_optimal(
+                optimal_model,
+                sorted_characters,
+                unallocated_appearances,
+                allocatable_mic_ids,
+                skip_characters=set(static_sorted_characters),
+                deadline=time.monotonic() + OPTIMAL_SOLVER_TIME_BUDGET,
+                on_progress=report(0.5, 1.0),
+            )
+        except MicSolverTimeout:
+            costs["optimal"] = None
+        else:
+            costs["optimal"] = optimal_model.total_cost
+            # Only use the optimal solution if it is actually better, as scenes are
+            # solved one at a time it is not guaranteed to be
+            if (len(optimal_unassigned), optimal_model.total_cost) < (
+                len(unassigned),
+                greedy_model.total_cost,
+            ):
+                solved_allocations = optimal_allocations
+                unassigned = optimal_unassigned
+                solver_used = "optimal"
+
+    new_allocations.extend(solved_allocations)
+    for character_id, scene_id in unassigned:
+        # No available mic - record hint
+        hints.append(
+            {
+                "character_id": character_id,
+                "scene_id": scene_id,
+                "reason": "No available microphone",
+                "type": "allocation",
+            }
+        )
+
+    # Build response in PATCH-compatible format
+    suggestions: Dict[int, Dict[int, int]] = {}
+
+    # Include existing allocations in response (complete picture)
+    for mic_id, scene_id, character_id in suggestion_input.existing_allocations:
+        if mic_id not in suggestions:
+            suggestions[mic_id] = {}
+        suggestions[mic_id][scene_id] = character_id
+
+    # Add new suggestions
+    for mic_id, scene_id, character_id in new_allocations:
+        if mic_id not in suggestions:
+            suggestions[mic_id] = {}
+        suggestions[mic_id][scene_id] = character_id
+
+    # Process gap mode if needed
+    if suggestion_input.gap_mode == "no_gaps":
+        for mic_id, mic_allocations in suggestions.items():
+            seen_scenes = []
+            single_character = True
+            character_id = None
+            # For each scene, see whether the same character is assigned to the mic
+            for scene_id, char_id in mic_allocations.items():
+                seen_scenes.append(scene_id)
+                if character_id is not None and char_id != character_id:
+                    single_character = False
+                    break
+                character_id = char_id
+
+            # Only proceed if a single character is assigned to this mic
+            if not single_character:
+                continue
+
+            # Fill in gaps for scenes where the character wasn't assigned a mic
+            gapped_scenes = all_scene_ids - set(seen_scenes)
+            if gapped_scenes:
+                hints.append(
+                    {
+                        "character_id": character_id,
+                        "reason": "Filled gap in microphone assignment",
+                        "type": "gap_fill",
+                        "scenes": list(gapped_scenes),
+                    }
+                )
+                for scene_id in gapped_scenes:
+                    mic_allocations[scene_id] = character_id
+
+    if on_progress:
+        on_progress(1.0)
+
+    return {
+        "allocations": suggestions,
+        "hints": hints,
+        "solver": solver_used,
+        "costs": costs,
+    }
@@ -0,0 +1,457 @@
+"""
+Differences between two revisions of a script.
+
+Revisions share :class:`~models.script.ScriptLine` rows, and editing a line in a
+revision replaces it with a new row, so the lines of two revisions are compared as
+sets of IDs:
+
+- Both revisions are put in running order by one recursive query each, following
+  ``next_line_id`` through the primary key of ``script_line_revision_association``,
+  and the two orders are joined on line ID to find the lines only in one of them.
+- Lines in both revisions whose order changed are found from the longest run of
+  them in the same order in both (see :func:`_longest_increasing`). The rest were
+  moved.
+- A line only in the old revision and a line only in the new one, between the same
+  unmoved lines, are treated as one line being modified, unless their content is
+  the same.
+- Cues and cuts are compared with ``EXCEPT`` queries on ``script_cue_association``
+  and ``script_line_cuts``, with modified lines matched to the line they replaced.
+
+Each change is given the page it is on in the new revision, or in the old revision
+for things which were removed, so the diff can be sent one page at a time.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal, null, select, union_all
+from sqlalchemy.orm import Session, aliased, selectinload
+
+from models.cue import Cue, CueAssociation, CueType
+from models.script import (
+    ScriptCuts,
+    ScriptLine,
+    ScriptLinePart,
+    ScriptLineRevisionAssociation,
+)
+
+
+LINE_ADDED = "added"
+LINE_REMOVED = "removed"
+LINE_MODIFIED = "modified"
+LINE_MOVED = "moved"
+
+
+@dataclass
+class LineChange:
+    """
+    A line which differs between the revisions.
+
+    :param kind: One of ``added``, ``removed``, ``modified`` or ``moved``
+    :param page: Page the change is on
+    :param line_id: ID of the line in the new revision, None if it was removed
+    :param from_line_id: ID of the line in the old revision, None if it was added
+    :param from_page: Page of the line in the old revision
+    """
+
+    kind: str
+    page: int
+    line_id: Optional[int]
+    from_line_id: Optional[int]
+    from_page: Optional[int] = None
+
+
+@dataclass
+class CueChange:
+    """
+    A cue added to a line, removed from one, or moved to another line.
+
+    :param kind: One of ``added``, ``removed`` or ``moved``
+    :param page: Page the change is on
+    :param cue_id: ID of the cue
+    :param line_id: Line the cue is on in the new revision, None if removed
+    :param from_line_id: Line the cue was on in the old revision, None if added
+    """
+
+    kind: str
+    page: int
+    cue_id: int
+    line_id: Optional[int]
+    from_line_id: Optional[int]
+
+
+@dataclass
+class CutChange:
+    """
+    A line part which was cut, or is no longer cut.
+
+    :param kind: ``added`` if the part is cut in the new revision only, or
+                 ``removed`` if it was only cut in the old revision
+    :param page: Page the change is on
+    :param line_id: ID of the line the part is in
+    :param part_index: Index of the part in the line
+    """
+
+    kind: str
+    page: int
+    line_id: int
+    part_index: int
+
+
+@dataclass
+class RevisionDiff:
+    """
+    Changes from one script revision to another.
+
+    :param from_revision_id: ID of the old revision
+    :param to_revision_id: ID of the new revision
+    """
+
+    from_revision_id: int
+    to_revision_id: int
+    lines: List[LineChange] = field(default_factory=list)
+    cues: List[CueChange] = field(default_factory=list)
+    cuts: List[CutChange] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, int]:
+        counts = {f"lines_{kind}": 0 for kind in (LINE_ADDED, LINE_REMOVED)}
+        counts.update(lines_modified=0, lines_moved=0)
+        for change in self.lines:
+            counts[f"lines_{change.kind}"] += 1
+        for name, changes in (("cues", self.cues), ("cuts", self.cuts)):
+            for change in changes:
+                key = f"{name}_{change.kind}"
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def by_page(self) -> Dict[int, "RevisionDiff"]:
+        """
+        :return: Page number to the changes on that page, in page order
+        """
+        pages: Dict[int, RevisionDiff] = {}
+
+        def page_diff(page):
+            if page not in pages:
+                pages[page] = RevisionDiff(self.from_revision_id, self.to_revision_id)
+            return pages[page]
+
+        for change in self.lines:
+            page_diff(change.page).lines.append(change)
+        for change in self.cues:
+            page_diff(change.page).cues.append(change)
+        for change in self.cuts:
+            page_diff(change.page).cuts.append(change)
+        return dict(sorted(pages.items(), key=lambda item: item[0] or 0))
+
+
+def _ordered_lines(session: Session, revision_id: int, name: str):
+    """
+    :return: Recursive CTE of the line IDs of a revision, with their position
+    """
+    association = ScriptLineRevisionAssociation
+    line_count = session.scalar(
+        select(func.count()).where(association.revision_id == revision_id)
+    )
+    ordered = (
+        select(
+            association.line_id,
+            association.next_line_id,
+            literal(0).label("position"),
+        )
+        .where(
+            association.revision_id == revision_id,
+            association.previous_line_id.is_(None),
+        )
+        .cte(name, recursive=True)
+    )
+    following = aliased(association)
+    return ordered.union_all(
+        select(
+            following.line_id,
+            following.next_line_id,
+            ordered.c.position + 1,
+        ).where(
+            following.revision_id == revision_id,
+            following.line_id == ordered.c.next_line_id,
+            # Stop on a corrupt list with a loop in it
+            ordered.c.position < line_count,
+        )
+    )
+
+
+def _longest_increasing(values: Sequence[int]) -> List[int]:
+    """
+    :return: Indices of a longest strictly increasing subsequence of the values
+    """
+    tails: List[int] = []
+    tail_indices: List[int] = []
+    previous: List[Optional[int]] = []
+    for index, value in enumerate(values):
+        position = bisect_left(tails, value)
+        if position == len(tails):
+            tails.append(value)
+            tail_indices.append(index)
+        else:
+            tails[position] = value
+            tail_indices[position] = index
+        previous.append(tail_indices[position - 1] if position else None)
+
+    result = []
+    index = tail_indices[-1] if tail_indices else None
+    while index is not None:
+        result.append(index)
+        index = previous[index]
+    return result[::-1]
+
+
+def _line_contents(session: Session, line_ids: Iterable[int]) -> Dict[int, tuple]:
+    """
+    :return: Line ID to what is shown for the line, ignoring its page
+    """
+    contents = {}
+    lines = session.scalars(
+        select(ScriptLine)
+        .where(ScriptLine.id.in_(list(line_ids)))
+        .options(selectinload(ScriptLine.line_parts))
+    )
+    for line in lines:
+        contents[line.id] = (
+            line.act_id,
+            line.scene_id,
+            line.line_type,
+            line.stage_direction_style_id,
+            tuple(
+                sorted(
+                    (part.part_index, part.character_id, part.character_group_id)
+                    + (part.line_text,)
+                    for part in line.line_parts
+                )
+            ),
+        )
+    return contents
+
+
+def diff_revisions(
+    session: Session, from_revision_id: int, to_revision_id: int
+) -> RevisionDiff:
+    """
+    Compare two revisions of a script.
+
+    :param session: SQLAlchemy session
+    :param from_revision_id: ID of the old revision
+    :param to_revision_id: ID of the new revision
+    :return: Changes from the old revision to the new one
+    """
+    diff = RevisionDiff(from_revision_id, to_revision_id)
+    from_lines = _ordered_lines(session, from_revision_id, "from_lines")
+    to_lines = _ordered_lines(session, to_revision_id, "to_lines")
+    from_page = aliased(ScriptLine)
+    to_page = aliased(ScriptLine)
+
+    # Every line of either revision, with its position in each. The position is
+    # NULL in a revision the line is not in.
+    rows = session.execute(
+        union_all(
+            select(
+                from_lines.c.line_id,
+                from_lines.c.position,
+                to_lines.c.position,
+                from_page.page,
+                to_page.page,
+            )
+            .join(from_page, from_page.id == from_lines.c.line_id)
+            .outerjoin(to_lines, to_lines.c.line_id == from_lines.c.line_id)
+            .outerjoin(to_page, to_page.id == to_lines.c.line_id),
+            select(
+                to_lines.c.line_id,
+                null(),
+                to_lines.c.position,
+                null(),
+                to_page.page,
+            )
+            .join(to_page, to_page.id == to_lines.c.line_id)
+            .where(to_lines.c.line_id.not_in(select(from_lines.c.line_id))),
+        )
+    ).all()
+
+    from_order: List[Tuple[int, int]] = []
+    to_order: List[Tuple[int, int]] = []
+    pages_from: Dict[int, int] = {}
+    pages_to: Dict[int, int] = {}
+    for line_id, from_position, to_position, page_from, page_to in rows:
+        if from_position is not None:
+            from_order.append((from_position, line_id))
+            pages_from[line_id] = page_from
+        if to_position is not None:
+            to_order.append((to_position, line_id))
+            pages_to[line_id] = page_to
+    from_order = [line_id for _position, line_id in sorted(from_order)]
+    to_order = [line_id for _position, line_id in sorted(to_order)]
+
+    # Lines in both revisions, in the old order, which are also in order in the
+    # new revision did not move
+    to_positions = {line_id: index for index, line_id in enumerate(to_order)}
+    common = [line_id for line_id in from_order if line_id in to_positions]
+    stable = {
+        common[index]
+        for index in _longest_increasing([to_positions[i] for i in common])
+    }
+
+    # Group the lines in only one revision by the unmoved line they follow
+    removed_after: Dict[Optional[int], List[int]] = defaultdict(list)
+    anchor = None
+    for line_id in from_order:
+        if line_id in stable:
+            anchor = line_id
+        elif line_id not in to_positions:
+            removed_after[anchor].append(line_id)
+    added_after: Dict[Optional[int], List[int]] = defaultdict(list)
+    moved = []
+    anchor = None
+    for line_id in to_order:
+        if line_id in stable:
+            anchor = line_id
+        elif line_id in pages_from:
+            moved.append(line_id)
+        else:
+            added_after[anchor].append(line_id)
+
+    candidates = []
+    for anchor, removed in removed_after.items():
+        candidates.extend(zip(removed, added_after.get(anchor, [])))
+    contents = _line_contents(session, [i for pair in candidates for i in pair])
+    replaced = {old: new for old, new in candidates}
+
+    # Each line keeps its place in the new revision, and removed lines go after
+    # the unmoved line they followed
+    changes: List[Tuple[float, LineChange]] = []
+    for anchor in set(removed_after) | set(added_after):
+        removed = removed_after.get(anchor, [])
+        added = added_after.get(anchor, [])
+        for index, new_id in enumerate(added):
+            old_id = removed[index] if index < len(removed) else None
+            if old_id is None:
+                change = LineChange(LINE_ADDED, pages_to[new_id], new_id, None)
+            elif contents.get(old_id) != contents.get(new_id):
+                change = LineChange(
+                    LINE_MODIFIED, pages_to[new_id], new_id, old_id, pages_from[old_id]
+                )
+            else:
+                continue
+            changes.append((to_positions[new_id], change))
+        after = to_positions[anchor] if anchor is not None else -1
+        for index, old_id in enumerate(removed[len(added) :]):
+            change = LineChange(
+                LINE_REMOVED, pages_from[old_id], None, old_id, pages_from[old_id]
+            )
+            position = after + len(added) + (index + 1) / (len(removed) + 1)
+            changes.append((position, change))
+    for line_id in moved:
+        change = LineChange(
+            LINE_MOVED, pages_to[line_id], line_id, line_id, pages_from[line_id]
+        )
+        changes.append((to_positions[line_id], change))
+    changes.sort(key=lambda item: (item[1].page or 0, item[0]))
+    diff.lines = [change for _position, change in changes]
+
+    diff.cues = _diff_cues(session, diff, replaced, pages_from, pages_to)
+    diff.cuts = _diff_cuts(session, diff, replaced, pages_from, pages_to)
+    return diff
+
+
+def _diff_cues(session, diff, replaced, pages_from, pages_to) -> List[CueChange]:
+    def cues_in(revision_id):
+        return select(CueAssociation.line_id, CueAssociation.cue_id).where(
+            CueAssociation.revision_id == revision_id
+        )
+
+    old_cues = cues_in(diff.from_revision_id)
+    new_cues = cues_in(diff.to_revision_id)
+    removed = {
+        cue_id: line_id
+        for line_id, cue_id in session.execute(old_cues.except_(new_cues))
+    }
+    added = {
+        cue_id: line_id
+        for line_id, cue_id in session.execute(new_cues.except_(old_cues))
+    }
+
+    changes = []
+    for cue_id, line_id in added.items():
+        from_line_id = removed.pop(cue_id, None)
+        if from_line_id is None:
+            changes.append(
+                CueChange(LINE_ADDED, pages_to.get(line_id), cue_id, line_id, None)
+            )
+        elif replaced.get(from_line_id) != line_id:
+            changes.append(
+                CueChange(
+                    LINE_MOVED, pages_to.get(line_id), cue_id, line_id, from_line_id
+                )
+            )
+    for cue_id, from_line_id in removed.items():
+        changes.append(
+            CueChange(
+                LINE_REMOVED, pages_from.get(from_line_id), cue_id, None, from_line_id
+            )
+        )
+    changes.sort(key=lambda change: (change.page or 0, change.cue_id))
+    return changes
+
+
+def _diff_cuts(session, diff, replaced, pages_from, pages_to) -> List[CutChange]:
+    def cuts_in(revision_id):
+        # Cuts are left behind when a line is deleted from a revision, so only
+        # those on lines still in the revision are compared
+        return (
+            select(ScriptLinePart.line_id, ScriptLinePart.part_index)
+            .join(ScriptCuts, ScriptCuts.line_part_id == ScriptLinePart.id)
+            .join(
+                ScriptLineRevisionAssociation,
+                (ScriptLineRevisionAssociation.line_id == ScriptLinePart.line_id)
+                & (ScriptLineRevisionAssociation.revision_id == revision_id),
+            )
+            .where(ScriptCuts.revision_id == revision_id)
+        )
+
+    old_cuts = cuts_in(diff.from_revision_id)
+    new_cuts = cuts_in(diff.to_revision_id)
+    removed = set(session.execute(old_cuts.except_(new_cuts)).tuples())
+    added = set(session.execute(new_cuts.except_(old_cuts)).tuples())
+
+    # A cut on a modified line is carried over to the part of the new line with the
+    # same index
+    carried = {
+        (line_id, part_index)
+        for line_id, part_index in removed
+        if (replaced.get(line_id), part_index) in added
+    }
+    changes = [
+        CutChange(LINE_REMOVED, pages_from[line_id], line_id, part_index)
+        for line_id, part_index in removed - carried
+    ]
+    carried_to = {(replaced[line_id], index) for line_id, index in carried}
+    changes.extend(
+        CutChange(LINE_ADDED, pages_to[line_id], line_id, part_index)
+        for line_id, part_index in added - carried_to
+    )
+    changes.sort(
+        key=lambda change: (change.page or 0, change.line_id, change.part_index)
+    )
+    return changes
+
+
+def load_cues(session: Session, cue_ids: Iterable[int]) -> Dict[int, dict]:
+    """
+    :return: Cue ID to the cue's ``ident`` and its type's ``prefix``
+    """
+    rows = session.execute(
+        select(Cue.id, Cue.ident, CueType.prefix)
+        .join(CueType, CueType.id == Cue.cue_type_id)
+        .where(Cue.id.in_(list(cue_ids)))
+    )
+    return {
+        cue_id: {"ident": ident, "prefix": prefix} for cue_id, ident, prefix in rows
+    }
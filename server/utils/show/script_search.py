@@ -0,0 +1,275 @@
+"""
+Full-text search over script line text.
+
+Searches are served from the ``script_line_search`` FTS5 index (see
+:data:`models.script.SCRIPT_LINE_SEARCH_DDL`), which indexes every
+:class:`~models.script.ScriptLinePart` once. Results are scoped to a single
+script revision by joining through ``script_line_revision_association``, and
+ranked with FTS5's built-in BM25 function.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.orm import Session
+
+from models.script import (
+    SCRIPT_LINE_SEARCH_TABLE,
+    ScriptLine,
+    ScriptLineRevisionAssociation,
+)
+
+
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_TOKENS = 16
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class ScriptSearchResult:
+    """A single line part matching a search query.
+
+    :param line_id: ID of the script line containing the match
+    :param line_part_id: ID of the matching line part
+    :param part_index: Index of the line part within its line
+    :param page: Page the line is on
+    :param line_index: Zero-based position of the line within its page
+    :param act_id: Act the line belongs to
+    :param scene_id: Scene the line belongs to
+    :param character_id: Character speaking the line part, if any
+    :param character_group_id: Character group speaking the line part, if any
+    :param line_text: Full text of the line part
+    :param highlight: Full text with matched terms wrapped in highlight markers
+    :param snippet: Short extract around the match, with highlight markers
+    :param is_cut: Whether the line part is cut in the searched revision
+    :param rank: BM25 rank (lower is a better match)
+    """
+
+    line_id: int
+    line_part_id: int
+    part_index: Optional[int]
+    page: Optional[int]
+    line_index: Optional[int]
+    act_id: Optional[int]
+    scene_id: Optional[int]
+    character_id: Optional[int]
+    character_group_id: Optional[int]
+    line_text: Optional[str]
+    highlight: str
+    snippet: str
+    is_cut: bool
+    rank: float
+
+    def as_json(self) -> dict:
+        return {
+            "line_id": self.line_id,
+            "line_part_id": self.line_part_id,
+            "part_index": self.part_index,
+            "page": self.page,
+            "line_index": self.line_index,
+            "act_id": self.act_id,
+            "scene_id": self.scene_id,
+            "character_id": self.character_id,
+            "character_group_id": self.character_group_id,
+            "line_text": self.line_text,
+            "highlight": self.highlight,
+            "snippet": self.snippet,
+            "is_cut": self.is_cut,
+            "rank": self.rank,
+        }
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Convert free text from a user into a safe FTS5 MATCH expression.
+
+    Every word is quoted (so FTS5 operators and punctuation in the input cannot
+    cause syntax errors) and treated as a prefix, and all words must match.
+
+    :param query: Raw search text
+    :returns: FTS5 query string, or None if the text contains no searchable words
+    """
+    tokens = _TOKEN_RE.findall(query or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _character_filter_clause(character_ids: List[int]) -> str:
+    # A character matches a line part if they speak it directly, or are a
+    # member of the character group speaking it
+    if not character_ids:
+        return ""
+    return (
+        "AND (slp.character_id IN :character_ids "
+        "OR slp.character_group_id IN ("
+        "SELECT cga.character_group_id FROM character_group_association AS cga "
+        "WHERE cga.character_id IN :character_ids)) "
+    )
+
+
+def count_matches(
+    session: Session,
+    revision_id: int,
+    match_query: str,
+    character_ids: Optional[List[int]] = None,
+) -> int:
+    """
+    Count line parts in a revision matching an FTS5 query.
+
+    :param session: Database session
+    :param revision_id: Script revision to search
+    :param match_query: FTS5 MATCH expression, see :func:`build_match_query`
+    :param character_ids: Optional list of character IDs to restrict results to
+    :returns: Number of matching line parts
+    """
+    character_ids = list(character_ids or [])
+    stmt = text(
+        f"SELECT count(*) FROM {SCRIPT_LINE_SEARCH_TABLE} "
+        f"JOIN script_line_parts AS slp ON slp.id = {SCRIPT_LINE_SEARCH_TABLE}.rowid "
+        "JOIN script_line_revision_association AS slra "
+        "ON slra.line_id = slp.line_id AND slra.revision_id = :revision_id "
+        f"WHERE {SCRIPT_LINE_SEARCH_TABLE} MATCH :match_query "
+        f"{_character_filter_clause(character_ids)}"
+    )
+    params = {"revision_id": revision_id, "match_query": match_query}
+    if character_ids:
+        stmt = stmt.bindparams(bindparam("character_ids", expanding=True))
+        params["character_ids"] = character_ids
+    return session.execute(stmt, params).scalar() or 0
+
+
+def search_lines(
+    session: Session,
+    revision_id: int,
+    match_query: str,
+    character_ids: Optional[List[int]] = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> List[ScriptSearchResult]:
+    """
+    Search a script revision for line parts matching an FTS5 query.
+
+    :param session: Database session
+    :param revision_id: Script revision to search
+    :param match_query: FTS5 MATCH expression, see :func:`build_match_query`
+    :param character_ids: Optional list of character IDs to restrict results to
+    :param limit: Maximum number of results to return
+    :param offset: Number of results to skip
+    :returns: Matching line parts, best match first
+    """
+    character_ids = list(character_ids or [])
+    stmt = text(
+        "SELECT slp.id AS line_part_id, slp.line_id, slp.part_index, "
+        "slp.character_id, slp.character_group_id, slp.line_text, "
+        "sl.page, sl.act_id, sl.scene_id, "
+        f"highlight({SCRIPT_LINE_SEARCH_TABLE}, 0, :hl_open, :hl_close) AS highlight, "
+        f"snippet({SCRIPT_LINE_SEARCH_TABLE}, 0, :hl_open, :hl_close, :ellipsis, "
+        f"{SNIPPET_TOKENS}) AS snippet, "
+        "EXISTS (SELECT 1 FROM script_line_cuts AS slc "
+        "WHERE slc.line_part_id = slp.id AND slc.revision_id = :revision_id) "
+        "AS is_cut, "
+        f"bm25({SCRIPT_LINE_SEARCH_TABLE}) AS rank "
+        f"FROM {SCRIPT_LINE_SEARCH_TABLE} "
+        f"JOIN script_line_parts AS slp ON slp.id = {SCRIPT_LINE_SEARCH_TABLE}.rowid "
+        "JOIN script_line_revision_association AS slra "
+        "ON slra.line_id = slp.line_id AND slra.revision_id = :revision_id "
+        "JOIN script_lines AS sl ON sl.id = slp.line_id "
+        f"WHERE {SCRIPT_LINE_SEARCH_TABLE} MATCH :match_query "
+        f"{_character_filter_clause(character_ids)}"
+        "ORDER BY rank, sl.page, slp.line_id, slp.part_index "
+        "LIMIT :limit OFFSET :offset"
+    )
+    params = {
+        "revision_id": revision_id,
+        "match_query": match_query,
+        "hl_open": HIGHLIGHT_OPEN,
+        "hl_close": HIGHLIGHT_CLOSE,
+        "ellipsis": SNIPPET_ELLIPSIS,
+        "limit": limit,
+        "offset": offset,
+    }
+    if character_ids:
+        stmt = stmt.bindparams(bindparam("character_ids", expanding=True))
+        params["character_ids"] = character_ids
+
+    rows = session.execute(stmt, params).mappings().all()
+    line_positions = get_line_positions(
+        session, revision_id, {row["page"] for row in rows if row["page"] is not None}
+    )
+
+    return [
+        ScriptSearchResult(
+            line_id=row["line_id"],
+            line_part_id=row["line_part_id"],
+            part_index=row["part_index"],
+            page=row["page"],
+            line_index=line_positions.get(row["line_id"]),
+            act_id=row["act_id"],
+            scene_id=row["scene_id"],
+            character_id=row["character_id"],
+            character_group_id=row["character_group_id"],
+            line_text=row["line_text"],
+            highlight=row["highlight"],
+            snippet=row["snippet"],
+            is_cut=bool(row["is_cut"]),
+            rank=row["rank"],
+        )
+        for row in rows
+    ]
+
+
+def get_line_positions(
+    session: Session, revision_id: int, pages: Iterable[int]
+) -> Dict[int, int]:
+    """
+    Get the zero-based position of each line within its page for a revision.
+
+    Loads the line order links for the requested pages in a single query and
+    walks them in memory, rather than following the linked list one lazy load
+    at a time.
+
+    :param session: Database session
+    :param revision_id: Script revision the lines belong to
+    :param pages: Page numbers to compute positions for
+    :returns: Dict mapping line ID to its index within its page
+    """
+    pages = set(pages)
+    if not pages:
+        return {}
+
+    rows = session.execute(
+        select(
+            ScriptLineRevisionAssociation.line_id,
+            ScriptLineRevisionAssociation.previous_line_id,
+            ScriptLineRevisionAssociation.next_line_id,
+            ScriptLine.page,
+        )
+        .join(ScriptLine, ScriptLine.id == ScriptLineRevisionAssociation.line_id)
+        .where(
+            ScriptLineRevisionAssociation.revision_id == revision_id,
+            ScriptLine.page.in_(pages),
+        )
+    ).all()
+    links = {row.line_id: row for row in rows}
+
+    positions: Dict[int, int] = {}
+    for row in rows:
+        previous = links.get(row.previous_line_id)
+        if previous is not None and previous.page == row.page:
+            continue
+        # This is the first line of its page, walk forwards until the page ends
+        index = 0
+        current = row
+        while current is not None and current.page == row.page:
+            if current.line_id in positions:
+                break
+            positions[current.line_id] = index
+            index += 1
+            current = links.get(current.next_line_id)
+    return positions
@@ -0,0 +1,294 @@
+"""
+Set-based deletion of a show and everything belonging to it.
+
+Deleting a show through ``session.delete(show)`` loads every object in the show
+into the session so the ORM can cascade to it, and calls the delete hooks once for
+every object. :func:`delete_show` instead issues one ``DELETE ... WHERE ... IN
+(SELECT ...)`` statement per table, children before parents, and calls the bulk
+delete hooks (see :meth:`~utils.database.DigiSQLAlchemy.register_bulk_delete_hook`)
+once per table with the primary keys of the rows about to be deleted.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import Select, Table, delete, inspect, or_, select, update
+from sqlalchemy.orm import Session
+
+from models.cue import Cue, CueAssociation, CueGroup, CueType
+from models.mics import Microphone, MicrophoneAllocation
+from models.script import (
+    CompiledScript,
+    Script,
+    ScriptCuts,
+    ScriptLine,
+    ScriptLinePart,
+    ScriptLineRevisionAssociation,
+    ScriptRevision,
+    StageDirectionStyle,
+)
+from models.session import (
+    Interval,
+    SessionTag,
+    ShowSession,
+    session_tag_association_table,
+)
+from models.show import (
+    Act,
+    Cast,
+    Character,
+    CharacterGroup,
+    Scene,
+    Show,
+    character_group_association_table,
+)
+from models.stage import (
+    Crew,
+    CrewAssignment,
+    Props,
+    PropsAllocation,
+    PropType,
+    Scenery,
+    SceneryAllocation,
+    SceneryType,
+)
+
+
+@dataclass
+class ShowDeletionResult:
+    """
+    Outcome of deleting a show.
+
+    :param show_id: ID of the deleted show
+    :param row_counts: Table name to the number of rows deleted from it
+    :param compiled_script_paths: Paths of the compiled script files for the show,
+                                  which should be removed once the transaction commits
+    """
+
+    show_id: int
+    row_counts: Dict[str, int] = field(default_factory=dict)
+    compiled_script_paths: List[str] = field(default_factory=list)
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.row_counts.values())
+
+
+def delete_show(session: Session, show_id: int) -> Optional[ShowDeletionResult]:
+    """
+    Delete a show and all of its data with set-based statements.
+
+    Rows are deleted without being loaded into the session, so objects belonging to
+    the show which are already in the session are left stale. Nothing is committed.
+
+    :param session: SQLAlchemy session, bound to a :class:`~utils.database.DigiSQLAlchemy`
+    :param show_id: ID of the show to delete
+    :return: Details of what was deleted, or None if the show does not exist
+    """
+    if session.scalar(select(Show.id).where(Show.id == show_id)) is None:
+        return None
+
+    result = ShowDeletionResult(show_id=show_id)
+
+    def ids(column, *conditions) -> Select:
+        return select(column).where(*conditions)
+
+    acts = ids(Act.id, Act.show_id == show_id)
+    scenes = ids(Scene.id, Scene.show_id == show_id)
+    scripts = ids(Script.id, Script.show_id == show_id)
+    revisions = ids(ScriptRevision.id, ScriptRevision.script_id.in_(scripts))
+    show_sessions = ids(ShowSession.id, ShowSession.show_id == show_id)
+    session_tags = ids(SessionTag.id, SessionTag.show_id == show_id)
+    cue_types = ids(CueType.id, CueType.show_id == show_id)
+    cues = ids(Cue.id, Cue.cue_type_id.in_(cue_types))
+    characters = ids(Character.id, Character.show_id == show_id)
+    character_groups = ids(CharacterGroup.id, CharacterGroup.show_id == show_id)
+    mics = ids(Microphone.id, Microphone.show_id == show_id)
+    crew = ids(Crew.id, Crew.show_id == show_id)
+    props = ids(Props.id, Props.show_id == show_id)
+    scenery = ids(Scenery.id, Scenery.show_id == show_id)
+
+    # Lines belong to the show through their act and scene, but the ORM cascade also
+    # removes lines only reachable through a revision of the show. Those have to be
+    # found before the revision associations are deleted.
+    unplaced_line_ids = session.scalars(
+        select(ScriptLineRevisionAssociation.line_id)
+        .join(ScriptLine, ScriptLine.id == ScriptLineRevisionAssociation.line_id)
+        .where(
+            ScriptLineRevisionAssociation.revision_id.in_(revisions),
+            ScriptLine.act_id.is_(None),
+            ScriptLine.scene_id.is_(None),
+        )
+        .distinct()
+    ).all()
+    line_condition = or_(
+        ScriptLine.act_id.in_(acts),
+        ScriptLine.scene_id.in_(scenes),
+        ScriptLine.id.in_(unplaced_line_ids),
+    )
+    lines = ids(ScriptLine.id, line_condition)
+    line_parts = ids(ScriptLinePart.id, ScriptLinePart.line_id.in_(lines))
+
+    result.compiled_script_paths = [
+        path
+        for path in session.scalars(
+            select(CompiledScript.data_path).where(
+                CompiledScript.revision_id.in_(revisions)
+            )
+        )
+        if path
+    ]
+
+    # Break the circular references between the show, its sessions, acts, scenes
+    # and scripts, so each table can be deleted with a single statement
+    _null_references(
+        session,
+        Show,
+        Show.id == show_id,
+        current_session_id=None,
+        first_act_id=None,
+    )
+    _null_references(session, Script, Script.show_id == show_id, current_revision=None)
+    _null_references(session, Act, Act.show_id == show_id, first_scene_id=None)
+
+    steps = [
+        (
+            ScriptCuts,
+            or_(
+                ScriptCuts.revision_id.in_(revisions),
+                ScriptCuts.line_part_id.in_(line_parts),
+            ),
+        ),
+        (
+            CueAssociation,
+            or_(
+                CueAssociation.revision_id.in_(revisions),
+                CueAssociation.line_id.in_(lines),
+                CueAssociation.cue_id.in_(cues),
+            ),
+        ),
+        (Cue, Cue.cue_type_id.in_(cue_types)),
+        (CueGroup, CueGroup.cue_type_id.in_(cue_types)),
+        (
+            ScriptLineRevisionAssociation,
+            or_(
+                ScriptLineRevisionAssociation.revision_id.in_(revisions),
+                ScriptLineRevisionAssociation.line_id.in_(lines),
+            ),
+        ),
+        (CompiledScript, CompiledScript.revision_id.in_(revisions)),
+        (
+            Interval,
+            or_(Interval.session_id.in_(show_sessions), Interval.act_id.in_(acts)),
+        ),
+        (
+            session_tag_association_table,
+            or_(
+                session_tag_association_table.c.session_id.in_(show_sessions),
+                session_tag_association_table.c.tag_id.in_(session_tags),
+            ),
+        ),
+        (ShowSession, ShowSession.show_id == show_id),
+        (SessionTag, SessionTag.show_id == show_id),
+        (ScriptLinePart, ScriptLinePart.line_id.in_(lines)),
+        (ScriptLine, line_condition),
+        (ScriptRevision, ScriptRevision.script_id.in_(scripts)),
+        (StageDirectionStyle, StageDirectionStyle.script_id.in_(scripts)),
+        (Script, Script.show_id == show_id),
+        (
+            MicrophoneAllocation,
+            or_(
+                MicrophoneAllocation.mic_id.in_(mics),
+                MicrophoneAllocation.scene_id.in_(scenes),
+                MicrophoneAllocation.character_id.in_(characters),
+            ),
+        ),
+        (Microphone, Microphone.show_id == show_id),
+        (
+            CrewAssignment,
+            or_(
+                CrewAssignment.crew_id.in_(crew),
+                CrewAssignment.scene_id.in_(scenes),
+                CrewAssignment.prop_id.in_(props),
+                CrewAssignment.scenery_id.in_(scenery),
+            ),
+        ),
+        (
+            PropsAllocation,
+            or_(
+                PropsAllocation.props_id.in_(props),
+                PropsAllocation.scene_id.in_(scenes),
+            ),
+        ),
+        (
+            SceneryAllocation,
+            or_(
+                SceneryAllocation.scenery_id.in_(scenery),
+                SceneryAllocation.scene_id.in_(scenes),
+            ),
+        ),
+        (Props, Props.show_id == show_id),
+        (Scenery, Scenery.show_id == show_id),
+        (PropType, PropType.show_id == show_id),
+        (SceneryType, SceneryType.show_id == show_id),
+        (Crew, Crew.show_id == show_id),
+        (
+            character_group_association_table,
+            or_(
+                character_group_association_table.c.character_id.in_(characters),
+                character_group_association_table.c.character_group_id.in_(
+                    character_groups
+                ),
+            ),
+        ),
+        (Character, Character.show_id == show_id),
+        (CharacterGroup, CharacterGroup.show_id == show_id),
+        (Cast, Cast.show_id == show_id),
+        (CueType, CueType.show_id == show_id),
+        (Scene, Scene.show_id == show_id),
+        (Act, Act.show_id == show_id),
+        (Show, Show.id == show_id),
+    ]
+    for target, condition in steps:
+        _delete_rows(session, result, target, condition)
+
+    return result
+
+
+def _null_references(session: Session, model, condition, **values) -> None:
+    session.execute(
+        update(model)
+        .where(condition)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _delete_rows(session: Session, result: ShowDeletionResult, target, condition):
+    """
+    Delete the rows of a model or association table matching a condition.
+
+    For mapped models, the bulk delete hooks are called with the primary keys of the
+    matching rows before they are deleted. Association tables have no hooks, as the
+    ORM does not call the delete hooks for their rows either.
+    """
+    if isinstance(target, Table):
+        table = target
+        count = session.execute(delete(table).where(condition)).rowcount
+    else:
+        table = inspect(target).persist_selectable
+        primary_keys = [
+            tuple(row)
+            for row in session.execute(
+                select(*inspect(target).primary_key).where(condition)
+            )
+        ]
+        if not primary_keys:
+            return
+        session.db.run_bulk_delete_hooks(session, target, primary_keys)
+        session.execute(
+            delete(target).where(condition).execution_options(synchronize_session=False)
+        )
+        count = len(primary_keys)
+    if count:
+        result.row_counts[table.name] = count
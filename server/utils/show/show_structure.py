@@ -0,0 +1,194 @@
+"""
+Cached running order of the acts and scenes in a show.
+
+Acts and scenes are stored as linked lists (``Show.first_act``, ``Act.next_act``,
+``Act.first_scene`` and ``Scene.next_scene``), so walking them through the ORM
+costs a lazy load per node. :func:`get_show_structure` walks them once, from two
+queries, and caches the result per show until a transaction which touches the
+show, its acts or its scenes is committed.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from digi_server import metrics
+from models.show import Act, Scene, Show
+from utils.database import DigiDBSession
+
+
+# Key in Session.info for the IDs of shows whose structure the session has changed,
+# None if every show should be treated as changed
+_CHANGED_SHOWS_KEY = "show_structure_changed"
+
+_cache: Dict[int, "ShowStructure"] = {}
+
+
+@dataclass(frozen=True)
+class ShowStructure:
+    """
+    Running order of a show.
+
+    :param show_id: ID of the show
+    :param act_ids: Act IDs in show order
+    :param act_scene_ids: Act ID to the IDs of its scenes in order
+    :param scene_ids: Scene IDs in show order
+    :param scene_groups: Scene IDs in show order, split into groups at each interval
+    :param scene_positions: Scene ID to its index in ``scene_ids``
+    :param scene_acts: Scene ID to the ID of its act
+    """
+
+    show_id: int
+    act_ids: Tuple[int, ...]
+    act_scene_ids: Dict[int, Tuple[int, ...]]
+    scene_ids: Tuple[int, ...]
+    scene_groups: Tuple[Tuple[int, ...], ...]
+    scene_positions: Dict[int, int]
+    scene_acts: Dict[int, int]
+
+
+def load_show_structure(session: Session, show_id: int) -> ShowStructure:
+    """
+    Read the running order of a show from the database, bypassing the cache.
+
+    :param session: SQLAlchemy session
+    :param show_id: ID of the show
+    :return: Structure of the show
+    """
+    first_act_id = session.scalar(select(Show.first_act_id).where(Show.id == show_id))
+    acts = session.execute(
+        select(Act.id, Act.previous_act_id, Act.first_scene_id, Act.interval_after)
+        .where(Act.show_id == show_id)
+        .order_by(Act.id)
+    ).all()
+    scenes = session.execute(
+        select(Scene.id, Scene.previous_scene_id)
+        .where(Scene.show_id == show_id)
+        .order_by(Scene.id)
+    ).all()
+
+    next_act = {act.previous_act_id: act for act in acts if act.previous_act_id}
+    next_scene = {
+        scene.previous_scene_id: scene.id for scene in scenes if scene.previous_scene_id
+    }
+    act_by_id = {act.id: act for act in acts}
+
+    act_ids = []
+    act_scene_ids = {}
+    scene_ids = []
+    scene_groups = []
+    scene_acts = {}
+    current_group = []
+    act = act_by_id.get(first_act_id)
+    # Bound the walks by the number of rows, so a cycle in the links cannot hang
+    while act and len(act_ids) < len(acts):
+        act_ids.append(act.id)
+        act_scenes = []
+        scene_id = act.first_scene_id
+        while scene_id and len(act_scenes) < len(scenes):
+            act_scenes.append(scene_id)
+            scene_acts[scene_id] = act.id
+            scene_id = next_scene.get(scene_id)
+        if act_scenes:
+            act_scene_ids[act.id] = tuple(act_scenes)
+        scene_ids.extend(act_scenes)
+        current_group.extend(act_scenes)
+        if act.interval_after:
+            scene_groups.append(tuple(current_group))
+            current_group = []
+        act = next_act.get(act.id)
+    if current_group:
+        scene_groups.append(tuple(current_group))
+
+    return ShowStructure(
+        show_id=show_id,
+        act_ids=tuple(act_ids),
+        act_scene_ids=act_scene_ids,
+        scene_ids=tuple(scene_ids),
+        scene_groups=tuple(scene_groups),
+        scene_positions={scene_id: i for i, scene_id in enumerate(scene_ids)},
+        scene_acts=scene_acts,
+    )
+
+
+def get_show_structure(session: Session, show_id: int) -> ShowStructure:
+    """
+    Get the running order of a show, from the cache where possible.
+
+    :param session: SQLAlchemy session
+    :param show_id: ID of the show
+    :return: Structure of the show
+    """
+    if not _has_uncommitted_changes(session, show_id):
+        structure = _cache.get(show_id)
+        if structure is not None:
+            metrics.record_cache_lookup("show_structure", True)
+            return structure
+
+    metrics.record_cache_lookup("show_structure", False)
+    structure = load_show_structure(session, show_id)
+    # Loading may have flushed pending changes, so check again before caching, as
+    # what this session has changed but not yet committed may be rolled back
+    if not _has_uncommitted_changes(session, show_id):
+        _cache[show_id] = structure
+    return structure
+
+
+def invalidate_show_structure(show_id: Optional[int] = None) -> None:
+    """
+    Remove the cached structure of a show.
+
+    :param show_id: ID of the show, or None to clear the whole cache
+    """
+    if show_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(show_id, None)
+
+
+def _has_uncommitted_changes(session: Session, show_id: int) -> bool:
+    changed = session.info.get(_CHANGED_SHOWS_KEY, set())
+    return changed is None or show_id in changed
+
+
+def _mark_changed(session: Session, show_ids: Optional[Set[int]]) -> None:
+    changed = session.info.get(_CHANGED_SHOWS_KEY, set())
+    if changed is None or show_ids is None:
+        session.info[_CHANGED_SHOWS_KEY] = None
+    else:
+        session.info[_CHANGED_SHOWS_KEY] = changed | show_ids
+
+
+@event.listens_for(DigiDBSession, "after_flush")
+def _track_flushed_changes(session: Session, _flush_context) -> None:
+    show_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Show):
+            show_ids.add(obj.id)
+        elif isinstance(obj, (Act, Scene)) and obj.show_id is not None:
+            show_ids.add(obj.show_id)
+    if show_ids:
+        _mark_changed(session, show_ids)
+
+
+@event.listens_for(DigiDBSession, "do_orm_execute")
+def _track_bulk_changes(orm_execute_state) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (Show, Act, Scene):
+        # The rows affected by bulk statements are not known, so drop every show
+        _mark_changed(orm_execute_state.session, None)
+
+
+@event.listens_for(DigiDBSession, "after_commit")
+@event.listens_for(DigiDBSession, "after_rollback")
+def _invalidate_changed(session: Session) -> None:
+    changed = session.info.pop(_CHANGED_SHOWS_KEY, set())
+    if changed is None:
+        invalidate_show_structure()
+    else:
+        for show_id in changed:
+            invalidate_show_structure(show_id)
@@ -0,0 +1,514 @@
+"""
+Export of a show to a stream of JSON Lines, and import of that stream as a new show.
+
+The export is written one table at a time, parents before children: a header line
+naming the table and its columns, then one JSON array of column values per row,
+read from the database in batches so the script is never held in memory at once.
+The first line describes the format and the last line counts the rows written, so
+a truncated export is detected on import::
+
+    {"format": "digiscript-show", "version": 1, "show_id": 3}
+    {"table": "shows", "columns": ["id", "name", ...]}
+    [3, "Example", ...]
+    {"table": "act", "columns": [...]}
+    ...
+    {"end": true, "rows": 52310}
+
+Import inserts the rows of each table in batches, with the IDs of the exported rows
+replaced by new ones. References to a table which is imported later, or to the
+same table, such as :attr:`~models.show.Act.first_scene_id` or
+:attr:`~models.show.Scene.previous_scene_id`, are set once every row is inserted.
+Show sessions, intervals and compiled scripts are not exported.
+"""
+
+import datetime
+import enum
+import json
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Column, Table, bindparam, case, insert, select, update
+from sqlalchemy.orm import Session
+
+from models.cue import Cue, CueAssociation, CueGroup, CueType
+from models.mics import Microphone, MicrophoneAllocation
+from models.script import (
+    Script,
+    ScriptCuts,
+    ScriptLine,
+    ScriptLinePart,
+    ScriptLineRevisionAssociation,
+    ScriptRevision,
+    StageDirectionStyle,
+)
+from models.session import SessionTag
+from models.show import (
+    Act,
+    Cast,
+    Character,
+    CharacterGroup,
+    Scene,
+    Show,
+    character_group_association_table,
+)
+from models.stage import (
+    Crew,
+    CrewAssignment,
+    Props,
+    PropsAllocation,
+    PropType,
+    Scenery,
+    SceneryAllocation,
+    SceneryType,
+)
+from utils.show.show_structure import load_show_structure
+
+
+FORMAT = "digiscript-show"
+FORMAT_VERSION = 1
+# Rows read from the database, or inserted into it, per statement
+BATCH_SIZE = 1000
+# Compressed bytes to collect before handing a chunk of the export on
+CHUNK_SIZE = 64 * 1024
+
+# Tables in the order they are exported and imported
+TABLES: List[Table] = [
+    Show.__table__,
+    Act.__table__,
+    Scene.__table__,
+    Cast.__table__,
+    Character.__table__,
+    CharacterGroup.__table__,
+    character_group_association_table,
+    Script.__table__,
+    ScriptRevision.__table__,
+    StageDirectionStyle.__table__,
+    ScriptLine.__table__,
+    ScriptLinePart.__table__,
+    ScriptLineRevisionAssociation.__table__,
+    ScriptCuts.__table__,
+    CueType.__table__,
+    CueGroup.__table__,
+    Cue.__table__,
+    CueAssociation.__table__,
+    Microphone.__table__,
+    MicrophoneAllocation.__table__,
+    SessionTag.__table__,
+    Crew.__table__,
+    SceneryType.__table__,
+    Scenery.__table__,
+    PropType.__table__,
+    Props.__table__,
+    SceneryAllocation.__table__,
+    PropsAllocation.__table__,
+    CrewAssignment.__table__,
+]
+_TABLES_BY_NAME: Dict[str, Table] = {table.name: table for table in TABLES}
+
+
+class ShowImportError(Exception):
+    """The data being imported is not a valid show export."""
+
+
+@dataclass
+class ShowImportResult:
+    """
+    Outcome of importing a show.
+
+    :param show_id: ID of the new show
+    :param row_counts: Table name to the number of rows inserted into it
+    """
+
+    show_id: int
+    row_counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.row_counts.values())
+
+
+def _references(column: Column) -> Optional[str]:
+    """
+    :return: Name of the table whose ID the column holds, if any
+    """
+    for foreign_key in column.foreign_keys:
+        if foreign_key.column.name == "id":
+            return foreign_key.column.table.name
+    return None
+
+
+def _encode(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _decoder(column: Column) -> Optional[Callable]:
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return None
+    if python_type is datetime.datetime:
+        return datetime.datetime.fromisoformat
+    if python_type is datetime.date:
+        return datetime.date.fromisoformat
+    if issubclass(python_type, enum.Enum):
+        return python_type
+    return None
+
+
+def _export_queries(session: Session, show_id: int) -> Dict[str, Tuple]:
+    """
+    :return: Table name to the condition selecting the show's rows, and the order
+             to export them in
+    """
+
+    def ids(column, *conditions):
+        return select(column).where(*conditions)
+
+    acts = ids(Act.id, Act.show_id == show_id)
+    scenes = ids(Scene.id, Scene.show_id == show_id)
+    scripts = ids(Script.id, Script.show_id == show_id)
+    revisions = ids(ScriptRevision.id, ScriptRevision.script_id.in_(scripts))
+    cue_types = ids(CueType.id, CueType.show_id == show_id)
+    characters = ids(Character.id, Character.show_id == show_id)
+    crew = ids(Crew.id, Crew.show_id == show_id)
+    lines = (
+        select(ScriptLineRevisionAssociation.line_id)
+        .where(ScriptLineRevisionAssociation.revision_id.in_(revisions))
+        .union(
+            ids(ScriptLine.id, ScriptLine.act_id.in_(acts)),
+            ids(ScriptLine.id, ScriptLine.scene_id.in_(scenes)),
+        )
+    )
+
+    # Acts and scenes in running order, then any not linked into it
+    structure = load_show_structure(session, show_id)
+
+    def running_order(column, ordered_ids):
+        if not ordered_ids:
+            return (column,)
+        positions = {item_id: index for index, item_id in enumerate(ordered_ids)}
+        return case(positions, value=column, else_=len(positions)), column
+
+    association = ScriptLineRevisionAssociation
+    allocation = MicrophoneAllocation
+    return {
+        "shows": (Show.id == show_id, (Show.id,)),
+        "act": (Act.show_id == show_id, running_order(Act.id, structure.act_ids)),
+        "scene": (
+            Scene.show_id == show_id,
+            running_order(Scene.id, structure.scene_ids),
+        ),
+        "cast": (Cast.show_id == show_id, (Cast.id,)),
+        "character": (Character.show_id == show_id, (Character.id,)),
+        "character_group": (CharacterGroup.show_id == show_id, (CharacterGroup.id,)),
+        "character_group_association": (
+            character_group_association_table.c.character_id.in_(characters),
+            tuple(character_group_association_table.primary_key.columns),
+        ),
+        "script": (Script.show_id == show_id, (Script.id,)),
+        "script_revisions": (
+            ScriptRevision.script_id.in_(scripts),
+            (ScriptRevision.id,),
+        ),
+        "stage_direction_styles": (
+            StageDirectionStyle.script_id.in_(scripts),
+            (StageDirectionStyle.id,),
+        ),
+        "script_lines": (ScriptLine.id.in_(lines), (ScriptLine.id,)),
+        "script_line_parts": (
+            ScriptLinePart.line_id.in_(lines),
+            (ScriptLinePart.id,),
+        ),
+        "script_line_revision_association": (
+            association.revision_id.in_(revisions),
+            (association.revision_id, association.line_id),
+        ),
+        "script_line_cuts": (
+            ScriptCuts.revision_id.in_(revisions),
+            (ScriptCuts.revision_id, ScriptCuts.line_part_id),
+        ),
+        "cuetypes": (CueType.show_id == show_id, (CueType.id,)),
+        "cue_groups": (CueGroup.cue_type_id.in_(cue_types), (CueGroup.id,)),
+        "cue": (Cue.cue_type_id.in_(cue_types), (Cue.id,)),
+        "script_cue_association": (
+            CueAssociation.revision_id.in_(revisions),
+            (CueAssociation.revision_id, CueAssociation.line_id, CueAssociation.cue_id),
+        ),
+        "microphones": (Microphone.show_id == show_id, (Microphone.id,)),
+        "microphone_allocations": (
+            allocation.scene_id.in_(scenes),
+            (allocation.mic_id, allocation.scene_id, allocation.character_id),
+        ),
+        "session_tags": (SessionTag.show_id == show_id, (SessionTag.id,)),
+        "crew": (Crew.show_id == show_id, (Crew.id,)),
+        "scenery_type": (SceneryType.show_id == show_id, (SceneryType.id,)),
+        "scenery": (Scenery.show_id == show_id, (Scenery.id,)),
+        "prop_type": (PropType.show_id == show_id, (PropType.id,)),
+        "props": (Props.show_id == show_id, (Props.id,)),
+        "scenery_allocation": (
+            SceneryAllocation.scene_id.in_(scenes),
+            (SceneryAllocation.id,),
+        ),
+        "props_allocation": (
+            PropsAllocation.scene_id.in_(scenes),
+            (PropsAllocation.id,),
+        ),
+        "crew_assignment": (CrewAssignment.crew_id.in_(crew), (CrewAssignment.id,)),
+    }
+
+
+def export_show(session: Session, show_id: int) -> Iterator[str]:
+    """
+    Export a show as JSON Lines.
+
+    :param session: SQLAlchemy session
+    :param show_id: ID of the show to export, which must exist
+    :return: Iterator over the lines of the export, each ending in a newline
+    """
+    queries = _export_queries(session, show_id)
+    yield json.dumps({"format": FORMAT, "version": FORMAT_VERSION, "show_id": show_id})
+    yield "\n"
+    total_rows = 0
+    for table in TABLES:
+        condition, order_by = queries[table.name]
+        yield json.dumps({"table": table.name, "columns": list(table.columns.keys())})
+        yield "\n"
+        result = session.execute(
+            select(table).where(condition).order_by(*order_by),
+            execution_options={"yield_per": BATCH_SIZE},
+        )
+        for rows in result.partitions():
+            total_rows += len(rows)
+            yield "".join(
+                json.dumps([_encode(value) for value in row]) + "\n" for row in rows
+            )
+    yield json.dumps({"end": True, "rows": total_rows})
+    yield "\n"
+
+
+def export_show_gzip(session: Session, show_id: int) -> Iterator[bytes]:
+    """
+    Export a show as gzip-compressed JSON Lines.
+
+    :param session: SQLAlchemy session
+    :param show_id: ID of the show to export, which must exist
+    :return: Iterator over chunks of the compressed export
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    pending = []
+    pending_size = 0
+    for text in export_show(session, show_id):
+        data = compressor.compress(text.encode("utf-8"))
+        if data:
+            pending.append(data)
+            pending_size += len(data)
+        if pending_size >= CHUNK_SIZE:
+            yield b"".join(pending)
+            pending = []
+            pending_size = 0
+    pending.append(compressor.flush())
+    yield b"".join(pending)
+
+
+def iter_lines(data: bytes) -> Iterator[bytes]:
+    """
+    Split an export into lines, decompressing it first if it is gzip-compressed.
+
+    :param data: The export, as uploaded
+    :return: Iterator over the lines of the export
+    """
+    if data[:2] != b"\x1f\x8b":
+        yield from data.splitlines()
+        return
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    remainder = b""
+    try:
+        for start in range(0, len(data), CHUNK_SIZE):
+            remainder += decompressor.decompress(data[start : start + CHUNK_SIZE])
+            *lines, remainder = remainder.split(b"\n")
+            yield from lines
+        remainder += decompressor.flush()
+    except zlib.error as error:
+        raise ShowImportError(f"Export is not valid gzip data: {error}") from error
+    yield from remainder.split(b"\n")
+
+
+def _self_references(table: Table) -> set:
+    """
+    :return: Names of the columns in foreign keys from the table to itself, other
+             than its primary key
+    """
+    return {
+        column.name
+        for constraint in table.foreign_key_constraints
+        if constraint.referred_table is table
+        for column in constraint.columns
+        if not column.primary_key
+    }
+
+
+class _Importer:
+    def __init__(self, session: Session):
+        self.session = session
+        self.id_maps: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.imported: set = set()
+        # (table, column) to (new primary key, exported ID referenced) pairs, set
+        # once every table is imported
+        self.deferred: Dict[Tuple[str, str], List[Tuple[tuple, int]]] = defaultdict(
+            list
+        )
+        self.row_counts: Dict[str, int] = {}
+
+    def insert(self, table: Table, columns: List[str], rows: List[list]) -> None:
+        key_columns = [column.name for column in table.primary_key.columns]
+        has_id = key_columns == ["id"]
+        references = {name: _references(table.c[name]) for name in columns}
+        decoders = {name: _decoder(table.c[name]) for name in columns}
+        # Rows referring to rows of the same table are inserted without the
+        # reference, so SQLite never has to look for rows in violation of a
+        # deferred foreign key, which it does with a scan of the table
+        self_references = _self_references(table)
+        values = []
+        deferred = []
+        for row in rows:
+            if len(row) != len(columns):
+                raise ShowImportError(f"Row in {table.name} has the wrong length")
+            record = {}
+            for name, value in zip(columns, row):
+                if value is not None and decoders[name]:
+                    value = decoders[name](value)
+                target = references[name]
+                if target and target not in _TABLES_BY_NAME:
+                    # Such as the show's current session, which is not exported
+                    value = None
+                elif value is not None and target:
+                    if target not in self.imported or name in self_references:
+                        deferred.append((len(values), name, value))
+                        value = None
+                    else:
+                        try:
+                            value = self.id_maps[target][value]
+                        except KeyError:
+                            raise ShowImportError(
+                                f"{table.name}.{name} references a missing {target} "
+                                f"row {value}"
+                            ) from None
+                record[name] = value
+            values.append(record)
+
+        if has_id:
+            old_ids = [record.pop("id") for record in values]
+            new_ids = self.session.scalars(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True),
+                values,
+            ).all()
+            self.id_maps[table.name].update(zip(old_ids, new_ids))
+            keys = [(new_id,) for new_id in new_ids]
+        else:
+            self.session.execute(insert(table), values)
+            keys = [tuple(record[name] for name in key_columns) for record in values]
+        for index, name, value in deferred:
+            self.deferred[(table.name, name)].append((keys[index], value))
+        self.row_counts[table.name] = self.row_counts.get(table.name, 0) + len(rows)
+
+    def resolve_deferred(self) -> None:
+        for (table_name, column_name), pairs in self.deferred.items():
+            table = _TABLES_BY_NAME[table_name]
+            key_columns = list(table.primary_key.columns)
+            target_ids = self.id_maps[_references(table.c[column_name])]
+            values = [
+                {
+                    **{f"_{c.name}": value for c, value in zip(key_columns, key)},
+                    "_value": target_ids[old_id],
+                }
+                for key, old_id in pairs
+                if old_id in target_ids
+            ]
+            if values:
+                self.session.execute(
+                    update(table)
+                    .where(*(c == bindparam(f"_{c.name}") for c in key_columns))
+                    .values({column_name: bindparam("_value")}),
+                    values,
+                )
+
+
+def import_show(session: Session, lines: Iterable[bytes]) -> ShowImportResult:
+    """
+    Import a show from JSON Lines written by :func:`export_show`, as a new show.
+
+    Nothing is committed, so the import can be rolled back as a whole.
+
+    :param session: SQLAlchemy session
+    :param lines: Lines of the export, see :func:`iter_lines`
+    :return: Details of what was imported
+    :raises ShowImportError: If the lines are not a valid export
+    """
+    importer = _Importer(session)
+    table: Optional[Table] = None
+    columns: List[str] = []
+    batch: List[list] = []
+    header = None
+    footer = None
+
+    def flush():
+        if batch:
+            importer.insert(table, columns, batch)
+            batch.clear()
+
+    try:
+        for raw_line in lines:
+            if not raw_line.strip():
+                continue
+            if footer is not None:
+                raise ShowImportError("Data found after the end of the export")
+            item = json.loads(raw_line)
+            if header is None:
+                if not isinstance(item, dict) or item.get("format") != FORMAT:
+                    raise ShowImportError("Not a DigiScript show export")
+                if item.get("version") != FORMAT_VERSION:
+                    raise ShowImportError(
+                        f"Unsupported export version {item.get('version')}"
+                    )
+                header = item
+            elif isinstance(item, list):
+                if table is None:
+                    raise ShowImportError("Row found before any table")
+                batch.append(item)
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+            elif isinstance(item, dict) and "table" in item:
+                flush()
+                if table is not None:
+                    importer.imported.add(table.name)
+                table = _TABLES_BY_NAME.get(item["table"])
+                if table is None or table.name in importer.imported:
+                    raise ShowImportError(f"Unexpected table {item['table']}")
+                columns = item.get("columns", [])
+                unknown = set(columns) - set(table.columns.keys())
+                if unknown:
+                    raise ShowImportError(
+                        f"Unknown columns in {table.name}: {', '.join(sorted(unknown))}"
+                    )
+            elif isinstance(item, dict) and item.get("end"):
+                flush()
+                footer = item
+            else:
+                raise ShowImportError("Unrecognised line in export")
+    except ValueError as error:
+        raise ShowImportError(f"Invalid value in export: {error}") from error
+
+    if footer is None:
+        raise ShowImportError("Export is incomplete")
+    if footer.get("rows") != sum(importer.row_counts.values()):
+        raise ShowImportError("Export does not contain the expected number of rows")
+    show_ids = list(importer.id_maps["shows"].values())
+    if len(show_ids) != 1:
+        raise ShowImportError("Export must contain exactly one show")
+
+    importer.resolve_deferred()
+    return ShowImportResult(show_id=show_ids[0], row_counts=importer.row_counts)
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
-from copy import deepcopy
-from typing import TYPE_CHECKING, Any, Awaitable, Optional
+import logging
+import random
+from asyncio import Future
+from collections import Counter
+from contextvars import Token
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Awaitable, Optional, Union
 
 import bcrypt
 from sqlalchemy import select
@@ -9,12 +14,15 @@ from tornado import escape, httputil
 from tornado.ioloop import IOLoop
 from tornado.web import HTTPError, RequestHandler
 
-from digi_server.logger import get_logger
+from digi_server import metrics
+from digi_server.logger import TRACE_LEVEL, get_logger
 from models.models import db
 from models.show import Show
 from models.user import User
 from rbac.role import Role
-from schemas.schemas import ShowSchema, UserSchema
+from schemas.serializers import dump_show, dump_user
+from utils.web.codec import Codec, codec_for_accept
+from utils.web.query_profiler import server_timing
 
 
 if TYPE_CHECKING:
@@ -44,13 +52,18 @@ class BaseController(DatabaseMixin, RequestHandler):
         super().__init__(application, request, **kwargs)
         self.application: DigiScriptServer = self.application
         self.current_show: Optional[dict] = None
+        self.response_bytes = 0
+        self.query_stats = metrics.QueryStats(
+            statements=Counter() if self.application.query_profiler.enabled else None
+        )
+        self._query_stats_token: Optional[Token] = None
 
     async def prepare(
         self,
     ) -> Optional[Awaitable[None]]:
-        show_schema = ShowSchema()
-        user_schema = UserSchema()
-
+        # Set in the context of the request, not of its connection, which later
+        # requests on the same connection share
+        self._query_stats_token = metrics.track_queries(self.query_stats)
         with self.make_session() as session:
             # First, try JWT authentication
             auth_header = self.request.headers.get("Authorization", "")
@@ -76,7 +89,7 @@ class BaseController(DatabaseMixin, RequestHandler):
 
                     user = session.get(User, int(payload["user_id"]))
                     if user:
-                        self.current_user = user_schema.dump(user)
+                        self.current_user = dump_user(user)
 
             # If not authenticated via JWT, try API token authentication
             if not self.current_user:
@@ -101,7 +114,7 @@ class BaseController(DatabaseMixin, RequestHandler):
                             break
 
                     if authenticated_user:
-                        self.current_user = user_schema.dump(authenticated_user)
+                        self.current_user = dump_user(authenticated_user)
                     else:
                         raise HTTPError(401, log_message="Invalid API key")
 
@@ -120,11 +133,11 @@ class BaseController(DatabaseMixin, RequestHandler):
                         log_message="Password change required before accessing this resource",
                     )
 
-            current_show = await self.application.digi_settings.get("current_show")
+            current_show = self.application.digi_settings.snapshot["current_show"]
             if current_show:
                 show = session.get(Show, current_show)
                 if show:
-                    self.current_show = show_schema.dump(show)
+                    self.current_show = dump_show(show)
         return
 
     def requires_admin(self):
@@ -167,6 +180,27 @@ class BaseController(DatabaseMixin, RequestHandler):
         self.set_status(204)
         self.finish()
 
+    @cached_property
+    def response_codec(self) -> Codec:
+        """Codec for the response, negotiated from the request's ``Accept`` header."""
+        return codec_for_accept(self.request.headers.get("Accept"))
+
+    def write(self, chunk: Union[str, bytes, dict]) -> None:
+        # Encode dictionaries with the negotiated codec, rather than Tornado's JSON
+        if isinstance(chunk, dict):
+            codec = self.response_codec
+            self.set_header("Content-Type", codec.content_type)
+            self.set_header("Vary", "Accept")
+            chunk = codec.dumps(chunk)
+        super().write(chunk)
+
+    def flush(self, include_footers: bool = False) -> Future[None]:
+        # Count the response size for the access log
+        self.response_bytes += sum(len(chunk) for chunk in self._write_buffer)
+        if self.application.query_profiler.enabled and not self._headers_written:
+            self.set_header("Server-Timing", server_timing(self))
+        return super().flush(include_footers)
+
     def data_received(self, chunk: bytes) -> Optional[Awaitable[None]]:
         raise RuntimeError(f"Data streaming not supported for {self.__class__}")
 
@@ -186,38 +220,68 @@ class BaseAPIController(BaseController):
     def on_finish(self):
         from utils.web.route import Route  # noqa: PLC0415
 
-        if self.request.path in Route.ignored_logging_routes():
-            log_method = get_logger().trace
-        else:
-            log_method = get_logger().debug
-
         if self.request.body:
-            username = self.current_user.get("username") if self.current_user else None
-            user_suffix = f" [{username}]" if username else ""
-
-            method_name = self.request.method.lower()
-            handler_method = getattr(self, method_name, None)
-            redacted_data_paths = getattr(handler_method, "_redacted_data_paths", None)
-            try:
-                body = escape.json_decode(self.request.body)
-            except BaseException:
-                get_logger().debug(
-                    f"{self.request.method} {self.request.path} {self.request.body}{user_suffix}",
-                    extra=self._log_extra(),
-                )
+            if self.request.path in Route.ignored_logging_routes():
+                level = TRACE_LEVEL
             else:
-                if (
-                    redacted_data_paths
-                    and self.application.digi_settings.settings[
-                        "log_redaction"
-                    ].get_value()
-                ):
-                    body = deepcopy(body)
-                    redacted_data_paths.apply(body)
-
-                log_method(
-                    f"{self.request.method} {self.request.path} {body}{user_suffix}",
-                    extra=self._log_extra(),
-                )
+                level = logging.DEBUG
+            # Nothing is decoded, copied or redacted unless the body will be logged
+            if get_logger().isEnabledFor(level) and self._sample_body():
+                self._log_request_body(level)
 
+        self._untrack_queries()
         super().on_finish()
+
+    def on_connection_close(self):
+        self._untrack_queries()
+        super().on_connection_close()
+
+    def _untrack_queries(self) -> None:
+        if self._query_stats_token is not None:
+            metrics.untrack_queries(self.query_stats, self._query_stats_token)
+            self._query_stats_token = None
+
+    def _sample_body(self) -> bool:
+        sample_percent = self.application.digi_settings.snapshot[
+            "log_body_sample_percent"
+        ]
+        return random.random() * 100 < sample_percent
+
+    def _log_request_body(self, level: int) -> None:
+        username = self.current_user.get("username") if self.current_user else None
+        user_suffix = f" [{username}]" if username else ""
+        max_bytes = self.application.digi_settings.snapshot["log_body_max_bytes"]
+        if len(self.request.body) > max_bytes:
+            get_logger().log(
+                level,
+                f"{self.request.method} {self.request.path} "
+                f"<{len(self.request.body)} byte body not logged>{user_suffix}",
+                extra=self._log_extra(),
+            )
+            return
+
+        method_name = self.request.method.lower()
+        handler_method = getattr(self, method_name, None)
+        redacted_data_paths = getattr(handler_method, "_redacted_data_paths", None)
+        try:
+            body = escape.json_decode(self.request.body)
+        except BaseException:
+            get_logger().log(
+                level,
+                f"{self.request.method} {self.request.path} {self.request.body}{user_suffix}",
+                extra=self._log_extra(),
+            )
+            return
+
+        if (
+            redacted_data_paths
+            and self.application.digi_settings.snapshot["log_redaction"]
+        ):
+            # The body was decoded just for logging, so can be redacted in place
+            redacted_data_paths.apply(body)
+
+        get_logger().log(
+            level,
+            f"{self.request.method} {self.request.path} {body}{user_suffix}",
+            extra=self._log_extra(),
+        )
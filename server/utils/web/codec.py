@@ -0,0 +1,143 @@
+"""
+Encoding of API responses, WebSocket messages and compiled scripts.
+
+:data:`JSON` encodes with ``orjson`` if it is installed, which is several times
+faster than the standard library, and otherwise with :mod:`json`. Clients can ask
+for :data:`MESSAGE_PACK` instead, by listing a MessagePack media type in the
+``Accept`` header of an API request, or the ``digiscript.msgpack`` subprotocol when
+opening a WebSocket.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import msgpack
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+MESSAGE_PACK_MEDIA_TYPES = (
+    "application/msgpack",
+    "application/vnd.msgpack",
+    "application/x-msgpack",
+)
+
+
+class Codec:
+    """Encodes messages to, and decodes them from, bytes."""
+
+    name: str
+    content_type: str
+    # True if messages are sent as binary WebSocket frames
+    binary: bool
+
+    def dumps(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        raise NotImplementedError
+
+
+class JSONCodec(Codec):
+    name = "json"
+    content_type = "application/json; charset=UTF-8"
+    binary = False
+
+    def __init__(self, use_orjson: bool = orjson is not None):
+        """
+        :param use_orjson: False to use the standard library even if ``orjson`` is
+                           installed
+        """
+        self.use_orjson = use_orjson
+
+    def dumps(self, obj: Any) -> bytes:
+        if self.use_orjson:
+            data = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            data = json.dumps(obj).encode("utf-8")
+        # As tornado.escape.json_encode, so the JSON can be embedded in HTML
+        return data.replace(b"</", b"<\\/")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        if self.use_orjson:
+            return orjson.loads(data)
+        return json.loads(data)
+
+
+class MessagePackCodec(Codec):
+    name = "msgpack"
+    content_type = "application/msgpack"
+    binary = True
+
+    def dumps(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        # Map keys may be integers, as the page numbers of compiled scripts are
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+JSON = JSONCodec()
+MESSAGE_PACK = MessagePackCodec()
+
+WS_SUBPROTOCOLS: Dict[str, Codec] = {
+    "digiscript.msgpack": MESSAGE_PACK,
+    "digiscript.json": JSON,
+}
+
+
+def quality_values(header: str) -> Dict[str, float]:
+    """
+    :param header: Value of an ``Accept`` or ``Accept-Encoding`` header
+    :return: Quality value of each media type or encoding the header lists
+    """
+    accepted = {}
+    for item in header.split(","):
+        name, *params = item.strip().split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def codec_for_accept(accept: Optional[str]) -> Codec:
+    """
+    :param accept: Value of the request's ``Accept`` header
+    :return: MessagePack if the client prefers it to JSON, otherwise JSON
+    """
+    if not accept or "msgpack" not in accept:
+        return JSON
+    accepted = quality_values(accept)
+    message_pack = max(accepted.get(media, 0.0) for media in MESSAGE_PACK_MEDIA_TYPES)
+    json_quality = accepted.get(
+        "application/json", accepted.get("application/*", accepted.get("*/*", 0.0))
+    )
+    if message_pack > 0 and message_pack >= json_quality:
+        return MESSAGE_PACK
+    return JSON
+
+
+def codec_for_subprotocols(subprotocols: Iterable[str]) -> Tuple[Optional[str], Codec]:
+    """
+    :param subprotocols: WebSocket subprotocols the client asked for, in order of
+                         preference
+    :return: The first subprotocol which names a codec, or None if none do, and
+             the codec to use
+    """
+    for subprotocol in subprotocols:
+        if subprotocol in WS_SUBPROTOCOLS:
+            return subprotocol, WS_SUBPROTOCOLS[subprotocol]
+    return None, JSON
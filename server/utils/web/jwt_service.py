@@ -90,9 +90,9 @@ class JWTService:
         if expires_delta:
             expire = datetime.now(tz=timezone.utc) + expires_delta
         elif self.application:
-            lifetime_hours = self.application.digi_settings.settings[
+            lifetime_hours = self.application.digi_settings.snapshot[
                 "jwt_token_lifetime_hours"
-            ].get_value()
+            ]
             expire = datetime.now(tz=timezone.utc) + timedelta(hours=lifetime_hours)
         else:
             expire = datetime.now(tz=timezone.utc) + self._default_expiry
@@ -176,9 +176,9 @@ class JWTService:
         if max_lifetime_hours is None:
             if not self.application:
                 return True
-            max_lifetime_hours = self.application.digi_settings.settings[
+            max_lifetime_hours = self.application.digi_settings.snapshot[
                 "jwt_token_lifetime_hours"
-            ].get_value()
+            ]
 
         issued_at = datetime.fromtimestamp(iat, tz=timezone.utc)
         age = datetime.now(tz=timezone.utc) - issued_at
@@ -0,0 +1,201 @@
+"""
+Per-request SQL query profiling, enabled when the server runs in debug mode.
+
+Each request handler counts the statements it executes in a
+:class:`~digi_server.metrics.QueryStats`. With profiling enabled the statements
+themselves are counted too, so statements repeated many times in one request,
+the usual sign of an N+1 query pattern from lazy loading in a loop, can be
+reported. Responses get a ``Server-Timing`` header with the number of queries
+and the time spent in the database, which browser developer tools display
+alongside the request, and the profiles of recent requests are kept for the
+admin report at ``/api/v1/debug/queries``.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+
+if TYPE_CHECKING:
+    from utils.web.base_controller import BaseController
+
+# Requests kept for the report
+HISTORY_SIZE = 1000
+# Times a statement must run in one request to be listed in the report
+REPEAT_THRESHOLD = 5
+
+_WHITESPACE = re.compile(r"\s+")
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalise a SQL statement, so statements differing only in their literal
+    values or the length of their ``IN`` lists are the same.
+
+    :param statement: SQL statement
+    :return: Normalised statement
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _PARAMETER_LIST.sub("(?, ...)", statement)
+    return _NUMBER.sub("?", statement)
+
+
+@dataclass
+class RequestProfile:
+    """
+    Statements executed while handling one request.
+
+    :param endpoint: Handler class name and HTTP method
+    :param path: Request path
+    :param status: Response status code
+    :param queries: Number of statements executed
+    :param db_seconds: Time spent executing statements
+    :param repeated: Statements executed more than once, with the number of
+        times, most repeated first
+    """
+
+    endpoint: str
+    path: str
+    status: int
+    queries: int
+    db_seconds: float
+    repeated: List[Tuple[str, int]] = field(default_factory=list)
+
+
+class QueryProfiler:
+    """
+    Keeps the query profiles of recent requests.
+
+    :param enabled: Whether statements are profiled
+    :param history_size: Number of recent requests to keep
+    """
+
+    def __init__(self, enabled: bool, history_size: int = HISTORY_SIZE):
+        self.enabled = enabled
+        self.history: deque[RequestProfile] = deque(maxlen=history_size)
+        # Number of requests recorded since the server started
+        self.recorded = 0
+
+    def record(self, handler: BaseController) -> Optional[RequestProfile]:
+        """
+        Record the statements executed by a finished request.
+
+        :param handler: Request handler which has finished
+        :return: Profile of the request, or None if profiling is disabled
+        """
+        stats = handler.query_stats
+        if not self.enabled or stats.statements is None:
+            return None
+
+        repeats: Dict[str, int] = {}
+        for statement, count in stats.statements.items():
+            key = fingerprint(statement)
+            repeats[key] = repeats.get(key, 0) + count
+        profile = RequestProfile(
+            endpoint=f"{type(handler).__name__}.{handler.request.method}",
+            path=handler.request.path,
+            status=handler.get_status(),
+            queries=stats.count,
+            db_seconds=stats.seconds,
+            repeated=sorted(
+                (
+                    (statement, count)
+                    for statement, count in repeats.items()
+                    if count > 1
+                ),
+                key=lambda item: item[1],
+                reverse=True,
+            ),
+        )
+        self.history.append(profile)
+        self.recorded += 1
+        return profile
+
+    def profiles_since(self, recorded: int) -> List[RequestProfile]:
+        """
+        Get the profiles recorded after :attr:`recorded` had the given value.
+
+        :param recorded: Earlier value of :attr:`recorded`
+        :return: Profiles, oldest first, limited to those still in the history
+        """
+        count = min(self.recorded - recorded, len(self.history))
+        return list(self.history)[len(self.history) - count :]
+
+    def report(self, limit: int = 20) -> List[dict]:
+        """
+        Summarise the recent requests by endpoint, most queries per request first.
+
+        :param limit: Most endpoints to include
+        :return: Summary of each endpoint
+        """
+        endpoints: Dict[str, dict] = {}
+        for profile in self.history:
+            summary = endpoints.setdefault(
+                profile.endpoint,
+                {
+                    "endpoint": profile.endpoint,
+                    "requests": 0,
+                    "total_queries": 0,
+                    "max_queries": 0,
+                    "total_db_ms": 0.0,
+                    "max_db_ms": 0.0,
+                    "repeated": {},
+                },
+            )
+            summary["requests"] += 1
+            summary["total_queries"] += profile.queries
+            summary["max_queries"] = max(summary["max_queries"], profile.queries)
+            summary["total_db_ms"] += profile.db_seconds * 1000
+            summary["max_db_ms"] = max(summary["max_db_ms"], profile.db_seconds * 1000)
+            for statement, count in profile.repeated:
+                if count < REPEAT_THRESHOLD:
+                    break
+                summary["repeated"][statement] = max(
+                    summary["repeated"].get(statement, 0), count
+                )
+
+        report = []
+        for summary in endpoints.values():
+            requests = summary.pop("requests")
+            total_queries = summary.pop("total_queries")
+            total_db_ms = summary.pop("total_db_ms")
+            repeated = summary.pop("repeated")
+            report.append(
+                {
+                    **summary,
+                    "requests": requests,
+                    "avg_queries": total_queries / requests,
+                    "avg_db_ms": total_db_ms / requests,
+                    "repeated": [
+                        {"statement": statement, "max_count": count}
+                        for statement, count in sorted(
+                            repeated.items(), key=lambda item: item[1], reverse=True
+                        )
+                    ],
+                }
+            )
+        report.sort(key=lambda summary: summary["avg_queries"], reverse=True)
+        return report[:limit]
+
+    def clear(self) -> None:
+        """Forget the profiles of all recorded requests."""
+        self.history.clear()
+
+
+def server_timing(handler: BaseController) -> str:
+    """
+    Build a ``Server-Timing`` header value for the statements executed so far.
+
+    :param handler: Request handler
+    :return: Header value
+    """
+    stats = handler.query_stats
+    return (
+        f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries", '
+        f"total;dur={handler.request.request_time() * 1000:.2f}"
+    )
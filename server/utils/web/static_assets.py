@@ -0,0 +1,322 @@
+"""
+Static files served from memory.
+
+:class:`StaticAssetCache` reads each file the first time it is requested, or when
+it is preloaded at start up, and keeps its contents, a hash of them to use as the
+``ETag`` and gzip and brotli encoded copies if it is worth compressing. Later
+requests only check the file has not changed on disk. Brotli is used if the
+``brotli`` or ``brotlicffi`` package is installed.
+
+:class:`StaticAssetHandler` serves the built client from the cache, choosing an
+encoding from the request's ``Accept-Encoding``. Files with a content hash in their
+name are cached by browsers as immutable, and everything else is revalidated with
+its ``ETag``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import email.utils
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import stat as stat_module
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from tornado.ioloop import IOLoop
+from tornado.web import RequestHandler, StaticFileHandler
+
+from digi_server.logger import get_logger
+from utils.web.codec import quality_values
+
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+# Files larger than this are not kept in memory, so are served from disk
+MAX_FILE_SIZE = 16 * 1024 * 1024
+# Compressing smaller files saves less than the cost of the encoding headers
+MIN_COMPRESS_SIZE = 1024
+# Quality 11 takes several times longer for a few percent smaller output
+BROTLI_QUALITY = 9
+# Encodings in order of preference
+ENCODINGS = ("br", "gzip")
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "application/wasm",
+    "application/xml",
+    "font/otf",
+    "font/ttf",
+    "image/svg+xml",
+    "image/vnd.microsoft.icon",
+    "image/x-icon",
+)
+# Vite names built files ``[name]-[hash].[ext]``, with an 8 character hash
+HASHED_FILENAME = re.compile(r"-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def _content_type(path: str) -> str:
+    # Matches StaticFileHandler.get_content_type
+    mime_type, encoding = mimetypes.guess_type(path)
+    if encoding == "gzip":
+        return "application/gzip"
+    if encoding is not None:
+        return "application/octet-stream"
+    return mime_type or "application/octet-stream"
+
+
+def _compress(body: bytes, content_type: str) -> Dict[str, bytes]:
+    if len(body) < MIN_COMPRESS_SIZE or not content_type.startswith(COMPRESSIBLE_TYPES):
+        return {}
+    encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    # Only keep encodings which save at least a tenth of the size
+    return {
+        encoding: data
+        for encoding, data in encoded.items()
+        if len(data) < len(body) * 0.9
+    }
+
+
+@dataclass(frozen=True)
+class CachedAsset:
+    path: str
+    body: bytes
+    content_type: str
+    digest: str
+    modified: datetime.datetime
+    stat_key: Tuple[int, int]
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    def negotiate(self, accept_encoding: str) -> Tuple[Optional[str], bytes]:
+        """
+        :param accept_encoding: Value of the request's ``Accept-Encoding`` header
+        :return: The encoding to use, or None for the unencoded contents, and the
+                 body in that encoding
+        """
+        if self.encoded:
+            accepted = quality_values(accept_encoding)
+            wildcard = accepted.get("*", 0.0)
+            for encoding in ENCODINGS:
+                if encoding in self.encoded and accepted.get(encoding, wildcard) > 0:
+                    return encoding, self.encoded[encoding]
+        return None, self.body
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        # Each encoding is a different representation, so has its own tag
+        if encoding is None:
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+
+def load_asset(path: str, stat: os.stat_result) -> CachedAsset:
+    """
+    Read a file and compress its contents.
+
+    :param path: Absolute path of the file
+    :param stat: Result of :func:`os.stat` for the file, read before its contents
+    """
+    with open(path, "rb") as file:
+        body = file.read()
+    content_type = _content_type(path)
+    return CachedAsset(
+        path=path,
+        body=body,
+        content_type=content_type,
+        digest=hashlib.sha256(body).hexdigest()[:32],
+        modified=datetime.datetime.fromtimestamp(
+            int(stat.st_mtime), datetime.timezone.utc
+        ),
+        stat_key=(stat.st_mtime_ns, stat.st_size),
+        encoded=_compress(body, content_type),
+    )
+
+
+class StaticAssetCache:
+    """
+    Contents of static files, read and compressed once and kept until the file
+    changes on disk.
+    """
+
+    def __init__(self, max_file_size: int = MAX_FILE_SIZE):
+        self.max_file_size = max_file_size
+        self._assets: Dict[str, CachedAsset] = {}
+        self._loading: Dict[str, asyncio.Future] = {}
+
+    def _stat(self, path: str) -> Optional[os.stat_result]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not stat_module.S_ISREG(stat.st_mode) or stat.st_size > self.max_file_size:
+            return None
+        return stat
+
+    def _load(self, path: str, stat: os.stat_result) -> CachedAsset:
+        asset = load_asset(path, stat)
+        self._assets[path] = asset
+        return asset
+
+    async def load(self, path: str) -> Optional[CachedAsset]:
+        """
+        Get a file from the cache, reading it in the default executor if it is not
+        cached or has changed since it was read. Concurrent requests for a file
+        which is being read wait for the same read.
+
+        :param path: Path of the file
+        :return: The cached file, or None if it does not exist or is larger than
+                 ``max_file_size``
+        """
+        path = os.path.abspath(path)
+        stat = self._stat(path)
+        if stat is None:
+            self._assets.pop(path, None)
+            return None
+        asset = self._assets.get(path)
+        if asset is not None and asset.stat_key == (stat.st_mtime_ns, stat.st_size):
+            return asset
+
+        future = self._loading.get(path)
+        if future is None:
+            future = IOLoop.current().run_in_executor(None, self._load, path, stat)
+            self._loading[path] = future
+            future.add_done_callback(lambda _future: self._loading.pop(path, None))
+        return await future
+
+    async def preload(self, path: str) -> int:
+        """
+        Read a file, or every file in a directory and its subdirectories, into the
+        cache.
+
+        :param path: Path of the file or directory
+        :return: The number of files cached
+        """
+        if os.path.isfile(path):
+            paths = [path]
+        else:
+            paths = [
+                os.path.join(root, name)
+                for root, _dirs, files in os.walk(path)
+                for name in files
+            ]
+        count = 0
+        for file_path in paths:
+            try:
+                if await self.load(file_path) is not None:
+                    count += 1
+            except OSError as error:
+                get_logger().warning(f"Unable to cache static file: {error}")
+        return count
+
+
+def write_asset(
+    handler: RequestHandler,
+    asset: CachedAsset,
+    cache_control: str = REVALIDATE_CACHE_CONTROL,
+    include_body: bool = True,
+) -> None:
+    """
+    Write a cached file as the response, in the best encoding the client accepts,
+    or a 304 response if the client has the same version.
+
+    :param handler: Handler for the request
+    :param asset: The file to send
+    :param cache_control: Value of the ``Cache-Control`` header
+    :param include_body: False to only send the headers, for ``HEAD`` requests
+    """
+    encoding, body = asset.negotiate(handler.request.headers.get("Accept-Encoding", ""))
+    if asset.encoded:
+        handler.set_header("Vary", "Accept-Encoding")
+    if encoding is not None:
+        handler.set_header("Content-Encoding", encoding)
+    handler.set_header("Etag", asset.etag(encoding))
+    handler.set_header("Last-Modified", asset.modified)
+    handler.set_header("Cache-Control", cache_control)
+    handler.set_header("Content-Type", asset.content_type)
+
+    if handler.request.headers.get("If-None-Match"):
+        if handler.check_etag_header():
+            handler.set_status(304)
+            return
+    elif _not_modified_since(handler, asset.modified):
+        handler.set_status(304)
+        return
+
+    handler.set_header("Content-Length", len(body))
+    if include_body:
+        handler.write(body)
+
+
+def _not_modified_since(handler: RequestHandler, modified: datetime.datetime) -> bool:
+    value = handler.request.headers.get("If-Modified-Since")
+    if value is None:
+        return False
+    try:
+        since = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=datetime.timezone.utc)
+    return since >= modified
+
+
+class StaticAssetHandler(StaticFileHandler):
+    """
+    :class:`~tornado.web.StaticFileHandler` serving files from the application's
+    :class:`StaticAssetCache`. Files too large to cache, and requests for a range
+    of a file, are served from disk.
+    """
+
+    def initialize(
+        self, path: str, default_filename: Optional[str] = None, hashed: bool = False
+    ) -> None:
+        """
+        :param path: Directory to serve files from
+        :param default_filename: File to serve for a request for a directory
+        :param hashed: True if files with a content hash in their name should be
+                       cached as immutable
+        """
+        super().initialize(path, default_filename)
+        self.hashed = hashed
+
+    async def get(self, path: str, include_body: bool = True) -> None:
+        if self.request.headers.get("Range"):
+            await super().get(path, include_body)
+            return
+
+        self.path = self.parse_url_path(path)
+        absolute_path = self.get_absolute_path(self.root, self.path)
+        self.absolute_path = self.validate_absolute_path(self.root, absolute_path)
+        if self.absolute_path is None:
+            return
+
+        asset = await self.application.static_assets.load(self.absolute_path)
+        if asset is None:
+            await super().get(path, include_body)
+            return
+        write_asset(self, asset, self._cache_control(self.path), include_body)
+
+    def _cache_control(self, path: str) -> str:
+        if self.hashed and HASHED_FILENAME.search(path):
+            return IMMUTABLE_CACHE_CONTROL
+        return REVALIDATE_CACHE_CONTROL
+
+    def set_extra_headers(self, path: str) -> None:
+        # Files served from disk are given the same caching as cached ones
+        self.set_header("Cache-Control", self._cache_control(path))